@@ -24,6 +24,11 @@ from app.models.category import Category
 from app.models.menu import Menu
 from app.models.order import OrderBase
 from app.models.order_detail import OrderDetail
+from app.models.daily_sales import DailySales
+from app.models.idempotency_key import IdempotencyKey
+from app.models.table_version import TableVersion
+from app.models.menu import NAME_TRIGRAM_INDEX
+from app.core.partitions import is_partition
 
 # This is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -46,6 +51,21 @@ naming_convention = {
 }
 
 
+def include_name(name, type_, parent_names) -> bool:
+    # Les partitions mensuelles ne sont pas dans les modèles : elles sont
+    # créées par la migration b7d3e91f4c26 et `app.cli create-partitions`
+    return not (type_ == "table" and is_partition(name))
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    # PostgreSQL duplique une clé étrangère vers une table partitionnée
+    # en une contrainte interne par partition référencée
+    if type_ == "foreign_key_constraint" and reflected:
+        return not is_partition(object.referred_table.name)
+    # Index optionnel (extension pg_trgm), absent des modèles
+    return not (type_ == "index" and name == NAME_TRIGRAM_INDEX)
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -65,6 +85,8 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         naming_convention=naming_convention,
+        include_name=include_name,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -83,6 +105,8 @@ def run_migrations_online() -> None:
             compare_type=True,
             naming_convention=naming_convention,
             render_as_batch=True,
+            include_name=include_name,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,73 @@
+"""indexes on hot lookup columns
+
+Revision ID: 3c9f0e2a7b41
+Revises: 499b16e1debc
+Create Date: 2026-10-18 10:12:43.518204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlmodel
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9f0e2a7b41"
+down_revision: Union[str, Sequence[str], None] = "499b16e1debc"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Statuts non terminaux : seules ces lignes intéressent la cuisine
+ACTIVE_STATUSES = sa.text("status IN ('CREATED', 'PREPARING', 'READY')")
+
+# (nom, table, colonnes, condition d'index partiel)
+INDEXES = [
+    ("ix_order_created_at_id", "order", ["created_at", "id"], None),
+    (
+        "ix_order_client_id_created_at",
+        "order",
+        ["client_id", "created_at", "id"],
+        None,
+    ),
+    ("ix_order_active_created_at", "order", ["created_at"], ACTIVE_STATUSES),
+    ("ix_orderdetail_order_id", "orderdetail", ["order_id"], None),
+    ("ix_orderdetail_menu_id", "orderdetail", ["menu_id"], None),
+    (
+        "ix_orderdetail_active_status",
+        "orderdetail",
+        ["status", "order_id"],
+        ACTIVE_STATUSES,
+    ),
+    ("ix_menu_category_id", "menu", ["category_id"], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY ne bloque pas les écritures mais ne peut
+    # pas s'exécuter dans une transaction. En cas d'échec, l'index reste
+    # INVALID : le supprimer puis relancer la migration.
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                postgresql_where=where,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
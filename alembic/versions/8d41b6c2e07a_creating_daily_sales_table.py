@@ -0,0 +1,51 @@
+"""creating daily_sales table
+
+Revision ID: 8d41b6c2e07a
+Revises: 3c9f0e2a7b41
+Create Date: 2026-10-18 14:03:51.204417
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlmodel
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d41b6c2e07a"
+down_revision: Union[str, Sequence[str], None] = "3c9f0e2a7b41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "daily_sales",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.Column("order_count", sa.Integer(), nullable=False),
+        sa.Column("average_ticket", sa.Float(), nullable=False),
+        sa.Column(
+            "orders_by_status",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.Column(
+            "revenue_by_category",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+    # Le cumul des commandes existantes se calcule après la migration :
+    #   python -m app.cli rebuild-daily-sales
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("daily_sales")
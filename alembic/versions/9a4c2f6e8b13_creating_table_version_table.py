@@ -0,0 +1,69 @@
+"""creating table_version table
+
+Revision ID: 9a4c2f6e8b13
+Revises: b7d3e91f4c26
+Create Date: 2026-10-18 19:12:40.216537
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlmodel
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4c2f6e8b13"
+down_revision: Union[str, Sequence[str], None] = "b7d3e91f4c26"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables du catalogue dont les routes GET renvoient un ETag
+VERSIONED_TABLES = ("menu", "category", "role")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "table_version",
+        sa.Column(
+            "table_name",
+            sqlmodel.sql.sqltypes.AutoString(length=63),
+            nullable=False,
+        ),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("table_name"),
+    )
+    # Une fois par instruction (et non par ligne), dans sa transaction :
+    # la nouvelle version n'est visible qu'avec les données modifiées
+    op.execute(
+        """
+        CREATE FUNCTION bump_table_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE table_version SET version = version + 1
+            WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    for table in VERSIONED_TABLES:
+        op.execute(
+            f"INSERT INTO table_version (table_name, version) "
+            f"VALUES ('{table}', 1)"
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_bump_version "
+            f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER {table}_bump_version ON {table}")
+    op.execute("DROP FUNCTION bump_table_version()")
+    op.drop_table("table_version")
@@ -0,0 +1,229 @@
+"""partitioning order tables by month
+
+Revision ID: b7d3e91f4c26
+Revises: 5e2a9c7d1f08
+Create Date: 2026-10-18 17:48:30.915274
+
+"""
+
+from datetime import date, datetime, timezone
+from typing import List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d3e91f4c26"
+down_revision: Union[str, Sequence[str], None] = "5e2a9c7d1f08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Les tables sont recréées partitionnées par mois de created_at puis
+# les données recopiées : la migration verrouille "order" et
+# orderdetail pendant la copie (à lancer hors service)
+
+MONTHS_AHEAD = 3
+
+ACTIVE = "status IN ('CREATED', 'PREPARING', 'READY')"
+
+ORDER_INDEXES = [
+    'CREATE INDEX ix_order_created_at_id ON "order" (created_at, id)',
+    "CREATE INDEX ix_order_client_id_created_at "
+    'ON "order" (client_id, created_at, id)',
+    f'CREATE INDEX ix_order_active_created_at ON "order" (created_at) '
+    f"WHERE {ACTIVE}",
+]
+
+ORDERDETAIL_INDEXES = [
+    "CREATE INDEX ix_orderdetail_order_id ON orderdetail (order_id)",
+    "CREATE INDEX ix_orderdetail_menu_id ON orderdetail (menu_id)",
+    "CREATE INDEX ix_orderdetail_active_status "
+    f"ON orderdetail (status, order_id) WHERE {ACTIVE}",
+]
+
+ORDER_COLUMNS = "id, client_id, created_at, total_price, status"
+ORDERDETAIL_COLUMNS = "id, order_id, menu_id, price, comment, quantity, status"
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_to_create() -> List[date]:
+    # Du mois de la plus ancienne commande à MONTHS_AHEAD mois après le
+    # mois courant
+    oldest = (
+        op.get_bind()
+        .execute(sa.text('SELECT min(created_at) FROM "order"'))
+        .scalar()
+    )
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    month = oldest.date().replace(day=1) if oldest else current
+    months = []
+    while month <= add_months(current, MONTHS_AHEAD):
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def create_partitions(table: str) -> None:
+    for month in months_to_create():
+        op.execute(
+            f'CREATE TABLE "{table}_p{month:%Y_%m}" PARTITION OF "{table}" '
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        )
+    op.execute(
+        f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT'
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Les séquences des id survivent aux anciennes tables
+    op.execute("ALTER SEQUENCE order_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE orderdetail_id_seq OWNED BY NONE")
+    op.execute('ALTER TABLE "order" RENAME TO order_unpartitioned')
+    op.execute("ALTER TABLE orderdetail RENAME TO orderdetail_unpartitioned")
+
+    # La clé primaire (et toute contrainte unique) d'une table
+    # partitionnée contient la clé de partitionnement
+    op.execute(
+        """
+        CREATE TABLE "order" (
+            id integer NOT NULL DEFAULT nextval('order_id_seq'),
+            client_id integer NOT NULL,
+            created_at timestamp without time zone NOT NULL,
+            total_price double precision NOT NULL,
+            status orderstatus NOT NULL
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    # created_at d'une ligne : celui de sa commande (ou sa date
+    # d'insertion si elle n'en a pas)
+    op.execute(
+        """
+        CREATE TABLE orderdetail (
+            id integer NOT NULL DEFAULT nextval('orderdetail_id_seq'),
+            order_id integer,
+            created_at timestamp without time zone NOT NULL,
+            menu_id integer NOT NULL,
+            price double precision NOT NULL,
+            comment varchar(255) NOT NULL,
+            quantity integer NOT NULL,
+            status orderdetailstatus NOT NULL
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    create_partitions("order")
+    create_partitions("orderdetail")
+
+    op.execute(
+        f'INSERT INTO "order" ({ORDER_COLUMNS}) '
+        f"SELECT {ORDER_COLUMNS} FROM order_unpartitioned"
+    )
+    op.execute(
+        f"""
+        INSERT INTO orderdetail ({ORDERDETAIL_COLUMNS}, created_at)
+        SELECT {", ".join("d." + c for c in ORDERDETAIL_COLUMNS.split(", "))},
+               coalesce(o.created_at, now() AT TIME ZONE 'UTC')
+        FROM orderdetail_unpartitioned AS d
+        LEFT JOIN order_unpartitioned AS o ON o.id = d.order_id
+        """
+    )
+    op.execute("DROP TABLE orderdetail_unpartitioned")
+    op.execute("DROP TABLE order_unpartitioned")
+    op.execute('ALTER SEQUENCE order_id_seq OWNED BY "order".id')
+    op.execute("ALTER SEQUENCE orderdetail_id_seq OWNED BY orderdetail.id")
+
+    # Contraintes et index après la copie (construits une seule fois)
+    op.create_primary_key("order_pkey", "order", ["id", "created_at"])
+    op.create_foreign_key(
+        "order_client_id_fkey", "order", "user", ["client_id"], ["id"]
+    )
+    for statement in ORDER_INDEXES:
+        op.execute(statement)
+    op.create_primary_key(
+        "orderdetail_pkey", "orderdetail", ["id", "created_at"]
+    )
+    op.create_foreign_key(
+        "orderdetail_menu_id_fkey", "orderdetail", "menu", ["menu_id"], ["id"]
+    )
+    # Une commande et ses lignes sont dans les partitions du même mois
+    op.create_foreign_key(
+        "orderdetail_order_id_fkey",
+        "orderdetail",
+        "order",
+        ["order_id", "created_at"],
+        ["id", "created_at"],
+        onupdate="CASCADE",
+    )
+    for statement in ORDERDETAIL_INDEXES:
+        op.execute(statement)
+    op.execute('ANALYZE "order", orderdetail')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER SEQUENCE order_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE orderdetail_id_seq OWNED BY NONE")
+    op.execute('ALTER TABLE "order" RENAME TO order_partitioned')
+    op.execute("ALTER TABLE orderdetail RENAME TO orderdetail_partitioned")
+    op.execute(
+        """
+        CREATE TABLE "order" (
+            id integer NOT NULL DEFAULT nextval('order_id_seq'),
+            client_id integer NOT NULL,
+            created_at timestamp without time zone NOT NULL,
+            total_price double precision NOT NULL,
+            status orderstatus NOT NULL
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE orderdetail (
+            id integer NOT NULL DEFAULT nextval('orderdetail_id_seq'),
+            order_id integer,
+            menu_id integer NOT NULL,
+            price double precision NOT NULL,
+            comment varchar(255) NOT NULL,
+            quantity integer NOT NULL,
+            status orderdetailstatus NOT NULL
+        )
+        """
+    )
+    op.execute(
+        f'INSERT INTO "order" ({ORDER_COLUMNS}) '
+        f"SELECT {ORDER_COLUMNS} FROM order_partitioned"
+    )
+    op.execute(
+        f"INSERT INTO orderdetail ({ORDERDETAIL_COLUMNS}) "
+        f"SELECT {ORDERDETAIL_COLUMNS} FROM orderdetail_partitioned"
+    )
+    # Supprime aussi les partitions
+    op.execute("DROP TABLE orderdetail_partitioned")
+    op.execute("DROP TABLE order_partitioned")
+    op.execute('ALTER SEQUENCE order_id_seq OWNED BY "order".id')
+    op.execute("ALTER SEQUENCE orderdetail_id_seq OWNED BY orderdetail.id")
+
+    op.create_primary_key("order_pkey", "order", ["id"])
+    op.create_foreign_key(
+        "order_client_id_fkey", "order", "user", ["client_id"], ["id"]
+    )
+    for statement in ORDER_INDEXES:
+        op.execute(statement)
+    op.create_primary_key("orderdetail_pkey", "orderdetail", ["id"])
+    op.create_foreign_key(
+        "orderdetail_menu_id_fkey", "orderdetail", "menu", ["menu_id"], ["id"]
+    )
+    op.create_foreign_key(
+        "orderdetail_order_id_fkey",
+        "orderdetail",
+        "order",
+        ["order_id"],
+        ["id"],
+    )
+    for statement in ORDERDETAIL_INDEXES:
+        op.execute(statement)
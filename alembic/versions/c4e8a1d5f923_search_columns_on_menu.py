@@ -0,0 +1,76 @@
+"""search columns on menu
+
+Revision ID: c4e8a1d5f923
+Revises: 9a4c2f6e8b13
+Create Date: 2026-10-18 21:04:37.582119
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e8a1d5f923"
+down_revision: Union[str, Sequence[str], None] = "9a4c2f6e8b13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Voir app.models.menu (SEARCH_VECTOR, NAME_TRIGRAM_INDEX)
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('french', name), 'A') || "
+    "setweight(to_tsvector('french', description), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "menu",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_menu_search_vector",
+        "menu",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_with={"fastupdate": "off"},
+    )
+    # Recherche approchée sur le nom : seulement si le serveur fournit
+    # pg_trgm (contrib) ; sinon l'API se rabat sur un index en mémoire
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM pg_available_extensions
+                WHERE name = 'pg_trgm'
+            ) THEN
+                CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                CREATE INDEX ix_menu_name_trgm
+                    ON menu USING gin (name gin_trgm_ops);
+            END IF;
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # L'extension pg_trgm reste installée : d'autres objets peuvent
+    # en dépendre
+    op.execute("DROP INDEX IF EXISTS ix_menu_name_trgm")
+    op.drop_index(
+        "ix_menu_search_vector", table_name="menu", postgresql_using="gin"
+    )
+    op.drop_column("menu", "search_vector")
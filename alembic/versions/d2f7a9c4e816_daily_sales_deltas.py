@@ -0,0 +1,53 @@
+"""daily_sales deltas
+
+Revision ID: d2f7a9c4e816
+Revises: c4e8a1d5f923
+Create Date: 2026-10-19 09:41:12.803655
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d2f7a9c4e816"
+down_revision: Union[str, Sequence[str], None] = "c4e8a1d5f923"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Somme clé par clé de deux objets {clé: nombre} (deltas de
+    # daily_sales_crud) ; les clés à zéro disparaissent, l'arrondi absorbe
+    # le reste flottant de deux deltas opposés
+    op.execute(
+        """
+        CREATE FUNCTION jsonb_sum(a jsonb, b jsonb) RETURNS jsonb
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT coalesce(jsonb_object_agg(key, total), '{}'::jsonb)
+            FROM (
+                SELECT key, trim_scale(round(sum(value::numeric), 6)) AS total
+                FROM (
+                    SELECT * FROM jsonb_each_text(a)
+                    UNION ALL
+                    SELECT * FROM jsonb_each_text(b)
+                ) AS entries
+                GROUP BY key
+            ) AS sums
+            WHERE total <> 0
+        $$
+        """
+    )
+    # Les commandes "Created" ne sont plus comptées par statut
+    op.execute(
+        "UPDATE daily_sales SET orders_by_status = orders_by_status - 'Created'"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Les comptes "Created" reviennent avec rebuild-daily-sales
+    op.execute("DROP FUNCTION jsonb_sum(jsonb, jsonb)")
@@ -0,0 +1,71 @@
+"""menu version without stock
+
+Revision ID: e5a1c7b3f920
+Revises: d2f7a9c4e816
+Create Date: 2026-10-19 14:22:05.418273
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a1c7b3f920"
+down_revision: Union[str, Sequence[str], None] = "d2f7a9c4e816"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Colonnes du catalogue : le stock, écrit par chaque commande, n'en fait
+# pas partie
+CATALOG_COLUMNS = "name, price, category_id, description"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("DROP TRIGGER menu_bump_version ON menu")
+    op.execute(
+        f"CREATE TRIGGER menu_bump_version "
+        f"AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF {CATALOG_COLUMNS} "
+        f"ON menu FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+    )
+    # Disponibilité des menus (stock épuisé ou non) : version distincte,
+    # incrémentée seulement quand un stock passe à zéro ou en repart
+    op.execute(
+        "INSERT INTO table_version (table_name, version) "
+        "VALUES ('menu_availability', 1)"
+    )
+    op.execute(
+        """
+        CREATE FUNCTION bump_menu_availability() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE table_version SET version = version + 1
+            WHERE table_name = 'menu_availability';
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER menu_bump_availability "
+        "AFTER UPDATE OF stock ON menu FOR EACH ROW "
+        "WHEN ((OLD.stock > 0) IS DISTINCT FROM (NEW.stock > 0)) "
+        "EXECUTE FUNCTION bump_menu_availability()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER menu_bump_availability ON menu")
+    op.execute("DROP FUNCTION bump_menu_availability()")
+    op.execute(
+        "DELETE FROM table_version WHERE table_name = 'menu_availability'"
+    )
+    op.execute("DROP TRIGGER menu_bump_version ON menu")
+    op.execute(
+        "CREATE TRIGGER menu_bump_version "
+        "AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON menu "
+        "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+    )
@@ -0,0 +1,81 @@
+import hashlib
+from typing import Annotated, Hashable, Optional
+
+from fastapi import Depends, Header, Request, Response
+
+# Réponses gardées par le client (authentifiées : pas par un proxy
+# partagé) et revalidées à chaque usage avec If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts: Hashable) -> str:
+    """
+    ETag faible des éléments qui déterminent une réponse.
+    Args:
+        parts (Hashable): Versions, identifiants, paramètres...
+    Returns:
+        str: L'ETag, `W/"<empreinte>"`.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Si l'en-tête If-None-Match désigne `etag` (comparaison faible : le
+    préfixe W/ est ignoré).
+    Args:
+        if_none_match (str, optional): L'en-tête de la requête.
+        etag (str): L'ETag courant.
+    Returns:
+        bool: True si le client a déjà cette version.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+class ConditionalGet:
+    """
+    En-têtes ETag / If-None-Match d'une route de lecture.
+
+    La route calcule la version de ce qu'elle renvoie (compteur de la
+    table, xmin des lignes) avant toute lecture : si le client a déjà
+    cette version, elle répond 304 sans charger ni sérialiser la
+    réponse. Le chemin et les paramètres de la requête font partie de
+    l'ETag.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        response: Response,
+        if_none_match: Annotated[Optional[str], Header()] = None,
+    ):
+        self.request = request
+        self.response = response
+        self.if_none_match = if_none_match
+
+    def check(self, *version: Hashable) -> Optional[Response]:
+        """
+        Pose ETag et Cache-Control sur la réponse.
+        Args:
+            version (Hashable): La version des données renvoyées.
+        Returns:
+            Response: Une réponse 304 si le client a déjà cette version,
+                à renvoyer telle quelle ; None sinon.
+        """
+        etag = weak_etag(
+            self.request.url.path, self.request.url.query, *version
+        )
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(self.if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        self.response.headers.update(headers)
+        return None
+
+
+ConditionalGetDep = Annotated[ConditionalGet, Depends()]
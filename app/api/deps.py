@@ -1,10 +1,11 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
-from fastapi import Depends
+from fastapi import Depends, Request
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.database import engine
+from app.core.database import async_session_maker, engine
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -17,4 +18,37 @@ def get_db() -> Generator[Session, None, None]:
         yield session
 
 
+# Méthodes HTTP dont les lectures peuvent partir vers le réplica
+READ_ONLY_METHODS = frozenset({"GET", "HEAD"})
+
+
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Get an asynchronous database session routed by HTTP method.
+
+    GET/HEAD requests read from the replica (when configured) until
+    they write; every other request uses the primary.
+
+    Yields:
+        AsyncGenerator[AsyncSession, None]: An async database session.
+    """
+    async with async_session_maker(
+        read_only=request.method in READ_ONLY_METHODS
+    ) as session:
+        yield session
+
+
+async def get_primary_db() -> AsyncGenerator[AsyncSession, None]:
+    """Get an asynchronous database session bound to the primary.
+
+    For GET routes that write and must read up-to-date data.
+
+    Yields:
+        AsyncGenerator[AsyncSession, None]: An async database session.
+    """
+    async with async_session_maker() as session:
+        yield session
+
+
 SessionDep = Annotated[Session, Depends(get_db)]  # Alexis : j'ai rien compris
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
+PrimarySessionDep = Annotated[AsyncSession, Depends(get_primary_db)]
@@ -0,0 +1,224 @@
+import asyncio
+import csv
+import io
+import json
+import sys
+from collections import defaultdict
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import async_session_maker
+from app.core.query_counter import track_queries
+from app.crud import archive_crud, order_crud, order_detail_crud
+from app.crud.archive_crud import ArchivedOrder
+from app.models.order import OrderBase, OrderStatus
+from app.models.order_detail import OrderDetail
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+ORDER_COLUMNS = ["id", "client_id", "created_at", "status", "total_price"]
+DETAIL_COLUMNS = ["id", "menu_id", "quantity", "price", "status", "comment"]
+
+DetailsByOrder = Dict[Optional[int], List[OrderDetail]]
+
+# Colonnes CSV : une ligne par ligne de commande, préfixées "detail_"
+CSV_DETAIL_COLUMNS = [f"detail_{column}" for column in DETAIL_COLUMNS]
+
+
+def _value(value: Any) -> Any:
+    # Valeur sérialisable en JSON comme en CSV
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _row(obj: Any, columns: List[str]) -> Dict[str, Any]:
+    return {column: _value(getattr(obj, column)) for column in columns}
+
+
+def _ndjson_chunk(
+    orders: List[OrderBase], details: Optional[DetailsByOrder]
+) -> str:
+    lines = []
+    for order in orders:
+        row = _row(order, ORDER_COLUMNS)
+        if details is not None:
+            row["details"] = [
+                _row(detail, DETAIL_COLUMNS) for detail in details[order.id]
+            ]
+        lines.append(json.dumps(row, separators=(",", ":")))
+    return "\n".join(lines) + "\n"
+
+
+def _csv_chunk(
+    orders: List[OrderBase], details: Optional[DetailsByOrder]
+) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for order in orders:
+        row = list(_row(order, ORDER_COLUMNS).values())
+        if details is None:
+            writer.writerow(row)
+        elif not details[order.id]:
+            writer.writerow(row + [None] * len(DETAIL_COLUMNS))
+        else:
+            writer.writerows(
+                row + list(_row(detail, DETAIL_COLUMNS).values())
+                for detail in details[order.id]
+            )
+    return buffer.getvalue()
+
+
+def _csv_header(include_details: bool) -> str:
+    buffer = io.StringIO()
+    columns = ORDER_COLUMNS + (CSV_DETAIL_COLUMNS if include_details else [])
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue()
+
+
+async def _details_by_order(
+    session: AsyncSession, orders: List[OrderBase]
+) -> DetailsByOrder:
+    details: DetailsByOrder = defaultdict(list)
+    if not orders:
+        return details
+    for detail in await order_detail_crud.get_order_details_by_orders(
+        session,
+        [order.id for order in orders if order.id is not None],
+        created_between=(
+            min(order.created_at for order in orders),
+            max(order.created_at for order in orders),
+        ),
+    ):
+        details[detail.order_id].append(detail)
+    return details
+
+
+def _sort_key(order: OrderBase) -> Tuple[datetime, int]:
+    return order.created_at, order.id or 0
+
+
+async def _with_archived(
+    batches: AsyncIterator[List[OrderBase]],
+    archived: AsyncIterator[ArchivedOrder],
+    batch_size: int,
+) -> AsyncIterator[Tuple[List[OrderBase], List[ArchivedOrder]]]:
+    # Intercale les commandes archivées (triées) entre celles de la base,
+    # dans l'ordre (created_at, id) : chaque paquet de la base emporte
+    # les commandes archivées qui le précèdent
+    pending = await anext(archived, None)
+    async for orders in batches:
+        last = _sort_key(orders[-1])
+        older = []
+        while pending is not None and _sort_key(pending.order) <= last:
+            older.append(pending)
+            pending = await anext(archived, None)
+        yield orders, older
+    rest: List[ArchivedOrder] = []
+    while pending is not None:
+        rest.append(pending)
+        if len(rest) == batch_size:
+            yield [], rest
+            rest = []
+        pending = await anext(archived, None)
+    if rest:
+        yield [], rest
+
+
+async def _archived_orders(
+    start_date: date,
+    end_date: date,
+    status: Optional[OrderStatus],
+    client_id: Optional[int],
+    include_details: bool,
+) -> AsyncIterator[ArchivedOrder]:
+    # Un groupe de fichiers d'archive à la fois, lu hors de la boucle
+    # d'événements
+    for month in archive_crud.archived_months_between(start_date, end_date):
+        chunks = archive_crud.iter_archived_orders(
+            month, start_date, end_date, status, client_id, include_details
+        )
+        while chunk := await asyncio.to_thread(next, chunks, None):
+            for archived in chunk:
+                yield archived
+
+
+async def export_orders(
+    export_format: ExportFormat,
+    start_date: date,
+    end_date: date,
+    status: Optional[OrderStatus] = None,
+    client_id: Optional[int] = None,
+    include_details: bool = False,
+    batch_size: int = 1000,
+) -> AsyncIterator[str]:
+    """
+    Génère l'export des commandes, paquet par paquet.
+
+    Le générateur ouvre sa propre session : celle de la route est fermée
+    avant l'envoi du corps d'une StreamingResponse. Les lignes de
+    commande sont lues par une requête IN par paquet de commandes. Les
+    commandes des mois archivés sont lues dans les fichiers d'archive et
+    intercalées dans le même ordre.
+    Args:
+        export_format (ExportFormat): ndjson ou csv.
+        start_date (date): Premier jour de la période.
+        end_date (date): Dernier jour de la période.
+        status (OrderStatus, optional): Filtre sur le statut.
+        client_id (int, optional): Filtre sur le client.
+        include_details (bool): Inclure les lignes de commande.
+        batch_size (int): Commandes lues par aller-retour.
+    Yields:
+        str: Un morceau du fichier exporté.
+    """
+    if export_format == ExportFormat.CSV:
+        yield _csv_header(include_details)
+    write_chunk = (
+        _csv_chunk if export_format == ExportFormat.CSV else _ndjson_chunk
+    )
+
+    # La requête des lignes est répétée une fois par paquet, c'est voulu :
+    # pas de détection N+1 sur un export
+    with track_queries(threshold=sys.maxsize, raise_on_repeat=False):
+        async with async_session_maker(read_only=True) as session:
+            batches = order_crud.stream_orders(
+                session,
+                start_date,
+                end_date,
+                status=status,
+                client_id=client_id,
+                batch_size=batch_size,
+            )
+            archived = _archived_orders(
+                start_date, end_date, status, client_id, include_details
+            )
+            async for orders, older in _with_archived(
+                batches, archived, batch_size
+            ):
+                details = (
+                    await _details_by_order(session, orders)
+                    if include_details
+                    else None
+                )
+                if older:
+                    if details is not None:
+                        for order, lines in older:
+                            details[order.id] = lines
+                    orders = sorted(
+                        orders + [order for order, _ in older], key=_sort_key
+                    )
+                yield write_chunk(orders, details)
@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import json
+from typing import (
+    Annotated,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from fastapi import Depends, Header, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth.auth_bearer import get_current_user_payload
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.crud import idempotency_crud
+
+# En-tête posé sur une réponse rejouée
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    body: Any
+
+
+KeyId = Tuple[str, str]
+
+# Cache mémoire devant la table idempotency_key : une relance rapide du
+# même client est rejouée sans requête SQL
+idempotency_cache: TTLCache[KeyId, StoredResponse] = TTLCache(
+    maxsize=settings.IDEMPOTENCY_CACHE_SIZE, ttl=settings.IDEMPOTENCY_KEY_TTL
+)
+
+# Requêtes en cours dans ce processus, par clé : un doublon concurrent
+# attend la fin de la première au lieu de créer une seconde commande
+in_flight: Dict[KeyId, asyncio.Event] = {}
+
+
+def fingerprint_of(body: BaseModel) -> str:
+    """
+    Empreinte du corps d'une requête.
+    Args:
+        body (BaseModel): Le corps validé.
+    Returns:
+        str: Le SHA-256 du JSON canonique du corps.
+    """
+    raw = json.dumps(
+        jsonable_encoder(body), sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class Idempotency:
+    """
+    En-tête `Idempotency-Key` d'une route de création.
+
+    La première requête portant une clé est traitée et sa réponse
+    enregistrée (table `idempotency_key`, et cache mémoire) ; une
+    relance avec la même clé reçoit la même réponse, avec l'en-tête
+    `Idempotent-Replayed: true`, sans rien recréer. La clé est réservée
+    dans la transaction de la requête : une requête en échec ne laisse
+    rien, et une réservation sans réponse (processus arrêté entre les
+    deux) est reprise après `IDEMPOTENCY_KEY_LEASE` secondes. Sans
+    en-tête, la requête est traitée normalement.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        response: Response,
+        payload: Annotated[dict, Depends(get_current_user_payload)],
+        idempotency_key: Annotated[
+            Optional[str], Header(min_length=1, max_length=255)
+        ] = None,
+    ):
+        self.response = response
+        self.key = idempotency_key
+        # Une clé ne vaut que pour une route et un utilisateur
+        self.scope = (
+            f"{request.method} {request.url.path} {payload.get('user_id')}"
+        )[:255]
+
+    async def run(
+        self,
+        session: AsyncSession,
+        body: BaseModel,
+        create: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Traite la requête une seule fois par clé.
+        Args:
+            session (AsyncSession): La session de base de données.
+            body (BaseModel): Le corps de la requête.
+            create (Callable): Traite la requête et renvoie la réponse.
+        Raises:
+            HTTPException: Si la clé a servi pour un autre corps (422).
+            HTTPException: Si la clé est en cours de traitement par un
+                autre processus (409).
+        Returns:
+            La réponse, créée ou rejouée.
+        """
+        if self.key is None:
+            return await create()
+        key_id = (self.scope, self.key)
+        fingerprint = fingerprint_of(body)
+
+        while True:
+            stored = idempotency_cache.get(key_id)
+            if stored is not None:
+                return self.replay(stored, fingerprint)
+            pending = in_flight.get(key_id)
+            if pending is None:
+                break
+            # Si la première échoue, la clé est libérée : on la reprend
+            await pending.wait()
+
+        done = in_flight[key_id] = asyncio.Event()
+        try:
+            stored, replayed = await self.process(session, fingerprint, create)
+        finally:
+            del in_flight[key_id]
+            done.set()
+        return self.replay(stored, fingerprint) if replayed else stored.body
+
+    async def process(
+        self,
+        session: AsyncSession,
+        fingerprint: str,
+        create: Callable[[], Awaitable[Any]],
+    ) -> Tuple[StoredResponse, bool]:
+        # La réponse, et si elle a été enregistrée par une autre requête
+        assert self.key is not None
+        key_id = (self.scope, self.key)
+        claimed = await idempotency_crud.claim_key(
+            session,
+            self.scope,
+            self.key,
+            fingerprint,
+            settings.IDEMPOTENCY_KEY_LEASE,
+        )
+        if not claimed:
+            known = await idempotency_crud.get_key(
+                session, self.scope, self.key
+            )
+            if known is None or known.status_code is None:
+                await session.rollback()
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is "
+                    "already being processed",
+                    headers={"Retry-After": "1"},
+                )
+            stored = StoredResponse(known.fingerprint, known.response)
+            # Libère le verrou pris sur la clé par la tentative
+            await session.rollback()
+            idempotency_cache.set(key_id, stored)
+            return stored, True
+
+        try:
+            created = await create()
+        except BaseException:
+            await session.rollback()
+            await idempotency_crud.release_key(session, self.scope, self.key)
+            raise
+        stored = StoredResponse(fingerprint, jsonable_encoder(created))
+        await idempotency_crud.store_response(
+            session,
+            self.scope,
+            self.key,
+            self.response.status_code or 200,
+            stored.body,
+            settings.IDEMPOTENCY_KEY_TTL,
+        )
+        idempotency_cache.set(key_id, stored)
+        return stored, False
+
+    def replay(self, stored: StoredResponse, fingerprint: str) -> Any:
+        if stored.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key already used with a different "
+                "request body",
+            )
+        self.response.headers[REPLAYED_HEADER] = "true"
+        return stored.body
+
+
+IdempotencyDep = Annotated[Idempotency, Depends()]
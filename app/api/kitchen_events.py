@@ -0,0 +1,53 @@
+from typing import Iterable, Sequence
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.kitchen_feed import kitchen_feed
+from app.crud import menu_crud
+from app.models.order import OrderBase
+from app.models.order_detail import OrderDetail
+
+
+def publish_orders(event_type: str, orders: Iterable[OrderBase]) -> None:
+    """
+    Publie un événement du fil cuisine par commande.
+    Args:
+        event_type (str): "order.created", "order.status", ...
+        orders (Iterable[OrderBase]): Les commandes concernées.
+    """
+    for order in orders:
+        kitchen_feed.publish(
+            event_type,
+            order.model_dump(mode="json"),
+            status=order.status.value,
+        )
+
+
+async def publish_order_details(
+    session: AsyncSession, event_type: str, details: Sequence[OrderDetail]
+) -> None:
+    """
+    Publie un événement du fil cuisine par ligne de commande, avec la
+    catégorie de son menu (lue en base une seule fois par menu).
+    Args:
+        session (AsyncSession): La session de base de données.
+        event_type (str): "order_detail.created", "order_detail.status", ...
+        details (Sequence[OrderDetail]): Les lignes concernées.
+    """
+    unknown = kitchen_feed.unknown_menus({d.menu_id for d in details})
+    if unknown:
+        kitchen_feed.menu_categories.update(
+            await menu_crud.get_menu_categories(session, unknown)
+        )
+    for detail in details:
+        kitchen_feed.publish(
+            event_type,
+            detail.model_dump(mode="json"),
+            status=detail.status.value,
+            category_id=kitchen_feed.menu_categories.get(detail.menu_id),
+        )
+
+
+def forget_menu(menu_id: int) -> None:
+    """Oublie la catégorie d'un menu modifié ou supprimé."""
+    kitchen_feed.menu_categories.pop(menu_id, None)
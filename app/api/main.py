@@ -6,6 +6,9 @@ from app.api.routes import menu
 from app.api.routes import category
 from app.api.routes import order
 from app.api.routes import order_detail
+from app.api.routes import admin
+from app.api.routes import analytics
+from app.api.routes import kitchen
 
 router = APIRouter()
 router.include_router(user.router, prefix="/users")
@@ -14,3 +17,6 @@ router.include_router(menu.router, prefix="/menus")
 router.include_router(category.router, prefix="/categories")
 router.include_router(order.router, prefix="/orders")
 router.include_router(order_detail.router, prefix="/orderdetails")
+router.include_router(admin.router, prefix="/admin")
+router.include_router(analytics.router, prefix="/admin/analytics")
+router.include_router(kitchen.router, prefix="/kitchen")
@@ -0,0 +1,168 @@
+import asyncio
+import gzip
+import json
+import math
+import time
+from itertools import groupby
+from typing import Any, NamedTuple, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+
+from app.api.conditional import etag_matches, weak_etag
+from app.core.config import settings
+from app.core.database import async_session_maker
+from app.crud import menu_crud
+from app.crud.table_version_crud import get_table_version
+
+# Carte publique : gardée par les clients et les caches partagés, mais
+# revalidée à chaque usage (304 tant que le catalogue n'a pas changé)
+CACHE_CONTROL = "public, no-cache"
+
+
+class MenuSnapshot(NamedTuple):
+    """La carte publique, encodée une fois : JSON brut et compressé."""
+
+    versions: Tuple[int, ...]
+    etag: str
+    body: bytes
+    gzipped: bytes
+
+
+def render_menu(
+    rows: Sequence[Tuple[Any, ...]], versions: Tuple[int, ...]
+) -> MenuSnapshot:
+    """
+    Construit la carte publique : les menus groupés par catégorie, sans
+    le stock (seulement s'il en reste).
+    Args:
+        rows (Sequence[tuple]): Les lignes de `menu_crud.get_catalog_rows`.
+        versions (tuple): Versions des tables menu et category, et de
+            la disponibilité des menus.
+    Returns:
+        MenuSnapshot: La carte encodée.
+    """
+    categories = [
+        {
+            "id": category_id,
+            "name": category_name,
+            "menus": [
+                {
+                    "id": menu_id,
+                    "name": name,
+                    "price": price,
+                    "description": description,
+                    "available": stock > 0,
+                }
+                for _, _, menu_id, name, price, description, stock in menus
+            ],
+        }
+        for (category_id, category_name), menus in groupby(
+            rows, key=lambda row: (row[0], row[1])
+        )
+    ]
+    body = json.dumps(
+        {"categories": categories}, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+    return MenuSnapshot(
+        versions=versions,
+        etag=weak_etag("public_menu", *versions),
+        body=body,
+        # mtime fixe : mêmes octets pour la même carte
+        gzipped=gzip.compress(body, mtime=0),
+    )
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Si l'en-tête Accept-Encoding accepte gzip (ou `*`) avec q > 0.
+    Args:
+        accept_encoding (str, optional): L'en-tête de la requête.
+    Returns:
+        bool: True si la réponse peut être compressée.
+    """
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip().replace(" ", "")
+        if not quality.startswith("q="):
+            return True
+        try:
+            return float(quality[2:]) > 0
+        except ValueError:
+            return False
+    return False
+
+
+class MenuSnapshotStore:
+    """
+    La carte publique en mémoire du worker, reconstruite quand les
+    tables menu ou category changent, ou quand un menu passe en rupture
+    de stock ou en sort (versions de table_version : les autres
+    variations du stock ne changent pas la carte).
+
+    Les versions sont relues au plus une fois par
+    MENU_SNAPSHOT_CHECK_INTERVAL : entre deux vérifications, la carte
+    est servie sans aucune requête SQL. Une seule requête à la fois
+    vérifie et reconstruit ; les autres servent la carte précédente.
+    """
+
+    def __init__(self) -> None:
+        self.current: Optional[MenuSnapshot] = None
+        self.checked_at = -math.inf
+        self.lock = asyncio.Lock()
+
+    def is_fresh(self) -> bool:
+        elapsed = time.monotonic() - self.checked_at
+        return elapsed < settings.MENU_SNAPSHOT_CHECK_INTERVAL
+
+    async def get(self) -> MenuSnapshot:
+        if self.current is not None and (
+            self.is_fresh() or self.lock.locked()
+        ):
+            return self.current
+        async with self.lock:
+            if self.current is None or not self.is_fresh():
+                self.current = await self.refresh(self.current)
+                self.checked_at = time.monotonic()
+        return self.current
+
+    async def refresh(self, current: Optional[MenuSnapshot]) -> MenuSnapshot:
+        async with async_session_maker(read_only=True) as session:
+            versions = (
+                await get_table_version(session, "menu"),
+                await get_table_version(session, "category"),
+                await get_table_version(session, "menu_availability"),
+            )
+            if current is not None and current.versions == versions:
+                return current
+            rows = await menu_crud.get_catalog_rows(session)
+        return render_menu(rows, versions)
+
+
+menu_snapshot = MenuSnapshotStore()
+
+
+def snapshot_response(snapshot: MenuSnapshot, request: Request) -> Response:
+    """
+    La réponse de la carte : 304 si le client l'a déjà, sinon les
+    octets pré-encodés, compressés si le client accepte gzip.
+    Args:
+        snapshot (MenuSnapshot): La carte.
+        request (Request): La requête (If-None-Match, Accept-Encoding).
+    Returns:
+        Response: La réponse, sans sérialisation.
+    """
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    if accepts_gzip(request.headers.get("accept-encoding")):
+        headers["Content-Encoding"] = "gzip"
+        body = snapshot.gzipped
+    else:
+        body = snapshot.body
+    return Response(body, media_type="application/json", headers=headers)
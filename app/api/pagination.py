@@ -0,0 +1,142 @@
+import base64
+import json
+from datetime import datetime
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from fastapi import Depends, HTTPException, Query, Request, Response
+
+from app.crud.keyset import KeysetCursor
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode les valeurs de la clé d'un élément en curseur opaque.
+    Args:
+        values (Sequence): Valeurs de la clé (datetime, int, str).
+    Returns:
+        str: Le curseur, utilisable tel quel dans une URL.
+    """
+    payload = [
+        {"dt": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _has_type(value: Any, key_type: type) -> bool:
+    # bool est une sous-classe d'int : refusé pour une clé entière
+    return isinstance(value, key_type) and not isinstance(value, bool)
+
+
+def decode_cursor(cursor: str, key_types: Sequence[type]) -> KeysetCursor:
+    """
+    Décode un curseur produit par `encode_cursor`, et vérifie qu'il
+    correspond à la clé de tri de la liste.
+    Args:
+        cursor (str): Le curseur opaque.
+        key_types (Sequence[type]): Types des valeurs de la clé.
+    Raises:
+        HTTPException: Si le curseur est invalide, ou d'une autre clé.
+    Returns:
+        tuple: Les valeurs de la clé.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = tuple(
+            (
+                datetime.fromisoformat(value["dt"])
+                if isinstance(value, dict)
+                else value
+            )
+            for value in payload
+        )
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if len(values) != len(key_types) or not all(
+        _has_type(value, key_type)
+        for value, key_type in zip(values, key_types)
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+class Page:
+    """
+    Paramètres de pagination par clé d'une route de liste.
+
+    La route demande `limit + 1` éléments au crud : l'élément en trop
+    indique qu'une page suivante existe. Son curseur est renvoyé dans
+    l'en-tête `X-Next-Cursor` et dans un en-tête `Link` (rel="next").
+    Les listes triées par id ; `DatedPage` pour celles triées par
+    (created_at, id).
+    """
+
+    # Types des valeurs de la clé de tri, vérifiés sur le curseur reçu
+    key_types: Tuple[type, ...] = (int,)
+
+    def __init__(
+        self,
+        request: Request,
+        response: Response,
+        limit: Annotated[
+            int, Query(ge=1, le=MAX_PAGE_SIZE)
+        ] = DEFAULT_PAGE_SIZE,
+        cursor: Annotated[Optional[str], Query()] = None,
+    ):
+        self.request = request
+        self.response = response
+        self.limit = limit
+        self.after = decode_cursor(cursor, self.key_types) if cursor else None
+
+    @property
+    def fetch_limit(self) -> int:
+        return self.limit + 1
+
+    def paginate(
+        self, items: List[T], key: Callable[[T], Sequence[Any]]
+    ) -> List[T]:
+        """
+        Tronque les éléments à la page et pose les en-têtes de la
+        page suivante.
+        Args:
+            items (List): Les `fetch_limit` éléments renvoyés par le crud.
+            key (Callable): Renvoie les valeurs de la clé d'un élément.
+        Returns:
+            List: Les éléments de la page.
+        """
+        if len(items) <= self.limit:
+            return items
+        items = items[: self.limit]
+        next_cursor = encode_cursor(key(items[-1]))
+        next_url = self.request.url.include_query_params(
+            limit=self.limit, cursor=next_cursor
+        )
+        self.response.headers["X-Next-Cursor"] = next_cursor
+        self.response.headers["Link"] = f'<{next_url}>; rel="next"'
+        return items
+
+
+class DatedPage(Page):
+    """Pagination d'une liste triée par (created_at, id)."""
+
+    key_types = (datetime, int)
+
+
+PageDep = Annotated[Page, Depends()]
+DatedPageDep = Annotated[DatedPage, Depends()]
@@ -0,0 +1,76 @@
+from datetime import date
+from typing import Any, Dict, List
+from fastapi import APIRouter, Depends, HTTPException
+from app.api.deps import AsyncSessionDep
+from app.auth.auth_bearer import RoleChecker
+from app.core.database import pool_stats
+from app.crud import daily_sales_crud
+from app.crud.catalog_cache import category_cache, menu_cache
+from app.models.role import RoleType
+from app.schemas.daily_sales_schema import DailySalesPublic
+
+router = APIRouter(tags=["Admin"])
+
+
+@router.get(
+    "/pool",
+    response_model=List[Dict[str, Any]],
+    dependencies=[Depends(RoleChecker(allowed_roles=[RoleType.admin]))],
+)
+async def get_pool_stats():
+    """
+    Get the connection pool statistics of this worker.
+
+    Returns:
+        List[dict]: Checked-out connections, overflow in use, wait time
+        to acquire and connection churn for each pool.
+    """
+    return [stats.snapshot() for stats in pool_stats]
+
+
+@router.get(
+    "/catalog_cache",
+    response_model=Dict[str, Any],
+    dependencies=[Depends(RoleChecker(allowed_roles=[RoleType.admin]))],
+)
+async def get_catalog_cache_stats():
+    """
+    Get the catalog cache statistics of this worker.
+
+    Returns:
+        dict: Size, hits, misses, evictions and hit ratio of the rows,
+        names and pages caches, for the menus and the categories.
+    """
+    return {
+        "menus": menu_cache.snapshot(),
+        "categories": category_cache.snapshot(),
+    }
+
+
+@router.get(
+    "/daily_sales",
+    response_model=List[DailySalesPublic],
+    dependencies=[Depends(RoleChecker(allowed_roles=[RoleType.admin]))],
+)
+async def get_daily_sales(*, session: AsyncSessionDep, start: date, end: date):
+    """
+    Get the daily sales between two dates (inclusive), read from the
+    daily rollup: revenue, order count, average ticket, orders by
+    status and revenue by category, one row per day.
+
+    Args:
+        session (AsyncSessionDep): The database session dependency.
+        start (date): First day of the range.
+        end (date): Last day of the range.
+
+    Raises:
+        HTTPException: If the range is empty.
+
+    Returns:
+        List[DailySalesPublic]: The days that have sales data.
+    """
+    if end < start:
+        raise HTTPException(
+            status_code=400, detail="end must not be before start"
+        )
+    return await daily_sales_crud.get_daily_sales(session, start, end)
@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Annotated, Any, Awaitable, Callable, Hashable, List, TypeVar
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.api.deps import AsyncSessionDep
+from app.auth.auth_bearer import RoleChecker
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.crud import analytics_crud
+from app.models.role import RoleType
+from app.schemas.analytics_schema import (
+    BasketSize,
+    CategoryRevenue,
+    HourlyRevenue,
+    MenuSales,
+)
+
+router = APIRouter(
+    tags=["Analytics"],
+    dependencies=[Depends(RoleChecker(allowed_roles=[RoleType.admin]))],
+)
+
+T = TypeVar("T")
+
+# Résultats par requête et par période : une période passée ne change
+# presque plus, celle du jour est recalculée au plus tous les TTL
+analytics_cache: TTLCache[Hashable, Any] = TTLCache(
+    maxsize=settings.ANALYTICS_CACHE_SIZE, ttl=settings.ANALYTICS_CACHE_TTL
+)
+
+
+async def cached(key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+    """
+    Le résultat en cache pour `key`, calculé et mis en cache sinon.
+    Args:
+        key (Hashable): La requête et ses paramètres.
+        compute (Callable): Calcule le résultat.
+    Returns:
+        Le résultat.
+    """
+    result = analytics_cache.get(key)
+    if result is None:
+        result = await compute()
+        analytics_cache.set(key, result)
+    return result
+
+
+@dataclass(frozen=True)
+class DateRange:
+    start: date
+    end: date
+
+
+def date_range(start: date, end: date) -> DateRange:
+    # Période inclusive, commune à toutes les statistiques
+    if end < start:
+        raise HTTPException(
+            status_code=400, detail="end must not be before start"
+        )
+    return DateRange(start, end)
+
+
+DateRangeDep = Annotated[DateRange, Depends(date_range)]
+
+
+@router.get("/top_menus", response_model=List[MenuSales])
+async def get_top_menus(
+    *,
+    session: AsyncSessionDep,
+    period: DateRangeDep,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+):
+    """
+    Get the best-selling menus of a date range (inclusive).
+
+    Args:
+        session (AsyncSessionDep): The database session dependency.
+        period (DateRange): The `start` and `end` days.
+        limit (int): Number of menus to return (1 to 100).
+
+    Returns:
+        List[MenuSales]: Quantity sold and revenue per menu.
+    """
+    return await cached(
+        ("top_menus", period, limit),
+        lambda: analytics_crud.get_top_menus(
+            session, period.start, period.end, limit
+        ),
+    )
+
+
+@router.get("/revenue_by_category", response_model=List[CategoryRevenue])
+async def get_revenue_by_category(
+    *, session: AsyncSessionDep, period: DateRangeDep
+):
+    """
+    Get the revenue of each category over a date range (inclusive).
+
+    Args:
+        session (AsyncSessionDep): The database session dependency.
+        period (DateRange): The `start` and `end` days.
+
+    Returns:
+        List[CategoryRevenue]: The revenue per category.
+    """
+    return await cached(
+        ("revenue_by_category", period),
+        lambda: analytics_crud.get_revenue_by_category(
+            session, period.start, period.end
+        ),
+    )
+
+
+@router.get("/revenue_by_hour", response_model=List[HourlyRevenue])
+async def get_revenue_by_hour(
+    *, session: AsyncSessionDep, period: DateRangeDep
+):
+    """
+    Get the revenue heatmap of a date range (inclusive): orders and
+    revenue per day of the week and hour of the day (UTC).
+
+    Args:
+        session (AsyncSessionDep): The database session dependency.
+        period (DateRange): The `start` and `end` days.
+
+    Returns:
+        List[HourlyRevenue]: The non-empty cells of the heatmap.
+    """
+    return await cached(
+        ("revenue_by_hour", period),
+        lambda: analytics_crud.get_revenue_by_hour(
+            session, period.start, period.end
+        ),
+    )
+
+
+@router.get("/basket_size", response_model=BasketSize)
+async def get_basket_size(*, session: AsyncSessionDep, period: DateRangeDep):
+    """
+    Get the average basket of the orders of a date range (inclusive).
+
+    Args:
+        session (AsyncSessionDep): The database session dependency.
+        period (DateRange): The `start` and `end` days.
+
+    Returns:
+        BasketSize: Average items, lines and amount per order.
+    """
+    return await cached(
+        ("basket_size", period),
+        lambda: analytics_crud.get_basket_size(
+            session, period.start, period.end
+        ),
+    )
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException
-from app.api.deps import SessionDep
+from app.api.deps import AsyncSessionDep
+from app.api.conditional import ConditionalGetDep
+from app.api.pagination import PageDep
 from app.schemas.category_schema import (
     CategoryCreate,
     CategoryPublic,
@@ -22,13 +24,19 @@ router = APIRouter(tags=["Categories"])
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def get_all_categories(*, session: SessionDep):
+async def get_all_categories(
+    *,
+    session: AsyncSessionDep,
+    page: PageDep,
+    conditional: ConditionalGetDep,
+):
     """
-    Get all categories.
+    Get a page of categories.
 
     Args:
-        session (SessionDep): The database session dependency.
-        category_id (int): The ID of the category to retrieve.
+        session (AsyncSessionDep): The database session dependency.
+        page (PageDep): The page size and cursor.
+        conditional (ConditionalGetDep): The ETag / If-None-Match headers.
 
     Raises:
         HTTPException: If the category is not found.
@@ -36,7 +44,13 @@ def get_all_categories(*, session: SessionDep):
     Returns:
         CategoryPublic: The retrieved category data.
     """
-    return category_crud.get_all_categories(session=session)
+    version = await category_crud.get_categories_version(session=session)
+    if (not_modified := conditional.check(version)) is not None:
+        return not_modified
+    categories = await category_crud.get_all_categories(
+        session=session, limit=page.fetch_limit, after=page.after
+    )
+    return page.paginate(categories, key=lambda category: (category.id,))
 
 
 @router.post(
@@ -46,12 +60,14 @@ def get_all_categories(*, session: SessionDep):
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def create_category(*, session: SessionDep, category_in: CategoryCreate):
+async def create_category(
+    *, session: AsyncSessionDep, category_in: CategoryCreate
+):
     """
     Create a new category.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         category_in (CategoryCreate): The category creation data.
 
     Raises:
@@ -62,7 +78,7 @@ def create_category(*, session: SessionDep, category_in: CategoryCreate):
         CategoryPublic: The created category data.
     """
 
-    category = category_crud.get_category_by_name(
+    category = await category_crud.get_category_by_name(
         session=session, name=category_in.name
     )
     if category:
@@ -71,7 +87,7 @@ def create_category(*, session: SessionDep, category_in: CategoryCreate):
             detail="The category with this name already exists in the system.",
         )
 
-    category = category_crud.create_category(
+    category = await category_crud.create_category(
         session=session, category=category_in
     )
 
@@ -85,13 +101,19 @@ def create_category(*, session: SessionDep, category_in: CategoryCreate):
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def get_category_by_id(*, session: SessionDep, category_id: int):
+async def get_category_by_id(
+    *,
+    session: AsyncSessionDep,
+    category_id: int,
+    conditional: ConditionalGetDep,
+):
     """
     Get a category by ID.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         category_id (int): The ID of the category to retrieve.
+        conditional (ConditionalGetDep): The ETag / If-None-Match headers.
 
     Raises:
         HTTPException: If the category is not found.
@@ -99,7 +121,10 @@ def get_category_by_id(*, session: SessionDep, category_id: int):
     Returns:
         CategoryPublic: The retrieved category data.
     """
-    category = category_crud.get_category_by_id(
+    version = await category_crud.get_categories_version(session=session)
+    if (not_modified := conditional.check(version)) is not None:
+        return not_modified
+    category = await category_crud.get_category_by_id(
         session=session, category_id=category_id
     )
     if not category:
@@ -115,14 +140,14 @@ def get_category_by_id(*, session: SessionDep, category_id: int):
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def update_category(
-    *, session: SessionDep, category_id: int, category_in: CategoryUpdate
+async def update_category(
+    *, session: AsyncSessionDep, category_id: int, category_in: CategoryUpdate
 ):
     """
     Update a category by ID.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         category_id (int): The ID of the category to update.
         category_in (CategoryCreate): The category update data.
 
@@ -134,13 +159,13 @@ def update_category(
         CategoryPublic: The updated category data.
     """
 
-    category = category_crud.get_category_by_id(
+    category = await category_crud.get_category_by_id(
         session=session, category_id=category_id
     )
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    updated_category = category_crud.update_category(
+    updated_category = await category_crud.update_category(
         session=session, category_id=category_id, category_update=category_in
     )
 
@@ -154,12 +179,12 @@ def update_category(
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def delete_category(*, session: SessionDep, category_id: int):
+async def delete_category(*, session: AsyncSessionDep, category_id: int):
     """
     Delete a category by ID.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         category_id (int): The ID of the category to delete.
 
     Raises:
@@ -169,12 +194,14 @@ def delete_category(*, session: SessionDep, category_id: int):
         dict: A success message.
     """
 
-    category = category_crud.get_category_by_id(
+    category = await category_crud.get_category_by_id(
         session=session, category_id=category_id
     )
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
 
-    category_crud.delete_category(session=session, category_id=category_id)
+    await category_crud.delete_category(
+        session=session, category_id=category_id
+    )
 
     return {"detail": "Category deleted successfully"}
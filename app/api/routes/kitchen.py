@@ -0,0 +1,158 @@
+import json
+from typing import Annotated, AsyncIterator, List, Optional, Union
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    Query,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import StreamingResponse
+from starlette.status import WS_1008_POLICY_VIOLATION
+
+from app.auth.auth_bearer import RoleChecker
+from app.auth.auth_handler import verifyJWT
+from app.core.config import settings
+from app.core.kitchen_feed import KitchenEvent, StationFilter, kitchen_feed
+from app.models.order import OrderStatus
+from app.models.order_detail import OrderDetailStatus
+from app.models.role import RoleType
+
+router = APIRouter(tags=["Kitchen"])
+
+# Rôles autorisés sur le WebSocket (vérifiés à la main, voir plus bas)
+KITCHEN_ROLES = frozenset({RoleType.admin.value, RoleType.employee.value})
+
+
+def station_filter(
+    status: Annotated[
+        List[Union[OrderDetailStatus, OrderStatus]], Query()
+    ] = [],
+    category_id: Annotated[List[int], Query()] = [],
+) -> StationFilter:
+    # Filtre du poste, à partir des paramètres répétables de l'URL : un
+    # statut de ligne ou de commande ("Paid" n'existe que pour celles-ci)
+    return StationFilter(
+        statuses={item.value for item in status},
+        category_ids=set(category_id),
+    )
+
+
+StationDep = Annotated[StationFilter, Depends(station_filter)]
+
+
+def format_sse(event: Optional[KitchenEvent]) -> str:
+    """
+    Formate un événement (ou un maintien de connexion) pour SSE.
+    Args:
+        event (KitchenEvent, optional): L'événement, None pour un
+            simple commentaire de maintien de connexion.
+    Returns:
+        str: Le message text/event-stream.
+    """
+    if event is None:
+        return ": keep-alive\n\n"
+    data = json.dumps(event.to_dict(), separators=(",", ":"))
+    return f"id: {event.seq}\nevent: {event.type}\ndata: {data}\n\n"
+
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    dependencies=[
+        Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
+    ],
+)
+async def kitchen_events(
+    *,
+    station: StationDep,
+    since: Optional[int] = None,
+    last_event_id: Annotated[Optional[int], Header()] = None,
+):
+    """
+    Server-sent events feed of order and order detail changes.
+
+    Sequence numbers are per worker process: resuming with `since` or
+    `Last-Event-ID` is only reliable when the API runs a single worker
+    (or the client always reconnects to the same one).
+
+    Args:
+        station (StationFilter): Order or order detail statuses and
+            categories followed by the station (repeat `status` /
+            `category_id`, empty = all).
+        since (int, optional): Last sequence number received.
+        last_event_id (int, optional): Set by EventSource when it
+            reconnects; used when `since` is not given.
+
+    Returns:
+        StreamingResponse: The text/event-stream feed.
+    """
+
+    async def stream() -> AsyncIterator[str]:
+        events = kitchen_feed.subscribe(
+            station,
+            since=since if since is not None else last_event_id,
+            heartbeat=settings.KITCHEN_FEED_HEARTBEAT,
+        )
+        async for event in events:
+            yield format_sse(event)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def websocket_authorized(websocket: WebSocket) -> bool:
+    # Les navigateurs ne peuvent pas poser d'en-tête sur un WebSocket :
+    # le jeton est accepté dans l'en-tête Authorization ou en paramètre
+    authorization = websocket.headers.get("authorization", "")
+    token = websocket.query_params.get("token")
+    if authorization.startswith("Bearer "):
+        token = authorization.removeprefix("Bearer ")
+    verified = verifyJWT(token) if token else None
+    return verified is not None and not KITCHEN_ROLES.isdisjoint(
+        verified.roles
+    )
+
+
+@router.websocket("/ws")
+async def kitchen_websocket(
+    websocket: WebSocket,
+    station: StationDep,
+    since: Optional[int] = None,
+):
+    """
+    WebSocket feed of order and order detail changes, one JSON message
+    per event: {"seq": ..., "type": ..., "data": {...}}.
+
+    Sequence numbers are per worker process: resuming with `since` is
+    only reliable when the API runs a single worker.
+
+    Args:
+        websocket (WebSocket): The connection.
+        station (StationFilter): Order or order detail statuses and
+            categories followed by the station (repeat `status` /
+            `category_id`, empty = all).
+        since (int, optional): Last sequence number received.
+    """
+    if not websocket_authorized(websocket):
+        await websocket.close(code=WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    events = kitchen_feed.subscribe(
+        station, since=since, heartbeat=settings.KITCHEN_FEED_HEARTBEAT
+    )
+    try:
+        async for event in events:
+            if event is None:
+                await websocket.send_json({"type": "keep-alive"})
+            else:
+                await websocket.send_json(event.to_dict())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await events.aclose()
@@ -1,8 +1,28 @@
-from fastapi import APIRouter, HTTPException
-from app.api.deps import SessionDep
-from app.schemas.menu_schema import MenuCreate, MenuPublic, MenuUpdate
-from app.crud import menu_crud
-from typing import List
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+)
+from app.api.deps import AsyncSessionDep
+from app.api.conditional import ConditionalGetDep
+from app.api.kitchen_events import forget_menu
+from app.api.menu_snapshot import menu_snapshot, snapshot_response
+from app.api.pagination import MAX_PAGE_SIZE, PageDep
+from app.schemas.menu_schema import (
+    MenuCreate,
+    MenuImportReport,
+    MenuPrice,
+    MenuPublic,
+    MenuReprice,
+    MenuUpdate,
+)
+from app.crud import menu_crud, menu_import_crud
+from app.crud.menu_crud import UnknownMenuError
+from app.crud.menu_import_crud import ImportFormat
+from typing import Annotated, List, Optional
 
 from fastapi import Depends
 from app.auth.auth_bearer import RoleChecker, TokenResponse
@@ -18,12 +38,12 @@ router = APIRouter(tags=["Menus"])
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def create_menu(*, session: SessionDep, menu_in: MenuCreate):
+async def create_menu(*, session: AsyncSessionDep, menu_in: MenuCreate):
     """
     Create a new menu.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         menu_in (MenuCreate): The menu creation data.
 
     Raises:
@@ -34,14 +54,14 @@ def create_menu(*, session: SessionDep, menu_in: MenuCreate):
         MenuPublic: The created menu data.
     """
 
-    menu = menu_crud.get_menu_by_name(session=session, name=menu_in.name)
+    menu = await menu_crud.get_menu_by_name(session=session, name=menu_in.name)
     if menu:
         raise HTTPException(
             status_code=400,
             detail="The menu with this name already exists in the system.",
         )
 
-    menu = menu_crud.create_menu(session=session, menu=menu_in)
+    menu = await menu_crud.create_menu(session=session, menu=menu_in)
 
     return menu
 
@@ -53,13 +73,19 @@ def create_menu(*, session: SessionDep, menu_in: MenuCreate):
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def get_all_menus(*, session: SessionDep):
+async def get_all_menus(
+    *,
+    session: AsyncSessionDep,
+    page: PageDep,
+    conditional: ConditionalGetDep,
+):
     """
-    Get all menus.
+    Get a page of menus.
 
     Args:
-        session (SessionDep): The database session dependency.
-        menu_id (int): The ID of the menu to retrieve.
+        session (AsyncSessionDep): The database session dependency.
+        page (PageDep): The page size and cursor.
+        conditional (ConditionalGetDep): The ETag / If-None-Match headers.
 
     Raises:
         HTTPException: If the menu is not found.
@@ -67,7 +93,176 @@ def get_all_menus(*, session: SessionDep):
     Returns:
         MenuPublic: The retrieved menu data.
     """
-    return menu_crud.get_all_menus(session=session)
+    version = await menu_crud.get_menus_version(session=session)
+    menus = await menu_crud.get_all_menus(
+        session=session, limit=page.fetch_limit, after=page.after
+    )
+    # Stock des seuls menus de la page, relu à chaque requête : il
+    # change à chaque commande sans changer la version du catalogue
+    _, stock = await menu_crud.get_menus_stock(
+        session=session, menu_ids=[menu.id for menu in menus if menu.id]
+    )
+    not_modified = conditional.check(version, tuple(sorted(stock.items())))
+    if not_modified is not None:
+        return not_modified
+    menus = [menu_crud.with_stock(menu, stock) for menu in menus]
+    return page.paginate(menus, key=lambda menu: (menu.id,))
+
+
+@router.post(
+    "/import",
+    response_model=MenuImportReport,
+    dependencies=[
+        Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
+    ],
+)
+async def import_menus(
+    *,
+    session: AsyncSessionDep,
+    file: UploadFile,
+    format: Optional[ImportFormat] = None,
+):
+    """
+    Create or update menus by name from a CSV file (with a header line)
+    or a JSON array, with the columns name, price, category_id,
+    description and stock (optional: an existing menu keeps its stock).
+    The valid rows are imported, the others are reported.
+
+    Args:
+        session (AsyncSessionDep): The database session dependency.
+        file (UploadFile): The CSV or JSON file.
+        format (ImportFormat, optional): csv or json (default: from the
+            file name, else csv).
+
+    Raises:
+        HTTPException: If the file cannot be read.
+
+    Returns:
+        MenuImportReport: The number of menus created, updated and
+            unchanged, and the rejected rows.
+    """
+    data = await file.read()
+    try:
+        records = menu_import_crud.read_records(
+            data, format or menu_import_crud.guess_format(file.filename)
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+    result = await menu_import_crud.import_menus(
+        session=session, records=records
+    )
+    for menu_id in result.updated:
+        forget_menu(menu_id)
+
+    return MenuImportReport(
+        created=len(result.created),
+        updated=len(result.updated),
+        unchanged=result.unchanged,
+        errors=result.errors,
+    )
+
+
+@router.post(
+    "/reprice",
+    response_model=List[MenuPrice],
+    dependencies=[
+        Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
+    ],
+)
+async def reprice_menus(*, session: AsyncSessionDep, reprice_in: MenuReprice):
+    """
+    Change the price of many menus in a single UPDATE: by a percentage
+    (of one category, or of every menu), or from a price list by ID.
+
+    Args:
+        session (AsyncSessionDep): The database session dependency.
+        reprice_in (MenuReprice): The percentage or the price list.
+
+    Raises:
+        HTTPException: If a menu of the price list does not exist.
+
+    Returns:
+        List[MenuPrice]: The new price of each changed menu.
+    """
+    if reprice_in.prices is not None:
+        try:
+            prices = await menu_crud.set_prices(
+                session=session,
+                prices={menu.id: menu.price for menu in reprice_in.prices},
+            )
+        except UnknownMenuError as error:
+            raise HTTPException(status_code=404, detail=str(error))
+    else:
+        prices = await menu_crud.increase_prices(
+            session=session,
+            percent=reprice_in.percent or 0,
+            category_id=reprice_in.category_id,
+        )
+
+    return [
+        MenuPrice(id=menu_id, price=price)
+        for menu_id, price in sorted(prices.items())
+    ]
+
+
+# Déclarée avant "/{menu_id}" pour ne pas être capturée par cette route
+@router.get(
+    "/search",
+    response_model=List[MenuPublic],
+    dependencies=[
+        Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
+    ],
+)
+async def search_menus(
+    *,
+    session: AsyncSessionDep,
+    q: Annotated[str, Query(min_length=1, max_length=100)],
+    category_id: Optional[int] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 20,
+):
+    """
+    Search menus by name and description, best match first. Every word
+    of `q` matches as a prefix; with no match, menus with a close name
+    are returned (typos).
+
+    Args:
+        session (AsyncSessionDep): The database session dependency.
+        q (str): The searched text.
+        category_id (int, optional): Only menus of this category.
+        limit (int): Maximum number of menus to return.
+
+    Returns:
+        List[MenuPublic]: The matching menus.
+    """
+    return await menu_crud.search_menus(
+        session=session, query=q, category_id=category_id, limit=limit
+    )
+
+
+# Carte publique, sans authentification : servie depuis un rendu en
+# mémoire (ni ORM, ni validation, ni encodage JSON par requête)
+@router.get(
+    "/public",
+    responses={
+        200: {"content": {"application/json": {}}},
+        304: {"description": "Not modified"},
+    },
+)
+async def get_public_menu(request: Request) -> Response:
+    """
+    The menus available to customers, grouped by category. The document
+    is rendered once per catalog change and sent as pre-encoded bytes
+    (gzip when accepted), with an ETag for conditional requests.
+
+    Args:
+        request (Request): The request (If-None-Match, Accept-Encoding).
+
+    Returns:
+        Response: `{"categories": [{"id", "name", "menus": [...]}]}`.
+    """
+    snapshot = await menu_snapshot.get()
+    return snapshot_response(snapshot, request)
 
 
 @router.get(
@@ -77,13 +272,16 @@ def get_all_menus(*, session: SessionDep):
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def get_menu_by_id(*, session: SessionDep, menu_id: int):
+async def get_menu_by_id(
+    *, session: AsyncSessionDep, menu_id: int, conditional: ConditionalGetDep
+):
     """
     Get a menu by ID.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         menu_id (int): The ID of the menu to retrieve.
+        conditional (ConditionalGetDep): The ETag / If-None-Match headers.
 
     Raises:
         HTTPException: If the menu is not found.
@@ -91,11 +289,17 @@ def get_menu_by_id(*, session: SessionDep, menu_id: int):
     Returns:
         MenuPublic: The retrieved menu data.
     """
-    menu = menu_crud.get_menu_by_id(session=session, menu_id=menu_id)
+    version, stock = await menu_crud.get_menus_stock(
+        session=session, menu_ids=[menu_id]
+    )
+    not_modified = conditional.check(version, stock.get(menu_id))
+    if not_modified is not None:
+        return not_modified
+    menu = await menu_crud.get_menu_by_id(session=session, menu_id=menu_id)
     if not menu:
         raise HTTPException(status_code=404, detail="Menu not found")
 
-    return menu
+    return menu_crud.with_stock(menu, stock)
 
 
 @router.put(
@@ -105,12 +309,14 @@ def get_menu_by_id(*, session: SessionDep, menu_id: int):
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def update_menu(*, session: SessionDep, menu_id: int, menu_in: MenuUpdate):
+async def update_menu(
+    *, session: AsyncSessionDep, menu_id: int, menu_in: MenuUpdate
+):
     """
     Update a menu by ID.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         menu_id (int): The ID of the menu to update.
         menu_in (MenuCreate): The menu update data.
 
@@ -122,14 +328,16 @@ def update_menu(*, session: SessionDep, menu_id: int, menu_in: MenuUpdate):
         MenuPublic: The updated menu data.
     """
 
-    menu = menu_crud.get_menu_by_id(session=session, menu_id=menu_id)
+    menu = await menu_crud.get_menu_by_id(session=session, menu_id=menu_id)
     if not menu:
         raise HTTPException(status_code=404, detail="Menu not found")
 
-    updated_menu = menu_crud.update_menu(
+    updated_menu = await menu_crud.update_menu(
         session=session, menu_id=menu_id, menu_update=menu_in
     )
 
+    forget_menu(menu_id)
+
     return updated_menu
 
 
@@ -140,12 +348,12 @@ def update_menu(*, session: SessionDep, menu_id: int, menu_in: MenuUpdate):
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def delete_menu(*, session: SessionDep, menu_id: int):
+async def delete_menu(*, session: AsyncSessionDep, menu_id: int):
     """
     Delete a menu by ID.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         menu_id (int): The ID of the menu to delete.
 
     Raises:
@@ -155,10 +363,11 @@ def delete_menu(*, session: SessionDep, menu_id: int):
         dict: A success message.
     """
 
-    menu = menu_crud.get_menu_by_id(session=session, menu_id=menu_id)
+    menu = await menu_crud.get_menu_by_id(session=session, menu_id=menu_id)
     if not menu:
         raise HTTPException(status_code=404, detail="Menu not found")
 
-    menu_crud.delete_menu(session=session, menu_id=menu_id)
+    await menu_crud.delete_menu(session=session, menu_id=menu_id)
+    forget_menu(menu_id)
 
     return {"detail": "Menu deleted successfully"}
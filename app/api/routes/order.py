@@ -1,9 +1,24 @@
 from fastapi import APIRouter, HTTPException
-from app.api.deps import SessionDep
-from app.schemas.order_schema import OrderCreate, OrderPublic, OrderUpdate
+from fastapi.responses import StreamingResponse
+from app.api.deps import AsyncSessionDep, PrimarySessionDep
+from app.api.conditional import ConditionalGetDep
+from app.api.export import MEDIA_TYPES, ExportFormat, export_orders
+from app.api.idempotency import IdempotencyDep
+from app.api.kitchen_events import publish_order_details, publish_orders
+from app.api.pagination import DatedPageDep
+from app.models.order import OrderBase, OrderStatus
+from app.schemas.order_schema import (
+    OrderCreate,
+    OrderInclude,
+    OrderPublic,
+    OrderUpdate,
+    OrderWithDetailsPublic,
+    OrderWithLinesCreate,
+)
 from app.schemas.order_detail_schema import OrderDetailPublic
 from app.crud import order_crud, order_detail_crud
-from typing import List
+from app.crud.menu_crud import OutOfStockError, UnknownMenuError
+from typing import List, Optional, Sequence, Union
 from datetime import date
 
 from fastapi import Depends
@@ -17,18 +32,57 @@ from app.models.role import RoleType
 router = APIRouter(tags=["Order"])
 
 
+# Réponse d'une commande : avec ses lignes si ?include=details
+OrderResponse = Union[OrderWithDetailsPublic, OrderPublic]
+
+
+def order_key(order: OrderBase) -> tuple:
+    # Clé de pagination des listes de commandes
+    return (order.created_at, order.id)
+
+
+def orders_public(
+    orders: Sequence[OrderBase], include: Optional[OrderInclude]
+) -> List[OrderPublic]:
+    """
+    Les commandes au format de réponse, avec leurs lignes (chargées
+    par le crud avec `with_details`) si `include` le demande.
+    Args:
+        orders (Sequence[OrderBase]): Les commandes.
+        include (OrderInclude, optional): Les données à inclure.
+    Returns:
+        List[OrderPublic]: Les commandes.
+    """
+    schema = (
+        OrderWithDetailsPublic
+        if include is OrderInclude.DETAILS
+        else OrderPublic
+    )
+    return [
+        schema.model_validate(order, from_attributes=True) for order in orders
+    ]
+
+
 @router.post(
     "/",
     response_model=OrderPublic,
     dependencies=[Depends(get_current_user_payload)],
 )
-def create_order(*, session: SessionDep, order_in: OrderCreate):
+async def create_order(
+    *,
+    session: AsyncSessionDep,
+    order_in: OrderCreate,
+    idempotency: IdempotencyDep,
+):
     """
-    Create a new order.
+    Create a new order. With an `Idempotency-Key` header, a retry
+    replays the response of the first request instead of creating
+    another order.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         order_in (OrderCreate): The ordercreation data.
+        idempotency (IdempotencyDep): The Idempotency-Key header.
 
     Raises:
         HTTPException: If the order with this title already exists.
@@ -38,23 +92,141 @@ def create_order(*, session: SessionDep, order_in: OrderCreate):
         OrderPublic: The created order data.
     """
 
-    order = order_crud.create_order(session=session, order=order_in)
+    async def create() -> OrderPublic:
+        order = await order_crud.create_order(session=session, order=order_in)
+        publish_orders("order.created", [order])
+        return OrderPublic.model_validate(order, from_attributes=True)
+
+    return await idempotency.run(session, order_in, create)
+
+
+@router.post(
+    "/with_lines",
+    response_model=OrderWithDetailsPublic,
+    dependencies=[Depends(get_current_user_payload)],
+)
+async def create_order_with_lines(
+    *,
+    session: AsyncSessionDep,
+    order_in: OrderWithLinesCreate,
+    idempotency: IdempotencyDep,
+):
+    """
+    Create an order with all its lines in one transaction. The prices
+    come from the menus and the total is computed by the server; the
+    order is returned already finalized. Accepts an `Idempotency-Key`
+    header, like the creation of an order.
+
+    Args:
+        session (AsyncSessionDep): The database session dependency.
+        order_in (OrderWithLinesCreate): The order and its lines.
+        idempotency (IdempotencyDep): The Idempotency-Key header.
+
+    Raises:
+        HTTPException: If a line refers to a menu that does not exist.
+        HTTPException: If a menu does not have enough stock.
+
+    Returns:
+        OrderWithDetailsPublic: The created order with its details.
+    """
+
+    async def create() -> OrderWithDetailsPublic:
+        try:
+            order, details = await order_crud.create_order_with_lines(
+                session=session, order=order_in
+            )
+        except UnknownMenuError as error:
+            raise HTTPException(status_code=404, detail=str(error))
+        except OutOfStockError as error:
+            raise HTTPException(status_code=409, detail=str(error))
+        publish_orders("order.created", [order])
+        await publish_order_details(session, "order_detail.created", details)
+
+        return OrderWithDetailsPublic(
+            **order.model_dump(),
+            details=[detail.model_dump() for detail in details],
+        )
+
+    return await idempotency.run(session, order_in, create)
 
-    return order
+
+# Déclarée avant "/{order_id}" pour ne pas être capturée par cette route
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    dependencies=[
+        Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
+    ],
+)
+async def export_all_orders(
+    *,
+    start: date,
+    end: date,
+    status: Optional[OrderStatus] = None,
+    client_id: Optional[int] = None,
+    format: ExportFormat = ExportFormat.NDJSON,
+    include_details: bool = False,
+):
+    """
+    Export the orders created between two dates (inclusive), streamed
+    as NDJSON (one order per line) or CSV (one row per order, or per
+    order detail with include_details).
+
+    Args:
+        start (date): First day of the range.
+        end (date): Last day of the range.
+        status (OrderStatus, optional): Only orders with this status.
+        client_id (int, optional): Only orders of this client.
+        format (ExportFormat): ndjson or csv.
+        include_details (bool): Include the order details.
+
+    Raises:
+        HTTPException: If the range is empty.
+
+    Returns:
+        StreamingResponse: The exported orders.
+    """
+    if end < start:
+        raise HTTPException(
+            status_code=400, detail="end must not be before start"
+        )
+
+    filename = f"orders_{start}_{end}.{format.value}"
+    return StreamingResponse(
+        export_orders(
+            format,
+            start,
+            end,
+            status=status,
+            client_id=client_id,
+            include_details=include_details,
+        ),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get(
     "/{order_id}",
-    response_model=OrderPublic,
+    response_model=OrderResponse,
     dependencies=[Depends(get_current_user_payload)],
 )
-def get_order(*, session: SessionDep, order_id: int):
+async def get_order(
+    *,
+    session: AsyncSessionDep,
+    order_id: int,
+    include: Optional[OrderInclude] = None,
+    conditional: ConditionalGetDep,
+):
     """
     Get a order by ID.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         order_id (int): The ID of the order to retrieve.
+        include (OrderInclude, optional): "details" to embed the order
+            details.
+        conditional (ConditionalGetDep): The ETag / If-None-Match headers.
 
     Raises:
         HTTPException: If the order is not found.
@@ -62,25 +234,49 @@ def get_order(*, session: SessionDep, order_id: int):
     Returns:
         OrderPublic: The retrieved order data.
     """
-    order = order_crud.get_order(session=session, order_id=order_id)
+    version = await order_crud.get_order_version(
+        session=session, order_id=order_id
+    )
+    if version is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    if (not_modified := conditional.check(*version)) is not None:
+        return not_modified
+
+    order = await order_crud.get_order(
+        session=session,
+        order_id=order_id,
+        with_details=include is OrderInclude.DETAILS,
+    )
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    return order
+    return orders_public([order], include)[0]
 
 
 @router.get(
     "/",
-    response_model=List[OrderPublic],
+    response_model=List[OrderResponse],
     dependencies=[
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def get_all_orders(*, session: SessionDep):
+async def get_all_orders(
+    *,
+    session: AsyncSessionDep,
+    page: DatedPageDep,
+    include: Optional[OrderInclude] = None,
+):
 
-    # Get all order.
+    # Get a page of orders, ordered by (created_at, id), with their
+    # details (one more SQL query for the page) if include=details.
 
-    return order_crud.get_all_orders(session=session)
+    orders = await order_crud.get_all_orders(
+        session=session,
+        limit=page.fetch_limit,
+        after=page.after,
+        with_details=include is OrderInclude.DETAILS,
+    )
+    return orders_public(page.paginate(orders, key=order_key), include)
 
 
 @router.put(
@@ -88,12 +284,14 @@ def get_all_orders(*, session: SessionDep):
     response_model=OrderPublic,
     dependencies=[Depends(get_current_user_payload)],
 )
-def update_order(*, session: SessionDep, order_id: int, order_in: OrderUpdate):
+async def update_order(
+    *, session: AsyncSessionDep, order_id: int, order_in: OrderUpdate
+):
     """
     Update an order by ID.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         order_id (int): The ID of the order to update.
         order_in (OrderCreate): The order update data.
 
@@ -105,14 +303,17 @@ def update_order(*, session: SessionDep, order_id: int, order_in: OrderUpdate):
         OrderPublic: The updated order data.
     """
 
-    order = order_crud.get_order(session=session, order_id=order_id)
+    order = await order_crud.get_order(session=session, order_id=order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    updated_order = order_crud.update_order(
+    updated_order = await order_crud.update_order(
         session=session, order_id=order_id, order_update=order_in
     )
 
+    if updated_order:
+        publish_orders("order.updated", [updated_order])
+
     return updated_order
 
 
@@ -123,12 +324,12 @@ def update_order(*, session: SessionDep, order_id: int, order_in: OrderUpdate):
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def delete_order(*, session: SessionDep, order_id: int):
+async def delete_order(*, session: AsyncSessionDep, order_id: int):
     """
     Delete an order by ID.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         order_id (int): The ID of the order to delete.
 
     Raises:
@@ -138,33 +339,43 @@ def delete_order(*, session: SessionDep, order_id: int):
         dict: A success message.
     """
 
-    order = order_crud.get_order(session=session, order_id=order_id)
+    order = await order_crud.get_order(session=session, order_id=order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    order_crud.delete_order(session=session, order_id=order_id)
+    await order_crud.delete_order(session=session, order_id=order_id)
+    publish_orders("order.deleted", [order])
 
     return {"detail": "Order deleted successfully"}
 
 
 @router.get(
     "/by_date/{year}/{month}/{day}",
-    response_model=List[OrderPublic],
+    response_model=List[OrderResponse],
     dependencies=[
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def get_all_orders_by_date(
-    *, session: SessionDep, year: int, month: int, day: int
+async def get_all_orders_by_date(
+    *,
+    session: AsyncSessionDep,
+    page: DatedPageDep,
+    year: int,
+    month: int,
+    day: int,
+    include: Optional[OrderInclude] = None,
 ):
     """
-    Get all orders by created_at date.
+    Get a page of orders by created_at date.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
+        page (DatedPageDep): The page size and cursor.
         year (int): Date Year.
         month (int): Date month.
         day (int): Date day.
+        include (OrderInclude, optional): "details" to embed the order
+            details.
 
     Raises:
         HTTPException: If no order is found.
@@ -173,7 +384,14 @@ def get_all_orders_by_date(
         OrderPublic: The retrieved orders data.
     """
     target_date = date(year, month, day)
-    return order_crud.get_orders_by_date(session, target_date)
+    orders = await order_crud.get_orders_by_date(
+        session,
+        target_date,
+        limit=page.fetch_limit,
+        after=page.after,
+        with_details=include is OrderInclude.DETAILS,
+    )
+    return orders_public(page.paginate(orders, key=order_key), include)
 
 
 @router.get(
@@ -181,12 +399,14 @@ def get_all_orders_by_date(
     response_model=List[OrderDetailPublic],
     dependencies=[Depends(get_current_user_payload)],
 )
-def get_all_order_details_by_order(*, session: SessionDep, order_id: int):
+async def get_all_order_details_by_order(
+    *, session: AsyncSessionDep, order_id: int
+):
     """
     Get all orders by created_at date.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         order_id (int): The ID of the order to get details.
 
     Raises:
@@ -195,7 +415,9 @@ def get_all_order_details_by_order(*, session: SessionDep, order_id: int):
     Returns:
         OrderPublic: The retrieved orders data.
     """
-    return order_detail_crud.get_all_order_details_by_order(session, order_id)
+    return await order_detail_crud.get_all_order_details_by_order(
+        session, order_id
+    )
 
 
 @router.get(
@@ -203,12 +425,12 @@ def get_all_order_details_by_order(*, session: SessionDep, order_id: int):
     response_model=float,
     dependencies=[Depends(get_current_user_payload)],
 )
-def get_order_total(*, session: SessionDep, order_id: int):
+async def get_order_total(*, session: AsyncSessionDep, order_id: int):
     """
     Get an order total price.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         order_id (int): The ID of the order.
 
     Raises:
@@ -217,7 +439,7 @@ def get_order_total(*, session: SessionDep, order_id: int):
     Returns:
         float: The retrieved order total.
     """
-    return order_crud.get_order_total(session, order_id)
+    return await order_crud.get_order_total(session, order_id)
 
 
 @router.get(
@@ -225,13 +447,13 @@ def get_order_total(*, session: SessionDep, order_id: int):
     response_model=OrderPublic,
     dependencies=[Depends(get_current_user_payload)],
 )
-def get_finalize_order(*, session: SessionDep, order_id: int):
+async def get_finalize_order(*, session: PrimarySessionDep, order_id: int):
     """
     "Finalize" an order (after lines being added,
     computes the total price and set status to PREPARING).
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (PrimarySessionDep): The database session dependency.
         order_id (int): The ID of the order.
 
     Raises:
@@ -240,4 +462,7 @@ def get_finalize_order(*, session: SessionDep, order_id: int):
     Returns:
         OrderPublic: The updated order.
     """
-    return order_crud.finalize_order(session, order_id)
+    order = await order_crud.finalize_order(session, order_id)
+    if order:
+        publish_orders("order.status", [order])
+    return order
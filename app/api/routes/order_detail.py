@@ -1,11 +1,18 @@
 from fastapi import APIRouter, HTTPException
-from app.api.deps import SessionDep
+from app.api.deps import AsyncSessionDep
+from app.api.idempotency import IdempotencyDep
+from app.api.kitchen_events import publish_order_details, publish_orders
+from app.api.pagination import PageDep
 from app.schemas.order_detail_schema import (
     OrderDetailCreate,
     OrderDetailPublic,
+    OrderDetailStatusBulkUpdate,
     OrderDetailUpdate,
 )
+from app.schemas.order_schema import OrderDetailStatusBulkPublic
 from app.crud import order_detail_crud
+from app.crud.order_detail_crud import InvalidTransitionError
+from app.crud.menu_crud import OutOfStockError, UnknownMenuError
 from typing import List
 
 from fastapi import Depends
@@ -24,28 +31,93 @@ router = APIRouter(tags=["Order Detail"])
     response_model=OrderDetailPublic,
     dependencies=[Depends(get_current_user_payload)],
 )
-def create_order_detail(
-    *, session: SessionDep, order_detail_in: OrderDetailCreate
+async def create_order_detail(
+    *,
+    session: AsyncSessionDep,
+    order_detail_in: OrderDetailCreate,
+    idempotency: IdempotencyDep,
 ):
     """
-    Create a new order detail.
+    Create a new order detail. With an `Idempotency-Key` header, a retry
+    replays the response of the first request instead of adding another
+    line.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         order_detail_in (OrderDetailCreate): The orderdetailcreation data.
+        idempotency (IdempotencyDep): The Idempotency-Key header.
 
     Raises:
-        HTTPException: If the order_detail with this title already exists.
-        HTTPException: If the order_detail creation fails.
+        HTTPException: If the menu does not exist.
+        HTTPException: If the menu is out of stock.
 
     Returns:
         OrderPublic: The created order detail data.
     """
-    order_detail = order_detail_crud.create_order_detail(
-        session=session, order_detail=order_detail_in
-    )
 
-    return order_detail
+    async def create() -> OrderDetailPublic:
+        try:
+            order_detail = await order_detail_crud.create_order_detail(
+                session=session, order_detail=order_detail_in
+            )
+        except UnknownMenuError as error:
+            raise HTTPException(status_code=404, detail=str(error))
+        except OutOfStockError as error:
+            raise HTTPException(status_code=409, detail=str(error))
+        await publish_order_details(
+            session, "order_detail.created", [order_detail]
+        )
+        return OrderDetailPublic.model_validate(
+            order_detail, from_attributes=True
+        )
+
+    return await idempotency.run(session, order_detail_in, create)
+
+
+@router.post(
+    "/status",
+    response_model=OrderDetailStatusBulkPublic,
+    dependencies=[
+        Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
+    ],
+)
+async def update_order_details_status(
+    *, session: AsyncSessionDep, transition_in: OrderDetailStatusBulkUpdate
+):
+    """
+    Move many order details, or every line of several orders, to a new
+    status at once. The orders whose lines all reached the status
+    follow.
+
+    Args:
+        session (AsyncSessionDep): The database session dependency.
+        transition_in (OrderDetailStatusBulkUpdate): The new status and
+            the order details or orders to move.
+
+    Raises:
+        HTTPException: If a listed order detail does not exist or
+            cannot move to the new status.
+
+    Returns:
+        OrderDetailStatusBulkPublic: The moved order details and the
+            orders whose status changed.
+    """
+    try:
+        details, orders = await order_detail_crud.transition_order_details(
+            session=session,
+            status=transition_in.status,
+            order_detail_ids=transition_in.order_detail_ids,
+            order_ids=transition_in.order_ids,
+        )
+    except InvalidTransitionError as error:
+        raise HTTPException(status_code=409, detail=str(error))
+    await publish_order_details(session, "order_detail.status", details)
+    publish_orders("order.status", orders)
+
+    return OrderDetailStatusBulkPublic(
+        order_details=[detail.model_dump() for detail in details],
+        orders=[order.model_dump() for order in orders],
+    )
 
 
 @router.get(
@@ -53,12 +125,12 @@ def create_order_detail(
     response_model=OrderDetailPublic,
     dependencies=[Depends(get_current_user_payload)],
 )
-def get_order_detail(*, session: SessionDep, order_detail_id: int):
+async def get_order_detail(*, session: AsyncSessionDep, order_detail_id: int):
     """
     Get a order detail by ID.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         order_detail_id (int): The ID of the order detail to retrieve.
 
     Raises:
@@ -67,7 +139,7 @@ def get_order_detail(*, session: SessionDep, order_detail_id: int):
     Returns:
         OrderDetailPublic: The retrieved order_detail data.
     """
-    order_detail = order_detail_crud.get_order_detail(
+    order_detail = await order_detail_crud.get_order_detail(
         session=session, order_detail_id=order_detail_id
     )
     if not order_detail:
@@ -83,11 +155,14 @@ def get_order_detail(*, session: SessionDep, order_detail_id: int):
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def get_all_order_details(*, session: SessionDep):
+async def get_all_order_details(*, session: AsyncSessionDep, page: PageDep):
 
-    # Get all order details.
+    # Get a page of order details, ordered by id.
 
-    return order_detail_crud.get_all_order_details(session=session)
+    order_details = await order_detail_crud.get_all_order_details(
+        session=session, limit=page.fetch_limit, after=page.after
+    )
+    return page.paginate(order_details, key=lambda detail: (detail.id,))
 
 
 @router.put(
@@ -95,9 +170,9 @@ def get_all_order_details(*, session: SessionDep):
     response_model=dict,
     dependencies=[Depends(get_current_user_payload)],
 )
-def update_order_detail(
+async def update_order_detail(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     order_detail_id: int,
     order_detail_in: OrderDetailUpdate,
 ):
@@ -105,29 +180,38 @@ def update_order_detail(
     Update an order detail by ID.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         order_detail_id (uuid.int): The ID of the order detail to update.
         order_detail_in (OrderDetailCreate): The order update data.
 
     Raises:
-        HTTPException: If the order_detail is not found.
-        HTTPException: If the order_detail update fails.
+        HTTPException: If the order_detail or the menu is not found.
+        HTTPException: If the menu is out of stock.
 
     Returns:
         OrderPublic: The updated order detail data.
     """
 
-    order_detail = order_detail_crud.get_order_detail(
+    order_detail = await order_detail_crud.get_order_detail(
         session=session, order_detail_id=order_detail_id
     )
     if not order_detail:
         raise HTTPException(status_code=404, detail="Order Detail not found")
 
-    updated_order_detail = order_detail_crud.update_order_detail(
-        session=session,
-        order_detail_id=order_detail_id,
-        order_detail_update=order_detail_in,
-    )
+    try:
+        updated_order_detail = await order_detail_crud.update_order_detail(
+            session=session,
+            order_detail_id=order_detail_id,
+            order_detail_update=order_detail_in,
+        )
+    except UnknownMenuError as error:
+        raise HTTPException(status_code=404, detail=str(error))
+    except OutOfStockError as error:
+        raise HTTPException(status_code=409, detail=str(error))
+    if updated_order_detail:
+        await publish_order_details(
+            session, "order_detail.updated", [updated_order_detail]
+        )
 
     return updated_order_detail
 
@@ -139,12 +223,14 @@ def update_order_detail(
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def delete_order_detail(*, session: SessionDep, order_detail_id: int):
+async def delete_order_detail(
+    *, session: AsyncSessionDep, order_detail_id: int
+):
     """
     Delete an order detail by ID.
 
     Args:
-        session (SessionDep): The database session dependency.
+        session (AsyncSessionDep): The database session dependency.
         order_detail_id (int): The ID of the order detail to delete.
 
     Raises:
@@ -154,14 +240,17 @@ def delete_order_detail(*, session: SessionDep, order_detail_id: int):
         dict: A success message.
     """
 
-    order_detail = order_detail_crud.get_order_detail(
+    order_detail = await order_detail_crud.get_order_detail(
         session=session, order_detail_id=order_detail_id
     )
     if not order_detail:
         raise HTTPException(status_code=404, detail="Order Detail not found")
 
-    order_detail_crud.delete_order_detail(
+    await order_detail_crud.delete_order_detail(
         session=session, order_detail_id=order_detail_id
     )
+    await publish_order_details(
+        session, "order_detail.deleted", [order_detail]
+    )
 
     return {"detail": "Order Detail deleted successfully"}
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException
-from app.api.deps import SessionDep
+from app.api.deps import AsyncSessionDep
+from app.api.conditional import ConditionalGetDep
 from app.schemas.role_schema import RoleCreate, RoleUpdate, RolePublic
 from app.crud import role_crud
+from app.crud.table_version_crud import get_table_version
 
 from fastapi import Depends
 from app.auth.auth_bearer import RoleChecker, TokenResponse
@@ -17,8 +19,13 @@ router = APIRouter(tags=["Roles"])
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def get_all_roles(*, session: SessionDep) -> list[RolePublic]:
-    roles = role_crud.get_all_roles(session=session)
+async def get_all_roles(
+    *, session: AsyncSessionDep, conditional: ConditionalGetDep
+):
+    version = await get_table_version(session, "role")
+    if (not_modified := conditional.check(version)) is not None:
+        return not_modified
+    roles = await role_crud.get_all_roles(session=session)
     roles_publics = []
     for role in roles:
         roles_publics.append(RolePublic(role_type=role.role_type, id=role.id))
@@ -26,8 +33,8 @@ def get_all_roles(*, session: SessionDep) -> list[RolePublic]:
 
 
 @router.post("/", response_model=RolePublic)
-def create_role(*, session: SessionDep, role_schema_in: RoleCreate):
-    existing_role_model = role_crud.get_role_by_role_type(
+async def create_role(*, session: AsyncSessionDep, role_schema_in: RoleCreate):
+    existing_role_model = await role_crud.get_role_by_role_type(
         session=session, role_type=role_schema_in.role_type
     )
     if existing_role_model:
@@ -35,7 +42,7 @@ def create_role(*, session: SessionDep, role_schema_in: RoleCreate):
             status_code=400,
             detail="A role already exists with this role type.",
         )
-    role_model = role_crud.create_role(
+    role_model = await role_crud.create_role(
         session=session, role_schema=role_schema_in
     )
     return role_model
@@ -48,8 +55,15 @@ def create_role(*, session: SessionDep, role_schema_in: RoleCreate):
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def get_role_by_id(*, session: SessionDep, role_id: int):
-    role_model = role_crud.get_role_by_id(session=session, role_id=role_id)
+async def get_role_by_id(
+    *, session: AsyncSessionDep, role_id: int, conditional: ConditionalGetDep
+):
+    version = await get_table_version(session, "role")
+    if (not_modified := conditional.check(version)) is not None:
+        return not_modified
+    role_model = await role_crud.get_role_by_id(
+        session=session, role_id=role_id
+    )
     if not role_model:
         raise HTTPException(status_code=404, detail="Role not found")
     return role_model
@@ -62,11 +76,15 @@ def get_role_by_id(*, session: SessionDep, role_id: int):
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def update_role(*, session: SessionDep, role_id: int, role_in: RoleUpdate):
-    role_model = role_crud.get_role_by_id(session=session, role_id=role_id)
+async def update_role(
+    *, session: AsyncSessionDep, role_id: int, role_in: RoleUpdate
+):
+    role_model = await role_crud.get_role_by_id(
+        session=session, role_id=role_id
+    )
     if not role_model:
         raise HTTPException(status_code=404, detail="Role not found")
-    role_with_same_role_type = role_crud.get_role_by_role_type(
+    role_with_same_role_type = await role_crud.get_role_by_role_type(
         session=session, role_type=role_in.role_type
     )
     if (role_with_same_role_type is not None) and (
@@ -76,7 +94,7 @@ def update_role(*, session: SessionDep, role_id: int, role_in: RoleUpdate):
             status_code=400,
             detail="An other role with the same role type already exists.",
         )
-    updated_role = role_crud.update_role(
+    updated_role = await role_crud.update_role(
         session=session, role_id=role_id, role_update=role_in
     )
     return updated_role
@@ -89,10 +107,12 @@ def update_role(*, session: SessionDep, role_id: int, role_in: RoleUpdate):
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def delete_role(*, session: SessionDep, role_id: int):
-    role_model = role_crud.get_role_by_id(session=session, role_id=role_id)
+async def delete_role(*, session: AsyncSessionDep, role_id: int):
+    role_model = await role_crud.get_role_by_id(
+        session=session, role_id=role_id
+    )
     if not role_model:
         raise HTTPException(status_code=404, detail="Role not found")
 
-    role_crud.delete_role(session, role_id=role_id)
+    await role_crud.delete_role(session, role_id=role_id)
     return {"detail": "Role deleted successfully"}
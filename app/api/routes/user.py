@@ -1,6 +1,8 @@
 from typing import Any, List, Dict, Optional
 from fastapi import APIRouter, HTTPException
-from app.api.deps import SessionDep
+from app.api.deps import AsyncSessionDep
+from app.api.pagination import DatedPageDep
+from app.api.routes.order import OrderResponse, order_key, orders_public
 from app.auth.auth_handler import signJWT
 from app.models.user import User
 from app.schemas.user_schema import (
@@ -10,7 +12,7 @@ from app.schemas.user_schema import (
     UserPublic,
     UserLogin,
 )
-from app.schemas.order_schema import OrderPublic
+from app.schemas.order_schema import OrderInclude
 from app.crud import user_crud, role_crud
 
 from fastapi import Depends
@@ -25,15 +27,14 @@ def user_to_userpublic(user: User) -> UserPublic:
     return UserPublic(**user.model_dump(exclude={"roles"}), role_ids=roles_ids)
 
 
-def userupdate_to_user(
-    user_id: int, user_update: UserUpdate, session: SessionDep
+async def userupdate_to_user(
+    user_id: int, user_update: UserUpdate, session: AsyncSessionDep
 ) -> User:
     roles_in_user = []
     if user_update.role_ids:
-        for role_id in user_update.role_ids:
-            roles_in_user.append(
-                role_crud.get_role_by_id(session=session, role_id=role_id)
-            )
+        roles_in_user = await role_crud.get_roles_by_ids(
+            session=session, role_ids=user_update.role_ids
+        )
     return User(
         **user_update.model_dump(exclude={"role_ids"}),
         id=user_id,
@@ -41,14 +42,12 @@ def userupdate_to_user(
     )
 
 
-def usercreate_to_user(
-    user_id: int, user_create: UserCreate, session: SessionDep
+async def usercreate_to_user(
+    user_id: int, user_create: UserCreate, session: AsyncSessionDep
 ) -> User:
-    roles_in_user = []
-    for role_id in user_create.role_ids:
-        roles_in_user.append(
-            role_crud.get_role_by_id(session=session, role_id=role_id)
-        )
+    roles_in_user = await role_crud.get_roles_by_ids(
+        session=session, role_ids=user_create.role_ids
+    )
     return User(
         **user_create.model_dump(exclude={"role_ids"}),
         id=user_id,
@@ -63,19 +62,23 @@ def usercreate_to_user(
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def get_all_users(
+async def get_all_users(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
+    page: DatedPageDep,
 ) -> List[UserPublic]:
-    users = user_crud.get_all_users(session=session)
+    users = await user_crud.get_all_users(
+        session=session, limit=page.fetch_limit, after=page.after
+    )
+    users = page.paginate(users, key=lambda user: (user.created_at, user.id))
     return [user_to_userpublic(user) for user in users]
 
 
 @router.post("/signup", response_model=Dict[str, str])
-def signup_user(
-    *, session: SessionDep, user_schema_public_in: UserPublicCreate
+async def signup_user(
+    *, session: AsyncSessionDep, user_schema_public_in: UserPublicCreate
 ):
-    existing_user = user_crud.get_user_by_email(
+    existing_user = await user_crud.get_user_by_email(
         session, user_schema_public_in.email
     )
     if existing_user:
@@ -85,7 +88,9 @@ def signup_user(
 
     # récupérer l'id du role "customer" pour l'affecter comme valeur par défaut
     #  à un user qui passe par /signup pour s'inscrit
-    customer_role = role_crud.get_role_by_role_type(session, RoleType.customer)
+    customer_role = await role_crud.get_role_by_role_type(
+        session, RoleType.customer
+    )
 
     # pour la création d'un "employee" ou d'un admin,
     #  il faut passer par la route /post
@@ -109,7 +114,7 @@ def signup_user(
         role_ids=[customer_role_id],
     )
 
-    created_user = user_crud.create_user(session, user_schema_in)
+    created_user = await user_crud.create_user(session, user_schema_in)
     user_email = user_to_userpublic(created_user).email
 
     roles = [role.role_type.value for role in created_user.roles]
@@ -118,9 +123,11 @@ def signup_user(
 
 
 @router.post("/login", response_model=TokenResponse)
-def login_user(*, session: SessionDep, user_schema_in: UserLogin):
-    if user_crud.check_user(session, user_schema_in):
-        user_info = user_crud.get_user_by_email(session, user_schema_in.email)
+async def login_user(*, session: AsyncSessionDep, user_schema_in: UserLogin):
+    if await user_crud.check_user(session, user_schema_in):
+        user_info = await user_crud.get_user_by_email(
+            session, user_schema_in.email
+        )
         roles = []
         if user_info:
             roles = [role.role_type.value for role in user_info.roles]
@@ -132,14 +139,16 @@ def login_user(*, session: SessionDep, user_schema_in: UserLogin):
 
 
 @router.post("/", response_model=UserPublic)
-def create_user(*, session: SessionDep, user_schema_in: UserCreate):
-    existing_user = user_crud.get_user_by_email(session, user_schema_in.email)
+async def create_user(*, session: AsyncSessionDep, user_schema_in: UserCreate):
+    existing_user = await user_crud.get_user_by_email(
+        session, user_schema_in.email
+    )
     if existing_user:
         raise HTTPException(
             status_code=400, detail="A user already exists with this email."
         )
 
-    created_user = user_crud.create_user(session, user_schema_in)
+    created_user = await user_crud.create_user(session, user_schema_in)
     return user_to_userpublic(created_user)
 
 
@@ -150,8 +159,10 @@ def create_user(*, session: SessionDep, user_schema_in: UserCreate):
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def get_user_by_id(*, session: SessionDep, user_id: int):
-    user_model = user_crud.get_user_by_id(session=session, user_id=user_id)
+async def get_user_by_id(*, session: AsyncSessionDep, user_id: int):
+    user_model = await user_crud.get_user_by_id(
+        session=session, user_id=user_id
+    )
     if not user_model:
         raise HTTPException(status_code=404, detail="User not found")
     return user_to_userpublic(user_model)
@@ -162,13 +173,17 @@ def get_user_by_id(*, session: SessionDep, user_id: int):
     response_model=UserPublic,
     dependencies=[Depends(RoleChecker(allowed_roles=[RoleType.admin]))],
 )
-def update_user(*, session: SessionDep, user_id: int, user_in: UserUpdate):
-    user_model = user_crud.get_user_by_id(session=session, user_id=user_id)
+async def update_user(
+    *, session: AsyncSessionDep, user_id: int, user_in: UserUpdate
+):
+    user_model = await user_crud.get_user_by_id(
+        session=session, user_id=user_id
+    )
     if not user_model:
         raise HTTPException(status_code=404, detail="User not found")
 
     if user_in.email:
-        user_with_same_email = user_crud.get_user_by_email(
+        user_with_same_email = await user_crud.get_user_by_email(
             session=session, email=user_in.email
         )
         if user_with_same_email and (user_with_same_email.id != user_id):
@@ -176,10 +191,12 @@ def update_user(*, session: SessionDep, user_id: int, user_in: UserUpdate):
                 status_code=400,
                 detail="An other user with the same email already exists.",
             )
-    updated_user = user_crud.update_user(
+    updated_user = await user_crud.update_user(
         session=session,
         user_id=user_id,
-        user_update=userupdate_to_user(user_id, user_in, session=session),
+        user_update=await userupdate_to_user(
+            user_id, user_in, session=session
+        ),
     )
     return user_to_userpublic(updated_user)
 
@@ -189,21 +206,38 @@ def update_user(*, session: SessionDep, user_id: int, user_in: UserUpdate):
     response_model=dict,
     dependencies=[Depends(RoleChecker(allowed_roles=[RoleType.admin]))],
 )
-def delete_user(*, session: SessionDep, user_id: int):
-    user_model = user_crud.get_user_by_id(session=session, user_id=user_id)
+async def delete_user(*, session: AsyncSessionDep, user_id: int):
+    user_model = await user_crud.get_user_by_id(
+        session=session, user_id=user_id
+    )
     if not user_model:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user_crud.delete_user(session, user_id=user_id)
+    await user_crud.delete_user(session, user_id=user_id)
     return {"detail": "User deleted successfully"}
 
 
 @router.get(
     "/{user_id}/orders",
-    response_model=List[OrderPublic],
+    response_model=List[OrderResponse],
     dependencies=[
         Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
     ],
 )
-def get_all_orders_by_customer(*, session: SessionDep, user_id: int):
-    return user_crud.get_all_orders_by_customer(session, user_id)
+async def get_all_orders_by_customer(
+    *,
+    session: AsyncSessionDep,
+    page: DatedPageDep,
+    user_id: int,
+    include: Optional[OrderInclude] = None,
+):
+    # Historique d'un client ; include=details y ajoute les lignes de
+    # toute la page en une seule requête supplémentaire
+    orders = await user_crud.get_all_orders_by_customer(
+        session,
+        user_id,
+        limit=page.fetch_limit,
+        after=page.after,
+        with_details=include is OrderInclude.DETAILS,
+    )
+    return orders_public(page.paginate(orders, key=order_key), include)
@@ -1,8 +1,8 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Optional
 from fastapi import Depends, Request, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from app.auth.auth_handler import decodeJWT
+from app.auth.auth_handler import VerifiedToken, verifyJWT
 
 
 security = HTTPBearer()
@@ -33,9 +33,9 @@ class JWTBearer(HTTPBearer):
         return credentials
 
 
-async def get_current_user_payload(
+async def get_current_token(
     credentials: HTTPAuthorizationCredentials = Depends(JWTBearer()),
-) -> Dict[str, Any]:
+) -> VerifiedToken:
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -48,27 +48,36 @@ async def get_current_user_payload(
             detail="Invalid authentication scheme.",
         )
 
-    decoded_payload = decodeJWT(credentials.credentials)
+    verified = verifyJWT(credentials.credentials)
 
-    if not decoded_payload:
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token or expired token.",
         )
 
-    return decoded_payload
+    return verified
+
+
+async def get_current_user_payload(
+    token: VerifiedToken = Depends(get_current_token),
+) -> Dict[str, Any]:
+    # Copie : le contenu en cache est partagé entre les requêtes
+    return dict(token.payload)
 
 
 # role check
 # On passe la liste des rôles autorisés à l'initialisation
 class RoleChecker:
-    def __init__(self, allowed_roles: List[str]):
-        self.allowed_roles = allowed_roles
-
-    def __call__(self, payload: dict = Depends(get_current_user_payload)):
-        user_roles = payload.get("roles", [])
+    def __init__(self, allowed_roles: Iterable[str]):
+        # Valeurs des rôles (RoleType est un str Enum), comparées aux
+        # rôles du jeton par intersection d'ensembles
+        self.allowed_roles = frozenset(
+            getattr(role, "value", role) for role in allowed_roles
+        )
 
-        if not any(role in self.allowed_roles for role in user_roles):
+    def __call__(self, token: VerifiedToken = Depends(get_current_token)):
+        if self.allowed_roles.isdisjoint(token.roles):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You do not have permission to access this resource.",
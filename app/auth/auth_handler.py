@@ -1,5 +1,8 @@
-from typing import Any, List, Optional
+import hashlib
+import time
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional
 import jwt
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 JWT_SECRET = settings.JWT_SECRET
@@ -7,16 +10,33 @@ JWT_ALGORITHM = settings.JWT_ALGORITHM
 JWT_TOKEN_EXPIRES = settings.JWT_TOKEN_EXPIRES
 
 
+class VerifiedToken(NamedTuple):
+    """Un jeton vérifié : son contenu et ses rôles, prêts à comparer."""
+
+    payload: Dict[str, Any]
+    roles: FrozenSet[str]
+
+
+# Jetons déjà vérifiés, par empreinte (le jeton lui-même n'est pas
+# gardé) ; une entrée expire au plus tard à l'exp de son jeton
+token_cache: TTLCache[bytes, VerifiedToken] = TTLCache(
+    maxsize=settings.JWT_CACHE_SIZE, ttl=float(JWT_TOKEN_EXPIRES)
+)
+
+
 def token_response(token: str) -> dict[str, str]:
     return {"access_token": token}
 
 
 def signJWT(user_id: str, user_roles: List[str]) -> dict[str, str]:
+    issued_at = int(time.time())
     payload = {
         "user_id": user_id,
         "roles": user_roles,
         "expires_in": int(JWT_TOKEN_EXPIRES),
         "token_type": "bearer",
+        "iat": issued_at,
+        "exp": issued_at + int(JWT_TOKEN_EXPIRES),
     }
     token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
     return token_response(token)
@@ -35,3 +55,35 @@ def decodeJWT(token: str) -> Optional[dict[Any, Any]]:
         return None
     except Exception:
         return None
+
+
+def verifyJWT(token: str) -> Optional[VerifiedToken]:
+    """
+    Le contenu d'un jeton valide, vérifié (signature, expiration) une
+    seule fois tant qu'il reste en cache.
+    Args:
+        token (str): Le jeton JWT.
+    Returns:
+        VerifiedToken: Le contenu et les rôles du jeton, à ne pas
+            modifier (partagés entre les requêtes) ; None si le jeton
+            est invalide ou expiré.
+    """
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    verified = token_cache.get(key)
+    if verified is not None:
+        return verified
+    payload = decodeJWT(token)
+    if payload is None:
+        return None
+    roles = payload.get("roles")
+    verified = VerifiedToken(
+        payload=payload,
+        roles=frozenset(roles) if isinstance(roles, list) else frozenset(),
+    )
+    # Sans exp, le jeton n'expire pas : il est revérifié à chaque fois
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        ttl = expires_at - time.time()
+        if ttl > 0:
+            token_cache.set(key, verified, ttl=ttl)
+    return verified
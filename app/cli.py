@@ -0,0 +1,258 @@
+"""
+Commandes d'administration.
+
+Usage (variables d'environnement de l'API chargées) :
+    python -m app.cli rebuild-daily-sales --start 2025-08-01 --end 2025-08-31
+    python -m app.cli purge-idempotency-keys
+    python -m app.cli create-partitions --months 3
+    python -m app.cli archive-orders --months 12
+    python -m app.cli import-menus menus.csv
+    python -m app.cli reprice-menus --percent 5 --category-id 3
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import typer
+
+from app.core import partitions
+from app.core.database import async_engine, async_session_maker
+from app.crud import (
+    archive_crud,
+    daily_sales_crud,
+    idempotency_crud,
+    menu_crud,
+    menu_import_crud,
+)
+from app.crud.menu_crud import UnknownMenuError
+from app.crud.menu_import_crud import ImportFormat, MenuImport
+
+cli = typer.Typer(help="Resto Simplon administration commands.")
+
+# Jours recalculés par transaction, pour ne pas verrouiller trop longtemps
+REBUILD_CHUNK_DAYS = 31
+
+DateOption = typer.Option(None, formats=["%Y-%m-%d"])
+
+
+@cli.callback()
+def main() -> None:
+    # Force le mode « groupe de commandes », même avec une seule commande
+    pass
+
+
+async def rebuild_daily_sales(start: Optional[date], end: date) -> int:
+    days = 0
+    try:
+        async with async_session_maker() as session:
+            if start is None:
+                # Le plus ancien jour, en base ou dans l'archive
+                oldest = [
+                    await daily_sales_crud.get_first_order_day(session),
+                    *archive_crud.archived_months_between(date.min, end)[:1],
+                ]
+                start = min((day for day in oldest if day), default=None)
+            while start is not None and start <= end:
+                chunk_end = min(
+                    start + timedelta(days=REBUILD_CHUNK_DAYS - 1), end
+                )
+                await daily_sales_crud.rebuild_daily_sales(
+                    session, start, chunk_end
+                )
+                typer.echo(f"daily sales rebuilt from {start} to {chunk_end}")
+                days += (chunk_end - start).days + 1
+                start = chunk_end + timedelta(days=1)
+    finally:
+        await async_engine.dispose()
+    return days
+
+
+@cli.command("rebuild-daily-sales")
+def rebuild_daily_sales_command(
+    start: Optional[datetime] = DateOption,
+    end: Optional[datetime] = DateOption,
+):
+    """
+    Recompute the daily sales rollup from START to END (inclusive).
+    Defaults: from the day of the oldest order, archived or not, to today
+    (UTC).
+    """
+    last_day = end.date() if end else datetime.now(timezone.utc).date()
+    days = asyncio.run(
+        rebuild_daily_sales(start.date() if start else None, last_day)
+    )
+    typer.echo(f"{days} day(s) rebuilt")
+
+
+async def purge_idempotency_keys() -> int:
+    try:
+        async with async_session_maker() as session:
+            return await idempotency_crud.delete_expired_keys(session)
+    finally:
+        await async_engine.dispose()
+
+
+@cli.command("purge-idempotency-keys")
+def purge_idempotency_keys_command():
+    """
+    Delete the expired Idempotency-Key responses (to run periodically).
+    """
+    deleted = asyncio.run(purge_idempotency_keys())
+    typer.echo(f"{deleted} expired key(s) deleted")
+
+
+async def create_partitions(start: date, months: int) -> List[str]:
+    try:
+        async with async_engine.begin() as connection:
+            return await connection.run_sync(
+                partitions.create_monthly_partitions, start, months
+            )
+    finally:
+        await async_engine.dispose()
+
+
+@cli.command("create-partitions")
+def create_partitions_command(
+    months: int = typer.Option(partitions.MONTHS_AHEAD, min=0),
+):
+    """
+    Create the monthly partitions of the orders and order details, from
+    the current month (UTC) to MONTHS months ahead. Existing partitions
+    are kept: run it periodically (e.g. every month).
+    """
+    today = datetime.now(timezone.utc).date()
+    created = asyncio.run(create_partitions(today, months))
+    for name in created:
+        typer.echo(f"partition {name} created")
+    typer.echo(f"{len(created)} partition(s) created")
+
+
+async def archive_orders(before: date, batch_size: int) -> int:
+    archived = 0
+    try:
+        async with async_session_maker() as session:
+            while (
+                month := await archive_crud.get_first_archivable_month(
+                    session, before
+                )
+            ) is not None:
+                count = 0
+                while batch := await archive_crud.archive_batch(
+                    session, month, before, batch_size
+                ):
+                    count += batch
+                typer.echo(f"{month:%Y-%m}: {count} order(s) archived")
+                archived += count
+    finally:
+        await async_engine.dispose()
+    return archived
+
+
+@cli.command("archive-orders")
+def archive_orders_command(
+    months: int = typer.Option(12, min=1),
+    batch_size: int = typer.Option(1000, min=1),
+):
+    """
+    Move the PAID and CANCELLED orders created more than MONTHS months
+    ago (whole months, UTC), with their details, to the archive files of
+    ARCHIVE_DIR. Rows are deleted by batches of BATCH_SIZE orders, one
+    transaction each.
+    """
+    today = datetime.now(timezone.utc).date()
+    before = partitions.add_months(today, -months)
+    archived = asyncio.run(archive_orders(before, batch_size))
+    typer.echo(f"{archived} order(s) archived before {before}")
+
+
+async def import_menus(records: List[dict]) -> MenuImport:
+    try:
+        async with async_session_maker() as session:
+            return await menu_import_crud.import_menus(session, records)
+    finally:
+        await async_engine.dispose()
+
+
+@cli.command("import-menus")
+def import_menus_command(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False),
+    format: Optional[ImportFormat] = None,
+):
+    """
+    Create or update menus by name from a CSV file (with a header line)
+    or a JSON array: columns name, price, category_id, description and
+    stock (optional). FORMAT defaults to the file extension.
+    """
+    try:
+        records = menu_import_crud.read_records(
+            path.read_bytes(),
+            format or menu_import_crud.guess_format(path.name),
+        )
+    except ValueError as error:
+        raise typer.BadParameter(str(error), param_hint="PATH")
+    result = asyncio.run(import_menus(records))
+    for rejected in result.errors:
+        typer.echo(
+            f"row {rejected.row} ({rejected.name}): {rejected.error}",
+            err=True,
+        )
+    typer.echo(
+        f"{len(result.created)} menu(s) created, "
+        f"{len(result.updated)} updated, {result.unchanged} unchanged, "
+        f"{len(result.errors)} rejected"
+    )
+    if result.errors:
+        raise typer.Exit(code=1)
+
+
+async def reprice_menus(
+    percent: Optional[float],
+    category_id: Optional[int],
+    prices: Optional[Dict[int, float]],
+) -> Dict[int, float]:
+    try:
+        async with async_session_maker() as session:
+            if prices is not None:
+                return await menu_crud.set_prices(session, prices)
+            return await menu_crud.increase_prices(
+                session, percent or 0, category_id
+            )
+    finally:
+        await async_engine.dispose()
+
+
+@cli.command("reprice-menus")
+def reprice_menus_command(
+    percent: Optional[float] = typer.Option(None, min=-99.99),
+    category_id: Optional[int] = None,
+    prices: Optional[Path] = typer.Option(None, exists=True, dir_okay=False),
+):
+    """
+    Change the price of many menus in a single UPDATE: by PERCENT (of
+    the menus of CATEGORY_ID, or of every menu), or from the PRICES
+    file (CSV or JSON, columns id and price).
+    """
+    if (percent is None) == (prices is None):
+        raise typer.BadParameter("use --percent or --prices (not both)")
+    price_list = None
+    if prices is not None:
+        try:
+            records = menu_import_crud.read_records(
+                prices.read_bytes(), menu_import_crud.guess_format(prices.name)
+            )
+            price_list = {
+                int(record["id"]): float(record["price"]) for record in records
+            }
+        except (KeyError, ValueError) as error:
+            raise typer.BadParameter(str(error), param_hint="--prices")
+    try:
+        changed = asyncio.run(reprice_menus(percent, category_id, price_list))
+    except UnknownMenuError as error:
+        raise typer.BadParameter(str(error), param_hint="--prices")
+    typer.echo(f"{len(changed)} menu price(s) changed")
+
+
+if __name__ == "__main__":
+    cli()
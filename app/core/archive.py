@@ -0,0 +1,193 @@
+"""
+Fichiers d'archive des commandes clôturées.
+
+Un répertoire par mois UTC de création (`<ARCHIVE_DIR>/2025-08/`), un
+fichier par lot archivé et par table (`order-<premier id>.json.gz`,
+`orderdetail-<premier id>.json.gz`). Un fichier est un objet JSON
+compressé (gzip) rangé par colonne : les valeurs d'une colonne se
+suivent, ce qui se compresse bien et se relit colonne par colonne, sans
+dépendance hors de la bibliothèque standard.
+"""
+
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime
+from enum import Enum
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Sequence,
+    Tuple,
+)
+
+MONTH_DIR = re.compile(r"^(\d{4})-(\d{2})$")
+
+
+def month_dir(root: Path, month: date) -> Path:
+    """Répertoire des archives du mois de `month`."""
+    return root / f"{month:%Y-%m}"
+
+
+def archived_months(root: Path) -> List[date]:
+    """
+    Les mois archivés, du plus ancien au plus récent.
+    Args:
+        root (Path): Répertoire des archives.
+    Returns:
+        List[date]: Le premier jour de chaque mois archivé.
+    """
+    if not root.is_dir():
+        return []
+    months = []
+    for path in root.iterdir():
+        match = MONTH_DIR.match(path.name)
+        if match and path.is_dir():
+            months.append(date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+def _encode(value: Any) -> Any:
+    # Les enums sont archivés par nom, comme en base
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def write_part(
+    root: Path, month: date, table: str, rows: Sequence[Mapping[str, Any]]
+) -> Path:
+    """
+    Écrit un lot de lignes d'une table dans un fichier du mois. Le
+    fichier est écrit à côté puis renommé : un lecteur ne voit jamais de
+    fichier partiel.
+    Args:
+        root (Path): Répertoire des archives.
+        month (date): Un jour du mois archivé.
+        table (str): Nom de la table.
+        rows (Sequence[Mapping]): Les lignes (au moins une, avec un id).
+    Returns:
+        Path: Le fichier écrit.
+    """
+    names = list(rows[0].keys())
+    content = {
+        "table": table,
+        "datetime_columns": [
+            name for name in names if isinstance(rows[0][name], datetime)
+        ],
+        "columns": {
+            name: [_encode(row[name]) for row in rows] for name in names
+        },
+    }
+    directory = month_dir(root, month)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{table}-{rows[0]['id']}.json.gz"
+    partial = path.with_name(f".{path.name}.tmp")
+    with gzip.open(partial, "wt", encoding="utf-8") as file:
+        json.dump(content, file, separators=(",", ":"))
+    os.replace(partial, path)
+    return path
+
+
+def read_part(path: Path) -> List[Dict[str, Any]]:
+    """
+    Relit un fichier d'archive.
+    Args:
+        path (Path): Le fichier.
+    Returns:
+        List[Dict]: Les lignes, les dates relues en datetime et les
+            enums laissés par nom.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        content = json.load(file)
+    columns = content["columns"]
+    for name in content["datetime_columns"]:
+        columns[name] = [
+            None if value is None else datetime.fromisoformat(value)
+            for value in columns[name]
+        ]
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def month_parts(root: Path, month: date, table: str) -> List[Path]:
+    """Les fichiers d'une table pour un mois, par nom."""
+    return sorted(month_dir(root, month).glob(f"{table}-*.json.gz"))
+
+
+class PartGroup(NamedTuple):
+    """Fichiers dont les plages de clés se chevauchent."""
+
+    low: Any
+    high: Any
+    paths: List[Path]
+
+
+def group_parts(
+    paths: Sequence[Path], key: Callable[[Dict[str, Any]], Any]
+) -> List[PartGroup]:
+    """
+    Regroupe des fichiers par plages de clés : chaque fichier est lu une
+    fois (un seul en mémoire à la fois) pour sa plus petite et sa plus
+    grande clé, puis les fichiers dont les plages se chevauchent sont
+    réunis. Relire les groupes dans l'ordre donne les lignes dans
+    l'ordre des clés, un groupe en mémoire à la fois.
+    Args:
+        paths (Sequence[Path]): Les fichiers, par nom.
+        key (Callable): La clé de tri d'une ligne.
+    Returns:
+        List[PartGroup]: Les groupes, dans l'ordre des clés ; les
+            fichiers d'un groupe restent dans l'ordre de `paths`.
+    """
+    ranges: List[Tuple[Any, Any, int]] = []
+    for index, path in enumerate(paths):
+        keys = [key(row) for row in read_part(path)]
+        if keys:
+            ranges.append((min(keys), max(keys), index))
+    # [plus petite clé, plus grande clé, indices des fichiers]
+    merged: List[List[Any]] = []
+    for low, high, index in sorted(ranges):
+        if merged and low <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], high)
+            merged[-1][2].append(index)
+        else:
+            merged.append([low, high, [index]])
+    return [
+        PartGroup(low, high, [paths[index] for index in sorted(indexes)])
+        for low, high, indexes in merged
+    ]
+
+
+def read_parts(paths: Sequence[Path]) -> List[Dict[str, Any]]:
+    """
+    Les lignes de plusieurs fichiers, triées par id. Une ligne archivée
+    deux fois n'est renvoyée qu'une fois (celle du dernier fichier).
+    """
+    rows: Dict[Any, Dict[str, Any]] = {}
+    for path in paths:
+        for row in read_part(path):
+            rows[row["id"]] = row
+    return [rows[key] for key in sorted(rows)]
+
+
+def read_month(root: Path, month: date, table: str) -> List[Dict[str, Any]]:
+    """
+    Les lignes archivées d'une table pour un mois, triées par id. Une
+    ligne archivée deux fois (archivage interrompu puis relancé) n'est
+    renvoyée qu'une fois.
+    Args:
+        root (Path): Répertoire des archives.
+        month (date): Un jour du mois.
+        table (str): Nom de la table.
+    Returns:
+        List[Dict]: Les lignes (vide si le mois n'est pas archivé).
+    """
+    return read_parts(month_parts(root, month, table))
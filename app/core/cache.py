@@ -0,0 +1,89 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Cache LRU en mémoire (par processus) dont les entrées expirent après
+    `ttl` secondes.
+
+    Au-delà de `maxsize` entrées, la moins récemment lue est évincée.
+    Les compteurs de succès / échecs permettent de suivre son efficacité.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        La valeur en cache pour `key`, ou None si absente ou expirée.
+        Args:
+            key (Hashable): La clé.
+        Returns:
+            La valeur, ou None.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry[0] <= self.clock():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """
+        Met `value` en cache pour `key` pendant `ttl` secondes.
+        Args:
+            key (Hashable): La clé.
+            value: La valeur (None n'est pas distinguable d'une absence).
+            ttl (float, optional): Durée de cette entrée, plafonnée par
+                celle du cache.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self.entries[key] = (self.clock() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: K) -> None:
+        """
+        Oublie `key` (sans effet si absente).
+        Args:
+            key (Hashable): La clé.
+        """
+        self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Vide le cache (les compteurs sont conservés)."""
+        self.entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Taille et compteurs du cache."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -9,11 +9,66 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_PASSWORD: str
     DATABASE_URL: str
+    # Réplica en lecture seule (optionnel) pour les routes GET
+    DATABASE_REPLICA_URL: Optional[str] = None
     JWT_SECRET: str
     JWT_ALGORITHM: str
     JWT_TOKEN_EXPIRES: str
+    # Jetons vérifiés gardés en mémoire (par worker), jusqu'à leur exp
+    JWT_CACHE_SIZE: int = 4096
     API_V1_STR: str = "/api/v1"
 
+    # Pool de connexions (par engine et par worker uvicorn)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_PRE_PING: bool = False
+    DB_POOL_RECYCLE: int = -1
+    # Intervalle (secondes) de remontée des statistiques du pool, 0 = off
+    DB_POOL_METRICS_INTERVAL: float = 0
+
+    # Journal SQL : echo complet (debug) ou requêtes lentes uniquement
+    DB_ECHO: bool = False
+    SLOW_QUERY_MS: float = 200
+    # Part des requêtes lentes pour lesquelles on capture un EXPLAIN
+    SLOW_QUERY_EXPLAIN_RATE: float = 0.0
+
+    # Détection N+1 : une même forme de requête répétée plus de N fois
+    # dans une requête HTTP est signalée (ou lève une erreur en test)
+    QUERY_REPEAT_THRESHOLD: int = 10
+    QUERY_REPEAT_RAISE: bool = False
+
+    # Fil cuisine (WebSocket/SSE) : événements gardés pour la reprise
+    # et intervalle (secondes) des messages de maintien de connexion
+    KITCHEN_FEED_BUFFER: int = 1000
+    KITCHEN_FEED_HEARTBEAT: float = 15
+
+    # Cache des statistiques de ventes : durée (secondes) et nombre de
+    # résultats gardés (par requête et période)
+    ANALYTICS_CACHE_TTL: float = 300
+    ANALYTICS_CACHE_SIZE: int = 256
+
+    # Clés d'idempotence des créations : durée de conservation (secondes)
+    # des réponses rejouées, durée de réservation d'une clé en cours de
+    # traitement (reprise ensuite par une relance) et taille du cache
+    # mémoire devant la table
+    IDEMPOTENCY_KEY_TTL: float = 86400
+    IDEMPOTENCY_KEY_LEASE: float = 30
+    IDEMPOTENCY_CACHE_SIZE: int = 1024
+
+    # Cache du catalogue (menus, catégories) : durée (secondes) et nombre
+    # d'entrées par table. Un autre worker ne voit une modification
+    # qu'à l'expiration de ses entrées
+    CATALOG_CACHE_TTL: float = 60
+    CATALOG_CACHE_SIZE: int = 1024
+    # Carte publique pré-calculée : intervalle (secondes) entre deux
+    # lectures de la version du catalogue, 0 = à chaque requête
+    MENU_SNAPSHOT_CHECK_INTERVAL: float = 1
+
+    # Répertoire des archives des commandes clôturées (un sous-répertoire
+    # par mois, voir `python -m app.cli archive-orders`)
+    ARCHIVE_DIR: str = "archive"
+
     # class Config:
     #     env_file = ".env"
     #     extra = "ignore"  # option temporaire pour accepter
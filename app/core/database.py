@@ -1,8 +1,116 @@
+from typing import Any, Dict, Optional
+from sqlalchemy import Select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.config import settings
+from app.core.pool_stats import (
+    TimedAsyncQueuePool,
+    TimedQueuePool,
+    instrument_engine,
+)
+from app.core.query_counter import install_query_counter
+from app.core.query_log import install_query_log
+
+# Paramètres du pool, communs aux deux engines
+pool_options: Dict[str, Any] = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+}
 
 # L'engine de la base de données
-engine = create_engine(str(settings.DATABASE_URL), echo=True)
+# (synchrone : utilisé par alembic, les scripts et les benchmarks)
+engine = create_engine(
+    str(settings.DATABASE_URL),
+    echo=settings.DB_ECHO,
+    poolclass=TimedQueuePool,
+    **pool_options,
+)
+
+# L'engine asynchrone (psycopg 3 en mode async) utilisé par l'API
+async_engine = create_async_engine(
+    str(settings.DATABASE_URL),
+    echo=settings.DB_ECHO,
+    poolclass=TimedAsyncQueuePool,
+    **pool_options,
+)
+
+# L'engine du réplica en lecture seule, si configuré
+replica_engine: Optional[AsyncEngine] = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = create_async_engine(
+        settings.DATABASE_REPLICA_URL,
+        echo=settings.DB_ECHO,
+        poolclass=TimedAsyncQueuePool,
+        **pool_options,
+    )
+
+# Journal des requêtes lentes et compteur de requêtes par requête HTTP
+install_query_log(async_engine.sync_engine)
+install_query_log(engine)
+install_query_counter(async_engine.sync_engine)
+
+# Statistiques des pools (exposées sur /admin/pool)
+pool_stats = [
+    instrument_engine("primary", async_engine.sync_engine),
+    instrument_engine("sync", engine),
+]
+
+if replica_engine is not None:
+    install_query_log(replica_engine.sync_engine)
+    install_query_counter(replica_engine.sync_engine)
+    pool_stats.append(instrument_engine("replica", replica_engine.sync_engine))
+
+
+class RoutingSession(Session):
+    """
+    Session qui route les lectures vers le réplica et les écritures
+    vers le primaire.
+
+    Les lectures ne partent vers le réplica que si la session est
+    ouverte en lecture seule (routes GET). Dès qu'une écriture a lieu
+    (flush, UPDATE/INSERT/DELETE, SELECT ... FOR UPDATE), la session
+    reste collée au primaire pour lire ses propres écritures.
+    """
+
+    def __init__(self, *args: Any, read_only: bool = False, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.read_only = read_only
+        self.wrote = False
+
+    def get_bind(  # type: ignore[override]
+        self, mapper: Any = None, clause: Any = None, **kwargs: Any
+    ) -> Engine:
+        if (
+            self.read_only
+            and not self.wrote
+            and not self._flushing
+            and replica_engine is not None
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+        ):
+            return replica_engine.sync_engine
+        self.wrote = True
+        return async_engine.sync_engine
+
+
+# Fabrique de sessions asynchrones.
+# expire_on_commit=False : les objets restent lisibles après un commit
+# sans déclencher de lazy-load (impossible hors greenlet en async).
+async_session_maker = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    expire_on_commit=False,
+)
 
 
 def create_db_and_tables():
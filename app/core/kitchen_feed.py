@@ -0,0 +1,204 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncGenerator,
+    Collection,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+)
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class KitchenEvent:
+    """
+    Un événement du fil cuisine : création, changement de statut ou
+    suppression d'une commande ou d'une ligne de commande.
+    """
+
+    seq: int
+    type: str
+    data: Dict[str, Any]
+    status: Optional[str] = None
+    category_id: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"seq": self.seq, "type": self.type, "data": self.data}
+
+
+# Événement envoyé à un client qui ne peut pas reprendre là où il en était
+# (séquence trop ancienne ou d'un autre processus) : il doit se resynchroniser
+# par l'API REST avant de suivre le fil.
+RESET_EVENT_TYPE = "reset"
+
+
+@dataclass
+class StationFilter:
+    """
+    Filtre d'un poste : statuts et catégories suivis (vide = tous).
+    Les événements de commande n'ont pas de catégorie et passent le
+    filtre de catégories.
+    """
+
+    statuses: Set[str] = field(default_factory=set)
+    category_ids: Set[int] = field(default_factory=set)
+
+    def matches(self, event: KitchenEvent) -> bool:
+        if event.type == RESET_EVENT_TYPE:
+            return True
+        if self.statuses and event.status not in self.statuses:
+            return False
+        if (
+            self.category_ids
+            and event.category_id is not None
+            and event.category_id not in self.category_ids
+        ):
+            return False
+        return True
+
+
+class Subscription:
+    """File d'événements d'un client connecté au fil."""
+
+    def __init__(self, station: StationFilter, max_queue: int):
+        self.station = station
+        self.queue: asyncio.Queue[KitchenEvent] = asyncio.Queue(
+            maxsize=max_queue
+        )
+        # Client trop lent : il est déconnecté une fois sa file vidée et
+        # reprendra depuis sa dernière séquence reçue
+        self.overflowed = False
+
+    def push(self, event: KitchenEvent) -> None:
+        if self.overflowed or not self.station.matches(event):
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class KitchenFeed:
+    """
+    Diffusion en mémoire (par processus) des événements cuisine.
+
+    Chaque événement reçoit un numéro de séquence croissant et reste
+    dans un tampon circulaire des `buffer_size` derniers événements :
+    un client qui se reconnecte avec sa dernière séquence reçoit ce
+    qu'il a manqué, puis le direct.
+    """
+
+    def __init__(self, buffer_size: int = 1000, max_queue: int = 1000):
+        self.max_queue = max_queue
+        self.last_seq = 0
+        self.buffer: Deque[KitchenEvent] = deque(maxlen=buffer_size)
+        self.subscriptions: Set[Subscription] = set()
+        # Catégorie de chaque menu, pour le filtre par poste
+        self.menu_categories: Dict[int, Optional[int]] = {}
+
+    def publish(
+        self,
+        event_type: str,
+        data: Dict[str, Any],
+        status: Optional[str] = None,
+        category_id: Optional[int] = None,
+    ) -> KitchenEvent:
+        """
+        Publie un événement à tous les abonnés dont le filtre correspond.
+        Args:
+            event_type (str): Le type, par exemple "order_detail.status".
+            data (dict): La représentation publique de l'objet.
+            status (str, optional): Le statut de l'objet.
+            category_id (int, optional): La catégorie du menu de la ligne.
+        Returns:
+            KitchenEvent: L'événement publié.
+        """
+        self.last_seq += 1
+        event = KitchenEvent(
+            seq=self.last_seq,
+            type=event_type,
+            data=data,
+            status=status,
+            category_id=category_id,
+        )
+        self.buffer.append(event)
+        for subscription in self.subscriptions:
+            subscription.push(event)
+        return event
+
+    def missed_events(self, since: int) -> Optional[List[KitchenEvent]]:
+        """
+        Les événements postérieurs à `since` encore dans le tampon, ou
+        None s'il en manque (le client doit se resynchroniser).
+        """
+        if since > self.last_seq:
+            return None
+        if since < self.last_seq and self.buffer[0].seq > since + 1:
+            return None
+        return [event for event in self.buffer if event.seq > since]
+
+    async def subscribe(
+        self,
+        station: StationFilter,
+        since: Optional[int] = None,
+        heartbeat: Optional[float] = None,
+    ) -> AsyncGenerator[Optional[KitchenEvent], None]:
+        """
+        Suit le fil : d'abord les événements manqués depuis `since`,
+        puis les nouveaux. S'arrête si le client ne suit pas le rythme.
+        Args:
+            station (StationFilter): Le filtre du poste.
+            since (int, optional): La dernière séquence reçue.
+            heartbeat (float, optional): Délai (secondes) sans événement
+                après lequel None est produit, pour maintenir la connexion.
+        Yields:
+            KitchenEvent: Les événements du poste, dans l'ordre (ou None).
+        """
+        subscription = Subscription(station, self.max_queue)
+        # Pas d'await entre l'abonnement et la lecture du tampon : chaque
+        # événement est soit rejoué depuis le tampon, soit mis en file
+        self.subscriptions.add(subscription)
+        missed = [] if since is None else self.missed_events(since)
+        try:
+            if missed is None:
+                yield KitchenEvent(
+                    seq=self.last_seq, type=RESET_EVENT_TYPE, data={}
+                )
+            else:
+                for event in missed:
+                    if station.matches(event):
+                        yield event
+            while True:
+                # La file est pleine quand le débordement survient : le
+                # client la vide avant d'être déconnecté
+                if subscription.overflowed and subscription.queue.empty():
+                    logger.warning("kitchen feed subscriber too slow, dropped")
+                    return
+                try:
+                    yield await asyncio.wait_for(
+                        subscription.queue.get(), heartbeat
+                    )
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self.subscriptions.discard(subscription)
+
+    def unknown_menus(self, menu_ids: Collection[int]) -> Set[int]:
+        """Les menus dont la catégorie n'est pas encore connue."""
+        return {
+            menu_id
+            for menu_id in menu_ids
+            if menu_id not in self.menu_categories
+        }
+
+
+kitchen_feed = KitchenFeed(buffer_size=settings.KITCHEN_FEED_BUFFER)
@@ -0,0 +1,150 @@
+"""
+Partitions mensuelles des tables "order" et orderdetail.
+
+Les deux tables sont partitionnées par intervalle sur created_at (celui
+de la commande, recopié sur ses lignes), une partition par mois UTC :
+"order_p2025_08" contient les commandes d'août 2025. Une partition par
+défaut ("order_default") reçoit les lignes d'un mois dont la partition
+n'a pas encore été créée ; la commande `python -m app.cli
+create-partitions` crée les mois à venir à l'avance, et déplace dans la
+partition créée les lignes du mois déjà reçues par défaut.
+"""
+
+import re
+from datetime import date
+from typing import List
+
+from sqlalchemy import Connection, text
+
+# Tables partitionnées, dans l'ordre de création (les lignes référencent
+# les commandes)
+PARTITIONED_TABLES = ("order", "orderdetail")
+
+# Mois créés à l'avance, en plus du mois courant
+MONTHS_AHEAD = 3
+
+PARTITION_NAME = re.compile(
+    r"^(?:%s)_(?:p\d{4}_\d{2}|default)$"
+    % "|".join(re.escape(table) for table in PARTITIONED_TABLES)
+)
+
+
+def month_of(day: date) -> date:
+    """Le premier jour du mois de `day`."""
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    """
+    Le premier jour du mois `months` mois après celui de `month`.
+    Args:
+        month (date): Un jour du mois de départ.
+        months (int): Nombre de mois à ajouter (négatif : à retirer).
+    Returns:
+        date: Le premier jour du mois obtenu.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Nom de la partition de `table` pour le mois de `month`."""
+    return f"{table}_p{month:%Y_%m}"
+
+
+def is_partition(name: str) -> bool:
+    """Si `name` est le nom d'une partition (mensuelle ou par défaut)."""
+    return PARTITION_NAME.match(name) is not None
+
+
+def partition_ddl(table: str, month: date) -> str:
+    """CREATE TABLE de la partition de `table` pour un mois."""
+    month = month_of(month)
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table, month)}" '
+        f'PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+    )
+
+
+def month_filter(month: date) -> str:
+    """Condition SQL sur created_at des lignes du mois de `month`."""
+    month = month_of(month)
+    return f"created_at >= '{month}' AND created_at < '{add_months(month, 1)}'"
+
+
+def create_month(
+    connection: Connection, month: date, tables: List[str]
+) -> None:
+    """
+    Crée les partitions d'un mois pour `tables`. PostgreSQL refuse de
+    créer la partition d'un mois dont la partition par défaut contient
+    déjà des lignes : elles sont sorties dans une table temporaire (les
+    lignes avant leurs commandes, à cause de la clé étrangère), puis
+    réinsérées dans la partition créée, dans la même transaction.
+    Args:
+        connection (Connection): La connexion (dans une transaction).
+        month (date): Un jour du mois.
+        tables (List[str]): Les tables dont la partition manque, dans
+            l'ordre de PARTITIONED_TABLES.
+    """
+    for table in reversed(tables):
+        connection.execute(
+            text(f'CREATE TEMP TABLE "moved_{table}" (LIKE "{table}")')
+        )
+        connection.execute(
+            text(
+                f"WITH moved AS ("
+                f'DELETE FROM "{table}_default" WHERE {month_filter(month)} '
+                f"RETURNING *) "
+                f'INSERT INTO "moved_{table}" SELECT * FROM moved'
+            )
+        )
+    for table in tables:
+        connection.execute(text(partition_ddl(table, month)))
+        connection.execute(
+            text(f'INSERT INTO "{table}" SELECT * FROM "moved_{table}"')
+        )
+        connection.execute(text(f'DROP TABLE "moved_{table}"'))
+
+
+def create_monthly_partitions(
+    connection: Connection, start: date, months: int
+) -> List[str]:
+    """
+    Crée les partitions manquantes des tables partitionnées, du mois de
+    `start` inclus aux `months` mois suivants, en y déplaçant les lignes
+    du mois reçues par les partitions par défaut. Les index et clés
+    étrangères des tables sont créés sur chaque partition par
+    PostgreSQL. Ne valide pas la transaction ; en async, passer par
+    `AsyncConnection.run_sync`.
+    Args:
+        connection (Connection): La connexion (dans une transaction).
+        start (date): Un jour du premier mois.
+        months (int): Nombre de mois créés après celui de `start`.
+    Returns:
+        List[str]: Les partitions créées (vide si toutes existaient).
+    """
+    existing = set(
+        connection.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = ANY(:tables)"
+            ),
+            {"tables": list(PARTITIONED_TABLES)},
+        ).scalars()
+    )
+    created: List[str] = []
+    for offset in range(months + 1):
+        month = add_months(start, offset)
+        missing = [
+            table
+            for table in PARTITIONED_TABLES
+            if partition_name(table, month) not in existing
+        ]
+        if missing:
+            create_month(connection, month, missing)
+            created.extend(partition_name(table, month) for table in missing)
+    return created
@@ -0,0 +1,179 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+MetricsHook = Callable[[str, Dict[str, Any]], None]
+
+_metrics_hooks: List[MetricsHook] = []
+
+
+class PoolStats:
+    """
+    Compteurs d'utilisation d'un pool de connexions.
+
+    Les compteurs sont alimentés par les événements du pool
+    (connect / close / checkout / checkin) et par les pools
+    instrumentés ci-dessous (temps d'attente d'acquisition).
+    """
+
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "close_detached", self._on_close)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_connect(self, *args: Any) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_close(self, *args: Any) -> None:
+        with self._lock:
+            self.closes += 1
+
+    def _on_invalidate(self, *args: Any) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def _on_checkout(self, *args: Any) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, *args: Any) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Photographie de l'état du pool et des compteurs cumulés.
+        Returns:
+            dict: Statistiques du pool pour ce worker.
+        """
+        pool = self.engine.pool
+        data: Dict[str, Any] = {"pool": self.name, "pid": os.getpid()}
+        if isinstance(pool, QueuePool):
+            data.update(
+                pool_size=pool.size(),
+                max_overflow=pool._max_overflow,
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow_in_use=max(pool.overflow(), 0),
+            )
+        with self._lock:
+            acquisitions = self.checkouts + self.timeouts
+            data.update(
+                checkouts=self.checkouts,
+                checkins=self.checkins,
+                timeouts=self.timeouts,
+                connects=self.connects,
+                closes=self.closes,
+                invalidations=self.invalidations,
+                wait_avg_ms=(
+                    self.wait_total / acquisitions * 1000
+                    if acquisitions
+                    else 0.0
+                ),
+                wait_max_ms=self.wait_max * 1000,
+            )
+        return data
+
+
+class _TimedPoolMixin(Pool):
+    """Mesure le temps d'attente pour obtenir une connexion du pool."""
+
+    pool_stats: Optional[PoolStats] = None
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if self.pool_stats is not None:
+                self.pool_stats.record_wait(
+                    time.perf_counter() - start, timed_out
+                )
+
+    def recreate(self) -> Any:
+        # engine.dispose() recrée le pool : on conserve les statistiques.
+        new_pool = super().recreate()
+        if isinstance(new_pool, _TimedPoolMixin):
+            new_pool.pool_stats = self.pool_stats
+        return new_pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(name: str, engine: Engine) -> PoolStats:
+    """
+    Branche les statistiques sur l'engine (et son pool instrumenté).
+    Args:
+        name (str): Nom du pool dans les statistiques.
+        engine (Engine): L'engine (synchrone) à instrumenter.
+    Returns:
+        PoolStats: Les statistiques du pool.
+    """
+    stats = PoolStats(name, engine)
+    if isinstance(engine.pool, _TimedPoolMixin):
+        engine.pool.pool_stats = stats
+    return stats
+
+
+def register_metrics_hook(hook: MetricsHook) -> None:
+    """
+    Enregistre un hook appelé avec (nom du pool, statistiques)
+    à chaque remontée périodique (export Prometheus, statsd...).
+    """
+    _metrics_hooks.append(hook)
+
+
+def log_metrics_hook(name: str, stats: Dict[str, Any]) -> None:
+    logger.info("pool %s: %s", name, stats)
+
+
+def emit_pool_metrics(all_stats: List[PoolStats]) -> None:
+    """Transmet une photographie de chaque pool aux hooks enregistrés."""
+    for stats in all_stats:
+        snapshot = stats.snapshot()
+        for hook in _metrics_hooks or [log_metrics_hook]:
+            try:
+                hook(stats.name, snapshot)
+            except Exception:
+                logger.exception("pool metrics hook failed")
@@ -0,0 +1,125 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.core.query_log import find_caller, normalize_sql
+
+logger = logging.getLogger(__name__)
+
+
+class RepeatedQueryError(RuntimeError):
+    """Une même requête est répétée trop de fois (motif N+1)."""
+
+
+class QueryStats:
+    """
+    Requêtes SQL exécutées pendant une requête HTTP (ou un bloc
+    `track_queries`) : nombre, durée cumulée et répétitions par forme.
+    """
+
+    def __init__(self, threshold: int, raise_on_repeat: bool):
+        self.threshold = threshold
+        self.raise_on_repeat = raise_on_repeat
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.duration += seconds
+        shape = normalize_sql(statement)
+        self.shapes[shape] += 1
+        if self.shapes[shape] == self.threshold + 1:
+            message = (
+                f"query repeated more than {self.threshold} times "
+                f"(N+1?) from {find_caller()}: {shape}"
+            )
+            if self.raise_on_repeat:
+                raise RepeatedQueryError(message)
+            logger.warning(message)
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+@contextmanager
+def track_queries(
+    threshold: Optional[int] = None, raise_on_repeat: Optional[bool] = None
+) -> Iterator[QueryStats]:
+    """
+    Compte les requêtes SQL exécutées dans le bloc.
+    Args:
+        threshold (int, optional): Répétitions tolérées par forme.
+        raise_on_repeat (bool, optional): Lever RepeatedQueryError
+            au lieu de journaliser un avertissement.
+    Yields:
+        QueryStats: Les statistiques, mises à jour au fil du bloc.
+    """
+    stats = QueryStats(
+        threshold=(
+            settings.QUERY_REPEAT_THRESHOLD if threshold is None else threshold
+        ),
+        raise_on_repeat=(
+            settings.QUERY_REPEAT_RAISE
+            if raise_on_repeat is None
+            else raise_on_repeat
+        ),
+    )
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_counter_start", []).append(
+            time.perf_counter()
+        )
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    stats = _current_stats.get()
+    start_times: List[float] = conn.info.get("query_counter_start", [])
+    if stats is None or not start_times:
+        return
+    stats.record(statement, time.perf_counter() - start_times.pop())
+
+
+def install_query_counter(engine: Engine) -> None:
+    """
+    Alimente les statistiques `track_queries` du contexte courant
+    avec chaque requête exécutée par l'engine.
+    Args:
+        engine (Engine): L'engine (synchrone) à instrumenter.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,155 @@
+import functools
+import logging
+import random
+import re
+import sys
+import time
+from types import FrameType
+from typing import Any, Iterator, List, Optional
+
+import greenlet  # type: ignore[import-untyped]
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\$\d+|:\w+|\?")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_POSTCOMPILE_RE = re.compile(r"\(?__\[POSTCOMPILE_\w+\]\)?")
+_SPACES_RE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(statement: str) -> str:
+    """
+    Réduit une requête à sa « forme » : paramètres, littéraux et listes
+    IN remplacés par `?`, espaces compactés.
+    Args:
+        statement (str): La requête SQL.
+    Returns:
+        str: La requête normalisée.
+    """
+    statement = _POSTCOMPILE_RE.sub("(?)", statement)
+    statement = _STRING_RE.sub("?", statement)
+    statement = _PARAM_RE.sub("?", statement)
+    statement = _NUMBER_RE.sub("?", statement)
+    statement = _LIST_RE.sub("(?)", statement)
+    return _SPACES_RE.sub(" ", statement).strip()
+
+
+def _iter_frames() -> Iterator[FrameType]:
+    # En async, SQLAlchemy exécute la requête dans un greenlet enfant :
+    # la pile de l'appelant (la coroutine du crud) est dans le parent.
+    frame: Optional[FrameType] = sys._getframe(1)
+    current: Optional[greenlet.greenlet] = greenlet.getcurrent()
+    while True:
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+        current = current.parent if current is not None else None
+        if current is None:
+            return
+        frame = current.gr_frame
+
+
+def find_caller() -> str:
+    """
+    Retrouve la fonction crud (ou à défaut applicative) à l'origine
+    de la requête en cours.
+    Returns:
+        str: "module.fonction" ou "?" si introuvable.
+    """
+    fallback = "?"
+    for frame in _iter_frames():
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.crud."):
+            return f"{module.rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+        if (
+            fallback == "?"
+            and module.startswith("app.")
+            and not module.startswith("app.core.")
+        ):
+            fallback = f"{module}.{frame.f_code.co_name}"
+    return fallback
+
+
+def _first_word(statement: str) -> str:
+    words = statement.split(None, 1)
+    return words[0].upper() if words else ""
+
+
+def _explain(conn: Connection, statement: str, parameters: Any) -> str:
+    # Curseur DBAPI brut : pas d'événements SQLAlchemy, pas de récursion.
+    # ANALYZE exécute la requête : seulement pour un SELECT, et toujours
+    # dans un savepoint annulé (fonctions volatiles, verrous...). Un WITH
+    # peut contenir INSERT/UPDATE/DELETE : simple EXPLAIN.
+    analyze = _first_word(statement) == "SELECT"
+    options = "(ANALYZE, BUFFERS)" if analyze else ""
+    dbapi_connection = conn.connection.dbapi_connection
+    cursor = dbapi_connection.cursor()  # type: ignore[union-attr]
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(f"EXPLAIN {options} {statement}", parameters)
+            return "\n".join(row[0] for row in cursor.fetchall())
+        except Exception as error:
+            return f"EXPLAIN failed: {error}"
+        finally:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    start_times: List[float] = conn.info.get("query_start_time", [])
+    if not start_times:
+        return
+    elapsed_ms = (time.perf_counter() - start_times.pop()) * 1000
+    if elapsed_ms < settings.SLOW_QUERY_MS:
+        return
+
+    message = "slow query (%.1f ms) from %s: %s"
+    args: List[Any] = [elapsed_ms, find_caller(), normalize_sql(statement)]
+    if (
+        not executemany
+        and conn.dialect.name == "postgresql"
+        and _first_word(statement) in ("SELECT", "WITH")
+        and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+    ):
+        message += "\n%s"
+        args.append(_explain(conn, statement, parameters))
+    logger.warning(message, *args)
+
+
+def install_query_log(engine: Engine) -> None:
+    """
+    Chronomètre chaque requête de l'engine et journalise les requêtes
+    plus lentes que SLOW_QUERY_MS (avec un EXPLAIN échantillonné).
+    Args:
+        engine (Engine): L'engine (synchrone) à instrumenter.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
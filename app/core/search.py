@@ -0,0 +1,118 @@
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+# Seuil de similarité par défaut de l'opérateur % de pg_trgm
+SIMILARITY_THRESHOLD = 0.3
+
+WORD = re.compile(r"\w+")
+
+
+def words(text: str) -> List[str]:
+    """
+    Les mots d'un texte, en minuscules et sans accents.
+    Args:
+        text (str): Le texte.
+    Returns:
+        List[str]: Les mots, dans l'ordre.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    plain = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return WORD.findall(plain)
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Les trigrammes d'un texte, découpés comme pg_trgm : chaque mot est
+    précédé de deux espaces et suivi d'un.
+    Args:
+        text (str): Le texte.
+    Returns:
+        Set[str]: Les trigrammes.
+    """
+    grams: Set[str] = set()
+    for word in words(text):
+        padded = f"  {word} "
+        grams.update(map("".join, zip(padded, padded[1:], padded[2:])))
+    return grams
+
+
+def similarity(a: str, b: str) -> float:
+    """
+    Similarité de deux textes (`similarity` de pg_trgm) : part des
+    trigrammes communs parmi tous leurs trigrammes.
+    Args:
+        a (str): Premier texte.
+        b (str): Second texte.
+    Returns:
+        float: Entre 0 (rien en commun) et 1.
+    """
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+class TrigramIndex:
+    """
+    Index inversé en mémoire (trigramme -> documents) pour la recherche
+    approchée, quand PostgreSQL n'a pas l'extension pg_trgm.
+
+    Une recherche ne compare la requête qu'aux documents qui partagent
+    au moins un de ses trigrammes ; le score est celui de `similarity`.
+    """
+
+    def __init__(self) -> None:
+        self.postings: Dict[str, Set[int]] = defaultdict(set)
+        self.sizes: Dict[int, int] = {}
+        self.groups: Dict[int, Optional[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def add(self, doc_id: int, text: str, group: Optional[int] = None):
+        """
+        Indexe un document (à n'ajouter qu'une fois).
+        Args:
+            doc_id (int): Identifiant du document.
+            text (str): Le texte indexé.
+            group (int, optional): Groupe du document, pour filtrer.
+        """
+        grams = trigrams(text)
+        for gram in grams:
+            self.postings[gram].add(doc_id)
+        self.sizes[doc_id] = len(grams)
+        self.groups[doc_id] = group
+
+    def search(
+        self,
+        query: str,
+        group: Optional[int] = None,
+        limit: Optional[int] = None,
+        threshold: float = SIMILARITY_THRESHOLD,
+    ) -> List[Tuple[int, float]]:
+        """
+        Les documents les plus proches de la requête.
+        Args:
+            query (str): Le texte recherché.
+            group (int, optional): Seulement les documents de ce groupe.
+            limit (int, optional): Nombre maximal de résultats.
+            threshold (float): Similarité minimale.
+        Returns:
+            List[Tuple[int, float]]: (document, similarité), du plus
+                proche au moins proche, puis par identifiant.
+        """
+        grams = trigrams(query)
+        shared: Counter[int] = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        results = []
+        for doc_id, count in shared.items():
+            if group is not None and self.groups[doc_id] != group:
+                continue
+            score = count / (len(grams) + self.sizes[doc_id] - count)
+            if score >= threshold:
+                results.append((doc_id, score))
+        results.sort(key=lambda result: (-result[1], result[0]))
+        return results[:limit]
@@ -0,0 +1,278 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, List
+
+from sqlalchemy import (
+    ColumnElement,
+    FromClause,
+    Integer,
+    and_,
+    cast,
+    extract,
+    func,
+)
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.crud.archive_crud import DETAILS, ORDERS, get_archived_sales
+from app.models.category import Category
+from app.models.menu import Menu
+from app.models.order import REVENUE_STATUSES
+from app.models.order_detail import OrderDetailStatus
+from app.schemas.analytics_schema import (
+    BasketSize,
+    CategoryRevenue,
+    HourlyRevenue,
+    MenuSales,
+)
+
+# Chaque agrégat est calculé par PostgreSQL (GROUP BY) : seules les
+# lignes du résultat, en tuples, remontent à Python. Les mois archivés
+# couverts par la période sont agrégés en Python (`get_archived_sales`)
+# et ajoutés au résultat de la requête
+
+
+def line_revenue(details: FromClause) -> ColumnElement[Any]:
+    return details.c.price * details.c.quantity
+
+
+def sold_in_range(
+    orders: FromClause, start: date, end: date
+) -> ColumnElement[bool]:
+    """
+    Orders created from `start` to `end` (inclusive) that count in the
+    revenue (finalized, not cancelled).
+    """
+    return and_(
+        orders.c.created_at >= datetime.combine(start, time.min),
+        orders.c.created_at
+        < datetime.combine(end + timedelta(days=1), time.min),
+        orders.c.status.in_(REVENUE_STATUSES),
+    )
+
+
+def sold_lines(
+    orders: FromClause, details: FromClause, start: date, end: date
+) -> ColumnElement[bool]:
+    """The lines of `sold_in_range` orders that are not cancelled."""
+    # Les lignes portent le created_at de leur commande : la même période
+    # limite la lecture aux partitions de lignes concernées
+    return and_(
+        sold_in_range(orders, start, end),
+        details.c.created_at >= datetime.combine(start, time.min),
+        details.c.created_at
+        < datetime.combine(end + timedelta(days=1), time.min),
+        details.c.status != OrderDetailStatus.CANCELLED,
+    )
+
+
+async def get_top_menus(
+    session: AsyncSession, start: date, end: date, limit: int = 10
+) -> List[MenuSales]:
+    """
+    The best-selling menus of a date range, by quantity sold.
+    Args:
+        session (AsyncSession): The database session.
+        start (date): First day of the range.
+        end (date): Last day of the range.
+        limit (int): Number of menus to return.
+    Returns:
+        List[MenuSales]: The menus, best-selling first.
+    """
+    archived = await get_archived_sales(start, end)
+    quantity = func.sum(DETAILS.c.quantity)
+    statement = (
+        select(
+            col(Menu.id),
+            col(Menu.name),
+            quantity,
+            func.sum(line_revenue(DETAILS)),
+        )
+        .join(DETAILS, DETAILS.c.menu_id == col(Menu.id))
+        .join(ORDERS, DETAILS.c.order_id == ORDERS.c.id)
+        .where(sold_lines(ORDERS, DETAILS, start, end))
+        .group_by(col(Menu.id))
+        .order_by(quantity.desc(), col(Menu.id))
+    )
+    if archived is None:
+        statement = statement.limit(limit)
+    sales = {
+        menu_id: MenuSales(
+            menu_id=menu_id, name=name, quantity=qty, revenue=revenue
+        )
+        for menu_id, name, qty, revenue in await session.exec(statement)
+    }
+    if archived is None:
+        return list(sales.values())
+
+    # Menus vendus seulement dans l'archive : leur nom vient de la table
+    missing = set(archived.menu_quantity) - set(sales)
+    names = select(col(Menu.id), col(Menu.name)).where(
+        col(Menu.id).in_(missing)
+    )
+    for menu_id, name in await session.exec(names) if missing else []:
+        sales[menu_id] = MenuSales(
+            menu_id=menu_id, name=name, quantity=0, revenue=0.0
+        )
+    for menu_id, qty in archived.menu_quantity.items():
+        if menu_id in sales:
+            sales[menu_id].quantity += qty
+            sales[menu_id].revenue += archived.menu_revenue[menu_id]
+    ranked = sorted(
+        sales.values(), key=lambda menu: (-menu.quantity, menu.menu_id)
+    )
+    return ranked[:limit]
+
+
+async def get_revenue_by_category(
+    session: AsyncSession, start: date, end: date
+) -> List[CategoryRevenue]:
+    """
+    The revenue of each category over a date range.
+    Args:
+        session (AsyncSession): The database session.
+        start (date): First day of the range.
+        end (date): Last day of the range.
+    Returns:
+        List[CategoryRevenue]: The categories, highest revenue first.
+    """
+    archived = await get_archived_sales(start, end)
+    revenue = func.sum(line_revenue(DETAILS))
+    statement = (
+        select(col(Menu.category_id), col(Category.name), revenue)
+        .select_from(DETAILS)
+        .join(ORDERS, DETAILS.c.order_id == ORDERS.c.id)
+        .join(Menu, DETAILS.c.menu_id == col(Menu.id))
+        .outerjoin(Category, col(Menu.category_id) == col(Category.id))
+        .where(sold_lines(ORDERS, DETAILS, start, end))
+        .group_by(col(Menu.category_id), col(Category.name))
+        .order_by(revenue.desc(), col(Menu.category_id))
+    )
+    categories = {
+        category_id: CategoryRevenue(
+            category_id=category_id, name=name, revenue=total
+        )
+        for category_id, name, total in await session.exec(statement)
+    }
+    if archived is None or not archived.menu_revenue:
+        return list(categories.values())
+
+    # Chiffre d'affaires archivé, par menu, rangé dans la catégorie
+    # actuelle du menu comme celui des tables
+    menus = (
+        select(col(Menu.id), col(Menu.category_id), col(Category.name))
+        .outerjoin(Category, col(Menu.category_id) == col(Category.id))
+        .where(col(Menu.id).in_(archived.menu_revenue))
+    )
+    for menu_id, category_id, name in await session.exec(menus):
+        if menu_id is None:
+            continue
+        category = categories.setdefault(
+            category_id,
+            CategoryRevenue(category_id=category_id, name=name, revenue=0.0),
+        )
+        category.revenue += archived.menu_revenue[menu_id]
+    return sorted(
+        categories.values(),
+        key=lambda category: (
+            -category.revenue,
+            category.category_id is None,
+            category.category_id or 0,
+        ),
+    )
+
+
+async def get_revenue_by_hour(
+    session: AsyncSession, start: date, end: date
+) -> List[HourlyRevenue]:
+    """
+    The revenue heatmap of a date range: orders and revenue per day of
+    the week and hour of the day (UTC). Empty cells are omitted.
+    Args:
+        session (AsyncSession): The database session.
+        start (date): First day of the range.
+        end (date): Last day of the range.
+    Returns:
+        List[HourlyRevenue]: The cells, by day of the week and hour.
+    """
+    archived = await get_archived_sales(start, end)
+    weekday = cast(extract("isodow", ORDERS.c.created_at), Integer)
+    hour = cast(extract("hour", ORDERS.c.created_at), Integer)
+    statement = (
+        select(weekday, hour, func.count(), func.sum(ORDERS.c.total_price))
+        .where(sold_in_range(ORDERS, start, end))
+        .group_by(weekday, hour)
+        .order_by(weekday, hour)
+    )
+    cells = {
+        (day, hour): HourlyRevenue(
+            weekday=day, hour=hour, order_count=count, revenue=revenue
+        )
+        for day, hour, count, revenue in await session.exec(statement)
+    }
+    if archived is None:
+        return list(cells.values())
+
+    for key, count in archived.hour_orders.items():
+        cell = cells.setdefault(
+            key,
+            HourlyRevenue(
+                weekday=key[0], hour=key[1], order_count=0, revenue=0.0
+            ),
+        )
+        cell.order_count += count
+        cell.revenue += archived.hour_revenue[key]
+    return [cells[key] for key in sorted(cells)]
+
+
+async def get_basket_size(
+    session: AsyncSession, start: date, end: date
+) -> BasketSize:
+    """
+    The average basket of the orders of a date range: items, lines and
+    amount per order.
+    Args:
+        session (AsyncSession): The database session.
+        start (date): First day of the range.
+        end (date): Last day of the range.
+    Returns:
+        BasketSize: The averages (0 without orders).
+    """
+    archived = await get_archived_sales(start, end)
+    baskets = (
+        select(
+            ORDERS.c.total_price.label("ticket"),
+            func.sum(DETAILS.c.quantity).label("item_count"),
+            func.count(DETAILS.c.id).label("line_count"),
+        )
+        .join(DETAILS, DETAILS.c.order_id == ORDERS.c.id)
+        .where(sold_lines(ORDERS, DETAILS, start, end))
+        # Clé primaire complète : "order" est partitionnée sur created_at
+        .group_by(ORDERS.c.id, ORDERS.c.created_at, ORDERS.c.total_price)
+        .subquery("baskets")
+    )
+    # Des sommes plutôt que des moyennes, pour y ajouter l'archive
+    statement = select(
+        func.count(),
+        func.coalesce(func.sum(baskets.c.item_count), 0),
+        func.coalesce(func.sum(baskets.c.line_count), 0),
+        func.coalesce(func.sum(baskets.c.ticket), 0.0),
+    )
+    order_count, items, lines, tickets = (await session.exec(statement)).one()
+    if archived is not None:
+        order_count += archived.basket_count
+        items += archived.basket_items
+        lines += archived.basket_lines
+        tickets += archived.basket_tickets
+    if not order_count:
+        return BasketSize(
+            order_count=0,
+            average_items=0.0,
+            average_lines=0.0,
+            average_ticket=0.0,
+        )
+    return BasketSize(
+        order_count=order_count,
+        average_items=items / order_count,
+        average_lines=lines / order_count,
+        average_ticket=tickets / order_count,
+    )
@@ -0,0 +1,416 @@
+import asyncio
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import (
+    Any,
+    DefaultDict,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from sqlalchemy import ColumnElement, and_, delete, func
+from sqlmodel import SQLModel, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import archive
+from app.core.config import settings
+from app.core.partitions import add_months, month_of
+from app.models.order import REVENUE_STATUSES, OrderBase, OrderStatus
+from app.models.order_detail import OrderDetail, OrderDetailStatus
+
+# Commandes archivées : clôturées, elles ne changeront plus
+ARCHIVED_STATUSES = (OrderStatus.PAID, OrderStatus.CANCELLED)
+
+# Les statuts sont archivés par nom
+REVENUE_STATUS_NAMES = {status.name for status in REVENUE_STATUSES}
+
+ORDERS = SQLModel.metadata.tables["order"]
+DETAILS = SQLModel.metadata.tables["orderdetail"]
+
+
+class ArchivedOrder(NamedTuple):
+    order: OrderBase
+    details: List[OrderDetail]
+
+
+def archive_root() -> Path:
+    return Path(settings.ARCHIVE_DIR)
+
+
+def _created_in(
+    created_at: Any, start: datetime, end: datetime
+) -> ColumnElement[bool]:
+    return and_(created_at >= start, created_at < end)
+
+
+async def get_first_archivable_month(
+    session: AsyncSession, before: date
+) -> Optional[date]:
+    """
+    The month of the oldest order that can be archived.
+    Args:
+        session (AsyncSession): The database session.
+        before (date): Orders created from this day on are kept.
+    Returns:
+        date: The first day of the month, or None if there is none.
+    """
+    statement = select(func.min(col(OrderBase.created_at))).where(
+        col(OrderBase.status).in_(ARCHIVED_STATUSES),
+        col(OrderBase.created_at) < datetime.combine(before, time.min),
+    )
+    oldest = (await session.exec(statement)).one()
+    return None if oldest is None else month_of(oldest.date())
+
+
+async def archive_batch(
+    session: AsyncSession,
+    month: date,
+    before: date,
+    batch_size: int = 1000,
+    root: Optional[Path] = None,
+) -> int:
+    """
+    Move a batch of closed orders of a month, with their details, from
+    the database to the archive files, and commit. The batches follow
+    (created_at, id), so that the files of a month can be read back in
+    order one at a time. The files are written before the rows are
+    deleted: a batch interrupted in between is archived again by the
+    next run (and read once).
+    Args:
+        session (AsyncSession): The database session.
+        month (date): A day of the archived month.
+        before (date): Orders created from this day on are kept.
+        batch_size (int): Maximum number of orders moved.
+        root (Path, optional): The archive directory (default: setting
+            ARCHIVE_DIR).
+    Returns:
+        int: The number of archived orders (0 when the month is done).
+    """
+    root = root or archive_root()
+    start = datetime.combine(month_of(month), time.min)
+    end = min(
+        datetime.combine(add_months(month, 1), time.min),
+        datetime.combine(before, time.min),
+    )
+    orders = (
+        await session.exec(
+            select(*ORDERS.c)  # type: ignore[call-overload]
+            .where(
+                _created_in(ORDERS.c.created_at, start, end),
+                ORDERS.c.status.in_(ARCHIVED_STATUSES),
+            )
+            .order_by(ORDERS.c.created_at, ORDERS.c.id)
+            .limit(batch_size)
+        )
+    ).all()
+    if not orders:
+        return 0
+    order_ids = [order.id for order in orders]
+    # Une ligne porte le created_at de sa commande : même mois
+    of_orders = and_(
+        DETAILS.c.order_id.in_(order_ids),
+        _created_in(DETAILS.c.created_at, start, end),
+    )
+    details = (
+        await session.exec(
+            select(*DETAILS.c)  # type: ignore[call-overload]
+            .where(of_orders)
+            .order_by(DETAILS.c.id)
+        )
+    ).all()
+
+    await asyncio.to_thread(
+        archive.write_part,
+        root,
+        month,
+        ORDERS.name,
+        [order._mapping for order in orders],
+    )
+    if details:
+        await asyncio.to_thread(
+            archive.write_part,
+            root,
+            month,
+            DETAILS.name,
+            [detail._mapping for detail in details],
+        )
+    await session.exec(delete(DETAILS).where(of_orders))  # type: ignore
+    await session.exec(
+        delete(ORDERS).where(  # type: ignore[call-overload]
+            ORDERS.c.id.in_(order_ids),
+            _created_in(ORDERS.c.created_at, start, end),
+        )
+    )
+    await session.commit()
+    return len(orders)
+
+
+def archived_months_between(
+    start: date, end: date, root: Optional[Path] = None
+) -> List[date]:
+    """
+    The archived months that overlap a date range.
+    Args:
+        start (date): First day of the range.
+        end (date): Last day of the range.
+        root (Path, optional): The archive directory.
+    Returns:
+        List[date]: The first day of each month, oldest first.
+    """
+    return [
+        month
+        for month in archive.archived_months(root or archive_root())
+        if month_of(start) <= month <= end
+    ]
+
+
+def _order_key(row: Dict[str, Any]) -> Tuple[datetime, int]:
+    return row["created_at"], row["id"]
+
+
+def _line_key(row: Dict[str, Any]) -> Tuple[datetime, int]:
+    # Une ligne porte le created_at de sa commande : même ordre
+    return row["created_at"], row["order_id"]
+
+
+def iter_month_rows(
+    root: Path,
+    month: date,
+    first: datetime,
+    last: datetime,
+    with_details: bool = True,
+) -> Iterator[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+    """
+    The archived rows of a month created in [first, last), one group of
+    archive files at a time: only that group and the detail files of
+    the same (created_at, id) range are in memory.
+    Args:
+        root (Path): The archive directory.
+        month (date): A day of the archived month.
+        first (datetime): Start of the range.
+        last (datetime): End of the range (excluded).
+        with_details (bool): Also read the order details.
+    Yields:
+        Tuple[List[Dict], List[Dict]]: The orders, ordered by
+            (created_at, id), and their details.
+    """
+    line_groups = (
+        archive.group_parts(
+            archive.month_parts(root, month, DETAILS.name), _line_key
+        )
+        if with_details
+        else []
+    )
+    for group in archive.group_parts(
+        archive.month_parts(root, month, ORDERS.name), _order_key
+    ):
+        if group.high[0] < first or group.low[0] >= last:
+            continue
+        orders = [
+            row
+            for row in archive.read_parts(group.paths)
+            if first <= row["created_at"] < last
+        ]
+        if not orders:
+            continue
+        orders.sort(key=_order_key)
+        ids = {row["id"] for row in orders}
+        paths = [
+            path
+            for lines in line_groups
+            if lines.low <= group.high and group.low <= lines.high
+            for path in lines.paths
+        ]
+        details = [
+            row for row in archive.read_parts(paths) if row["order_id"] in ids
+        ]
+        yield orders, details
+
+
+def iter_archived_orders(
+    month: date,
+    start: date,
+    end: date,
+    status: Optional[OrderStatus] = None,
+    client_id: Optional[int] = None,
+    with_details: bool = False,
+    root: Optional[Path] = None,
+) -> Iterator[List[ArchivedOrder]]:
+    """
+    The archived orders of a month created between two dates
+    (inclusive), ordered by (created_at, id) like the live orders, in
+    chunks of one group of archive files.
+    Args:
+        month (date): A day of the archived month.
+        start (date): First day of the range.
+        end (date): Last day of the range.
+        status (OrderStatus, optional): Only orders with this status.
+        client_id (int, optional): Only orders of this client.
+        with_details (bool): Also read the order details.
+        root (Path, optional): The archive directory.
+    Yields:
+        List[ArchivedOrder]: The orders of a chunk, with their details
+            (by id) when requested.
+    """
+    root = root or archive_root()
+    first = datetime.combine(start, time.min)
+    last = datetime.combine(end + timedelta(days=1), time.min)
+    for orders, lines in iter_month_rows(
+        root, month, first, last, with_details
+    ):
+        details: Dict[int, List[OrderDetail]] = {}
+        for row in lines:
+            details.setdefault(row["order_id"], []).append(
+                OrderDetail(
+                    **{**row, "status": OrderDetailStatus[row["status"]]}
+                )
+            )
+        chunk = [
+            ArchivedOrder(
+                OrderBase(**{**row, "status": OrderStatus[row["status"]]}),
+                details.get(row["id"], []),
+            )
+            for row in orders
+            if (status is None or row["status"] == status.name)
+            and (client_id is None or row["client_id"] == client_id)
+        ]
+        if chunk:
+            yield chunk
+
+
+def read_archived_orders(
+    month: date,
+    start: date,
+    end: date,
+    status: Optional[OrderStatus] = None,
+    client_id: Optional[int] = None,
+    with_details: bool = False,
+    root: Optional[Path] = None,
+) -> List[ArchivedOrder]:
+    """
+    The archived orders of a month created between two dates
+    (inclusive), ordered by (created_at, id), in one list (see
+    `iter_archived_orders`).
+    Args:
+        month (date): A day of the archived month.
+        start (date): First day of the range.
+        end (date): Last day of the range.
+        status (OrderStatus, optional): Only orders with this status.
+        client_id (int, optional): Only orders of this client.
+        with_details (bool): Also read the order details.
+        root (Path, optional): The archive directory.
+    Returns:
+        List[ArchivedOrder]: The orders, with their details (by id) when
+            requested.
+    """
+    return [
+        order
+        for chunk in iter_archived_orders(
+            month, start, end, status, client_id, with_details, root
+        )
+        for order in chunk
+    ]
+
+
+class ArchivedSales:
+    """
+    Sales of the archived orders of a date range, aggregated in Python
+    from the archive files like the analytics queries aggregate the
+    tables: finalized, non-cancelled orders and their non-cancelled
+    lines. The analytics merge them with the result of their query.
+    """
+
+    def __init__(self) -> None:
+        # Par menu : quantité vendue et chiffre d'affaires
+        self.menu_quantity: Counter[int] = Counter()
+        self.menu_revenue: DefaultDict[int, float] = defaultdict(float)
+        # Par (jour de la semaine, heure) : commandes et chiffre d'affaires
+        self.hour_orders: Counter[Tuple[int, int]] = Counter()
+        self.hour_revenue: DefaultDict[Tuple[int, int], float] = defaultdict(
+            float
+        )
+        # Paniers (commandes avec au moins une ligne vendue) : sommes
+        self.basket_count = 0
+        self.basket_items = 0
+        self.basket_lines = 0
+        self.basket_tickets = 0.0
+
+    def add_rows(
+        self,
+        orders: Sequence[Dict[str, Any]],
+        details: Sequence[Dict[str, Any]],
+        start: datetime,
+        end: datetime,
+    ) -> None:
+        sold = {
+            order["id"]: order
+            for order in orders
+            if start <= order["created_at"] < end
+            and order["status"] in REVENUE_STATUS_NAMES
+        }
+        for order in sold.values():
+            cell = (order["created_at"].isoweekday(), order["created_at"].hour)
+            self.hour_orders[cell] += 1
+            self.hour_revenue[cell] += order["total_price"]
+        baskets: Counter[int] = Counter()
+        lines: Counter[int] = Counter()
+        for line in details:
+            if (
+                line["order_id"] not in sold
+                or line["status"] == OrderDetailStatus.CANCELLED.name
+            ):
+                continue
+            self.menu_quantity[line["menu_id"]] += line["quantity"]
+            self.menu_revenue[line["menu_id"]] += (
+                line["price"] * line["quantity"]
+            )
+            baskets[line["order_id"]] += line["quantity"]
+            lines[line["order_id"]] += 1
+        self.basket_count += len(lines)
+        self.basket_items += sum(baskets.values())
+        self.basket_lines += sum(lines.values())
+        self.basket_tickets += sum(
+            sold[order_id]["total_price"] for order_id in lines
+        )
+
+
+def read_archived_sales(
+    months: Sequence[date], start: date, end: date, root: Path
+) -> ArchivedSales:
+    sales = ArchivedSales()
+    first = datetime.combine(start, time.min)
+    last = datetime.combine(end + timedelta(days=1), time.min)
+    for month in months:
+        for orders, details in iter_month_rows(root, month, first, last):
+            sales.add_rows(orders, details, first, last)
+    return sales
+
+
+async def get_archived_sales(
+    start: date, end: date, root: Optional[Path] = None
+) -> Optional[ArchivedSales]:
+    """
+    The sales of the archived orders created between two dates
+    (inclusive). The archived rows are only read and aggregated here:
+    the analytics query the tables, then merge these totals.
+    Args:
+        start (date): First day of the range.
+        end (date): Last day of the range.
+        root (Path, optional): The archive directory.
+    Returns:
+        ArchivedSales: The aggregates, or None when the range overlaps
+            no archived month.
+    """
+    root = root or archive_root()
+    months = archived_months_between(start, end, root)
+    if not months:
+        return None
+    return await asyncio.to_thread(
+        read_archived_sales, months, start, end, root
+    )
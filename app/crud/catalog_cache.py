@@ -0,0 +1,93 @@
+from typing import Any, Dict, Generic, Iterable, Optional, Tuple, TypeVar
+
+from sqlmodel import SQLModel
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.crud.keyset import KeysetCursor
+from app.models.category import Category
+from app.models.menu import Menu
+
+M = TypeVar("M", bound=SQLModel)
+
+# Nom connu pour n'appartenir à aucune ligne (les id commencent à 1)
+NOT_FOUND = 0
+
+PageKey = Tuple[Optional[int], Optional[KeysetCursor]]
+
+
+def detached(row: M) -> M:
+    """Une copie de `row` hors de toute session, partageable en cache."""
+    return type(row).model_validate(row.model_dump())
+
+
+class CatalogCache(Generic[M]):
+    """
+    Cache mémoire (par processus) d'une table du catalogue, devant les
+    lectures de menu_crud et category_crud.
+
+    Trois caches TTL + LRU : les lignes par id, l'id de chaque nom
+    recherché (y compris les noms libres, pour les contrôles d'unicité)
+    et les id de chaque page. Une page relit ses lignes dans le cache des
+    lignes : modifier une ligne n'invalide qu'elle, créer ou supprimer
+    une ligne invalide les pages. Les lignes en cache sont des copies
+    détachées, à ne pas modifier.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.rows: TTLCache[int, M] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.names: TTLCache[str, int] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.pages: TTLCache[PageKey, Tuple[int, ...]] = TTLCache(
+            maxsize=maxsize, ttl=ttl
+        )
+        # Version de la table (table_version) des lignes en cache
+        self.version: Optional[int] = None
+
+    def sync(self, version: int) -> None:
+        """
+        Vide le cache si la table a changé depuis la dernière version lue
+        (écriture d'un autre worker) : les réponses restent cohérentes
+        avec l'ETag calculé sur cette version.
+        """
+        if version != self.version:
+            self.clear()
+            self.version = version
+
+    def keep(self, row_id: Optional[int], row: M) -> None:
+        """Met en cache une copie détachée de la ligne `row_id`."""
+        if row_id is not None:
+            self.rows.set(row_id, detached(row))
+
+    def forget(
+        self, row_ids: Iterable[int] = (), names: Iterable[str] = ()
+    ) -> None:
+        """Invalide des lignes (par id) et des recherches par nom."""
+        for row_id in row_ids:
+            self.rows.pop(row_id)
+        for name in names:
+            self.names.pop(name)
+
+    def forget_pages(self) -> None:
+        """Invalide les pages (une ligne a été créée ou supprimée)."""
+        self.pages.clear()
+
+    def clear(self) -> None:
+        self.rows.clear()
+        self.names.clear()
+        self.pages.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Taille et compteurs (succès, échecs) de chaque cache."""
+        return {
+            "rows": self.rows.snapshot(),
+            "names": self.names.snapshot(),
+            "pages": self.pages.snapshot(),
+        }
+
+
+menu_cache: CatalogCache[Menu] = CatalogCache(
+    maxsize=settings.CATALOG_CACHE_SIZE, ttl=settings.CATALOG_CACHE_TTL
+)
+category_cache: CatalogCache[Category] = CatalogCache(
+    maxsize=settings.CATALOG_CACHE_SIZE, ttl=settings.CATALOG_CACHE_TTL
+)
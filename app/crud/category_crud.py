@@ -1,103 +1,201 @@
+from typing import List, Optional, Sequence
+from app.crud.catalog_cache import NOT_FOUND, category_cache
+from app.crud.keyset import KeysetCursor, keyset_paginate
+from app.crud.table_version_crud import get_table_version
 from app.schemas.category_schema import CategoryCreate, CategoryUpdate
 from app.models.category import Category
-from sqlmodel import Session, select
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
-def create_category(session: Session, category: CategoryCreate) -> Category:
+async def create_category(
+    session: AsyncSession, category: CategoryCreate
+) -> Category:
     """
     Create a new category in the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         category (CategoryCreate): The category data to create.
     Returns:
         Category: The created category.
     """
     db_category = Category.model_validate(category)
     session.add(db_category)
-    session.commit()
-    session.refresh(db_category)
+    await session.commit()
+    await session.refresh(db_category)
+    category_cache.forget(names=[db_category.name])
+    category_cache.forget_pages()
     return db_category
 
 
-def get_category_by_id(session: Session, category_id: int) -> Category | None:
+async def get_categories_version(session: AsyncSession) -> int:
     """
-    Retrieve a category by ID from the database.
+    Read the version of the category table, and empty the catalog cache
+    if it changed since the last read.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
+    Returns:
+        int: The version, to build the ETag of the categories routes.
+    """
+    version = await get_table_version(session, "category")
+    category_cache.sync(version)
+    return version
+
+
+async def get_category_by_id(
+    session: AsyncSession, category_id: int
+) -> Category | None:
+    """
+    Retrieve a category by ID, from the catalog cache or the database.
+    Args:
+        session (AsyncSession): The database session.
         category_id (int): The ID of the category to retrieve.
     Returns:
-        Category: The category object if found, otherwise raises ValueError.
+        Category: The category object if found, otherwise returns None.
     """
-    db_category = session.get(Category, category_id)
+    cached = category_cache.rows.get(category_id)
+    if cached is not None:
+        return cached
+    db_category = await session.get(Category, category_id)
     if not db_category:
         return None
+    category_cache.keep(category_id, db_category)
     return db_category
 
 
-def get_all_categories(session: Session) -> list[Category]:
+async def get_categories_by_ids(
+    session: AsyncSession, category_ids: Sequence[int]
+) -> List[Category]:
     """
-    Retrieve all categories from the database.
+    Retrieve several categories, from the catalog cache, then the
+    missing ones from the database in a single query.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
+        category_ids (Sequence[int]): The IDs of the categories.
+    Returns:
+        List[Category]: The existing categories, in the order of
+          `category_ids`.
+    """
+    categories = {
+        category_id: category_cache.rows.get(category_id)
+        for category_id in category_ids
+    }
+    missing = [
+        category_id
+        for category_id, category in categories.items()
+        if category is None
+    ]
+    if missing:
+        statement = select(Category).where(col(Category.id).in_(missing))
+        for db_category in await session.exec(statement):
+            category_cache.keep(db_category.id, db_category)
+            categories[db_category.id or 0] = db_category
+    return [
+        category for category in categories.values() if category is not None
+    ]
+
+
+async def get_all_categories(
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    after: Optional[KeysetCursor] = None,
+) -> list[Category]:
+    """
+    Retrieve all categories, ordered by id. The IDs of a page are
+    cached, its categories are read through the catalog cache.
+    Args:
+        session (AsyncSession): The database session.
+        limit (int, optional): Maximum number of categories to return.
+        after (tuple, optional): (id,) of the last category of the
+          previous page.
     Returns:
         list[Category]: A list of all category objects.
     """
-    statement = select(Category)
-    return list(session.exec(statement).all())
+    category_ids = category_cache.pages.get((limit, after))
+    if category_ids is not None:
+        return await get_categories_by_ids(session, category_ids)
+    statement = keyset_paginate(
+        select(Category), [Category.id], after=after, limit=limit
+    )
+    categories = list((await session.exec(statement)).all())
+    for category in categories:
+        category_cache.keep(category.id, category)
+    category_cache.pages.set(
+        (limit, after),
+        tuple(category.id for category in categories if category.id),
+    )
+    return categories
 
 
-def get_category_by_name(session: Session, name: str) -> Category | None:
+async def get_category_by_name(
+    session: AsyncSession, name: str
+) -> Category | None:
     """
-    Retrieve a category by its title from the database.
+    Retrieve a category by its title, from the catalog cache or the
+    database. An unused name is cached too.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         name (str): The name of the category to retrieve.
     Returns:
-        Category: The category object if found, otherwise raises ValueError.
+        Category: The category object if found, otherwise returns None.
     """
+    category_id = category_cache.names.get(name)
+    if category_id == NOT_FOUND:
+        return None
+    if category_id is not None:
+        return await get_category_by_id(session, category_id)
     statement = select(Category).where(Category.name == name)
-    db_category = session.exec(statement).first()
+    db_category = (await session.exec(statement)).first()
+    if not db_category:
+        category_cache.names.set(name, NOT_FOUND)
+        return None
+    category_cache.names.set(name, db_category.id or NOT_FOUND)
+    category_cache.keep(db_category.id, db_category)
     return db_category
 
 
-def update_category(
-    session: Session, category_id: int, category_update: CategoryUpdate
+async def update_category(
+    session: AsyncSession, category_id: int, category_update: CategoryUpdate
 ) -> Category | None:
     """
     Update an existing category in the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         category_id (int): The ID of the category to update.
         category_update (CategoryUpdate): The updated category data.
     Returns:
         Category: The updated category object.
     """
-    db_category = session.get(Category, category_id)
+    db_category = await session.get(Category, category_id)
     if not db_category:
         return None
 
+    previous_name = db_category.name
     category_data = category_update.model_dump(exclude_unset=True)
     for key, value in category_data.items():
         setattr(db_category, key, value)
 
     session.add(db_category)
-    session.commit()
-    session.refresh(db_category)
+    await session.commit()
+    await session.refresh(db_category)
+    category_cache.forget([category_id], [previous_name, db_category.name])
     return db_category
 
 
-def delete_category(session: Session, category_id: int) -> None:
+async def delete_category(session: AsyncSession, category_id: int) -> None:
     """
     Delete a category from the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         category_id (int): The ID of the category to delete.
     Raises:
         ValueError: If the category with the given ID does not exist.
     """
-    db_category = session.get(Category, category_id)
+    db_category = await session.get(Category, category_id)
     if not db_category:
         return None
 
-    session.delete(db_category)
-    session.commit()
+    await session.delete(db_category)
+    await session.commit()
+    category_cache.forget([category_id], [db_category.name])
+    category_cache.forget_pages()
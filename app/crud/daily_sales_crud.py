@@ -0,0 +1,550 @@
+import asyncio
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from typing import (
+    DefaultDict,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Float,
+    FromClause,
+    Integer,
+    String,
+    and_,
+    cast,
+    column,
+    func,
+    literal,
+    text,
+    values,
+)
+from sqlalchemy.dialects.postgresql import JSONB, insert
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.crud import archive_crud
+from app.models.daily_sales import DailySales
+from app.models.menu import Menu
+from app.models.order import REVENUE_STATUSES, OrderBase, OrderStatus
+from app.models.order_detail import OrderDetail, OrderDetailStatus
+
+# Le recalcul complet bloque les écritures de deltas (ROW EXCLUSIVE)
+# jusqu'à sa validation : aucun delta n'est perdu ni compté deux fois
+REBUILD_LOCK = text("LOCK TABLE daily_sales IN SHARE ROW EXCLUSIVE MODE")
+
+EMPTY_OBJECT = cast(literal("{}"), JSONB)
+
+# Clé de revenue_by_category : l'id de la catégorie du menu
+CATEGORY_KEY = func.coalesce(cast(col(Menu.category_id), String), "none")
+
+# Statut et total d'une commande, ce qui compte pour le cumul
+OrderState = Tuple[OrderStatus, float]
+
+
+class OrderChange(NamedTuple):
+    """Une commande avant et après une écriture (None : absente)."""
+
+    order_id: int
+    created_at: datetime
+    before: Optional[OrderState]
+    after: Optional[OrderState]
+
+
+class LineChange(NamedTuple):
+    """Montant ajouté (ou retiré, négatif) par une ligne de commande."""
+
+    order_id: int
+    created_at: datetime
+    menu_id: int
+    amount: float
+
+
+def order_state(order: OrderBase) -> OrderState:
+    """Le statut et le total d'une commande."""
+    return order.status, order.total_price
+
+
+def counted(state: Optional[OrderState]) -> bool:
+    """Si une commande dans cet état compte dans le chiffre d'affaires."""
+    return state is not None and state[0] in REVENUE_STATUSES
+
+
+def line_amount(order_detail: OrderDetail, sign: int = 1) -> LineChange:
+    """
+    Ce qu'une ligne apporte au chiffre d'affaires par catégorie (rien
+    une fois annulée), compté `sign` fois.
+    Args:
+        order_detail (OrderDetail): La ligne, écrite en base (created_at).
+        sign (int): 1 pour l'ajouter, -1 pour la retirer.
+    Returns:
+        LineChange: Le montant de la ligne.
+    """
+    assert order_detail.order_id is not None
+    assert order_detail.created_at is not None
+    amount = 0.0
+    if order_detail.status is not OrderDetailStatus.CANCELLED:
+        amount = sign * order_detail.price * order_detail.quantity
+    return LineChange(
+        order_id=order_detail.order_id,
+        created_at=order_detail.created_at,
+        menu_id=order_detail.menu_id,
+        amount=amount,
+    )
+
+
+class SalesDelta:
+    """Variation du cumul d'un jour, ajoutée à sa ligne."""
+
+    def __init__(self) -> None:
+        self.revenue = 0.0
+        self.order_count = 0
+        self.orders_by_status: Counter[str] = Counter()
+        self.revenue_by_category: DefaultDict[str, float] = defaultdict(float)
+
+    def add_order(self, state: Optional[OrderState], sign: int) -> None:
+        # Une commande non finalisée ("Created") ne compte pas encore
+        if state is None or state[0] is OrderStatus.CREATED:
+            return
+        status, total = state
+        self.orders_by_status[status.value] += sign
+        if counted(state):
+            self.revenue += sign * total
+            self.order_count += sign
+
+    def row(self, day: date) -> Optional[dict]:
+        """Les valeurs à ajouter à la ligne du jour, None si aucune."""
+        orders_by_status = {
+            key: count for key, count in self.orders_by_status.items() if count
+        }
+        revenue_by_category = {
+            key: amount
+            for key, amount in self.revenue_by_category.items()
+            if amount
+        }
+        if not (
+            self.revenue
+            or self.order_count
+            or orders_by_status
+            or revenue_by_category
+        ):
+            return None
+        return {
+            "day": day,
+            "revenue": self.revenue,
+            "order_count": self.order_count,
+            "average_ticket": 0.0,
+            "orders_by_status": orders_by_status,
+            "revenue_by_category": revenue_by_category,
+            "updated_at": datetime.now(timezone.utc),
+        }
+
+
+async def _add(session: AsyncSession, deltas: Dict[date, SalesDelta]) -> None:
+    # Un seul INSERT ... ON CONFLICT DO UPDATE ajoute les deltas aux
+    # lignes des jours, dans l'ordre des jours : les écritures concurrentes
+    # d'un même jour s'additionnent sur la ligne verrouillée, sans
+    # recalcul ni verrou au-delà de cette ligne
+    rows = [
+        row
+        for day, delta in sorted(deltas.items())
+        if (row := delta.row(day)) is not None
+    ]
+    if not rows:
+        return
+    statement = insert(DailySales).values(rows)
+    excluded = statement.excluded
+    revenue = col(DailySales.revenue) + excluded.revenue
+    order_count = col(DailySales.order_count) + excluded.order_count
+    statement = statement.on_conflict_do_update(
+        index_elements=[col(DailySales.day)],
+        set_={
+            "revenue": revenue,
+            "order_count": order_count,
+            "average_ticket": func.coalesce(
+                revenue / func.nullif(order_count, 0), 0.0
+            ),
+            "orders_by_status": func.jsonb_sum(
+                col(DailySales.orders_by_status), excluded.orders_by_status
+            ),
+            "revenue_by_category": func.jsonb_sum(
+                col(DailySales.revenue_by_category),
+                excluded.revenue_by_category,
+            ),
+            "updated_at": excluded.updated_at,
+        },
+    )
+    await session.exec(statement)  # type: ignore[call-overload]
+
+
+async def apply_order_changes(
+    session: AsyncSession, changes: Iterable[OrderChange]
+) -> None:
+    """
+    Add to the daily sales what the given order writes change: status
+    counts, revenue and order count, and the revenue by category of
+    the orders that start or stop counting (their lines that are not
+    cancelled). Orders in status "Created" count for nothing: creating
+    one changes no row. Does not commit.
+    Args:
+        session (AsyncSession): The database session.
+        changes (Iterable[OrderChange]): The orders before and after.
+    """
+    deltas: Dict[date, SalesDelta] = defaultdict(SalesDelta)
+    flipped: Dict[int, Tuple[datetime, int]] = {}
+    for change in changes:
+        delta = deltas[change.created_at.date()]
+        delta.add_order(change.before, -1)
+        delta.add_order(change.after, 1)
+        sign = int(counted(change.after)) - int(counted(change.before))
+        if sign:
+            flipped[change.order_id] = (change.created_at, sign)
+
+    if flipped:
+        # created_at des commandes en constantes : seules les partitions
+        # de leurs mois sont lues
+        created = [created_at for created_at, _ in flipped.values()]
+        statement = (
+            select(
+                col(OrderDetail.order_id),
+                CATEGORY_KEY,
+                func.sum(col(OrderDetail.price) * col(OrderDetail.quantity)),
+            )
+            .join(Menu, col(OrderDetail.menu_id) == col(Menu.id))
+            .where(
+                col(OrderDetail.order_id).in_(flipped),
+                col(OrderDetail.created_at) >= min(created),
+                col(OrderDetail.created_at) <= max(created),
+                col(OrderDetail.status) != OrderDetailStatus.CANCELLED,
+            )
+            .group_by(col(OrderDetail.order_id), col(Menu.category_id))
+        )
+        for order_id, category, amount in await session.exec(statement):
+            if order_id is None:
+                continue
+            created_at, sign = flipped[order_id]
+            deltas[created_at.date()].revenue_by_category[category] += (
+                sign * amount
+            )
+    await _add(session, deltas)
+
+
+async def apply_line_changes(
+    session: AsyncSession, changes: Sequence[LineChange]
+) -> None:
+    """
+    Add to the revenue by category the amounts of order lines that were
+    created, changed or deleted. Only the lines of orders that count in
+    the revenue matter: for the lines of an order not finalized yet, no
+    row is written. Does not commit.
+    Args:
+        session (AsyncSession): The database session.
+        changes (Sequence[LineChange]): The amounts of the lines.
+    """
+    changes = [change for change in changes if change.amount]
+    if not changes:
+        return
+    lines = (
+        values(
+            column("order_id", Integer),
+            column("created_at", DateTime),
+            column("menu_id", Integer),
+            column("amount", Float),
+            name="lines",
+        )
+        .data(changes)
+        .alias("lines")
+    )
+    statement = (
+        select(lines.c.created_at, CATEGORY_KEY, func.sum(lines.c.amount))
+        .select_from(
+            lines.join(
+                OrderBase,
+                and_(
+                    col(OrderBase.id) == lines.c.order_id,
+                    col(OrderBase.created_at) == lines.c.created_at,
+                ),
+            ).join(Menu, col(Menu.id) == lines.c.menu_id)
+        )
+        .where(col(OrderBase.status).in_(REVENUE_STATUSES))
+        .group_by(lines.c.created_at, col(Menu.category_id))
+    )
+    deltas: Dict[date, SalesDelta] = defaultdict(SalesDelta)
+    for created_at, category, amount in await session.exec(statement):
+        deltas[created_at.date()].revenue_by_category[category] += amount
+    await _add(session, deltas)
+
+
+def days_between(start: date, end: date) -> FromClause:
+    """Les jours de `start` à `end` inclus (colonne "day")."""
+    series = func.generate_series(start, end, timedelta(days=1))
+    return select(cast(series, Date).label("day")).subquery("days")
+
+
+def _created_in(created_at, bounds: Tuple[date, date]):
+    # Premier et dernier jours en constantes : seules les partitions de
+    # ces mois sont lues
+    start, end = bounds
+    return and_(created_at >= start, created_at < end + timedelta(days=1))
+
+
+def _rollup_statement(days: FromClause, bounds: Tuple[date, date]):
+    # Un seul INSERT ... SELECT ... ON CONFLICT DO UPDATE recalcule les
+    # jours donnés à partir des commandes et des lignes de ces jours
+    day = days.c.day
+    orders_of_day = days.join(
+        OrderBase,
+        and_(
+            col(OrderBase.created_at) >= day,
+            col(OrderBase.created_at) < day + timedelta(days=1),
+        ),
+    )
+    counted = col(OrderBase.status).in_(REVENUE_STATUSES)
+
+    # Nombre de commandes finalisées par statut : une clé par statut
+    # présent ("Created" n'est pas compté, voir apply_order_changes)
+    orders_by_status = func.jsonb_strip_nulls(
+        func.jsonb_build_object(
+            *(
+                item
+                for status in OrderStatus
+                if status is not OrderStatus.CREATED
+                for item in (
+                    status.value,
+                    func.nullif(
+                        func.count().filter(col(OrderBase.status) == status),
+                        0,
+                    ),
+                )
+            )
+        )
+    )
+    totals = (
+        select(day)
+        .add_columns(
+            func.sum(col(OrderBase.total_price))
+            .filter(counted)
+            .label("revenue"),
+            func.count().filter(counted).label("order_count"),
+            orders_by_status.label("orders_by_status"),
+        )
+        .select_from(orders_of_day)
+        .where(_created_in(col(OrderBase.created_at), bounds))
+        .group_by(day)
+        .subquery("totals")
+    )
+
+    per_category = (
+        select(day)
+        .add_columns(
+            CATEGORY_KEY.label("category"),
+            func.sum(col(OrderDetail.price) * col(OrderDetail.quantity)).label(
+                "revenue"
+            ),
+        )
+        .select_from(
+            orders_of_day.join(
+                OrderDetail, col(OrderDetail.order_id) == col(OrderBase.id)
+            ).join(Menu, col(OrderDetail.menu_id) == col(Menu.id))
+        )
+        .where(
+            counted,
+            col(OrderDetail.status) != OrderDetailStatus.CANCELLED,
+            _created_in(col(OrderBase.created_at), bounds),
+            _created_in(col(OrderDetail.created_at), bounds),
+        )
+        .group_by(day, col(Menu.category_id))
+        .subquery("per_category")
+    )
+    categories = (
+        select(per_category.c.day)
+        .add_columns(
+            func.jsonb_object_agg(
+                per_category.c.category, per_category.c.revenue
+            ).label("revenue_by_category"),
+        )
+        .group_by(per_category.c.day)
+        .subquery("categories")
+    )
+
+    # Les jours sans commande sont remis à zéro
+    revenue = func.coalesce(totals.c.revenue, 0.0)
+    order_count = func.coalesce(totals.c.order_count, 0)
+    rows = (
+        select(day)
+        .add_columns(
+            revenue,
+            order_count,
+            func.coalesce(revenue / func.nullif(order_count, 0), 0.0),
+            func.coalesce(totals.c.orders_by_status, EMPTY_OBJECT),
+            func.coalesce(categories.c.revenue_by_category, EMPTY_OBJECT),
+            literal(datetime.now(timezone.utc)),
+        )
+        .select_from(
+            days.outerjoin(totals, totals.c.day == day).outerjoin(
+                categories, categories.c.day == day
+            )
+        )
+    )
+    statement = insert(DailySales).from_select(
+        [
+            "day",
+            "revenue",
+            "order_count",
+            "average_ticket",
+            "orders_by_status",
+            "revenue_by_category",
+            "updated_at",
+        ],
+        rows,
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[col(DailySales.day)],
+        set_={
+            name: statement.excluded[name]
+            for name in (
+                "revenue",
+                "order_count",
+                "average_ticket",
+                "orders_by_status",
+                "revenue_by_category",
+                "updated_at",
+            )
+        },
+    )
+
+
+def _read_archived_days(
+    months: Sequence[date], start: date, end: date, root: Path
+) -> Tuple[Dict[date, SalesDelta], Dict[date, DefaultDict[int, float]]]:
+    # Les commandes archivées des jours comptées comme par le recalcul,
+    # un groupe de fichiers à la fois ; les lignes par menu, dont la
+    # catégorie est lue en base
+    first = datetime.combine(start, time.min)
+    last = datetime.combine(end + timedelta(days=1), time.min)
+    deltas: Dict[date, SalesDelta] = defaultdict(SalesDelta)
+    menus: Dict[date, DefaultDict[int, float]] = defaultdict(
+        lambda: defaultdict(float)
+    )
+    for month in months:
+        for orders, details in archive_crud.iter_month_rows(
+            root, month, first, last
+        ):
+            sold: Dict[int, date] = {}
+            for order in orders:
+                state = (OrderStatus[order["status"]], order["total_price"])
+                day = order["created_at"].date()
+                deltas[day].add_order(state, 1)
+                if counted(state):
+                    sold[order["id"]] = day
+            for line in details:
+                day = sold.get(line["order_id"])
+                if (
+                    day is None
+                    or line["status"] == OrderDetailStatus.CANCELLED.name
+                ):
+                    continue
+                menus[day][line["menu_id"]] += line["price"] * line["quantity"]
+    return deltas, menus
+
+
+async def _archived_days(
+    session: AsyncSession, start: date, end: date, root: Path
+) -> Dict[date, SalesDelta]:
+    months = archive_crud.archived_months_between(start, end, root)
+    if not months:
+        return {}
+    deltas, menus = await asyncio.to_thread(
+        _read_archived_days, months, start, end, root
+    )
+    menu_ids = {menu_id for amounts in menus.values() for menu_id in amounts}
+    categories = dict(
+        (
+            await session.exec(
+                select(col(Menu.id), CATEGORY_KEY).where(
+                    col(Menu.id).in_(menu_ids)
+                )
+            )
+        ).all()
+    )
+    # Comme la jointure du recalcul : les lignes d'un menu supprimé
+    # ne comptent pas
+    for day, amounts in menus.items():
+        for menu_id, amount in amounts.items():
+            if menu_id in categories:
+                deltas[day].revenue_by_category[categories[menu_id]] += amount
+    return deltas
+
+
+async def rebuild_daily_sales(
+    session: AsyncSession,
+    start: date,
+    end: date,
+    root: Optional[Path] = None,
+) -> None:
+    """
+    Recompute the daily sales of every day from `start` to `end`
+    (inclusive) from the orders and their lines, and commit. The orders
+    of archived months are read from the archive files and added, so
+    rebuilding archived days does not change their totals. The order
+    writes wait for the rebuild to commit before adding their deltas.
+    Args:
+        session (AsyncSession): The database session.
+        start (date): First day to recompute.
+        end (date): Last day to recompute.
+        root (Path, optional): The archive directory (default: setting
+            ARCHIVE_DIR).
+    """
+    # Archive lue avant le verrou : elle ne change pas avec les commandes
+    archived = await _archived_days(
+        session, start, end, root or archive_crud.archive_root()
+    )
+    await session.exec(REBUILD_LOCK)  # type: ignore[call-overload]
+    await session.exec(
+        _rollup_statement(  # type: ignore[call-overload]
+            days_between(start, end), (start, end)
+        )
+    )
+    await _add(session, archived)
+    await session.commit()
+
+
+async def get_first_order_day(session: AsyncSession) -> Optional[date]:
+    """
+    The day of the oldest order.
+    Args:
+        session (AsyncSession): The database session.
+    Returns:
+        date: The day, or None if there is no order.
+    """
+    statement = select(func.min(cast(col(OrderBase.created_at), Date)))
+    return (await session.exec(statement)).one()
+
+
+async def get_daily_sales(
+    session: AsyncSession, start: date, end: date
+) -> List[DailySales]:
+    """
+    Read the daily sales from `start` to `end` (inclusive), by day.
+    Args:
+        session (AsyncSession): The database session.
+        start (date): First day.
+        end (date): Last day.
+    Returns:
+        List[DailySales]: The rows of the days that have one.
+    """
+    statement = (
+        select(DailySales)
+        .where(col(DailySales.day) >= start, col(DailySales.day) <= end)
+        .order_by(col(DailySales.day))
+    )
+    return list((await session.exec(statement)).all())
@@ -0,0 +1,144 @@
+from datetime import timedelta
+from typing import Any, Optional
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.idempotency_key import IdempotencyKey
+
+
+async def claim_key(
+    session: AsyncSession,
+    scope: str,
+    key: str,
+    fingerprint: str,
+    lease: float,
+) -> bool:
+    """
+    Record a key as being processed, unless it is already known and not
+    expired (an expired key, or the claim of a request that never
+    stored its response, is claimed again). Does not commit: the claim
+    is committed with the writes of the request, so that a concurrent
+    duplicate waits on the key until then, and a request that fails
+    leaves no claim behind.
+    Args:
+        session (AsyncSession): The database session.
+        scope (str): The route and client the key belongs to.
+        key (str): The Idempotency-Key header.
+        fingerprint (str): The digest of the request body.
+        lease (float): Seconds the claim holds the key until the
+            response is stored.
+    Returns:
+        bool: True if the key was claimed by this request.
+    """
+    statement = insert(IdempotencyKey).values(
+        scope=scope,
+        key=key,
+        fingerprint=fingerprint,
+        created_at=func.now(),
+        expires_at=func.now() + timedelta(seconds=lease),
+    )
+    upsert = statement.on_conflict_do_update(
+        index_elements=[col(IdempotencyKey.scope), col(IdempotencyKey.key)],
+        set_={
+            "fingerprint": statement.excluded.fingerprint,
+            "status_code": None,
+            "response": None,
+            "created_at": statement.excluded.created_at,
+            "expires_at": statement.excluded.expires_at,
+        },
+        where=col(IdempotencyKey.expires_at) <= func.now(),
+    ).returning(col(IdempotencyKey.key))
+    claimed = (
+        await session.exec(upsert)  # type: ignore[call-overload]
+    ).first()
+    return claimed is not None
+
+
+async def get_key(
+    session: AsyncSession, scope: str, key: str
+) -> Optional[IdempotencyKey]:
+    """
+    Read a key and its stored response.
+    Args:
+        session (AsyncSession): The database session.
+        scope (str): The route and client the key belongs to.
+        key (str): The Idempotency-Key header.
+    Returns:
+        IdempotencyKey: The key, or None if it does not exist.
+    """
+    statement = select(IdempotencyKey).where(
+        col(IdempotencyKey.scope) == scope, col(IdempotencyKey.key) == key
+    )
+    return (await session.exec(statement)).first()
+
+
+async def store_response(
+    session: AsyncSession,
+    scope: str,
+    key: str,
+    status_code: int,
+    response: Any,
+    ttl: float,
+) -> None:
+    """
+    Store the response of a claimed key, kept for `ttl` seconds, and
+    commit.
+    Args:
+        session (AsyncSession): The database session.
+        scope (str): The route and client the key belongs to.
+        key (str): The Idempotency-Key header.
+        status_code (int): The HTTP status of the response.
+        response (Any): The JSON body of the response.
+        ttl (float): Seconds the key (and its response) is kept.
+    """
+    statement = (
+        update(IdempotencyKey)
+        .where(
+            col(IdempotencyKey.scope) == scope,
+            col(IdempotencyKey.key) == key,
+        )
+        .values(
+            status_code=status_code,
+            response=response,
+            expires_at=func.now() + timedelta(seconds=ttl),
+        )
+    )
+    await session.exec(statement)  # type: ignore[call-overload]
+    await session.commit()
+
+
+async def release_key(session: AsyncSession, scope: str, key: str) -> None:
+    """
+    Forget a claimed key whose request failed, so that a retry is
+    processed again, and commit.
+    Args:
+        session (AsyncSession): The database session.
+        scope (str): The route and client the key belongs to.
+        key (str): The Idempotency-Key header.
+    """
+    statement = delete(IdempotencyKey).where(
+        col(IdempotencyKey.scope) == scope,
+        col(IdempotencyKey.key) == key,
+        col(IdempotencyKey.status_code).is_(None),
+    )
+    await session.exec(statement)  # type: ignore[call-overload]
+    await session.commit()
+
+
+async def delete_expired_keys(session: AsyncSession) -> int:
+    """
+    Delete the expired keys and commit.
+    Args:
+        session (AsyncSession): The database session.
+    Returns:
+        int: The number of deleted keys.
+    """
+    statement = delete(IdempotencyKey).where(
+        col(IdempotencyKey.expires_at) <= func.now()
+    )
+    result = await session.exec(statement)  # type: ignore[call-overload]
+    await session.commit()
+    return int(result.rowcount)
@@ -0,0 +1,34 @@
+from typing import Any, Optional, Sequence, Tuple
+from sqlalchemy import tuple_
+from sqlmodel.sql.expression import SelectOfScalar
+
+KeysetCursor = Tuple[Any, ...]
+
+
+def keyset_paginate(
+    statement: SelectOfScalar,
+    columns: Sequence[Any],
+    after: Optional[KeysetCursor] = None,
+    limit: Optional[int] = None,
+) -> SelectOfScalar:
+    """
+    Applique une pagination par clé (keyset) à une requête.
+    Args:
+        statement (SelectOfScalar): La requête à paginer.
+        columns (Sequence): Colonnes de la clé de tri, la dernière unique.
+        after (tuple, optional): Valeurs de la clé du dernier élément
+            de la page précédente.
+        limit (int, optional): Taille maximale de la page.
+    Returns:
+        SelectOfScalar: La requête triée, filtrée et limitée.
+    """
+    statement = statement.order_by(*columns)
+    if after is not None:
+        # La borne redondante sur la première colonne permet l'élagage
+        # des partitions (impossible sur une comparaison de tuples)
+        statement = statement.where(
+            columns[0] >= after[0], tuple_(*columns) > tuple_(*after)
+        )
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
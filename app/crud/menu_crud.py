@@ -1,106 +1,597 @@
-from typing import List
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from app.core.search import WORD, TrigramIndex
+from app.crud.catalog_cache import NOT_FOUND, menu_cache
+from app.crud.keyset import KeysetCursor, keyset_paginate
+from app.crud.table_version_crud import get_table_version
 from app.schemas.menu_schema import MenuCreate, MenuUpdate
-from app.models.menu import Menu
-from sqlmodel import Session, select
+from app.models.category import Category
+from app.models.menu import SEARCH_CONFIG, SEARCH_VECTOR, Menu
+from app.models.table_version import TableVersion
+from sqlalchemy import (
+    Float,
+    Integer,
+    Numeric,
+    cast,
+    column,
+    func,
+    text,
+    update,
+    values,
+)
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
-def create_menu(session: Session, menu: MenuCreate) -> Menu:
+class UnknownMenuError(LookupError):
+    """Un ou plusieurs menus demandés n'existent pas."""
+
+    def __init__(self, menu_ids: Iterable[int]):
+        self.menu_ids = sorted(menu_ids)
+        super().__init__(f"Unknown menu(s): {self.menu_ids}")
+
+
+class OutOfStockError(ValueError):
+    """Le stock d'un ou plusieurs menus ne couvre pas la commande."""
+
+    def __init__(self, menu_ids: Iterable[int]):
+        self.menu_ids = sorted(menu_ids)
+        super().__init__(f"Insufficient stock for menu(s): {self.menu_ids}")
+
+
+async def create_menu(session: AsyncSession, menu: MenuCreate) -> Menu:
     """
     Create a new menu in the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         menu (MenuCreate): The menu data to create.
     Returns:
         Menu: The created menu.
     """
     db_menu = Menu.model_validate(menu)
     session.add(db_menu)
-    session.commit()
-    session.refresh(db_menu)
+    await session.commit()
+    await session.refresh(db_menu)
+    menu_cache.forget(names=[db_menu.name])
+    menu_cache.forget_pages()
     return db_menu
 
 
-def get_menu_by_id(session: Session, menu_id: int) -> Menu | None:
+async def get_menus_version(session: AsyncSession) -> int:
+    """
+    Read the version of the menu table, and empty the catalog cache
+    if it changed since the last read.
+    Args:
+        session (AsyncSession): The database session.
+    Returns:
+        int: The version, to build the ETag of the menus routes.
+    """
+    version = await get_table_version(session, "menu")
+    menu_cache.sync(version)
+    return version
+
+
+async def get_menus_stock(
+    session: AsyncSession, menu_ids: Collection[int]
+) -> Tuple[int, Dict[int, int]]:
     """
-    Retrieve a menu by ID from the database.
+    Read the version of the menu table and the current stock of some
+    menus in a single query, and empty the catalog cache if the version
+    changed. Stock changes do not increment the version (every order
+    writes the stock): the routes returning the stock add the stock of
+    the menus they return to their ETag and apply it to the cached
+    menus (`with_stock`).
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
+        menu_ids (Collection[int]): The IDs of the menus.
+    Returns:
+        Tuple[int, Dict[int, int]]: The version, and the stock by menu
+            ID (without the menus that do not exist).
+    """
+    statement = (
+        select(col(TableVersion.version), col(Menu.id), col(Menu.stock))
+        .outerjoin(Menu, col(Menu.id).in_(menu_ids))
+        .where(col(TableVersion.table_name) == "menu")
+    )
+    rows = (await session.exec(statement)).all()
+    version = rows[0][0] if rows else 0
+    menu_cache.sync(version)
+    stock = {row_id: row_stock for _, row_id, row_stock in rows if row_id}
+    return version, stock
+
+
+def with_stock(menu: Menu, stock: Mapping[int, int]) -> Menu:
+    """
+    The menu with its stock read by `get_menus_stock`: a cached menu
+    keeps the stock it had when cached (another worker may have
+    changed it since). The cache is updated with the current stock.
+    Args:
+        menu (Menu): The menu, from the catalog cache or the database.
+        stock (Mapping[int, int]): The stock by menu ID.
+    Returns:
+        Menu: The menu, or a copy with the current stock.
+    """
+    current = stock.get(menu.id or NOT_FOUND, menu.stock)
+    if current == menu.stock:
+        return menu
+    fresh = Menu.model_validate({**menu.model_dump(), "stock": current})
+    menu_cache.keep(menu.id, fresh)
+    return fresh
+
+
+PG_TRGM = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+)
+
+
+class FuzzyNames:
+    """
+    Recherche approchée sur les noms de menus : avec pg_trgm si
+    l'extension est installée (vérifié une fois par processus), sinon
+    avec un index trigrammes en mémoire, reconstruit après toute
+    écriture du catalogue dans la table menu (sa version dans
+    table_version, qui ignore le stock).
+    """
+
+    def __init__(self) -> None:
+        self.pg_trgm: Optional[bool] = None
+        self.version: Optional[int] = None
+        self.index = TrigramIndex()
+
+    async def has_pg_trgm(self, session: AsyncSession) -> bool:
+        if self.pg_trgm is None:
+            result = await session.exec(PG_TRGM)  # type: ignore[call-overload]
+            self.pg_trgm = bool(result.scalar_one())
+        return self.pg_trgm
+
+    async def refresh(self, session: AsyncSession) -> TrigramIndex:
+        version = await get_menus_version(session)
+        if version != self.version:
+            index = TrigramIndex()
+            statement = select(Menu.id, Menu.name, Menu.category_id)
+            for menu_id, name, category_id in await session.exec(statement):
+                index.add(menu_id or NOT_FOUND, name, category_id)
+            self.index, self.version = index, version
+        return self.index
+
+
+fuzzy_names = FuzzyNames()
+
+
+async def get_menu_by_id(session: AsyncSession, menu_id: int) -> Menu | None:
+    """
+    Retrieve a menu by ID, from the catalog cache or the database.
+    Args:
+        session (AsyncSession): The database session.
         menu_id (int): The ID of the menu to retrieve.
     Returns:
         Menu: The menu object if found, otherwise returns None.
     """
-    db_menu = session.get(Menu, menu_id)
+    cached = menu_cache.rows.get(menu_id)
+    if cached is not None:
+        return cached
+    db_menu = await session.get(Menu, menu_id)
     if not db_menu:
         return None
+    menu_cache.keep(menu_id, db_menu)
     return db_menu
 
 
-def get_all_menus(session: Session) -> List[Menu]:
+async def get_menus_by_ids(
+    session: AsyncSession, menu_ids: Sequence[int]
+) -> List[Menu]:
     """
-    Retrieve all menus from the database.
+    Retrieve several menus, from the catalog cache, then the missing
+    ones from the database in a single query.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
+        menu_ids (Sequence[int]): The IDs of the menus.
+    Returns:
+        List[Menu]: The existing menus, in the order of `menu_ids`.
+    """
+    menus = {menu_id: menu_cache.rows.get(menu_id) for menu_id in menu_ids}
+    missing = [menu_id for menu_id, menu in menus.items() if menu is None]
+    if missing:
+        statement = select(Menu).where(col(Menu.id).in_(missing))
+        for db_menu in await session.exec(statement):
+            menu_cache.keep(db_menu.id, db_menu)
+            menus[db_menu.id or 0] = db_menu
+    return [menu for menu in menus.values() if menu is not None]
+
+
+async def get_all_menus(
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    after: Optional[KeysetCursor] = None,
+) -> List[Menu]:
+    """
+    Retrieve all menus, ordered by id. The IDs of a page are cached,
+    its menus are read through the catalog cache.
+    Args:
+        session (AsyncSession): The database session.
+        limit (int, optional): Maximum number of menus to return.
+        after (tuple, optional): (id,) of the last menu of the
+          previous page.
     Returns:
         list[Menu]: A list of all menu objects.
     """
-    statement = select(Menu)
-    return list(session.exec(statement).all())
+    menu_ids = menu_cache.pages.get((limit, after))
+    if menu_ids is not None:
+        return await get_menus_by_ids(session, menu_ids)
+    statement = keyset_paginate(
+        select(Menu), [Menu.id], after=after, limit=limit
+    )
+    menus = list((await session.exec(statement)).all())
+    for menu in menus:
+        menu_cache.keep(menu.id, menu)
+    menu_cache.pages.set(
+        (limit, after), tuple(menu.id for menu in menus if menu.id)
+    )
+    return menus
 
 
-def get_menu_by_name(session: Session, name: str) -> Menu | None:
+async def get_menu_by_name(session: AsyncSession, name: str) -> Menu | None:
     """
-    Retrieve a menu by its title from the database.
+    Retrieve a menu by its title, from the catalog cache or the
+    database. An unused name is cached too.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         name (str): The name of the menu to retrieve.
     Returns:
-        Menu: The menu object if found, otherwise raises ValueError.
+        Menu: The menu object if found, otherwise returns None.
     """
+    menu_id = menu_cache.names.get(name)
+    if menu_id == NOT_FOUND:
+        return None
+    if menu_id is not None:
+        return await get_menu_by_id(session, menu_id)
     statement = select(Menu).where(Menu.name == name)
-    db_menu = session.exec(statement).first()
+    db_menu = (await session.exec(statement)).first()
     if not db_menu:
+        menu_cache.names.set(name, NOT_FOUND)
         return None
+    menu_cache.names.set(name, db_menu.id or NOT_FOUND)
+    menu_cache.keep(db_menu.id, db_menu)
     return db_menu
 
 
-def update_menu(
-    session: Session, menu_id: int, menu_update: MenuUpdate
+async def search_menus(
+    session: AsyncSession,
+    query: str,
+    category_id: Optional[int] = None,
+    limit: int = 20,
+) -> List[Menu]:
+    """
+    Search menus by name and description, best match first. Full-text
+    search first (every word of the query, as a prefix), ranked with
+    the name above the description; if nothing matches, fuzzy search
+    on the name, for typos.
+    Args:
+        session (AsyncSession): The database session.
+        query (str): The searched text.
+        category_id (int, optional): Only menus of this category.
+        limit (int): Maximum number of menus to return.
+    Returns:
+        List[Menu]: The matching menus, from the catalog cache or the
+          database.
+    """
+    terms = WORD.findall(query)
+    if not terms:
+        return []
+    tsquery = func.to_tsquery(
+        SEARCH_CONFIG, " & ".join(f"{term}:*" for term in terms)
+    )
+    statement = (
+        select(col(Menu.id))
+        .where(SEARCH_VECTOR.op("@@")(tsquery))
+        .order_by(func.ts_rank(SEARCH_VECTOR, tsquery).desc(), col(Menu.id))
+        .limit(limit)
+    )
+    if category_id is not None:
+        statement = statement.where(col(Menu.category_id) == category_id)
+    menu_ids: Sequence[Optional[int]] = (await session.exec(statement)).all()
+    if not menu_ids:
+        menu_ids = await fuzzy_search_menus(session, query, category_id, limit)
+    return await get_menus_by_ids(
+        session, [menu_id for menu_id in menu_ids if menu_id]
+    )
+
+
+async def fuzzy_search_menus(
+    session: AsyncSession,
+    query: str,
+    category_id: Optional[int] = None,
+    limit: int = 20,
+) -> List[int]:
+    """
+    Search menus whose name is close to the query (trigram similarity),
+    closest first.
+    Args:
+        session (AsyncSession): The database session.
+        query (str): The searched text.
+        category_id (int, optional): Only menus of this category.
+        limit (int): Maximum number of menus to return.
+    Returns:
+        List[int]: The IDs of the matching menus.
+    """
+    if not await fuzzy_names.has_pg_trgm(session):
+        index = await fuzzy_names.refresh(session)
+        return [
+            menu_id for menu_id, _ in index.search(query, category_id, limit)
+        ]
+    name = col(Menu.name)
+    statement = (
+        select(col(Menu.id))
+        .where(name.op("%")(query))
+        .order_by(func.similarity(name, query).desc(), col(Menu.id))
+        .limit(limit)
+    )
+    if category_id is not None:
+        statement = statement.where(col(Menu.category_id) == category_id)
+    return [menu_id for menu_id in await session.exec(statement) if menu_id]
+
+
+async def get_catalog_rows(session: AsyncSession) -> List[Tuple[Any, ...]]:
+    """
+    Read the whole catalog in a single query, as tuples (no ORM
+    objects): the menus with their category, ordered by category name
+    then menu name. Menus without category are left out.
+    Args:
+        session (AsyncSession): The database session.
+    Returns:
+        List[tuple]: (category id, category name, menu id, name, price,
+          description, stock) rows.
+    """
+    statement = (
+        select(col(Category.id))
+        .add_columns(
+            col(Category.name),
+            col(Menu.id),
+            col(Menu.name),
+            col(Menu.price),
+            col(Menu.description),
+            col(Menu.stock),
+        )
+        .select_from(Menu)
+        .join(Category, col(Menu.category_id) == col(Category.id))
+        .order_by(col(Category.name), col(Category.id), col(Menu.name))
+    )
+    connection = await session.connection()
+    return [tuple(row) for row in await connection.execute(statement)]
+
+
+async def update_menu(
+    session: AsyncSession, menu_id: int, menu_update: MenuUpdate
 ) -> Menu | None:
     """
     Update an existing menu in the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         menu_id (int): The ID of the menu to update.
         menu_update (MenuUpdate): The updated menu data.
     Returns:
         Menu: The updated menu object.
     """
-    db_menu = session.get(Menu, menu_id)
+    db_menu = await session.get(Menu, menu_id)
     if not db_menu:
         return None
 
+    previous_name = db_menu.name
     menu_data = menu_update.model_dump(exclude_unset=True)
     for key, value in menu_data.items():
         setattr(db_menu, key, value)
 
     session.add(db_menu)
-    session.commit()
-    session.refresh(db_menu)
+    await session.commit()
+    await session.refresh(db_menu)
+    menu_cache.forget([menu_id], [previous_name, db_menu.name])
     return db_menu
 
 
-def delete_menu(session: Session, menu_id: int) -> None:
+async def delete_menu(session: AsyncSession, menu_id: int) -> None:
     """
     Delete a menu from the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         menu_id (int): The ID of the menu to delete.
     Raises:
         ValueError: If the menu with the given ID does not exist.
     """
-    db_menu = session.get(Menu, menu_id)
+    db_menu = await session.get(Menu, menu_id)
     if not db_menu:
         return None
 
-    session.delete(db_menu)
-    session.commit()
+    await session.delete(db_menu)
+    await session.commit()
+    menu_cache.forget([menu_id], [db_menu.name])
+    menu_cache.forget_pages()
+
+
+async def increase_prices(
+    session: AsyncSession, percent: float, category_id: Optional[int] = None
+) -> Dict[int, float]:
+    """
+    Change by `percent` the price of every menu of a category (or of
+    every menu), in a single UPDATE. Prices are rounded to the cent.
+    Args:
+        session (AsyncSession): The database session.
+        percent (float): The change, e.g. 5 for +5 %, -10 for -10 %.
+        category_id (int, optional): Only the menus of this category.
+    Returns:
+        Dict[int, float]: The new price of each changed menu, by menu ID.
+    """
+    factor = 1 + percent / 100
+    price = col(Menu.price)
+    statement = (
+        update(Menu)
+        .values(price=func.round(cast(price * factor, Numeric), 2))
+        .returning(col(Menu.id), price)
+    )
+    if category_id is not None:
+        statement = statement.where(col(Menu.category_id) == category_id)
+    connection = await session.connection()
+    prices = {
+        menu_id: new_price
+        for menu_id, new_price in await connection.execute(statement)
+    }
+    await session.commit()
+    menu_cache.forget(prices)
+    return prices
+
+
+async def set_prices(
+    session: AsyncSession, prices: Mapping[int, float]
+) -> Dict[int, float]:
+    """
+    Set the price of several menus in a single UPDATE, only if every
+    menu exists.
+    Args:
+        session (AsyncSession): The database session.
+        prices (Mapping[int, float]): The new price, by menu ID.
+    Raises:
+        UnknownMenuError: If some of the menus do not exist (nothing is
+          changed).
+    Returns:
+        Dict[int, float]: The new price of each menu, by menu ID.
+    """
+    price_list = values(
+        column("menu_id", Integer), column("price", Float), name="price_list"
+    ).data(sorted(prices.items()))
+    statement = (
+        update(Menu)
+        .where(col(Menu.id) == price_list.c.menu_id)
+        .values(price=price_list.c.price)
+        .returning(col(Menu.id), col(Menu.price))
+    )
+    connection = await session.connection()
+    updated = {
+        menu_id: price
+        for menu_id, price in await connection.execute(statement)
+    }
+    unknown = set(prices) - updated.keys()
+    if unknown:
+        await session.rollback()
+        raise UnknownMenuError(unknown)
+    await session.commit()
+    menu_cache.forget(updated)
+    return updated
+
+
+async def reserve_stock(
+    session: AsyncSession, quantities: Mapping[int, int]
+) -> Dict[int, float]:
+    """
+    Decrement the stock of several menus in a single UPDATE, only if
+    every menu has enough stock. Does not commit: the caller commits
+    with the rest of the order, or rolls back on error.
+
+    The rows are locked in menu ID order before being updated, so two
+    orders sharing several menus cannot deadlock; a concurrent order
+    waits for the lock, then sees the stock left by the first one.
+    Args:
+        session (AsyncSession): The database session.
+        quantities (Mapping[int, int]): The quantity to reserve, by menu ID.
+    Raises:
+        UnknownMenuError: If some of the menus do not exist.
+        OutOfStockError: If some of the menus are out of stock. The
+          session must then be rolled back.
+    Returns:
+        Dict[int, float]: The current price of each menu, by menu ID.
+    """
+    if not quantities:
+        return {}
+    wanted = values(
+        column("menu_id", Integer), column("quantity", Integer), name="wanted"
+    ).data(sorted(quantities.items()))
+    locked = (
+        select(Menu.id)
+        .where(col(Menu.id).in_(quantities))
+        .order_by(col(Menu.id))
+        .with_for_update()
+    )
+    statement = (
+        update(Menu)
+        .where(
+            col(Menu.id) == wanted.c.menu_id,
+            col(Menu.id).in_(locked),
+            col(Menu.stock) >= wanted.c.quantity,
+        )
+        .values(stock=col(Menu.stock) - wanted.c.quantity)
+        .returning(col(Menu.id), col(Menu.price))
+    )
+    # Instruction Core sur la connexion de la session (même transaction)
+    connection = await session.connection()
+    prices = {
+        menu_id: price
+        for menu_id, price in await connection.execute(statement)
+    }
+    # Le stock en cache de ces menus est périmé (même si la transaction
+    # est ensuite annulée : ils sont simplement relus)
+    menu_cache.forget(prices)
+    missing = set(quantities) - prices.keys()
+    if missing:
+        existing = await session.exec(
+            select(Menu.id).where(col(Menu.id).in_(missing))
+        )
+        unknown = missing - set(existing.all())
+        if unknown:
+            raise UnknownMenuError(unknown)
+        raise OutOfStockError(missing)
+    return prices
+
+
+async def release_stock(
+    session: AsyncSession, quantities: Mapping[int, int]
+) -> None:
+    """
+    Give back the stock reserved by `reserve_stock`, in a single UPDATE.
+    Does not commit.
+    Args:
+        session (AsyncSession): The database session.
+        quantities (Mapping[int, int]): The quantity to release, by menu ID.
+    """
+    if not quantities:
+        return
+    released = values(
+        column("menu_id", Integer),
+        column("quantity", Integer),
+        name="released",
+    ).data(sorted(quantities.items()))
+    statement = (
+        update(Menu)
+        .where(col(Menu.id) == released.c.menu_id)
+        .values(stock=col(Menu.stock) + released.c.quantity)
+    )
+    connection = await session.connection()
+    await connection.execute(statement)
+    menu_cache.forget(quantities)
+
+
+async def get_menu_categories(
+    session: AsyncSession, menu_ids: Iterable[int]
+) -> Dict[int, Optional[int]]:
+    """
+    Retrieve the category of several menus in a single query.
+    Args:
+        session (AsyncSession): The database session.
+        menu_ids (Iterable[int]): The IDs of the menus.
+    Returns:
+        Dict[int, Optional[int]]: The category ID of each existing menu.
+    """
+    statement = select(Menu.id, Menu.category_id).where(
+        col(Menu.id).in_(set(menu_ids))
+    )
+    return {
+        menu_id: category_id
+        for menu_id, category_id in await session.exec(statement)
+        if menu_id is not None
+    }
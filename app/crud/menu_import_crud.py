@@ -0,0 +1,235 @@
+import csv
+import io
+import json
+from enum import Enum
+from typing import (
+    Any,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    cast,
+)
+
+from psycopg import AsyncConnection
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.crud.catalog_cache import menu_cache
+from app.schemas.menu_schema import MenuImportError, MenuImportRow
+
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    JSON = "json"
+
+
+# Table de transit, propre à la transaction : les lignes y sont copiées
+# (COPY), contrôlées, puis fusionnées dans menu en une instruction
+STAGING_TABLE = """
+CREATE TEMP TABLE menu_import (
+    position integer NOT NULL,
+    name varchar(100) NOT NULL,
+    price double precision NOT NULL,
+    category_id integer NOT NULL,
+    description varchar(255) NOT NULL,
+    stock integer
+) ON COMMIT DROP
+"""
+STAGING_COLUMNS = [
+    "position",
+    "name",
+    "price",
+    "category_id",
+    "description",
+    "stock",
+]
+
+# Lignes rejetées, retirées de la table : (position, nom, erreur)
+UNKNOWN_CATEGORIES = """
+DELETE FROM menu_import s
+WHERE NOT EXISTS (SELECT 1 FROM category c WHERE c.id = s.category_id)
+RETURNING s.position, s.name, 'unknown category ' || s.category_id
+"""
+DUPLICATE_NAMES = """
+DELETE FROM menu_import s
+USING menu_import kept
+WHERE kept.name = s.name AND kept.position < s.position
+RETURNING s.position, s.name, 'duplicate of row ' || (
+    SELECT min(f.position) FROM menu_import f WHERE f.name = s.name
+)
+"""
+STAGING_INDEX = "CREATE UNIQUE INDEX ON menu_import (name)"
+
+# Création ou mise à jour par nom ; une ligne sans stock garde celui du
+# menu existant, lu sur la ligne verrouillée (une réservation de stock
+# concurrente n'est pas écrasée). Les menus existants sont verrouillés
+# par id croissant, comme menu_crud.reserve_stock : pas d'interblocage.
+# Les menus identiques ne sont ni réécrits ni renvoyés
+UPSERT = """
+INSERT INTO menu AS m (name, price, category_id, description, stock,
+                       created_at)
+SELECT s.name, s.price, s.category_id, s.description,
+       coalesce(s.stock, 0), now() AT TIME ZONE 'utc'
+FROM menu_import s
+LEFT JOIN menu existing ON existing.name = s.name
+ORDER BY existing.id NULLS LAST, s.position
+ON CONFLICT (name) DO UPDATE SET
+    price = EXCLUDED.price,
+    category_id = EXCLUDED.category_id,
+    description = EXCLUDED.description,
+    stock = coalesce(
+        (SELECT s.stock FROM menu_import s WHERE s.name = EXCLUDED.name),
+        m.stock
+    )
+WHERE (m.price, m.category_id, m.description, m.stock)
+    IS DISTINCT FROM (
+        EXCLUDED.price,
+        EXCLUDED.category_id,
+        EXCLUDED.description,
+        coalesce(
+            (SELECT s.stock FROM menu_import s WHERE s.name = EXCLUDED.name),
+            m.stock
+        )
+    )
+RETURNING m.id, m.xmax = 0
+"""
+
+
+class MenuImport(NamedTuple):
+    created: List[int]
+    updated: List[int]
+    unchanged: int
+    errors: List[MenuImportError]
+
+
+def read_records(data: bytes, format: ImportFormat) -> List[Dict[str, Any]]:
+    """
+    The records of a CSV file (with a header line) or of a JSON array
+    of objects. Empty CSV cells are left out.
+    Args:
+        data (bytes): The file, UTF-8.
+        format (ImportFormat): csv or json.
+    Raises:
+        ValueError: If the file cannot be read.
+    Returns:
+        List[Dict[str, Any]]: The records, in the order of the file.
+    """
+    content = data.decode("utf-8-sig")
+    if format is ImportFormat.CSV:
+        reader = csv.DictReader(io.StringIO(content))
+        # Cellules vides et colonnes sans en-tête (clé None) ignorées
+        try:
+            return [
+                {key: value for key, value in row.items() if key and value}
+                for row in reader
+            ]
+        except csv.Error as error:
+            raise ValueError(f"line {reader.line_num}: {error}")
+    records = json.loads(content)
+    if not isinstance(records, list) or not all(
+        isinstance(record, dict) for record in records
+    ):
+        raise ValueError("a JSON array of objects is expected")
+    return records
+
+
+def validate_rows(
+    records: Sequence[Dict[str, Any]],
+) -> Tuple[List[Tuple[int, MenuImportRow]], List[MenuImportError]]:
+    """
+    Validate the records of an import, one by one.
+    Args:
+        records (Sequence[Dict[str, Any]]): The records of the file.
+    Returns:
+        tuple: The valid rows with their position in the file (from 1),
+            and the errors of the other ones.
+    """
+    rows = []
+    errors = []
+    for position, record in enumerate(records, start=1):
+        try:
+            rows.append((position, MenuImportRow.model_validate(record)))
+        except ValidationError as error:
+            message = "; ".join(
+                f"{'.'.join(map(str, detail['loc']))}: {detail['msg']}"
+                for detail in error.errors()
+            )
+            name = record.get("name")
+            errors.append(
+                MenuImportError(
+                    row=position,
+                    name=name if isinstance(name, str) else None,
+                    error=message,
+                )
+            )
+    return rows, errors
+
+
+async def import_menus(
+    session: AsyncSession, records: Sequence[Dict[str, Any]]
+) -> MenuImport:
+    """
+    Create or update menus by name, in one transaction: the valid rows
+    are copied (COPY) into a staging table, the rows with an unknown
+    category or a name already seen in the file are rejected, then the
+    others are merged into the menus by a single INSERT ... ON CONFLICT.
+    Args:
+        session (AsyncSession): The database session.
+        records (Sequence[Dict[str, Any]]): The records of the file.
+    Returns:
+        MenuImport: The IDs of the created and updated menus, the
+            number of unchanged ones and the rejected rows.
+    """
+    rows, errors = validate_rows(records)
+    if not rows:
+        return MenuImport([], [], 0, errors)
+    connection = await session.connection()
+    await connection.execute(text(STAGING_TABLE))
+    # COPY passe par la connexion psycopg de la session (même transaction)
+    raw_connection = await connection.get_raw_connection()
+    driver = cast(AsyncConnection, raw_connection.driver_connection)
+    columns = ", ".join(STAGING_COLUMNS)
+    async with driver.cursor() as cursor:
+        async with cursor.copy(
+            f"COPY menu_import ({columns}) FROM STDIN"
+        ) as copy:
+            for position, row in rows:
+                await copy.write_row(
+                    (
+                        position,
+                        row.name,
+                        row.price,
+                        row.category_id,
+                        row.description,
+                        row.stock,
+                    )
+                )
+    for statement in (UNKNOWN_CATEGORIES, DUPLICATE_NAMES):
+        errors.extend(
+            MenuImportError(row=position, name=name, error=error)
+            for position, name, error in await connection.execute(
+                text(statement)
+            )
+        )
+    await connection.execute(text(STAGING_INDEX))
+    created: List[int] = []
+    updated: List[int] = []
+    for menu_id, inserted in await connection.execute(text(UPSERT)):
+        (created if inserted else updated).append(menu_id)
+    await session.commit()
+    # Noms, pages et lignes changent ensemble : tout le cache est relu
+    menu_cache.clear()
+    errors.sort(key=lambda error: error.row)
+    unchanged = len(records) - len(errors) - len(created) - len(updated)
+    return MenuImport(created, updated, unchanged, errors)
+
+
+def guess_format(filename: Optional[str]) -> ImportFormat:
+    """Le format d'un fichier d'après son extension (CSV par défaut)."""
+    if filename and filename.lower().endswith(".json"):
+        return ImportFormat.JSON
+    return ImportFormat.CSV
@@ -1,173 +1,559 @@
-from typing import List, Optional
+from collections import Counter
+from typing import Any, AsyncIterator, Iterable, List, Optional, Tuple
 from app.models.order import OrderBase
-from app.schemas.order_schema import OrderCreate, OrderUpdate
+from app.schemas.order_schema import (
+    OrderCreate,
+    OrderUpdate,
+    OrderWithLinesCreate,
+)
 from app.models.order import OrderStatus
-from app.models.order_detail import OrderDetailStatus
-from app.crud.order_detail_crud import get_all_order_details_by_order
-from sqlmodel import Session, select
+from app.models.order_detail import OrderDetail, OrderDetailStatus
+from app.crud.menu_crud import (
+    OutOfStockError,
+    UnknownMenuError,
+    reserve_stock,
+)
+from app.crud.daily_sales_crud import (
+    OrderChange,
+    apply_order_changes,
+    order_state,
+)
+from app.crud.keyset import KeysetCursor, keyset_paginate
+from sqlalchemy import (
+    ScalarSelect,
+    and_,
+    exists,
+    func,
+    insert,
+    text,
+    update,
+)
+from sqlalchemy.orm import selectinload
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import date, datetime, time
 
 
-def create_order(session: Session, order: OrderCreate) -> OrderBase:
+# Lignes des commandes chargées en une seule requête IN par lot de
+# commandes, triées par id (voir OrderBase.details)
+WITH_DETAILS = selectinload(OrderBase.details)  # type: ignore[arg-type]
+
+
+def created(order: OrderBase) -> OrderChange:
+    """Le changement du cumul d'une commande qui vient d'être créée."""
+    assert order.id is not None
+    return OrderChange(
+        order_id=order.id,
+        created_at=order.created_at,
+        before=None,
+        after=order_state(order),
+    )
+
+
+async def create_order(session: AsyncSession, order: OrderCreate) -> OrderBase:
     """
     Create a new order in the databas
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         order (OrderCreate): The order data to create.
     Returns:
         Order: The created order.
     """
     db_order = OrderBase.model_validate(order)
     session.add(db_order)
-    session.commit()
-    session.refresh(db_order)
+    # Une commande "Created" ne change pas le cumul : aucune requête
+    if db_order.status is not OrderStatus.CREATED:
+        await session.flush()
+        await apply_order_changes(session, [created(db_order)])
+    await session.commit()
+    await session.refresh(db_order)
     return db_order
 
 
-def get_order(session: Session, order_id: int) -> Optional[OrderBase]:
+async def create_order_with_lines(
+    session: AsyncSession, order: OrderWithLinesCreate
+) -> Tuple[OrderBase, List[OrderDetail]]:
+    """
+    Create an order and all its lines in one transaction: one UPDATE
+    reserving the stock (and returning the menu prices), one INSERT for
+    the order and one multi-row INSERT for the lines. The total is
+    computed from the menu prices and the order is created finalized
+    (status "Preparing").
+    Args:
+        session (AsyncSession): The database session.
+        order (OrderWithLinesCreate): The order and its lines.
+    Raises:
+        UnknownMenuError: If a line refers to a menu that does not exist.
+        OutOfStockError: If a menu does not have enough stock.
+    Returns:
+        Tuple[Order, List[OrderDetail]]: The created order and lines.
+    """
+    quantities: Counter[int] = Counter()
+    for line in order.lines:
+        quantities[line.menu_id] += line.quantity
+    try:
+        prices = await reserve_stock(session, quantities)
+    except (UnknownMenuError, OutOfStockError):
+        await session.rollback()
+        raise
+    db_order = OrderBase(
+        client_id=order.client_id,
+        total_price=sum(
+            prices[line.menu_id] * line.quantity for line in order.lines
+        ),
+        status=OrderStatus.PREPARING,
+    )
+    session.add(db_order)
+    await session.flush()
+
+    # insertmanyvalues : un seul INSERT ... VALUES (...), (...) RETURNING
+    statement = insert(OrderDetail).returning(
+        OrderDetail, sort_by_parameter_order=True
+    )
+    details = await session.exec(
+        statement,  # type: ignore[call-overload]
+        params=[
+            {
+                "order_id": db_order.id,
+                "created_at": db_order.created_at,
+                "menu_id": line.menu_id,
+                "price": prices[line.menu_id],
+                "quantity": line.quantity,
+                "comment": line.comment,
+                "status": OrderDetailStatus.CREATED,
+            }
+            for line in order.lines
+        ],
+    )
+    db_details = list(details.scalars().all())
+    await apply_order_changes(session, [created(db_order)])
+    await session.commit()
+    return db_order, db_details
+
+
+async def get_order(
+    session: AsyncSession, order_id: int, with_details: bool = False
+) -> Optional[OrderBase]:
     """
     Retrieve an order by ID from the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         order_id (int): The ID of the order to retrieve.
+        with_details (bool): Also load the order details.
     Returns:
         Order: The order object if found, otherwise raises ValueError.
     """
-    db_order = session.get(OrderBase, order_id)
+    db_order = await session.get(
+        OrderBase,
+        order_id,
+        options=[WITH_DETAILS] if with_details else [],
+        populate_existing=with_details,
+    )
     if not db_order:
         return None
     return db_order
 
 
-def get_all_orders(session: Session) -> Optional[List[OrderBase]]:
+# Version d'une commande : xmin (transaction de la dernière écriture) de
+# la commande et de ses lignes, et leur nombre (une ligne supprimée)
+ORDER_VERSION = text(
     """
-    Retrieve all orders from the database.
+    SELECT o.xmin::text, count(d.id), max(d.xmin::text::bigint)
+    FROM "order" o
+    LEFT JOIN orderdetail d
+        ON d.order_id = o.id AND d.created_at = o.created_at
+    WHERE o.id = :order_id
+    GROUP BY o.xmin::text
+    """
+)
+
+
+async def get_order_version(
+    session: AsyncSession, order_id: int
+) -> Optional[Tuple[Any, ...]]:
+    """
+    Read the version of an order and its details, without loading them.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
+        order_id (int): The ID of the order.
     Returns:
-        list[Order]: A list of all order objects.
+        tuple: The version, to build the ETag of the order, or None if
+            the order does not exist.
+    """
+    statement = ORDER_VERSION.bindparams(order_id=order_id)
+    result = await session.exec(statement)  # type: ignore[call-overload]
+    row = result.first()
+    return tuple(row) if row else None
+
+
+def select_orders(with_details: bool = False):
+    """
+    SELECT of orders, loading their details if asked (one more query
+    for the whole page, not one per order).
+    Args:
+        with_details (bool): Also load the order details.
+    Returns:
+        Select: The statement.
     """
     statement = select(OrderBase)
-    return list(session.exec(statement).all())
+    return statement.options(WITH_DETAILS) if with_details else statement
 
 
-def get_order_by_client_id(
-    session: Session, client_id: int
+async def get_all_orders(
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    after: Optional[KeysetCursor] = None,
+    with_details: bool = False,
+) -> List[OrderBase]:
+    """
+    Retrieve all orders from the database, ordered by (created_at, id).
+    Args:
+        session (AsyncSession): The database session.
+        limit (int, optional): Maximum number of orders to return.
+        after (tuple, optional): (created_at, id) of the last order
+          of the previous page.
+        with_details (bool): Also load the order details.
+    Returns:
+        list[Order]: A list of all order objects.
+    """
+    statement = keyset_paginate(
+        select_orders(with_details),
+        [OrderBase.created_at, OrderBase.id],
+        after=after,
+        limit=limit,
+    )
+    return list((await session.exec(statement)).all())
+
+
+async def get_order_by_client_id(
+    session: AsyncSession, client_id: int
 ) -> OrderBase | None:
     """
     Retrieve a order by its title from the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         client_id(int): The client_id of the order to retrieve.
     Returns:
         Order: The order object if found, otherwise raises ValueError.
     """
     statement = select(OrderBase).where(OrderBase.client_id == client_id)
-    db_order = session.exec(
-        statement
+    db_order = (
+        await session.exec(statement)
     ).first()  # TODO we get only the first order with the client_id
     return db_order
 
 
-def get_orders_by_date(session: Session, target_date: date) -> List[OrderBase]:
+async def get_orders_by_date(
+    session: AsyncSession,
+    target_date: date,
+    limit: Optional[int] = None,
+    after: Optional[KeysetCursor] = None,
+    with_details: bool = False,
+) -> List[OrderBase]:
     """
     Retrieve all orders by their date from the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         target_date(date): The date of the orders to retrieve.
+        limit (int, optional): Maximum number of orders to return.
+        after (tuple, optional): (created_at, id) of the last order
+          of the previous page.
+        with_details (bool): Also load the order details.
     Returns:
         List[Order]: The order object if found, otherwise raises ValueError.
     """
     start_date = datetime.combine(target_date, time.min)
     end_date = datetime.combine(target_date, time.max)
+    statement = keyset_paginate(
+        select_orders(with_details).where(
+            col(OrderBase.created_at).between(start_date, end_date)
+        ),
+        [OrderBase.created_at, OrderBase.id],
+        after=after,
+        limit=limit,
+    )
+    return list((await session.exec(statement)).all())
+
+
+async def stream_orders(
+    session: AsyncSession,
+    start_date: date,
+    end_date: date,
+    status: Optional[OrderStatus] = None,
+    client_id: Optional[int] = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[List[OrderBase]]:
+    """
+    Stream the orders created between two dates (inclusive), ordered by
+    (created_at, id), through a server-side cursor.
+    Args:
+        session (AsyncSession): The database session.
+        start_date (date): First day of the range.
+        end_date (date): Last day of the range.
+        status (OrderStatus, optional): Only orders with this status.
+        client_id (int, optional): Only orders of this client.
+        batch_size (int): Number of rows fetched per round trip.
+    Yields:
+        List[Order]: Batches of at most `batch_size` orders.
+    """
     statement = select(OrderBase).where(
-        OrderBase.created_at.between(start_date, end_date)  # type: ignore[attr-defined]
+        OrderBase.created_at >= datetime.combine(start_date, time.min),
+        OrderBase.created_at <= datetime.combine(end_date, time.max),
+    )
+    if status is not None:
+        statement = statement.where(OrderBase.status == status)
+    if client_id is not None:
+        statement = statement.where(OrderBase.client_id == client_id)
+    statement = statement.order_by(
+        col(OrderBase.created_at), col(OrderBase.id)
     )
-    return list(session.exec(statement).all())
+
+    # yield_per active stream_results : les lignes sont lues par paquets
+    # depuis un curseur serveur au lieu d'être toutes chargées en mémoire
+    result = await session.stream_scalars(
+        statement, execution_options={"yield_per": batch_size}
+    )
+    async for orders in result.partitions():
+        yield list(orders)
 
 
-def update_order(
-    session: Session, order_id: int, order_update: OrderUpdate
+async def update_order(
+    session: AsyncSession, order_id: int, order_update: OrderUpdate
 ) -> Optional[OrderBase]:
     """
     Update an existing order in the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         order_update (OrderUpdate): The updated order data.
     Returns:
         Order: The updated order object.
     """
-    db_order = session.get(OrderBase, order_id)
+    # Ligne relue et verrouillée : son état d'avant est celui que la
+    # modification remplace dans le cumul du jour
+    db_order = await session.get(
+        OrderBase, order_id, populate_existing=True, with_for_update=True
+    )
     if not db_order:
         return None
 
+    before = order_state(db_order)
     order_data = order_update.model_dump(exclude_unset=True)
     for key, value in order_data.items():
         setattr(db_order, key, value)
 
     session.add(db_order)
-    session.commit()
-    session.refresh(db_order)
+    await apply_order_changes(
+        session,
+        [
+            OrderChange(
+                order_id=order_id,
+                created_at=db_order.created_at,
+                before=before,
+                after=order_state(db_order),
+            )
+        ],
+    )
+    await session.commit()
+    await session.refresh(db_order)
     return db_order
 
 
-def delete_order(session: Session, order_id: int) -> None:
+async def delete_order(session: AsyncSession, order_id: int) -> None:
     """
     Delete an order from the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         order_id (int): The ID of the order to delete.
     Raises:
         ValueError: If the order with the given ID does not exist.
     """
-    db_order = session.get(OrderBase, order_id)
+    # Ligne relue et verrouillée : son état d'avant est celui que la
+    # modification remplace dans le cumul du jour
+    db_order = await session.get(
+        OrderBase, order_id, populate_existing=True, with_for_update=True
+    )
     if not db_order:
         return None
 
-    session.delete(db_order)
-    session.commit()
+    # Retirée du cumul avant la suppression (ses lignes sont encore lues)
+    await apply_order_changes(
+        session,
+        [
+            OrderChange(
+                order_id=order_id,
+                created_at=db_order.created_at,
+                before=order_state(db_order),
+                after=None,
+            )
+        ],
+    )
+    await session.delete(db_order)
+    await session.commit()
+
+
+def order_total_expression(
+    order_id: Any, created_at: Any = None
+) -> ScalarSelect[float]:
+    """
+    SQL subquery computing an order total: the sum of price * quantity
+    of its lines that are not cancelled (0 without lines).
+    Args:
+        order_id: The order ID, as a value or a column.
+        created_at: The order creation date, as a value or a column:
+            only the partition of that month is read.
+    Returns:
+        ScalarSelect: The total, usable in a SELECT or an UPDATE.
+    """
+    line_total = func.sum(
+        col(OrderDetail.price) * col(OrderDetail.quantity)
+    ).filter(col(OrderDetail.status) != OrderDetailStatus.CANCELLED)
+    statement = select(func.coalesce(line_total, 0.0)).where(
+        col(OrderDetail.order_id) == order_id
+    )
+    if created_at is not None:
+        statement = statement.where(col(OrderDetail.created_at) == created_at)
+    return statement.scalar_subquery()
 
 
-def get_order_total(session: Session, order_id: int) -> float:
+async def get_order_total(session: AsyncSession, order_id: int) -> float:
     """
-    Compute the order total price.
+    Compute the order total price in the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         order_id (int): The ID of the order.
-    Raises:
-        ValueError: If the order with the given ID does not exist.
     Returns:
         float: The total price of the order.
     """
-    # order = get_order(session, order_id)
-    order_details = get_all_order_details_by_order(session, order_id)
-    order_total = 0.0
-    for order_detail in order_details:
-        if order_detail.status is not OrderDetailStatus.CANCELLED:
-            order_total += order_detail.price * order_detail.quantity
-    return float(order_total)
+    order_total = await session.exec(select(order_total_expression(order_id)))
+    return float(order_total.one() or 0.0)
 
 
-def finalize_order(session: Session, order_id: int) -> Optional[OrderBase]:
+async def finalize_order(
+    session: AsyncSession, order_id: int
+) -> Optional[OrderBase]:
     """
-    Finalize an order.
+    Finalize an order: compute its total and set its status to
+    "Preparing", in a single UPDATE ... RETURNING.
+
+    Only an order in status "Created" is finalized. If two requests
+    finalize the same order at once, the second UPDATE waits for the
+    first one's row lock, then matches no row: it returns the order as
+    finalized by the first one.
     Args:
-        session (Session): The database session.
-        order_id (int): The ID of the order to delete.
-    Raises:
-        ValueError: If the order with the given ID does not exist.
+        session (AsyncSession): The database session.
+        order_id (int): The ID of the order to finalize.
     Returns:
-        OrderBase: The updated order object.
-    """
-    order = get_order(session, order_id)
-    if order:
-        # Finalize can only be made if the order is in status "created"
-        if order.status is OrderStatus.CREATED:
-            order_update = OrderUpdate(
-                client_id=order.client_id,
-                status=OrderStatus.PREPARING,
-                total_price=get_order_total(session, order_id),
-            )
-            update_order(session, order_id, order_update)
-            order = get_order(session, order_id)
+        OrderBase: The updated order object, the unchanged order if it
+          was not in status "Created", or None if it does not exist.
+    """
+    statement = (
+        update(OrderBase)
+        .where(
+            col(OrderBase.id) == order_id,
+            col(OrderBase.status) == OrderStatus.CREATED,
+        )
+        .values(
+            total_price=order_total_expression(
+                OrderBase.id, OrderBase.created_at
+            ),
+            status=OrderStatus.PREPARING,
+        )
+        .returning(OrderBase)
+    )
+    result = await session.exec(statement)  # type: ignore[call-overload]
+    order: Optional[OrderBase] = result.scalars().first()
+    if order is not None:
+        await apply_order_changes(
+            session,
+            [
+                OrderChange(
+                    order_id=order_id,
+                    created_at=order.created_at,
+                    before=(OrderStatus.CREATED, 0.0),
+                    after=order_state(order),
+                )
+            ],
+        )
+    await session.commit()
+    if order is None:
+        order = await get_order(session, order_id)
     return order
+
+
+async def rollup_order_status(
+    session: AsyncSession,
+    order_ids: Iterable[int],
+    status: OrderDetailStatus,
+) -> List[OrderBase]:
+    """
+    Move to `status` the orders whose lines all reached it, in a single
+    UPDATE. Cancelled lines are ignored (an order is "Ready" when all
+    its other lines are), unless every line is cancelled. Only
+    finalized orders move: created (not yet finalized), paid and
+    cancelled orders never change. The daily sales follow the status
+    changes. Does not commit.
+    Args:
+        session (AsyncSession): The database session.
+        order_ids (Iterable[int]): The orders whose lines just moved.
+        status (OrderDetailStatus): The status the lines moved to.
+    Returns:
+        List[Order]: The orders whose status changed.
+    """
+    order_status = OrderStatus[status.name]
+    settled = {status, OrderDetailStatus.CANCELLED}
+    # created_at : les lignes ne sont cherchées que dans la partition du
+    # mois de leur commande
+    line_of_order = and_(
+        col(OrderDetail.order_id) == OrderBase.id,
+        col(OrderDetail.created_at) == OrderBase.created_at,
+    )
+    # Statut précédent des commandes (verrouillées) pour le cumul : un
+    # UPDATE ... RETURNING ne renvoie que les nouvelles valeurs
+    previous = (
+        select(
+            col(OrderBase.id),
+            col(OrderBase.created_at),
+            col(OrderBase.status).label("previous_status"),
+        )
+        .where(col(OrderBase.id).in_(set(order_ids)))
+        .with_for_update()
+        .subquery("previous")
+    )
+    statement = (
+        update(OrderBase)
+        .where(
+            col(OrderBase.id) == previous.c.id,
+            col(OrderBase.created_at) == previous.c.created_at,
+            col(OrderBase.status).not_in(
+                {
+                    order_status,
+                    OrderStatus.CREATED,
+                    OrderStatus.PAID,
+                    OrderStatus.CANCELLED,
+                }
+            ),
+            exists().where(line_of_order, col(OrderDetail.status) == status),
+            ~exists().where(
+                line_of_order, col(OrderDetail.status).not_in(settled)
+            ),
+        )
+        .values(status=order_status)
+        # Les objets déjà dans la session prennent les valeurs renvoyées
+        .returning(OrderBase, previous.c.previous_status)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    result = await session.exec(statement)  # type: ignore[call-overload]
+    orders = []
+    changes = []
+    for order, previous_status in result.all():
+        orders.append(order)
+        changes.append(
+            OrderChange(
+                order_id=order.id,
+                created_at=order.created_at,
+                before=(previous_status, order.total_price),
+                after=order_state(order),
+            )
+        )
+    await apply_order_changes(session, changes)
+    return orders
@@ -1,113 +1,322 @@
-from typing import List, Optional
-from app.models.order_detail import OrderDetail
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+from app.crud.daily_sales_crud import (
+    LineChange,
+    apply_line_changes,
+    line_amount,
+)
+from app.crud.keyset import KeysetCursor, keyset_paginate
+from app.crud.menu_crud import (
+    OutOfStockError,
+    UnknownMenuError,
+    release_stock,
+    reserve_stock,
+)
+from app.crud.order_crud import rollup_order_status
+from app.models.order import OrderBase
+from app.models.order_detail import (
+    OrderDetail,
+    OrderDetailStatus,
+    previous_statuses,
+)
 from app.schemas.order_detail_schema import (
     OrderDetailCreate,
     OrderDetailUpdate,
 )
-from sqlmodel import Session, select
+from sqlalchemy import or_, update
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+class InvalidTransitionError(ValueError):
+    """Des lignes ne peuvent pas passer au statut demandé."""
+
+    def __init__(self, order_detail_ids: Iterable[int]):
+        self.order_detail_ids = sorted(order_detail_ids)
+        super().__init__(
+            "Invalid status transition for order detail(s): "
+            f"{self.order_detail_ids}"
+        )
+
+
+def reserved_stock(order_detail: OrderDetail) -> Counter[int]:
+    """
+    Stock held by an order detail: its quantity of its menu, or nothing
+    once cancelled.
+    Args:
+        order_detail (OrderDetail): The order detail.
+    Returns:
+        Counter[int]: The reserved quantity, by menu ID.
+    """
+    if order_detail.status is OrderDetailStatus.CANCELLED:
+        return Counter()
+    return Counter({order_detail.menu_id: order_detail.quantity})
+
+
+def order_ids_of(order_details: Iterable[OrderDetail]) -> Set[int]:
+    """Les commandes des lignes données."""
+    return {detail.order_id for detail in order_details if detail.order_id}
 
 
-def create_order_detail(
-    session: Session, order_detail: OrderDetailCreate
+async def create_order_detail(
+    session: AsyncSession, order_detail: OrderDetailCreate
 ) -> OrderDetail:
     """
     Create a new order detail in the databas
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         order detail (OrderDetailCreate): The order detail data to create.
+    Raises:
+        UnknownMenuError: If the menu does not exist.
+        OutOfStockError: If the menu does not have enough stock.
     Returns:
         Order detail: The created order detail.
     """
     db_order_detail = OrderDetail.model_validate(order_detail)
+    try:
+        await reserve_stock(session, reserved_stock(db_order_detail))
+    except (UnknownMenuError, OutOfStockError):
+        await session.rollback()
+        raise
     session.add(db_order_detail)
-    session.commit()
-    session.refresh(db_order_detail)
+    await session.flush()
+    await apply_line_changes(session, [line_amount(db_order_detail)])
+    await session.commit()
+    await session.refresh(db_order_detail)
     return db_order_detail
 
 
-def get_order_detail(
-    session: Session, order_detail_id: int
+async def get_order_detail(
+    session: AsyncSession, order_detail_id: int
 ) -> Optional[OrderDetail]:
     """
     Retrieve an order detail by ID from the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         order_detail_id (int): The ID of the order detail to retrieve.
     Returns:
         Order detail: The order detail object if found,
           otherwise raises ValueError.
     """
-    db_order_detail = session.get(OrderDetail, order_detail_id)
+    db_order_detail = await session.get(OrderDetail, order_detail_id)
     if not db_order_detail:
         return None
     return db_order_detail
 
 
-def get_all_order_details(session: Session) -> list[OrderDetail]:
+async def get_all_order_details(
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    after: Optional[KeysetCursor] = None,
+) -> list[OrderDetail]:
     """
-    Retrieve all order details from the database.
+    Retrieve all order details from the database, ordered by id.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
+        limit (int, optional): Maximum number of order details to return.
+        after (tuple, optional): (id,) of the last order detail of the
+          previous page.
     Returns:
         list[Order detail]: A list of all order detail objects.
     """
-    statement = select(OrderDetail)
-    return list(session.exec(statement).all())
+    statement = keyset_paginate(
+        select(OrderDetail), [OrderDetail.id], after=after, limit=limit
+    )
+    return list((await session.exec(statement)).all())
 
 
-def update_order_detail(
-    session: Session,
+async def update_order_detail(
+    session: AsyncSession,
     order_detail_id: int,
     order_detail_update: OrderDetailUpdate,
 ) -> Optional[OrderDetail]:
     """
     Update an existing order detail in the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         order_detail_update (OrderDetailUpdate): The updated order detail data.
+    Raises:
+        UnknownMenuError: If the new menu does not exist.
+        OutOfStockError: If the new menu or quantity exceeds the stock.
     Returns:
         Order detail: The updated order detail object.
     """
-    db_order_detail = session.get(OrderDetail, order_detail_id)
+    db_order_detail = await session.get(OrderDetail, order_detail_id)
     if not db_order_detail:
         return None
 
+    reserved_before = reserved_stock(db_order_detail)
+    amount_before = line_amount(db_order_detail, -1)
     order_detail_data = order_detail_update.model_dump(exclude_unset=True)
     for key, value in order_detail_data.items():
         setattr(db_order_detail, key, value)
 
+    # Ajuste le stock : annulation, réactivation, quantité ou menu modifié
+    reserved_after = reserved_stock(db_order_detail)
+    try:
+        await reserve_stock(session, reserved_after - reserved_before)
+    except (UnknownMenuError, OutOfStockError):
+        await session.rollback()
+        raise
+    await release_stock(session, reserved_before - reserved_after)
+
     session.add(db_order_detail)
-    session.commit()
-    session.refresh(db_order_detail)
+    await session.flush()
+    await apply_line_changes(
+        session, [amount_before, line_amount(db_order_detail)]
+    )
+    await session.commit()
+    await session.refresh(db_order_detail)
     return db_order_detail
 
 
-def delete_order_detail(session: Session, order_detail_id: int) -> None:
+async def delete_order_detail(
+    session: AsyncSession, order_detail_id: int
+) -> None:
     """
     Delete an order detail from the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
         order_detail_id (int): The ID of the order detail to delete.
     Raises:
         ValueError: If the order detail with the given ID does not exist.
     """
-    db_order_detail = session.get(OrderDetail, order_detail_id)
+    db_order_detail = await session.get(OrderDetail, order_detail_id)
     if not db_order_detail:
         return None
 
-    session.delete(db_order_detail)
-    session.commit()
+    await release_stock(session, reserved_stock(db_order_detail))
+    await apply_line_changes(session, [line_amount(db_order_detail, -1)])
+    await session.delete(db_order_detail)
+    await session.commit()
 
 
-def get_all_order_details_by_order(
-    session: Session, order_id: int
+async def get_all_order_details_by_order(
+    session: AsyncSession, order_id: int
 ) -> List[OrderDetail]:
     """
     Retrieve all order details of an order from the database.
     Args:
-        session (Session): The database session.
+        session (AsyncSession): The database session.
     Returns:
         list[Order detail]: A list of all order details objects from an order.
     """
     statement = select(OrderDetail).where(OrderDetail.order_id == order_id)
-    return list(session.exec(statement).all())
+    return list((await session.exec(statement)).all())
+
+
+async def get_order_details_by_orders(
+    session: AsyncSession,
+    order_ids: Sequence[int],
+    created_between: Optional[Tuple[datetime, datetime]] = None,
+) -> List[OrderDetail]:
+    """
+    Retrieve the order details of several orders in a single query.
+    Args:
+        session (AsyncSession): The database session.
+        order_ids (Sequence[int]): The IDs of the orders.
+        created_between (tuple, optional): The first and last created_at
+          of these orders, to only read the partitions of those months.
+    Returns:
+        list[Order detail]: The order details, ordered by order then id.
+    """
+    if not order_ids:
+        return []
+    statement = (
+        select(OrderDetail)
+        .where(col(OrderDetail.order_id).in_(order_ids))
+        .order_by(col(OrderDetail.order_id), col(OrderDetail.id))
+    )
+    if created_between is not None:
+        first, last = created_between
+        statement = statement.where(
+            col(OrderDetail.created_at) >= first,
+            col(OrderDetail.created_at) <= last,
+        )
+    return list((await session.exec(statement)).all())
+
+
+async def transition_order_details(
+    session: AsyncSession,
+    status: OrderDetailStatus,
+    order_detail_ids: Sequence[int] = (),
+    order_ids: Sequence[int] = (),
+) -> Tuple[List[OrderDetail], List[OrderBase]]:
+    """
+    Move many order details to `status` in one set-based UPDATE, then
+    roll the status up to the orders whose lines all reached it.
+
+    Every listed line must be allowed to move to `status` by
+    ORDER_DETAIL_TRANSITIONS (lines already in `status` are left as
+    they are), otherwise nothing changes. For the listed orders, only
+    the lines that can make the transition move: "every line of order
+    12 is ready" skips its cancelled lines. Cancelled lines give their
+    stock back.
+    Args:
+        session (AsyncSession): The database session.
+        status (OrderDetailStatus): The new status.
+        order_detail_ids (Sequence[int]): The order details to move.
+        order_ids (Sequence[int]): The orders whose lines to move.
+    Raises:
+        InvalidTransitionError: If a listed line does not exist or
+          cannot move to `status`.
+    Returns:
+        Tuple[List[OrderDetail], List[Order]]: The moved order details
+          and the orders whose status changed.
+    """
+    statement = (
+        update(OrderDetail)
+        .where(
+            or_(
+                col(OrderDetail.id).in_(order_detail_ids),
+                col(OrderDetail.order_id).in_(order_ids),
+            ),
+            col(OrderDetail.status).in_(previous_statuses(status)),
+        )
+        .values(status=status)
+        # Les objets déjà dans la session prennent les valeurs renvoyées
+        .returning(OrderDetail)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    result = await session.exec(statement)  # type: ignore[call-overload]
+    details: List[OrderDetail] = list(result.scalars().all())
+
+    missing = set(order_detail_ids) - {detail.id for detail in details}
+    if missing:
+        already = await session.exec(
+            select(OrderDetail.id).where(
+                col(OrderDetail.id).in_(missing), OrderDetail.status == status
+            )
+        )
+        invalid = missing - set(already.all())
+        if invalid:
+            await session.rollback()
+            raise InvalidTransitionError(invalid)
+
+    if status is OrderDetailStatus.CANCELLED:
+        released: Counter[int] = Counter()
+        for detail in details:
+            released[detail.menu_id] += detail.quantity
+        await release_stock(session, released)
+        # Les lignes annulées sortent du cumul, avant que leurs commandes
+        # (entièrement annulées) ne cessent d'y compter
+        await apply_line_changes(
+            session,
+            [
+                LineChange(
+                    order_id=detail.order_id,
+                    created_at=detail.created_at,
+                    menu_id=detail.menu_id,
+                    amount=-detail.price * detail.quantity,
+                )
+                for detail in details
+                if detail.order_id is not None
+                and detail.created_at is not None
+            ],
+        )
+
+    moved_order_ids = order_ids_of(details)
+    orders = await rollup_order_status(session, moved_order_ids, status)
+    await session.commit()
+    return details, orders
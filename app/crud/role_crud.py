@@ -1,37 +1,45 @@
 from app.schemas.role_schema import RoleCreate, RoleUpdate
 from app.models import Role, RoleType
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
-def create_role(session: Session, role_schema: RoleCreate) -> Role:
+async def create_role(session: AsyncSession, role_schema: RoleCreate) -> Role:
     role_model = Role.model_validate(role_schema)
     session.add(role_model)
-    session.commit()
-    session.refresh(role_model)
+    await session.commit()
+    await session.refresh(role_model)
     return role_model
 
 
-def get_role_by_id(session: Session, role_id: int) -> Role | None:
-    return session.get(Role, role_id)
+async def get_role_by_id(session: AsyncSession, role_id: int) -> Role | None:
+    return await session.get(Role, role_id)
 
 
-def get_role_by_role_type(
-    session: Session, role_type: RoleType
+async def get_roles_by_ids(
+    session: AsyncSession, role_ids: list[int]
+) -> list[Role]:
+    statement = select(Role).where(Role.id.in_(role_ids))  # type: ignore[union-attr]
+    return list((await session.exec(statement)).all())
+
+
+async def get_role_by_role_type(
+    session: AsyncSession, role_type: RoleType
 ) -> Role | None:
     statement = select(Role).where(Role.role_type == role_type)
-    role_model = session.exec(statement).first()
+    role_model = (await session.exec(statement)).first()
     return role_model
 
 
-def get_all_roles(session: Session) -> list[Role]:
+async def get_all_roles(session: AsyncSession) -> list[Role]:
     statement = select(Role)
-    return list(session.exec(statement).all())
+    return list((await session.exec(statement)).all())
 
 
-def update_role(
-    session: Session, role_id: int, role_update: RoleUpdate
+async def update_role(
+    session: AsyncSession, role_id: int, role_update: RoleUpdate
 ) -> Role:
-    role_model = session.get(Role, role_id)
+    role_model = await session.get(Role, role_id)
     if not role_model:
         raise ValueError("Role not found")
 
@@ -40,15 +48,15 @@ def update_role(
         setattr(role_model, key, value)
 
     session.add(role_model)
-    session.commit()
-    session.refresh(role_model)
+    await session.commit()
+    await session.refresh(role_model)
     return role_model
 
 
-def delete_role(session: Session, role_id: int) -> None:
-    role_model = session.get(Role, role_id)
+async def delete_role(session: AsyncSession, role_id: int) -> None:
+    role_model = await session.get(Role, role_id)
     if not role_model:
         raise ValueError("Role not found")
 
-    session.delete(role_model)
-    session.commit()
+    await session.delete(role_model)
+    await session.commit()
@@ -0,0 +1,20 @@
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.table_version import TableVersion
+
+
+async def get_table_version(session: AsyncSession, table_name: str) -> int:
+    """
+    Read the version counter of a table, incremented by a trigger after
+    every write to it.
+    Args:
+        session (AsyncSession): The database session.
+        table_name (str): The name of the table.
+    Returns:
+        int: The version (0 for a table without counter).
+    """
+    statement = select(col(TableVersion.version)).where(
+        col(TableVersion.table_name) == table_name
+    )
+    return (await session.exec(statement)).first() or 0
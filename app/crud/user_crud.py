@@ -1,13 +1,15 @@
 from typing import List, Optional
+from app.crud.keyset import KeysetCursor, keyset_paginate
+from app.crud.order_crud import select_orders
 from app.models.order import OrderBase
-from app.schemas.order_schema import OrderPublic
 from app.schemas.user_schema import UserCreate, UserLogin
 from app.models import User, Role
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.auth.security import hash_password, verify_password
 
 
-def create_user(session: Session, user_schema: UserCreate) -> User:
+async def create_user(session: AsyncSession, user_schema: UserCreate) -> User:
     new_user = User(
         username=user_schema.username,
         email=user_schema.email,
@@ -20,8 +22,10 @@ def create_user(session: Session, user_schema: UserCreate) -> User:
 
     if user_schema.role_ids:
         roles = list(
-            session.exec(
-                select(Role).where(Role.id.in_(user_schema.role_ids))  # type: ignore[union-attr]
+            (
+                await session.exec(
+                    select(Role).where(Role.id.in_(user_schema.role_ids))  # type: ignore[union-attr]
+                )
             ).all()
         )
         if len(roles) != len(user_schema.role_ids):
@@ -30,28 +34,40 @@ def create_user(session: Session, user_schema: UserCreate) -> User:
     new_user.roles = roles
     session.add(new_user)
 
-    session.commit()
-    session.refresh(new_user)
+    await session.commit()
+    await session.refresh(new_user)
     return new_user
 
 
-def get_user_by_id(session: Session, user_id: int) -> Optional[User]:
-    return session.get(User, user_id)
+async def get_user_by_id(
+    session: AsyncSession, user_id: int
+) -> Optional[User]:
+    return await session.get(User, user_id)
 
 
-def get_all_users(session: Session) -> list[User]:
-    statement = select(User)
-    return list(session.exec(statement).all())
+async def get_all_users(
+    session: AsyncSession,
+    limit: Optional[int] = None,
+    after: Optional[KeysetCursor] = None,
+) -> list[User]:
+    statement = keyset_paginate(
+        select(User), [User.created_at, User.id], after=after, limit=limit
+    )
+    return list((await session.exec(statement)).all())
 
 
-def get_user_by_email(session: Session, email: str) -> Optional[User]:
+async def get_user_by_email(
+    session: AsyncSession, email: str
+) -> Optional[User]:
     statement = select(User).where(User.email == email)
-    user_model = session.exec(statement).first()
+    user_model = (await session.exec(statement)).first()
     return user_model
 
 
-def update_user(session: Session, user_id: int, user_update: User) -> User:
-    user_model = session.get(User, user_id)
+async def update_user(
+    session: AsyncSession, user_id: int, user_update: User
+) -> User:
+    user_model = await session.get(User, user_id)
     if not user_model:
         raise ValueError("User not found")
 
@@ -60,22 +76,22 @@ def update_user(session: Session, user_id: int, user_update: User) -> User:
         setattr(user_model, key, value)
 
     session.add(user_model)
-    session.commit()
-    session.refresh(user_model)
+    await session.commit()
+    await session.refresh(user_model)
     return user_model
 
 
-def delete_user(session: Session, user_id: int) -> None:
-    user_model = session.get(User, user_id)
+async def delete_user(session: AsyncSession, user_id: int) -> None:
+    user_model = await session.get(User, user_id)
     if not user_model:
         raise ValueError("User not found")
 
-    session.delete(user_model)
-    session.commit()
+    await session.delete(user_model)
+    await session.commit()
 
 
-def check_user(session: Session, user_schema: UserLogin) -> bool:
-    user = get_user_by_email(session, user_schema.email)
+async def check_user(session: AsyncSession, user_schema: UserLogin) -> bool:
+    user = await get_user_by_email(session, user_schema.email)
 
     if user:
         if user.email == user_schema.email and verify_password(
@@ -85,8 +101,17 @@ def check_user(session: Session, user_schema: UserLogin) -> bool:
     return False
 
 
-def get_all_orders_by_customer(
-    session: Session, user_id: int
-) -> List[OrderPublic]:
-    statement = select(OrderBase).where(OrderBase.client_id == user_id)
-    return list(session.exec(statement).all())  # type: ignore[arg-type]
+async def get_all_orders_by_customer(
+    session: AsyncSession,
+    user_id: int,
+    limit: Optional[int] = None,
+    after: Optional[KeysetCursor] = None,
+    with_details: bool = False,
+) -> List[OrderBase]:
+    statement = keyset_paginate(
+        select_orders(with_details).where(OrderBase.client_id == user_id),
+        [OrderBase.created_at, OrderBase.id],
+        after=after,
+        limit=limit,
+    )
+    return list((await session.exec(statement)).all())
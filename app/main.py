@@ -1,7 +1,20 @@
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Request
 from app.api.main import router
 from app.core.config import settings
+from app.core.database import pool_stats
+from app.core.pool_stats import emit_pool_metrics
+from app.core.query_counter import track_queries
+
+
+async def report_pool_metrics(interval: float) -> None:
+    """
+    Remonte périodiquement les statistiques des pools aux hooks.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        emit_pool_metrics(pool_stats)
 
 
 # on utilise alembic pour la création de la BDD...
@@ -19,10 +32,19 @@ async def lifespan(app: FastAPI):
     # on passe par alembic pour la création de la BDD
     # # Crée les tables de la base de données au démarrage
     # create_db_and_tables()
+    metrics_task = None
+    if settings.DB_POOL_METRICS_INTERVAL > 0:
+        metrics_task = asyncio.create_task(
+            report_pool_metrics(settings.DB_POOL_METRICS_INTERVAL)
+        )
     # Le 'yield' indique que l'application est maintenant démarrée
     # et prête à servir
     yield
     print("Application en cours d'arrêt...")
+    if metrics_task is not None:
+        metrics_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await metrics_task
     # Ici, vous pouvez ajouter du code pour fermer des connexions, etc.
     # Dans le cas de SQLModel, l'engine est géré automatiquement,
     # mais vous pourriez fermer d'autres types de connexions (Redis, etc.).
@@ -32,6 +54,18 @@ async def lifespan(app: FastAPI):
 # Crée l'application FastAPI en passant la fonction lifespan
 app = FastAPI(lifespan=lifespan)
 
+
+# Nombre de requêtes SQL et temps passé en base, pour chaque requête HTTP
+# (et détection des requêtes répétées, motif N+1)
+@app.middleware("http")
+async def count_queries(request: Request, call_next):
+    with track_queries() as stats:
+        response = await call_next(request)
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+    response.headers["X-DB-Time-Ms"] = f"{stats.duration_ms:.1f}"
+    return response
+
+
 # Gestion des CORS qu'il faudra très certainement activer
 # # Set all CORS enabled origins
 # if settings.all_cors_origins:
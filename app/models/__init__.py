@@ -1,3 +1,5 @@
 # Circular references management
 from .role import Role, RoleType
 from .user import User
+from .order import OrderBase
+from .order_detail import OrderDetail
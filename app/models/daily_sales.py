@@ -0,0 +1,40 @@
+from datetime import date, datetime, timezone
+from typing import Dict
+
+from sqlalchemy import Column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+
+class DailySales(SQLModel, table=True):
+    """
+    Daily sales rollup: one row per day (UTC), maintained by
+    `daily_sales_crud` in the transaction that changes the orders: each
+    write adds its delta, `rebuild_daily_sales` recomputes whole days.
+
+    Revenue only counts finalized orders that are not cancelled
+    (Preparing, Ready, Served, Paid); orders not finalized yet (Created)
+    are not counted at all.
+
+    Args:
+        SQLModel (SQLModel): Base class for SQLAlchemy models.
+        table (bool, optional): Whether the model is a SQLAlchemy table.
+        Defaults to False.
+    """
+
+    __tablename__ = "daily_sales"
+    day: date = Field(primary_key=True)
+    revenue: float = Field(default=0)
+    order_count: int = Field(default=0)
+    average_ticket: float = Field(default=0)
+    # Nombre de commandes finalisées par statut (annulées comprises)
+    orders_by_status: Dict[str, int] = Field(
+        default_factory=dict, sa_column=Column(JSONB, nullable=False)
+    )
+    # Chiffre d'affaires par id de catégorie ("none" : sans catégorie)
+    revenue_by_category: Dict[str, float] = Field(
+        default_factory=dict, sa_column=Column(JSONB, nullable=False)
+    )
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc)
+    )
@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import Column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """
+    Response stored for an `Idempotency-Key` header, replayed when a
+    client retries the same request. A row without status code is a
+    request still being processed; it expires after a short lease, so
+    that a retry takes the key over if the request never completed.
+
+    Args:
+        SQLModel (SQLModel): Base class for SQLAlchemy models.
+        table (bool, optional): Whether the model is a SQLAlchemy table.
+        Defaults to False.
+    """
+
+    __tablename__ = "idempotency_key"
+    # "<méthode> <chemin> <utilisateur>" : une clé ne vaut que pour une
+    # route et un client
+    scope: str = Field(primary_key=True, max_length=255)
+    key: str = Field(primary_key=True, max_length=255)
+    # Empreinte du corps de la requête, pour refuser une clé réutilisée
+    # avec un autre contenu
+    fingerprint: str = Field(max_length=64)
+    status_code: Optional[int] = Field(default=None)
+    response: Optional[Any] = Field(
+        default=None, sa_column=Column(JSONB, nullable=True)
+    )
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc)
+    )
+    expires_at: datetime = Field(index=True)
@@ -1,7 +1,16 @@
 from typing import Optional
+from sqlalchemy import Column, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlmodel import Field, SQLModel
 from datetime import datetime, timezone
 
+# Langue de la recherche plein texte (racinisation, mots vides)
+SEARCH_CONFIG = "french"
+
+# Index trigrammes du nom (recherche approchée), hors des métadonnées :
+# la migration c4e8a1d5f923 ne le crée que si pg_trgm est disponible
+NAME_TRIGRAM_INDEX = "ix_menu_name_trgm"
+
 
 class Menu(SQLModel, table=True):
     """
@@ -16,9 +25,34 @@ class Menu(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(..., max_length=100, nullable=False, unique=True)
     price: float = Field(default=0, ge=0, nullable=False)
-    category_id: Optional[int] = Field(default=None, foreign_key="category.id")
+    category_id: Optional[int] = Field(
+        default=None, foreign_key="category.id", index=True
+    )
     description: str = Field(..., max_length=255)
     stock: int = Field(default=0, ge=0)
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc)
     )
+
+
+# Document de recherche d'un menu, calculé par PostgreSQL : le nom pèse
+# plus que la description dans le classement. Colonne de la table mais
+# pas du modèle : jamais chargée par l'ORM, lue par menu_crud.search_menus
+SEARCH_VECTOR = Column(
+    "search_vector",
+    TSVECTOR,
+    Computed(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', name), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', description), 'B')",
+        persisted=True,
+    ),
+)
+SQLModel.metadata.tables["menu"].append_column(SEARCH_VECTOR)
+# Sans fastupdate : les lignes écrites vont directement dans l'index, au
+# lieu d'une liste d'attente qu'il faudrait parcourir à chaque recherche
+Index(
+    "ix_menu_search_vector",
+    SEARCH_VECTOR,
+    postgresql_using="gin",
+    postgresql_with={"fastupdate": "off"},
+)
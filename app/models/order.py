@@ -1,6 +1,7 @@
-from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, text
+from sqlmodel import SQLModel, Field, Relationship
 from datetime import timezone, datetime
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 
@@ -13,14 +14,58 @@ class OrderStatus(str, Enum):  # Enum for order status to ensure valid values.
     PAID = "Paid"
 
 
+# Commandes comptées dans le chiffre d'affaires : finalisées, non annulées
+REVENUE_STATUSES = (
+    OrderStatus.PREPARING,
+    OrderStatus.READY,
+    OrderStatus.SERVED,
+    OrderStatus.PAID,
+)
+
+# Statuts en cours (vus par la cuisine), en noms d'enum comme en base
+ACTIVE_ORDER_STATUSES = text("status IN ('CREATED', 'PREPARING', 'READY')")
+
+
 class OrderBase(
     SQLModel, table=True
 ):  # Order model representing a customer's order in the restaurant system.
     __tablename__ = "order"
-    id: Optional[int] = Field(default=None, primary_key=True)
+    # Table partitionnée par mois de created_at (migration b7d3e91f4c26,
+    # voir app.core.partitions) : la clé primaire contient created_at,
+    # l'identité ORM reste l'id seul
+    __table_args__ = (
+        Index("ix_order_created_at_id", "created_at", "id"),
+        Index(
+            "ix_order_client_id_created_at", "client_id", "created_at", "id"
+        ),
+        Index(
+            "ix_order_active_created_at",
+            "created_at",
+            postgresql_where=ACTIVE_ORDER_STATUSES,
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    __mapper_args__ = {"primary_key": ["id"]}
+    id: Optional[int] = Field(
+        default=None,
+        primary_key=True,
+        sa_column_kwargs={"autoincrement": True},
+    )
     client_id: int = Field(..., foreign_key="user.id")
     created_at: datetime = Field(
-        default_factory=lambda: datetime.now(timezone.utc)
+        default_factory=lambda: datetime.now(timezone.utc), primary_key=True
     )
     total_price: float = Field(..., gt=0)
     status: OrderStatus = Field(...)
+    # Chargées à la demande (selectinload), jamais implicitement :
+    # lazy="raise" signale tout lazy-load, impossible en async.
+    # passive_deletes : la suppression d'une commande ne touche pas ses
+    # lignes (la clé étrangère la refuse s'il en reste)
+    details: List["OrderDetail"] = Relationship(  # type: ignore[name-defined]
+        back_populates="order",
+        sa_relationship_kwargs={
+            "lazy": "raise",
+            "order_by": "OrderDetail.id",
+            "passive_deletes": "all",
+        },
+    )
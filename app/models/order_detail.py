@@ -1,6 +1,18 @@
-from sqlmodel import Field, SQLModel
-from typing import Optional
+from sqlalchemy import (
+    Connection,
+    ForeignKeyConstraint,
+    Index,
+    event,
+    inspect,
+    select,
+    text,
+)
+from sqlalchemy.orm import Mapper
+from sqlmodel import Field, Relationship, SQLModel, col
+from typing import Any, Dict, FrozenSet, Optional
+from datetime import datetime, timezone
 from enum import Enum
+from app.models.order import OrderBase
 
 
 class OrderDetailStatus(
@@ -13,14 +25,98 @@ class OrderDetailStatus(
     CANCELLED = "Cancelled"
 
 
+# Machine à états des lignes de commande (statut -> statuts suivants)
+ORDER_DETAIL_TRANSITIONS: Dict[
+    OrderDetailStatus, FrozenSet[OrderDetailStatus]
+] = {
+    OrderDetailStatus.CREATED: frozenset(
+        {OrderDetailStatus.PREPARING, OrderDetailStatus.CANCELLED}
+    ),
+    OrderDetailStatus.PREPARING: frozenset(
+        {OrderDetailStatus.READY, OrderDetailStatus.CANCELLED}
+    ),
+    OrderDetailStatus.READY: frozenset({OrderDetailStatus.SERVED}),
+    OrderDetailStatus.SERVED: frozenset(),
+    OrderDetailStatus.CANCELLED: frozenset(),
+}
+
+
+def previous_statuses(
+    status: OrderDetailStatus,
+) -> FrozenSet[OrderDetailStatus]:
+    """Statuts depuis lesquels une ligne peut passer à `status`."""
+    return frozenset(
+        source
+        for source, targets in ORDER_DETAIL_TRANSITIONS.items()
+        if status in targets
+    )
+
+
 class OrderDetail(
     SQLModel, table=True
 ):  # OrderDetail links an Order to its MenuItems (many-to-many).
 
-    id: Optional[int] = Field(default=None, primary_key=True)
-    order_id: Optional[int] = Field(default=None, foreign_key="order.id")
-    menu_id: int = Field(..., foreign_key="menu.id")
+    # Index créés par la migration 3c9f0e2a7b41, recréés sur la table
+    # partitionnée par b7d3e91f4c26 ; les lignes servies ou annulées
+    # sortent de l'index partiel de la cuisine
+    __table_args__ = (
+        Index(
+            "ix_orderdetail_active_status",
+            "status",
+            "order_id",
+            postgresql_where=text(
+                "status IN ('CREATED', 'PREPARING', 'READY')"
+            ),
+        ),
+        # Une ligne est dans la partition du mois de sa commande
+        ForeignKeyConstraint(
+            ["order_id", "created_at"],
+            ["order.id", "order.created_at"],
+            onupdate="CASCADE",
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    id: Optional[int] = Field(
+        default=None,
+        primary_key=True,
+        sa_column_kwargs={"autoincrement": True},
+    )
+    order_id: Optional[int] = Field(default=None, index=True)
+    # created_at de la commande, recopié à l'écriture (clé de partition)
+    created_at: Optional[datetime] = Field(default=None, primary_key=True)
+    menu_id: int = Field(..., foreign_key="menu.id", index=True)
     price: float = Field(..., ge=0)
     comment: str = Field(default="", max_length=255)
     quantity: int = Field(..., gt=0)
     status: OrderDetailStatus = Field(...)
+    order: Optional["OrderBase"] = Relationship(  # type: ignore[name-defined]
+        back_populates="details", sa_relationship_kwargs={"lazy": "raise"}
+    )
+
+
+def order_created_at(
+    connection: Connection, order_id: Optional[int]
+) -> datetime:
+    # La clé de partition d'une ligne : la date de sa commande
+    if order_id is None:
+        return datetime.now(timezone.utc)
+    statement = select(col(OrderBase.created_at)).where(
+        col(OrderBase.id) == order_id
+    )
+    created_at: datetime = connection.execute(statement).scalar_one()
+    return created_at
+
+
+@event.listens_for(OrderDetail, "before_insert")
+def set_created_at(mapper: Mapper, connection: Connection, target: Any):
+    if target.created_at is None:
+        target.created_at = order_created_at(connection, target.order_id)
+
+
+@event.listens_for(OrderDetail, "before_update")
+def move_created_at(mapper: Mapper, connection: Connection, target: Any):
+    # Ligne déplacée vers une autre commande : elle change de partition
+    if inspect(target).attrs.order_id.history.has_changes():
+        target.created_at = order_created_at(connection, target.order_id)
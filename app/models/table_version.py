@@ -0,0 +1,20 @@
+from sqlmodel import Field, SQLModel
+
+
+class TableVersion(SQLModel, table=True):
+    """
+    Version counter of a table, incremented by a trigger after every
+    statement that writes to it (see migration 9a4c2f6e8b13; for menu,
+    only its catalog columns, not the stock). The "menu_availability"
+    row counts the menus running out of stock or restocked (migration
+    e5a1c7b3f920). Read to build the ETag of the catalog routes.
+
+    Args:
+        SQLModel (SQLModel): Base class for SQLAlchemy models.
+        table (bool, optional): Whether the model is a SQLAlchemy table.
+        Defaults to False.
+    """
+
+    __tablename__ = "table_version"
+    table_name: str = Field(primary_key=True, max_length=63)
+    version: int = Field(default=0)
@@ -17,8 +17,12 @@ class User(SQLModel, table=True):
     last_name: str = Field(max_length=50, nullable=False)
     adresse: str = Field(nullable=False)
     phone: str = Field(max_length=30, nullable=False)
+    # lazy="selectin" : les rôles sont chargés en une seule requête IN,
+    #  indispensable en async où le lazy-load implicite est impossible.
     roles: List["Role"] = Relationship(  # type: ignore[name-defined]
-        back_populates="users", link_model=UserRoleLink
+        back_populates="users",
+        link_model=UserRoleLink,
+        sa_relationship_kwargs={"lazy": "selectin"},
     )
 
     # # test de relation User <> Role sans table intermédiaire
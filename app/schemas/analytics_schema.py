@@ -0,0 +1,58 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class MenuSales(BaseModel):
+    """
+    Sales of one menu over a date range.
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    menu_id: int
+    name: str
+    quantity: int
+    revenue: float
+
+
+class CategoryRevenue(BaseModel):
+    """
+    Revenue of one category over a date range (no category: None).
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    category_id: Optional[int]
+    name: Optional[str]
+    revenue: float
+
+
+class HourlyRevenue(BaseModel):
+    """
+    One cell of the revenue heatmap: a day of the week (1 = Monday) and
+    an hour of the day (UTC).
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    weekday: int
+    hour: int
+    order_count: int
+    revenue: float
+
+
+class BasketSize(BaseModel):
+    """
+    Average basket of the orders of a date range.
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    order_count: int
+    average_items: float
+    average_lines: float
+    average_ticket: float
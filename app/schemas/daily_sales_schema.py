@@ -0,0 +1,19 @@
+from datetime import date
+from typing import Dict
+from pydantic import BaseModel
+
+
+class DailySalesPublic(BaseModel):
+    """
+    Public representation of a day of sales.
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    day: date
+    revenue: float
+    order_count: int
+    average_ticket: float
+    orders_by_status: Dict[str, int]
+    revenue_by_category: Dict[str, float]
@@ -1,5 +1,5 @@
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
 
 
 class MenuCreate(BaseModel):
@@ -42,3 +42,81 @@ class MenuPublic(MenuCreate):
 
     id: int
     name: str
+
+
+class MenuImportRow(BaseModel):
+    """
+    A menu of a bulk import, created or updated by name. Without stock,
+    an existing menu keeps its stock (a new one starts at 0).
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    name: str = Field(..., min_length=1, max_length=100)
+    price: float = Field(..., ge=0)
+    category_id: int = Field(...)
+    description: str = Field(default="", max_length=255)
+    stock: Optional[int] = Field(None, ge=0)
+
+
+class MenuImportError(BaseModel):
+    """
+    A rejected row of a bulk import.
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    row: int
+    name: Optional[str] = None
+    error: str
+
+
+class MenuImportReport(BaseModel):
+    """
+    Result of a bulk import: the rows created, updated, unchanged (same
+    values as the existing menu), and the rejected ones.
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    created: int
+    updated: int
+    unchanged: int
+    errors: List[MenuImportError]
+
+
+class MenuPrice(BaseModel):
+    """
+    The price of a menu.
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    id: int
+    price: float = Field(..., ge=0)
+
+
+class MenuReprice(BaseModel):
+    """
+    Bulk price change: a percentage (of one category, or of every menu),
+    or a price list by menu ID.
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    percent: Optional[float] = Field(None, gt=-100)
+    category_id: Optional[int] = Field(None)
+    prices: Optional[List[MenuPrice]] = Field(None, min_length=1)
+
+    @model_validator(mode="after")
+    def check_change(self) -> "MenuReprice":
+        if (self.percent is None) == (self.prices is None):
+            raise ValueError("percent or prices is required (not both)")
+        if self.prices is not None and self.category_id is not None:
+            raise ValueError("category_id only applies to percent")
+        return self
@@ -1,5 +1,5 @@
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
 from app.models.order_detail import OrderDetailStatus
 
 
@@ -54,3 +54,23 @@ class OrderDetailPublic(OrderDetailCreate):
 
     class Config:
         orm_mode = True
+
+
+class OrderDetailStatusBulkUpdate(BaseModel):
+    """
+    Batch status transition of order details: the listed lines, and
+    every line of the listed orders.
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    status: OrderDetailStatus = Field(...)
+    order_detail_ids: List[int] = Field(default_factory=list)
+    order_ids: List[int] = Field(default_factory=list)
+
+    @model_validator(mode="after")
+    def check_targets(self) -> "OrderDetailStatusBulkUpdate":
+        if not self.order_detail_ids and not self.order_ids:
+            raise ValueError("order_detail_ids or order_ids is required")
+        return self
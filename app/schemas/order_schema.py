@@ -1,6 +1,8 @@
-from typing import Optional
+from enum import Enum
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from app.models.order import OrderStatus
+from app.schemas.order_detail_schema import OrderDetailPublic
 
 
 class OrderCreate(BaseModel):
@@ -46,3 +48,59 @@ class OrderPublic(OrderCreate):
 
     class Config:
         orm_mode = True
+
+
+class OrderLineCreate(BaseModel):
+    """
+    One line of an order created with its lines. The price is taken
+    from the menu, not from the client.
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    menu_id: int = Field(...)
+    quantity: int = Field(..., gt=0)
+    comment: str = Field(default="", max_length=255)
+
+
+class OrderWithLinesCreate(BaseModel):
+    """
+    Order creation model with all its lines, created in one transaction.
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    client_id: int = Field(...)
+    lines: List[OrderLineCreate] = Field(..., min_length=1)
+
+
+class OrderWithDetailsPublic(OrderPublic):
+    """
+    Public representation of an order with its details.
+
+    Args:
+        OrderPublic (OrderPublic): Public representation of an order.
+    """
+
+    details: List[OrderDetailPublic]
+
+
+class OrderInclude(str, Enum):
+    """Related data embedded in order responses (`?include=`)."""
+
+    DETAILS = "details"
+
+
+class OrderDetailStatusBulkPublic(BaseModel):
+    """
+    Result of a batch status transition: the moved order details and
+    the orders whose status rolled up.
+
+    Args:
+        BaseModel (BaseModel): Base model for Pydantic schemas.
+    """
+
+    order_details: List[OrderDetailPublic]
+    orders: List[OrderPublic]
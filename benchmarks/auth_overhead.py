@@ -0,0 +1,96 @@
+"""
+Microbenchmark : coût de l'authentification par requête.
+
+Mesure, en microsecondes par appel :
+- la vérification d'un jeton : `decodeJWT` (HMAC + JSON à chaque fois)
+  vs `verifyJWT` (cache des jetons vérifiés) ;
+- le contrôle des rôles : `any(...)` sur des listes (ancien RoleChecker)
+  vs intersection de frozensets ;
+- une requête complète sur une route protégée sans base de données
+  (httpx.ASGITransport), cache vide à chaque requête vs cache chaud.
+
+Usage (variables d'environnement de l'API chargées) :
+    python -m benchmarks.auth_overhead --repeat 20000
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Callable
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from app.auth.auth_bearer import RoleChecker
+from app.auth.auth_handler import decodeJWT, signJWT, token_cache, verifyJWT
+from app.models.role import RoleType
+
+ALLOWED = [RoleType.admin, RoleType.employee]
+
+protected_app = FastAPI()
+
+
+@protected_app.get("/", dependencies=[Depends(RoleChecker(ALLOWED))])
+async def protected():
+    return None
+
+
+def per_call_us(function: Callable[[], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+async def per_request_us(token: str, repeat: int, warm: bool) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=protected_app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=headers
+    ) as client:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            if not warm:
+                token_cache.clear()
+            response = await client.get("/")
+            response.raise_for_status()
+        return (time.perf_counter() - start) / repeat * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    roles = [RoleType.customer.value, RoleType.employee.value]
+    token = signJWT("bench@example.com", roles)["access_token"]
+    allowed_list = list(ALLOWED)
+    allowed_set = frozenset(role.value for role in ALLOWED)
+    user_roles = frozenset(roles)
+    verifyJWT(token)
+
+    results = {
+        "decodeJWT": per_call_us(lambda: decodeJWT(token), args.repeat),
+        "verifyJWT (cached)": per_call_us(
+            lambda: verifyJWT(token), args.repeat
+        ),
+        "roles any(list)": per_call_us(
+            lambda: any(role in allowed_list for role in roles), args.repeat
+        ),
+        "roles frozenset": per_call_us(
+            lambda: not allowed_set.isdisjoint(user_roles), args.repeat
+        ),
+    }
+    requests = max(args.repeat // 10, 1)
+    results["request, cold cache"] = await per_request_us(
+        token, requests, warm=False
+    )
+    results["request, warm cache"] = await per_request_us(
+        token, requests, warm=True
+    )
+    for label, microseconds in results.items():
+        print(f"{label:<22} {microseconds:>9.2f} µs")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
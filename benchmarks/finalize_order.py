@@ -0,0 +1,178 @@
+"""
+Micro-benchmark : finalisation d'une commande.
+
+Compare l'ancienne implémentation de `finalize_order` (lecture de la
+commande et de toutes ses lignes, somme en Python, puis update_order et
+relecture) à l'UPDATE ... RETURNING unique de `order_crud.finalize_order`.
+
+Pour chaque variante : nombre de requêtes SQL (allers-retours) par
+finalisation et latence moyenne / p99.
+
+Usage (variables d'environnement de l'API chargées) :
+    python -m benchmarks.finalize_order --orders 200 --lines 6
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import async_engine, async_session_maker, engine
+from app.core.query_counter import track_queries
+from app.crud import order_crud
+from app.crud.order_detail_crud import get_all_order_details_by_order
+from app.models.category import Category  # noqa: F401 (FK menu.category_id)
+from app.models.menu import Menu
+from app.models.order import OrderBase, OrderStatus
+from app.models.order_detail import OrderDetail, OrderDetailStatus
+from app.models.user import User
+from app.schemas.order_schema import OrderUpdate
+
+
+async def legacy_finalize_order(
+    session: AsyncSession, order_id: int
+) -> Optional[OrderBase]:
+    # Ancienne implémentation, conservée ici comme référence
+    order = await order_crud.get_order(session, order_id)
+    if order and order.status is OrderStatus.CREATED:
+        order_total = 0.0
+        for detail in await get_all_order_details_by_order(session, order_id):
+            if detail.status is not OrderDetailStatus.CANCELLED:
+                order_total += detail.price * detail.quantity
+        await order_crud.update_order(
+            session,
+            order_id,
+            OrderUpdate(
+                client_id=order.client_id,
+                status=OrderStatus.PREPARING,
+                total_price=order_total,
+            ),
+        )
+        order = await order_crud.get_order(session, order_id)
+    return order
+
+
+def seed(nb_orders: int, nb_lines: int) -> tuple[int, int, List[int]]:
+    """Crée un client, un menu et des commandes « Created » avec lignes."""
+    with Session(engine) as session:
+        user = User(
+            username="bench",
+            email=f"bench_{time.time_ns()}@example.com",
+            password_hash="x",
+            first_name="Bench",
+            last_name="Mark",
+            adresse="1 rue du Bench",
+            phone="0600000000",
+        )
+        menu = Menu(name=f"bench_{time.time_ns()}", price=7.5, description="")
+        session.add_all([user, menu])
+        session.commit()
+        orders = [
+            OrderBase(
+                client_id=user.id, total_price=1.0, status=OrderStatus.CREATED
+            )
+            for _ in range(nb_orders)
+        ]
+        session.add_all(orders)
+        session.commit()
+        session.add_all(
+            OrderDetail(
+                order_id=order.id,
+                menu_id=menu.id,
+                price=menu.price,
+                quantity=2,
+                status=OrderDetailStatus.CREATED,
+            )
+            for order in orders
+            for _ in range(nb_lines)
+        )
+        session.commit()
+        assert user.id is not None and menu.id is not None
+        return user.id, menu.id, [o.id for o in orders if o.id is not None]
+
+
+def reset(order_ids: List[int]) -> None:
+    """Remet les commandes à l'état « Created »."""
+    with Session(engine) as session:
+        for order in session.exec(
+            select(OrderBase).where(col(OrderBase.id).in_(order_ids))
+        ):
+            order.status = OrderStatus.CREATED
+        session.commit()
+
+
+def cleanup(user_id: int, menu_id: int, order_ids: List[int]) -> None:
+    """Supprime les données créées par `seed`."""
+    with Session(engine) as session:
+        for detail in session.exec(
+            select(OrderDetail).where(OrderDetail.menu_id == menu_id)
+        ):
+            session.delete(detail)
+        session.commit()
+        for order_id in order_ids:
+            order = session.get(OrderBase, order_id)
+            if order:
+                session.delete(order)
+        session.commit()
+        for model, model_id in ((Menu, menu_id), (User, user_id)):
+            obj = session.get(model, model_id)
+            if obj:
+                session.delete(obj)
+        session.commit()
+
+
+async def run(
+    finalize: Callable[[AsyncSession, int], Awaitable[Optional[OrderBase]]],
+    order_ids: List[int],
+) -> dict:
+    latencies: List[float] = []
+    queries: List[int] = []
+    for order_id in order_ids:
+        async with async_session_maker() as session:
+            with track_queries(raise_on_repeat=False) as stats:
+                start = time.perf_counter()
+                order = await finalize(session, order_id)
+                latencies.append(time.perf_counter() - start)
+            queries.append(stats.count)
+            assert order is not None
+            assert order.status is OrderStatus.PREPARING
+    latencies.sort()
+    return {
+        "queries": statistics.mean(queries),
+        "avg_ms": statistics.mean(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--lines", type=int, default=6)
+    args = parser.parse_args()
+
+    engine.echo = False
+    async_engine.echo = False
+    user_id, menu_id, order_ids = seed(args.orders, args.lines)
+    try:
+        for label, finalize in (
+            ("legacy", legacy_finalize_order),
+            ("single UPDATE", order_crud.finalize_order),
+        ):
+            reset(order_ids)
+            result = await run(finalize, order_ids)
+            print(
+                f"{label:<14} {result['queries']:>5.1f} queries  "
+                f"avg {result['avg_ms']:>7.2f} ms  "
+                f"p99 {result['p99_ms']:>7.2f} ms"
+            )
+    finally:
+        await async_engine.dispose()
+        cleanup(user_id, menu_id, order_ids)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,254 @@
+"""
+Benchmark : requêtes de recherche avec et sans les index secondaires.
+
+Remplit la base avec un gros jeu de données (commandes, lignes, clients,
+menus), puis mesure la latence moyenne / p99 des requêtes chaudes de
+l'API :
+- commandes d'un jour (`order_crud.get_orders_by_date`) ;
+- commandes d'un client (`user_crud.get_all_orders_by_customer`) ;
+- lignes d'une commande (`get_all_order_details_by_order`) ;
+- lignes en cours pour la cuisine (statuts non terminaux).
+
+La variante « sans index » supprime les index de la migration
+3c9f0e2a7b41 dans une transaction annulée à la fin : le schéma n'est
+pas modifié.
+
+Usage (variables d'environnement de l'API chargées, migrations à jour) :
+    python -m benchmarks.lookup_indexes --orders 200000 --lines 5
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy import text
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core import partitions
+from app.core.database import async_engine, async_session_maker, engine
+from app.core.query_counter import track_queries
+from app.crud import order_crud, user_crud
+from app.crud.order_detail_crud import get_all_order_details_by_order
+from app.models.category import Category  # noqa: F401 (FK menu.category_id)
+from app.models.order_detail import OrderDetail, OrderDetailStatus
+
+INDEXES = [
+    "ix_order_created_at_id",
+    "ix_order_client_id_created_at",
+    "ix_order_active_created_at",
+    "ix_orderdetail_order_id",
+    "ix_orderdetail_menu_id",
+    "ix_orderdetail_active_status",
+    "ix_menu_category_id",
+]
+
+DAYS = 365
+
+# Les statuts sont des enums PostgreSQL, stockés par nom ; :tag est
+# typé là où il est utilisé deux fois avec des types différents
+SEED_STATEMENTS = [
+    """
+    INSERT INTO "user" (username, email, password_hash, created_at,
+                        first_name, last_name, adresse, phone)
+    SELECT CAST(:tag AS text),
+           CAST(:tag AS text) || '_' || i || '@example.com', 'x', now(),
+           'Bench', 'Mark', '1 rue du Bench', '0600000000'
+    FROM generate_series(1, :clients) AS i
+    """,
+    """
+    INSERT INTO menu (name, price, description, stock, created_at)
+    SELECT :tag || '_' || i, 9.5, '', 1000000, now()
+    FROM generate_series(1, :menus) AS i
+    """,
+    'ANALYZE "user", menu',
+    """
+    INSERT INTO "order" (client_id, created_at, total_price, status)
+    SELECT u.ids[1 + i % cardinality(u.ids)],
+           now() - random() * make_interval(days => :days),
+           10,
+           CASE WHEN random() < 0.03 THEN 'PREPARING'
+                ELSE 'PAID' END::orderstatus
+    FROM generate_series(1, :orders) AS i,
+         (SELECT array_agg(id) AS ids FROM "user" WHERE username = :tag) AS u
+    """,
+    # Statistiques à jour : sinon le plan de la jointure suivante est
+    # estimé sur une table "order" vide
+    'ANALYZE "order"',
+    """
+    INSERT INTO orderdetail (order_id, created_at, menu_id, price, comment,
+                             quantity, status)
+    SELECT o.id, o.created_at, m.ids[1 + (o.id + k) % cardinality(m.ids)],
+           9.5, '', 1,
+           CASE WHEN o.status = 'PREPARING' THEN 'PREPARING'
+                ELSE 'SERVED' END::orderdetailstatus
+    FROM "order" AS o
+    JOIN "user" AS u ON u.id = o.client_id AND u.username = :tag
+    CROSS JOIN generate_series(1, :lines) AS k,
+         (SELECT array_agg(id) AS ids FROM menu
+          WHERE name LIKE :tag || '\\_%') AS m
+    """,
+]
+
+CLEANUP_STATEMENTS = [
+    """
+    DELETE FROM orderdetail USING "order", "user"
+    WHERE orderdetail.order_id = "order".id
+      AND "order".client_id = "user".id AND "user".username = :tag
+    """,
+    """
+    DELETE FROM "order" USING "user"
+    WHERE "order".client_id = "user".id AND "user".username = :tag
+    """,
+    'DELETE FROM "user" WHERE username = :tag',
+    "DELETE FROM menu WHERE name LIKE :tag || '\\_%'",
+]
+
+
+def seed(tag: str, nb_orders: int, nb_lines: int) -> Dict[str, List[int]]:
+    """Remplit la base et retourne des clients et commandes à chercher."""
+    params = {
+        "tag": tag,
+        "clients": max(nb_orders // 20, 1),
+        "menus": 50,
+        "orders": nb_orders,
+        "lines": nb_lines,
+        "days": DAYS,
+    }
+    with engine.begin() as connection:
+        # Une partition par mois couvert (sinon tout irait dans la
+        # partition par défaut)
+        partitions.create_monthly_partitions(
+            connection, date.today() - timedelta(days=DAYS), DAYS // 28
+        )
+        for statement in SEED_STATEMENTS:
+            connection.execute(text(statement), params)
+        client_ids = list(
+            connection.execute(
+                text('SELECT id FROM "user" WHERE username = :tag'), params
+            ).scalars()
+        )
+        order_ids = list(
+            connection.execute(
+                text(
+                    'SELECT id FROM "order" WHERE client_id = ANY(:ids) '
+                    "ORDER BY random() LIMIT 1000"
+                ),
+                {"ids": client_ids},
+            ).scalars()
+        )
+    # Hors de la transaction de remplissage, et validé : un ANALYZE annulé
+    # ne laisse aucune statistique
+    with engine.begin() as connection:
+        connection.execute(text('ANALYZE "user", menu, "order", orderdetail'))
+    return {"clients": client_ids, "orders": order_ids}
+
+
+def cleanup(tag: str) -> None:
+    """Supprime les données créées par `seed`."""
+    with engine.begin() as connection:
+        for statement in CLEANUP_STATEMENTS:
+            connection.execute(text(statement), {"tag": tag})
+
+
+async def kitchen_lines(session: AsyncSession) -> List[OrderDetail]:
+    # Ce que la cuisine affiche : les lignes en préparation
+    statement = (
+        select(OrderDetail)
+        .where(col(OrderDetail.status) == OrderDetailStatus.PREPARING)
+        .order_by(col(OrderDetail.order_id))
+        .limit(200)
+    )
+    return list((await session.exec(statement)).all())
+
+
+Lookup = Callable[[AsyncSession], Awaitable[object]]
+
+
+def lookups(targets: Dict[str, List[int]]) -> Dict[str, Lookup]:
+    today = date.today()
+
+    def by_date(session: AsyncSession) -> Awaitable[object]:
+        day = today - timedelta(days=random.randrange(DAYS))
+        return order_crud.get_orders_by_date(session, day, limit=51)
+
+    def by_customer(session: AsyncSession) -> Awaitable[object]:
+        client_id = random.choice(targets["clients"])
+        return user_crud.get_all_orders_by_customer(
+            session, client_id, limit=51
+        )
+
+    def details(session: AsyncSession) -> Awaitable[object]:
+        order_id = random.choice(targets["orders"])
+        return get_all_order_details_by_order(session, order_id)
+
+    return {
+        "orders by date": by_date,
+        "orders by customer": by_customer,
+        "details by order": details,
+        "kitchen lines": kitchen_lines,
+    }
+
+
+async def run(
+    lookup: Lookup, repeat: int, with_indexes: bool
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    async with async_session_maker() as session:
+        if not with_indexes:
+            # DROP INDEX est transactionnel : annulé par le rollback
+            connection = await session.connection()
+            for name in INDEXES:
+                await connection.execute(text(f"DROP INDEX {name}"))
+        with track_queries(threshold=sys.maxsize, raise_on_repeat=False):
+            for _ in range(repeat):
+                start = time.perf_counter()
+                await lookup(session)
+                latencies.append(time.perf_counter() - start)
+        await session.rollback()
+    latencies.sort()
+    return {
+        "avg_ms": statistics.mean(latencies) * 1000,
+        "p99_ms": latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--lines", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    engine.echo = False
+    async_engine.echo = False
+    tag = f"bench_{uuid.uuid4().hex[:8]}"
+    start = time.perf_counter()
+    targets = seed(tag, args.orders, args.lines)
+    print(
+        f"seeded {args.orders} orders x {args.lines} lines "
+        f"in {time.perf_counter() - start:.1f} s"
+    )
+    try:
+        for label, lookup in lookups(targets).items():
+            for with_indexes in (False, True):
+                result = await run(lookup, args.repeat, with_indexes)
+                variant = "indexes" if with_indexes else "no index"
+                print(
+                    f"{label:<19} {variant:<9} "
+                    f"avg {result['avg_ms']:>8.2f} ms  "
+                    f"p99 {result['p99_ms']:>8.2f} ms"
+                )
+    finally:
+        await async_engine.dispose()
+        cleanup(tag)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
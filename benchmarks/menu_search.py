@@ -0,0 +1,199 @@
+"""
+Benchmark : recherche de menus sur un gros catalogue.
+
+Remplit la base avec un catalogue (par défaut 50 000 menus répartis en
+20 catégories, noms et descriptions tirés d'un vocabulaire de cuisine),
+puis mesure la latence moyenne / p99 de `menu_crud.search_menus` :
+- plein texte (tsvector + index GIN), avec et sans filtre de catégorie ;
+- recherche approchée d'un nom mal orthographié (pg_trgm si l'extension
+  est installée, sinon l'index trigrammes en mémoire : sa construction
+  est mesurée à part).
+
+Usage (variables d'environnement de l'API chargées, migrations à jour) :
+    python -m benchmarks.menu_search --menus 50000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import async_engine, async_session_maker, engine
+from app.crud import menu_crud
+from app.models.category import Category  # noqa: F401 (FK menu.category_id)
+
+DISHES = [
+    "pizza",
+    "salade",
+    "burger",
+    "tarte",
+    "risotto",
+    "lasagnes",
+    "soupe",
+    "curry",
+    "tajine",
+    "quiche",
+]
+INGREDIENTS = [
+    "tomate",
+    "mozzarella",
+    "poulet",
+    "champignons",
+    "chèvre",
+    "saumon",
+    "épinards",
+    "jambon",
+    "aubergine",
+    "parmesan",
+    "citron",
+    "basilic",
+]
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO category (name, created_at)
+    SELECT :tag || '_' || i, now() FROM generate_series(1, :categories) AS i
+    """,
+    """
+    INSERT INTO menu (name, price, category_id, description, stock,
+                      created_at)
+    SELECT initcap(d.words[1 + i % cardinality(d.words)]) || ' '
+               || g.words[1 + (i / 7) % cardinality(g.words)] || ' '
+               || :tag || '_' || i,
+           9.5,
+           c.ids[1 + i % cardinality(c.ids)],
+           g.words[1 + (i / 3) % cardinality(g.words)] || ', '
+               || g.words[1 + (i / 11) % cardinality(g.words)] || ', '
+               || g.words[1 + (i / 13) % cardinality(g.words)],
+           100,
+           now()
+    FROM generate_series(1, :menus) AS i,
+         (SELECT CAST(:dishes AS text[]) AS words) AS d,
+         (SELECT CAST(:ingredients AS text[]) AS words) AS g,
+         (SELECT array_agg(id) AS ids FROM category
+          WHERE name LIKE :tag || '\\_%') AS c
+    """,
+    "ANALYZE menu",
+]
+
+CLEANUP_STATEMENTS = [
+    "DELETE FROM menu WHERE name LIKE '%' || :tag || '\\_%'",
+    "DELETE FROM category WHERE name LIKE :tag || '\\_%'",
+]
+
+
+def seed(tag: str, nb_menus: int, nb_categories: int) -> List[int]:
+    """Remplit le catalogue et retourne ses catégories."""
+    params = {
+        "tag": tag,
+        "menus": nb_menus,
+        "categories": nb_categories,
+        "dishes": DISHES,
+        "ingredients": INGREDIENTS,
+    }
+    with engine.begin() as connection:
+        for statement in SEED_STATEMENTS:
+            connection.execute(text(statement), params)
+        return list(
+            connection.execute(
+                text("SELECT id FROM category WHERE name LIKE :tag || '\\_%'"),
+                params,
+            ).scalars()
+        )
+
+
+def cleanup(tag: str) -> None:
+    """Supprime les données créées par `seed`."""
+    with engine.begin() as connection:
+        for statement in CLEANUP_STATEMENTS:
+            connection.execute(text(statement), {"tag": tag})
+
+
+def typo(word: str) -> str:
+    # Deux lettres voisines inversées
+    letters = list(word)
+    i = random.randrange(1, len(letters) - 2)
+    letters[i], letters[i + 1] = letters[i + 1], letters[i]
+    return "".join(letters)
+
+
+Search = Callable[[AsyncSession], Awaitable[object]]
+
+
+def searches(category_ids: List[int]) -> Dict[str, Search]:
+    def full_text(session: AsyncSession) -> Awaitable[object]:
+        query = f"{random.choice(DISHES)} {random.choice(INGREDIENTS)[:4]}"
+        return menu_crud.search_menus(session, query)
+
+    def by_category(session: AsyncSession) -> Awaitable[object]:
+        return menu_crud.search_menus(
+            session,
+            random.choice(INGREDIENTS),
+            category_id=random.choice(category_ids),
+        )
+
+    def fuzzy(session: AsyncSession) -> Awaitable[object]:
+        name = f"{random.choice(DISHES)} {random.choice(INGREDIENTS)}"
+        return menu_crud.search_menus(session, typo(name))
+
+    return {
+        "full-text": full_text,
+        "full-text + category": by_category,
+        "fuzzy name": fuzzy,
+    }
+
+
+async def measure(search: Search, repeat: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    async with async_session_maker() as session:
+        for _ in range(repeat):
+            begin = time.perf_counter()
+            await search(session)
+            latencies.append(time.perf_counter() - begin)
+    latencies.sort()
+    return {
+        "avg_ms": statistics.mean(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--menus", type=int, default=50000)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    engine.echo = False
+    async_engine.echo = False
+    tag = f"bench_{uuid.uuid4().hex[:8]}"
+    category_ids = seed(tag, args.menus, args.categories)
+    try:
+        async with async_session_maker() as session:
+            pg_trgm = await menu_crud.fuzzy_names.has_pg_trgm(session)
+            if not pg_trgm:
+                begin = time.perf_counter()
+                await menu_crud.fuzzy_names.refresh(session)
+                elapsed = (time.perf_counter() - begin) * 1000
+                print(f"{'in-memory index build':<22} {elapsed:>9.2f} ms")
+        print(f"fuzzy search: {'pg_trgm' if pg_trgm else 'in-memory index'}")
+        for label, search in searches(category_ids).items():
+            result = await measure(search, args.repeat)
+            print(
+                f"{label:<22} {args.menus} menus  "
+                f"avg {result['avg_ms']:>7.2f} ms  "
+                f"p99 {result['p99_ms']:>7.2f} ms"
+            )
+    finally:
+        await async_engine.dispose()
+        cleanup(tag)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
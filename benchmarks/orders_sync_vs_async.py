@@ -0,0 +1,173 @@
+"""
+Benchmark : endpoints de commandes en sync (threadpool) vs async.
+
+Compare le débit (req/s) et la latence p50/p99 de deux chemins :
+- "sync"  : handlers `def` + `Session(engine)` (ancienne implémentation,
+            exécutée dans le threadpool de Starlette) ;
+- "async" : les vraies routes de l'API (`async def` + AsyncSession).
+
+Les requêtes sont envoyées en mémoire (httpx.ASGITransport), avec une
+concurrence configurable pour reproduire un « coup de feu ».
+
+Usage (variables d'environnement de l'API chargées) :
+    python -m benchmarks.orders_sync_vs_async --requests 2000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from sqlmodel import Session, select
+
+from app.api.deps import SessionDep
+from app.auth.auth_bearer import RoleChecker, get_current_user_payload
+from app.auth.auth_handler import signJWT
+from app.core.database import async_engine, engine
+from app.main import app as async_app
+from app.models.order import OrderBase, OrderStatus
+from app.models.role import RoleType
+from app.models.user import User
+from app.schemas.order_schema import OrderPublic
+
+# Chemin synchrone : mêmes routes, mêmes dépendances d'auth, mais en `def`.
+sync_router = APIRouter()
+
+
+@sync_router.get(
+    "/",
+    response_model=List[OrderPublic],
+    dependencies=[
+        Depends(RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee]))
+    ],
+)
+def sync_get_all_orders(*, session: SessionDep):
+    return list(session.exec(select(OrderBase)).all())
+
+
+@sync_router.get(
+    "/{order_id}",
+    response_model=OrderPublic,
+    dependencies=[Depends(get_current_user_payload)],
+)
+def sync_get_order(*, session: SessionDep, order_id: int):
+    order = session.get(OrderBase, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+
+sync_app = FastAPI()
+sync_app.include_router(sync_router, prefix="/api/v1/orders")
+
+
+def seed_orders(nb_orders: int) -> tuple[int, List[int]]:
+    """Crée un client et `nb_orders` commandes, retourne leurs ids."""
+    with Session(engine) as session:
+        user = User(
+            username="bench",
+            email=f"bench_{time.time_ns()}@example.com",
+            password_hash="x",
+            first_name="Bench",
+            last_name="Mark",
+            adresse="1 rue du Bench",
+            phone="0600000000",
+        )
+        session.add(user)
+        session.commit()
+        orders = [
+            OrderBase(
+                client_id=user.id,
+                total_price=10.0 + i,
+                status=OrderStatus.CREATED,
+            )
+            for i in range(nb_orders)
+        ]
+        session.add_all(orders)
+        session.commit()
+        order_ids = [order.id for order in orders if order.id is not None]
+        assert user.id is not None
+        return user.id, order_ids
+
+
+def cleanup(user_id: int) -> None:
+    """Supprime les données créées par `seed_orders`."""
+    with Session(engine) as session:
+        for order in session.exec(
+            select(OrderBase).where(OrderBase.client_id == user_id)
+        ):
+            session.delete(order)
+        session.commit()
+        user = session.get(User, user_id)
+        if user:
+            session.delete(user)
+            session.commit()
+
+
+async def run(
+    app: FastAPI, paths: List[str], nb_requests: int, concurrency: int
+) -> dict:
+    token = signJWT("bench@example.com", [RoleType.admin.value])
+    headers = {"Authorization": f"Bearer {token['access_token']}"}
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", headers=headers
+    ) as client:
+
+        async def one(i: int) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(paths[i % len(paths)])
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(nb_requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": nb_requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--orders", type=int, default=50)
+    args = parser.parse_args()
+
+    engine.echo = False
+    async_engine.echo = False
+    user_id, order_ids = seed_orders(args.orders)
+    scenarios = {
+        "GET /orders/{id}": [f"/api/v1/orders/{i}" for i in order_ids],
+        "GET /orders/": ["/api/v1/orders/"],
+    }
+
+    try:
+        for name, paths in scenarios.items():
+            for label, app in (("sync", sync_app), ("async", async_app)):
+                result = await run(app, paths, args.requests, args.concurrency)
+                print(
+                    f"{name:<18} {label:<5} "
+                    f"{result['rps']:>8.1f} req/s  "
+                    f"p50 {result['p50_ms']:>7.2f} ms  "
+                    f"p99 {result['p99_ms']:>7.2f} ms"
+                )
+    finally:
+        await async_engine.dispose()
+        cleanup(user_id)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""
+Benchmark : carte publique pré-rendue vs lecture paginée du catalogue.
+
+Remplit la base avec un catalogue (par défaut 300 menus, la taille d'une
+vraie carte), puis compare le débit (req/s) et la latence p50/p99 de :
+- "GET /menus/"       : la page de menus (ORM, `MenuPublic`, JSON) ;
+- "GET /menus/public" : la carte en octets pré-encodés, en gzip ;
+- "... 304"           : la même avec If-None-Match (client à jour).
+
+Les requêtes sont envoyées en mémoire (httpx.ASGITransport), dans un
+seul worker, comme `orders_sync_vs_async`.
+
+Usage (variables d'environnement de l'API chargées, migrations à jour) :
+    python -m benchmarks.public_menu --menus 300 --requests 5000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Dict, List
+
+import httpx
+
+from app.auth.auth_handler import signJWT
+from app.core.database import async_engine, engine
+from app.main import app
+from app.models.role import RoleType
+from benchmarks.menu_search import cleanup, seed
+
+
+async def run(
+    client: httpx.AsyncClient,
+    path: str,
+    headers: Dict[str, str],
+    nb_requests: int,
+    concurrency: int,
+) -> dict:
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code in (200, 304)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(nb_requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": nb_requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--menus", type=int, default=300)
+    parser.add_argument("--categories", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    engine.echo = False
+    async_engine.echo = False
+    tag = f"bench_{uuid.uuid4().hex[:8]}"
+    seed(tag, args.menus, args.categories)
+    token = signJWT("bench@example.com", [RoleType.admin.value])
+    admin = {"Authorization": f"Bearer {token['access_token']}"}
+    gzip = {"Accept-Encoding": "gzip"}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            public = await client.get("/api/v1/menus/public", headers=gzip)
+            print(
+                f"public menu: {len(public.content)} bytes JSON, "
+                f"{public.headers['content-length']} bytes gzip"
+            )
+            scenarios = {
+                "GET /menus/?limit=100": ("/api/v1/menus/?limit=100", admin),
+                "GET /menus/public": ("/api/v1/menus/public", gzip),
+                "GET /menus/public 304": (
+                    "/api/v1/menus/public",
+                    {**gzip, "If-None-Match": public.headers["etag"]},
+                ),
+            }
+            for name, (path, headers) in scenarios.items():
+                result = await run(
+                    client, path, headers, args.requests, args.concurrency
+                )
+                print(
+                    f"{name:<22} {result['rps']:>8.1f} req/s  "
+                    f"p50 {result['p50_ms']:>7.2f} ms  "
+                    f"p99 {result['p99_ms']:>7.2f} ms"
+                )
+    finally:
+        await async_engine.dispose()
+        cleanup(tag)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,193 @@
+"""
+Benchmark : statistiques de ventes sur un gros volume de lignes.
+
+Sur le jeu de données de `benchmarks.lookup_indexes` (par défaut 200 000
+commandes de 5 lignes, soit 1M de lignes de commande sur un an), compare
+pour une période le calcul des quatre statistiques (menus les plus
+vendus, CA par catégorie, carte horaire, panier moyen) :
+- "ORM + Python" : chargement des commandes et lignes en objets ORM,
+  agrégation en Python ;
+- "tuples + Python" : mêmes colonnes lues en tuples, agrégation en Python ;
+- "SQL GROUP BY" : les requêtes de `analytics_crud` ;
+- "cache" : un second appel servi par le cache des routes.
+
+Usage (variables d'environnement de l'API chargées, migrations à jour) :
+    python -m benchmarks.sales_analytics --orders 200000 --lines 5 --days 30
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple
+
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.routes.analytics import analytics_cache, cached
+from app.core.database import async_engine, async_session_maker, engine
+from app.core.query_counter import track_queries
+from app.crud import analytics_crud
+from app.crud.analytics_crud import sold_lines
+from app.crud.archive_crud import DETAILS, ORDERS
+from app.models.category import Category  # noqa: F401 (FK menu.category_id)
+from app.models.menu import Menu
+from app.models.order import OrderBase
+from app.models.order_detail import OrderDetail
+from benchmarks.lookup_indexes import cleanup, seed
+
+# (commande, date, total, menu, catégorie, quantité, prix)
+Row = Tuple[int, datetime, float, int, Any, int, float]
+
+
+def aggregate(rows: Iterable[Row]) -> Dict[str, Any]:
+    """Les quatre statistiques, calculées en Python."""
+    menus: Counter[int] = Counter()
+    categories: Dict[Any, float] = defaultdict(float)
+    tickets: Dict[int, float] = {}
+    items: Counter[int] = Counter()
+    lines: Counter[int] = Counter()
+    created: Dict[int, datetime] = {}
+    for order_id, created_at, total, menu_id, category, qty, price in rows:
+        menus[menu_id] += qty
+        categories[category] += price * qty
+        tickets[order_id] = total
+        created[order_id] = created_at
+        items[order_id] += qty
+        lines[order_id] += 1
+    heatmap: Dict[Tuple[int, int], float] = defaultdict(float)
+    for order_id, created_at in created.items():
+        heatmap[created_at.isoweekday(), created_at.hour] += tickets[order_id]
+    count = len(tickets)
+    return {
+        "top_menus": menus.most_common(10),
+        "revenue_by_category": categories,
+        "revenue_by_hour": heatmap,
+        "basket_size": (
+            count,
+            sum(items.values()) / count if count else 0,
+            sum(lines.values()) / count if count else 0,
+            sum(tickets.values()) / count if count else 0,
+        ),
+    }
+
+
+def lines_statement(start: date, end: date):
+    return (
+        select(OrderBase, OrderDetail, col(Menu.category_id))
+        .join(OrderDetail, col(OrderDetail.order_id) == col(OrderBase.id))
+        .join(Menu, col(OrderDetail.menu_id) == col(Menu.id))
+        .where(sold_lines(ORDERS, DETAILS, start, end))
+    )
+
+
+async def orm_python(session: AsyncSession, start: date, end: date) -> Any:
+    result = await session.exec(lines_statement(start, end))
+    return aggregate(
+        (
+            order.id,
+            order.created_at,
+            order.total_price,
+            detail.menu_id,
+            category_id,
+            detail.quantity,
+            detail.price,
+        )
+        for order, detail, category_id in result
+    )
+
+
+async def tuples_python(session: AsyncSession, start: date, end: date) -> Any:
+    statement = (
+        select(col(OrderBase.id))
+        .add_columns(
+            col(OrderBase.created_at),
+            col(OrderBase.total_price),
+            col(OrderDetail.menu_id),
+            col(Menu.category_id),
+            col(OrderDetail.quantity),
+            col(OrderDetail.price),
+        )
+        .join(OrderDetail, col(OrderDetail.order_id) == col(OrderBase.id))
+        .join(Menu, col(OrderDetail.menu_id) == col(Menu.id))
+        .where(sold_lines(ORDERS, DETAILS, start, end))
+    )
+    connection = await session.connection()
+    result = await connection.execute(statement)
+    return aggregate(result.tuples())
+
+
+async def sql_group_by(session: AsyncSession, start: date, end: date) -> Any:
+    return [
+        await analytics_crud.get_top_menus(session, start, end),
+        await analytics_crud.get_revenue_by_category(session, start, end),
+        await analytics_crud.get_revenue_by_hour(session, start, end),
+        await analytics_crud.get_basket_size(session, start, end),
+    ]
+
+
+async def cache_hit(session: AsyncSession, start: date, end: date) -> Any:
+    return await cached(
+        ("benchmark", start, end),
+        lambda: sql_group_by(session, start, end),
+    )
+
+
+Variant = Callable[[AsyncSession, date, date], Awaitable[Any]]
+
+
+async def run(
+    variant: Variant, start: date, end: date, repeat: int
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    async with async_session_maker() as session:
+        with track_queries(threshold=sys.maxsize, raise_on_repeat=False):
+            for _ in range(repeat):
+                begin = time.perf_counter()
+                await variant(session, start, end)
+                latencies.append(time.perf_counter() - begin)
+    return {
+        "avg_ms": statistics.mean(latencies) * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--lines", type=int, default=5)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine.echo = False
+    async_engine.echo = False
+    tag = f"bench_{uuid.uuid4().hex[:8]}"
+    seed(tag, args.orders, args.lines)
+    end = date.today()
+    start = end - timedelta(days=args.days - 1)
+    analytics_cache.clear()
+    try:
+        for label, variant in (
+            ("ORM + Python", orm_python),
+            ("tuples + Python", tuples_python),
+            ("SQL GROUP BY", sql_group_by),
+            ("cache", cache_hit),
+        ):
+            result = await run(variant, start, end, args.repeat)
+            print(
+                f"{label:<16} {args.days} days  "
+                f"avg {result['avg_ms']:>9.2f} ms  "
+                f"max {result['max_ms']:>9.2f} ms"
+            )
+    finally:
+        await async_engine.dispose()
+        cleanup(tag)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,28 +1,105 @@
+import uuid
 import pytest
 from typing import List
 from fastapi.testclient import TestClient
-from sqlmodel import Session
 from app.main import app
-from app.core.database import engine
+from app.core.config import settings
+from app.auth.auth_handler import signJWT
+from app.models.role import RoleType
+from app.core.database import async_engine, async_session_maker
+
+# En test, une requête répétée (motif N+1) fait échouer le build.
+settings.QUERY_REPEAT_RAISE = True
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
 
 
 @pytest.fixture()
-def session():
-    with Session(engine) as session:
+async def session(anyio_backend):
+    async with async_session_maker() as session:
         yield session
+    # Les connexions du pool sont liées à la boucle d'événements du test.
+    await async_engine.dispose()
 
 
 @pytest.fixture(name="client_test")
-def client_test_fixture(session: Session):
+def client_test_fixture():
     """
     Fixture qui crée un client de test FastAPI en utilisant la session de test.
     """
 
-    client_test = TestClient(app)
-    yield client_test
+    with TestClient(app) as client_test:
+        yield client_test
+        # Ferme les connexions ouvertes dans la boucle du TestClient.
+        client_test.portal.call(async_engine.dispose)
     app.dependency_overrides.clear()
 
 
+def auth_headers(*roles: RoleType) -> dict:
+    token = signJWT("test@example.com", [role.value for role in roles])
+    return {"Authorization": f"Bearer {token['access_token']}"}
+
+
+@pytest.fixture
+def admin_headers() -> dict:
+    return auth_headers(RoleType.admin)
+
+
+@pytest.fixture
+def customer_id(client_test: TestClient, admin_headers: dict):
+    client_test.post("/api/v1/roles/", json={"role_type": "customer"})
+    roles = client_test.get("/api/v1/roles/", headers=admin_headers).json()
+    role_id = next(r["id"] for r in roles if r["role_type"] == "customer")
+    response = client_test.post(
+        "/api/v1/users/",
+        json={
+            "username": "routes",
+            "email": f"routes_{uuid.uuid4().hex}@example.com",
+            "first_name": "Route",
+            "last_name": "Test",
+            "adresse": "1 rue du Test",
+            "phone": "0600000000",
+            "password_hash": "motdepasse",
+            "role_ids": [role_id],
+        },
+    )
+    assert response.status_code == 200
+    user_id = response.json()["id"]
+    yield user_id
+    client_test.delete(f"/api/v1/users/{user_id}", headers=admin_headers)
+
+
+@pytest.fixture
+def menu_id(client_test: TestClient, admin_headers: dict):
+    suffix = uuid.uuid4().hex
+    category = client_test.post(
+        "/api/v1/categories/",
+        json={"name": f"category_{suffix}"},
+        headers=admin_headers,
+    ).json()
+    response = client_test.post(
+        "/api/v1/menus/",
+        json={
+            "name": f"menu_{suffix}",
+            "price": 9.5,
+            "category_id": category["id"],
+            "description": "Plat de test",
+            "stock": 100,
+        },
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    menu_id = response.json()["id"]
+    yield menu_id
+    client_test.delete(f"/api/v1/menus/{menu_id}", headers=admin_headers)
+    client_test.delete(
+        f"/api/v1/categories/{category['id']}", headers=admin_headers
+    )
+
+
 def compare_object_to_dict(
     an_object: any,
     a_dict: dict,
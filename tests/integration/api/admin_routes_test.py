@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from app.models.role import RoleType
+from tests.conftest import auth_headers
+
+
+def test_get_pool_stats(client_test: TestClient, admin_headers: dict):
+    client_test.get("/api/v1/roles/", headers=admin_headers)
+    response = client_test.get("/api/v1/admin/pool", headers=admin_headers)
+    assert response.status_code == 200
+    pools = response.json()
+    primary = next(p for p in pools if p["pool"] == "primary")
+    assert sum(p["checkouts"] for p in pools) >= 1
+    assert {"checked_out", "overflow_in_use", "wait_avg_ms"} <= set(primary)
+
+
+def test_get_pool_stats_requires_admin(client_test: TestClient):
+    response = client_test.get(
+        "/api/v1/admin/pool", headers=auth_headers(RoleType.employee)
+    )
+    assert response.status_code == 403
+
+
+def test_get_daily_sales(
+    client_test: TestClient,
+    admin_headers: dict,
+    customer_id: int,
+    menu_id: int,
+):
+    order = client_test.post(
+        "/api/v1/orders/with_lines",
+        json={
+            "client_id": customer_id,
+            "lines": [{"menu_id": menu_id, "quantity": 2}],
+        },
+        headers=admin_headers,
+    ).json()
+    today = datetime.now(timezone.utc).date().isoformat()
+
+    response = client_test.get(
+        f"/api/v1/admin/daily_sales?start={today}&end={today}",
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    [sales] = response.json()
+    assert sales["day"] == today
+    assert sales["revenue"] >= 9.5 * 2
+    assert sales["orders_by_status"]["Preparing"] >= 1
+
+    response = client_test.get(
+        f"/api/v1/admin/daily_sales?start={today}&end=2000-01-01",
+        headers=admin_headers,
+    )
+    assert response.status_code == 400
+    response = client_test.get(
+        f"/api/v1/admin/daily_sales?start={today}&end={today}",
+        headers=auth_headers(RoleType.employee),
+    )
+    assert response.status_code == 403
+
+    for detail in order["details"]:
+        client_test.delete(
+            f"/api/v1/orderdetails/{detail['id']}", headers=admin_headers
+        )
+    client_test.delete(f"/api/v1/orders/{order['id']}", headers=admin_headers)
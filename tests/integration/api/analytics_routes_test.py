@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from app.api.routes.analytics import analytics_cache
+from app.models.role import RoleType
+from tests.conftest import auth_headers
+
+
+def test_sales_analytics(
+    client_test: TestClient,
+    admin_headers: dict,
+    customer_id: int,
+    menu_id: int,
+):
+    analytics_cache.clear()
+    order = client_test.post(
+        "/api/v1/orders/with_lines",
+        json={
+            "client_id": customer_id,
+            "lines": [{"menu_id": menu_id, "quantity": q} for q in (2, 3)],
+        },
+        headers=admin_headers,
+    ).json()
+    now = datetime.now(timezone.utc)
+    period = f"start={now.date()}&end={now.date()}"
+
+    def get(path: str):
+        response = client_test.get(
+            f"/api/v1/admin/analytics/{path}", headers=admin_headers
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    top = get(f"top_menus?{period}&limit=100")
+    menu = next(m for m in top if m["menu_id"] == menu_id)
+    assert menu["quantity"] == 5
+    assert menu["revenue"] == 9.5 * 5
+
+    categories = get(f"revenue_by_category?{period}")
+    assert sum(c["revenue"] for c in categories) >= 9.5 * 5
+
+    heatmap = get(f"revenue_by_hour?{period}")
+    cell = next(c for c in heatmap if c["hour"] == now.hour)
+    assert cell["weekday"] == now.isoweekday()
+    assert cell["order_count"] >= 1
+
+    basket = get(f"basket_size?{period}")
+    assert basket["order_count"] >= 1
+    assert basket["average_items"] > 0
+
+    # Même période : servi depuis le cache, sans requête SQL
+    response = client_test.get(
+        f"/api/v1/admin/analytics/basket_size?{period}",
+        headers=admin_headers,
+    )
+    assert response.json() == basket
+    assert response.headers["X-DB-Query-Count"] == "0"
+    assert analytics_cache.hits >= 1
+
+    response = client_test.get(
+        f"/api/v1/admin/analytics/basket_size?start={now.date()}"
+        "&end=2000-01-01",
+        headers=admin_headers,
+    )
+    assert response.status_code == 400
+    response = client_test.get(
+        f"/api/v1/admin/analytics/basket_size?{period}",
+        headers=auth_headers(RoleType.employee),
+    )
+    assert response.status_code == 403
+
+    for detail in order["details"]:
+        client_test.delete(
+            f"/api/v1/orderdetails/{detail['id']}", headers=admin_headers
+        )
+    client_test.delete(f"/api/v1/orders/{order['id']}", headers=admin_headers)
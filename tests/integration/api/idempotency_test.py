@@ -0,0 +1,149 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+from fastapi.testclient import TestClient
+from sqlmodel import col, delete
+
+from app.api.idempotency import (
+    REPLAYED_HEADER,
+    Idempotency,
+    fingerprint_of,
+    idempotency_cache,
+)
+from app.core.database import async_session_maker
+from app.crud import idempotency_crud
+from app.models.idempotency_key import IdempotencyKey
+from app.models.order import OrderStatus
+from app.schemas.order_schema import OrderCreate
+
+
+def test_retried_order_creation_is_replayed(
+    client_test: TestClient, admin_headers: dict, customer_id: int
+):
+    body = {
+        "client_id": customer_id,
+        "total_price": 12.5,
+        "status": OrderStatus.CREATED.value,
+    }
+    headers = {**admin_headers, "Idempotency-Key": uuid.uuid4().hex}
+    first = client_test.post("/api/v1/orders/", json=body, headers=headers)
+    assert first.status_code == 200
+    assert REPLAYED_HEADER not in first.headers
+
+    # Relance servie par le cache mémoire, puis par la table seule
+    for clear_cache in (False, True):
+        if clear_cache:
+            idempotency_cache.clear()
+        retry = client_test.post("/api/v1/orders/", json=body, headers=headers)
+        assert retry.status_code == 200
+        assert retry.headers[REPLAYED_HEADER] == "true"
+        assert retry.json() == first.json()
+
+    response = client_test.get(
+        f"/api/v1/users/{customer_id}/orders", headers=admin_headers
+    )
+    assert [o["id"] for o in response.json()] == [first.json()["id"]]
+
+    # Même clé, autre contenu : refusé
+    response = client_test.post(
+        "/api/v1/orders/",
+        json={**body, "total_price": 13.0},
+        headers=headers,
+    )
+    assert response.status_code == 422
+
+    client_test.delete(
+        f"/api/v1/orders/{first.json()['id']}", headers=admin_headers
+    )
+
+
+@pytest.mark.anyio
+async def test_concurrent_duplicates_are_collapsed(session):
+    key = uuid.uuid4().hex
+    calls = []
+
+    def idempotency() -> Idempotency:
+        request = SimpleNamespace(
+            method="POST", url=SimpleNamespace(path="/test")
+        )
+        return Idempotency(
+            request, Response(), {"user_id": "t"}, key  # type: ignore
+        )
+
+    async def create():
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return {"id": len(calls)}
+
+    async def post():
+        async with async_session_maker() as other_session:
+            body = OrderCreate(
+                client_id=1, total_price=1.0, status=OrderStatus.CREATED
+            )
+            return await idempotency().run(other_session, body, create)
+
+    results = await asyncio.gather(*(post() for _ in range(3)))
+    assert results == [{"id": 1}] * 3
+    assert len(calls) == 1
+
+    await session.exec(
+        delete(IdempotencyKey).where(col(IdempotencyKey.key) == key)
+    )
+    await session.commit()
+
+
+@pytest.mark.anyio
+async def test_abandoned_claim_is_taken_over(session):
+    key = uuid.uuid4().hex
+    body = OrderCreate(
+        client_id=1, total_price=1.0, status=OrderStatus.CREATED
+    )
+    request = SimpleNamespace(method="POST", url=SimpleNamespace(path="/test"))
+    idempotency = Idempotency(
+        request, Response(), {"user_id": "t"}, key  # type: ignore
+    )
+
+    async def create():
+        return {"id": 1}
+
+    async def fail():
+        raise HTTPException(status_code=409)
+
+    # Une requête en échec ne laisse pas de réservation
+    with pytest.raises(HTTPException):
+        await idempotency.run(session, body, fail)
+    assert (
+        await idempotency_crud.get_key(session, idempotency.scope, key) is None
+    )
+
+    # Réservation d'un processus arrêté avant d'enregistrer sa réponse
+    claim = IdempotencyKey(
+        scope=idempotency.scope,
+        key=key,
+        fingerprint=fingerprint_of(body),
+        expires_at=datetime.now(timezone.utc) + timedelta(seconds=30),
+    )
+    session.add(claim)
+    await session.commit()
+    with pytest.raises(HTTPException) as error:
+        await idempotency.run(session, body, create)
+    assert error.value.status_code == 409
+
+    # Bail expiré : une relance reprend la clé
+    claim.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    session.add(claim)
+    await session.commit()
+    assert await idempotency.run(session, body, create) == {"id": 1}
+    stored = await idempotency_crud.get_key(session, idempotency.scope, key)
+    assert stored is not None and stored.status_code == 200
+    assert stored.expires_at - stored.created_at > timedelta(hours=1)
+
+    idempotency_cache.clear()
+    await session.exec(
+        delete(IdempotencyKey).where(col(IdempotencyKey.key) == key)
+    )
+    await session.commit()
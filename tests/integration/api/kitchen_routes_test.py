@@ -0,0 +1,110 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.kitchen_feed import kitchen_feed
+from app.models.order import OrderStatus
+from app.models.order_detail import OrderDetailStatus
+from app.models.role import RoleType
+from tests.conftest import auth_headers
+
+
+def test_kitchen_websocket_feed(
+    client_test: TestClient,
+    admin_headers: dict,
+    customer_id: int,
+    menu_id: int,
+):
+    since = kitchen_feed.last_seq
+    with client_test.websocket_connect(
+        "/api/v1/kitchen/ws", headers=admin_headers
+    ) as websocket:
+        response = client_test.post(
+            "/api/v1/orders/with_lines",
+            json={
+                "client_id": customer_id,
+                "lines": [{"menu_id": menu_id, "quantity": 2}],
+            },
+            headers=admin_headers,
+        )
+        assert int(response.headers["X-DB-Query-Count"]) <= 6
+        order = response.json()
+        created = websocket.receive_json()
+        assert created["type"] == "order.created"
+        assert created["data"]["id"] == order["id"]
+        line = websocket.receive_json()
+        assert line["type"] == "order_detail.created"
+        assert line["data"]["id"] == order["details"][0]["id"]
+        assert line["seq"] == created["seq"] + 1
+
+    # Un poste qui ne suit que les lignes prêtes reprend depuis `since`
+    line_id = order["details"][0]["id"]
+    for status in (OrderDetailStatus.PREPARING, OrderDetailStatus.READY):
+        client_test.post(
+            "/api/v1/orderdetails/status",
+            json={"status": status.value, "order_detail_ids": [line_id]},
+            headers=admin_headers,
+        )
+    with client_test.websocket_connect(
+        f"/api/v1/kitchen/ws?since={since}&status=Ready",
+        headers=admin_headers,
+    ) as websocket:
+        ready = websocket.receive_json()
+        assert ready["type"] == "order_detail.status"
+        assert ready["data"]["id"] == line_id
+        assert ready["data"]["status"] == OrderDetailStatus.READY.value
+
+    client_test.delete(
+        f"/api/v1/orderdetails/{line_id}", headers=admin_headers
+    )
+    client_test.delete(f"/api/v1/orders/{order['id']}", headers=admin_headers)
+
+
+def test_kitchen_websocket_requires_staff(client_test: TestClient):
+    headers = auth_headers(RoleType.customer)
+    for url, kwargs in (
+        ("/api/v1/kitchen/ws", {}),
+        ("/api/v1/kitchen/ws", {"headers": headers}),
+        (
+            "/api/v1/kitchen/ws?token="
+            + headers["Authorization"].removeprefix("Bearer "),
+            {},
+        ),
+    ):
+        with pytest.raises(WebSocketDisconnect):
+            with client_test.websocket_connect(url, **kwargs) as websocket:
+                websocket.receive_json()
+
+
+def test_kitchen_feed_filters_order_statuses(
+    client_test: TestClient, admin_headers: dict, customer_id: int
+):
+    since = kitchen_feed.last_seq
+    order = client_test.post(
+        "/api/v1/orders/",
+        json={
+            "client_id": customer_id,
+            "total_price": 10.0,
+            "status": OrderStatus.CREATED.value,
+        },
+        headers=admin_headers,
+    ).json()
+    client_test.put(
+        f"/api/v1/orders/{order['id']}",
+        json={"status": OrderStatus.PAID.value},
+        headers=admin_headers,
+    )
+    with client_test.websocket_connect(
+        f"/api/v1/kitchen/ws?since={since}&status=Paid",
+        headers=admin_headers,
+    ) as websocket:
+        paid = websocket.receive_json()
+        assert paid["type"] == "order.updated"
+        assert paid["data"]["id"] == order["id"]
+        assert paid["data"]["status"] == OrderStatus.PAID.value
+
+    response = client_test.get(
+        "/api/v1/kitchen/events?status=Unknown", headers=admin_headers
+    )
+    assert response.status_code == 422
+    client_test.delete(f"/api/v1/orders/{order['id']}", headers=admin_headers)
@@ -0,0 +1,137 @@
+import json
+import uuid
+
+from fastapi.testclient import TestClient
+
+
+def test_menu_import_and_reprice(
+    client_test: TestClient, admin_headers: dict, menu_id: int
+):
+    category_id = client_test.get(
+        f"/api/v1/menus/{menu_id}", headers=admin_headers
+    ).json()["category_id"]
+    other_category = client_test.post(
+        "/api/v1/categories/",
+        json={"name": f"bulk_{uuid.uuid4().hex}"},
+        headers=admin_headers,
+    ).json()["id"]
+    existing = client_test.get(
+        f"/api/v1/menus/{menu_id}", headers=admin_headers
+    ).json()
+    suffix = uuid.uuid4().hex[:8]
+    csv_file = "\n".join(
+        [
+            "name,price,category_id,description,stock",
+            f"Gratin {suffix},12.5,{category_id},Pommes de terre,10",
+            f"Soupe {suffix},6,{other_category},,",
+            f"{existing['name']},11,{category_id},Nouvelle recette,",
+            f"Soupe {suffix},7,{other_category},Doublon,",
+            f"Flan {suffix},-1,{category_id},Prix négatif,",
+            f"Tarte {suffix},5,0,Catégorie inconnue,",
+        ]
+    )
+
+    def upload(content: str, filename: str = "menus.csv"):
+        return client_test.post(
+            "/api/v1/menus/import",
+            files={"file": (filename, content)},
+            headers=admin_headers,
+        )
+
+    response = upload(csv_file)
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["created"], report["updated"], report["unchanged"]) == (
+        2,
+        1,
+        0,
+    )
+    assert [(e["row"], e["name"]) for e in report["errors"]] == [
+        (4, f"Soupe {suffix}"),
+        (5, f"Flan {suffix}"),
+        (6, f"Tarte {suffix}"),
+    ]
+    assert report["errors"][0]["error"] == "duplicate of row 2"
+    assert report["errors"][1]["error"].startswith("price:")
+
+    menus = {
+        menu["name"]: menu
+        for menu in client_test.get(
+            "/api/v1/menus/?limit=500", headers=admin_headers
+        ).json()
+    }
+    gratin = menus[f"Gratin {suffix}"]
+    soupe = menus[f"Soupe {suffix}"]
+    assert (gratin["price"], gratin["stock"]) == (12.5, 10)
+    assert (soupe["description"], soupe["stock"]) == ("", 0)
+    # Sans stock dans le fichier, le menu existant garde le sien
+    updated = menus[existing["name"]]
+    assert updated["description"] == "Nouvelle recette"
+    assert updated["stock"] == existing["stock"]
+
+    # Même fichier en JSON : rien ne change
+    records = [
+        {
+            "name": f"Gratin {suffix}",
+            "price": 12.5,
+            "category_id": category_id,
+            "description": "Pommes de terre",
+        }
+    ]
+    report = upload(json.dumps(records), "menus.json").json()
+    assert (report["created"], report["updated"], report["unchanged"]) == (
+        0,
+        0,
+        1,
+    )
+    assert upload("not json", "menus.json").status_code == 400
+
+    # +10 % sur une catégorie, en une requête
+    response = client_test.post(
+        "/api/v1/menus/reprice",
+        json={"percent": 10, "category_id": other_category},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["X-DB-Query-Count"] == "1"
+    assert response.json() == [{"id": soupe["id"], "price": 6.6}]
+
+    response = client_test.post(
+        "/api/v1/menus/reprice",
+        json={"prices": [{"id": gratin["id"], "price": 13}]},
+        headers=admin_headers,
+    )
+    assert response.json() == [{"id": gratin["id"], "price": 13}]
+    assert (
+        client_test.get(
+            f"/api/v1/menus/{gratin['id']}", headers=admin_headers
+        ).json()["price"]
+        == 13
+    )
+
+    # Un id inconnu : rien n'est changé
+    response = client_test.post(
+        "/api/v1/menus/reprice",
+        json={
+            "prices": [
+                {"id": gratin["id"], "price": 20},
+                {"id": 0, "price": 1},
+            ]
+        },
+        headers=admin_headers,
+    )
+    assert response.status_code == 404
+    response = client_test.post(
+        "/api/v1/menus/reprice",
+        json={"percent": 5, "prices": [{"id": gratin["id"], "price": 1}]},
+        headers=admin_headers,
+    )
+    assert response.status_code == 422
+
+    for menu in (gratin, soupe):
+        client_test.delete(
+            f"/api/v1/menus/{menu['id']}", headers=admin_headers
+        )
+    client_test.delete(
+        f"/api/v1/categories/{other_category}", headers=admin_headers
+    )
@@ -0,0 +1,283 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.api.pagination import encode_cursor
+from app.core.config import settings
+from app.crud.catalog_cache import menu_cache
+from app.models.menu import Menu
+
+
+def test_catalog_reads_are_cached(
+    client_test: TestClient,
+    admin_headers: dict,
+    customer_id: int,
+    menu_id: int,
+):
+    url = f"/api/v1/menus/{menu_id}"
+    client_test.get(url, headers=admin_headers)
+    response = client_test.get(url, headers=admin_headers)
+    assert response.status_code == 200
+    # Seule la version de la table (ETag) est lue en base
+    assert response.headers["X-DB-Query-Count"] == "1"
+    menu = response.json()
+
+    # Contrôle d'unicité du nom : servi par le cache au second essai
+    for _ in range(2):
+        response = client_test.post(
+            "/api/v1/menus/", json=menu, headers=admin_headers
+        )
+        assert response.status_code == 400
+    assert response.headers["X-DB-Query-Count"] == "0"
+
+    response = client_test.put(
+        url, json={"price": 11.0}, headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert client_test.get(url, headers=admin_headers).json()["price"] == 11.0
+
+    # Une commande réserve du stock : le menu est relu
+    order = client_test.post(
+        "/api/v1/orders/with_lines",
+        json={
+            "client_id": customer_id,
+            "lines": [{"menu_id": menu_id, "quantity": 2}],
+        },
+        headers=admin_headers,
+    ).json()
+    response = client_test.get(url, headers=admin_headers)
+    assert response.json()["stock"] == menu["stock"] - 2
+
+    stats = client_test.get(
+        "/api/v1/admin/catalog_cache", headers=admin_headers
+    ).json()
+    assert stats["menus"]["rows"]["hits"] >= 1
+    assert stats["menus"]["names"]["hits"] >= 1
+
+    for detail in order["details"]:
+        client_test.delete(
+            f"/api/v1/orderdetails/{detail['id']}", headers=admin_headers
+        )
+    client_test.delete(f"/api/v1/orders/{order['id']}", headers=admin_headers)
+
+
+def test_menu_etag(client_test: TestClient, admin_headers: dict, menu_id: int):
+    url = f"/api/v1/menus/{menu_id}"
+    response = client_test.get(url, headers=admin_headers)
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    response = client_test.get(
+        url, headers={**admin_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    # Une autre page du catalogue a son propre ETag
+    response = client_test.get(
+        "/api/v1/menus/?limit=1",
+        headers={**admin_headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 200
+
+    client_test.put(url, json={"price": 13.0}, headers=admin_headers)
+    response = client_test.get(
+        url, headers={**admin_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["price"] == 13.0
+
+
+def test_menu_search(client_test: TestClient, admin_headers: dict):
+    categories = [
+        client_test.post(
+            "/api/v1/categories/",
+            json={"name": f"search_{uuid.uuid4().hex}"},
+            headers=admin_headers,
+        ).json()["id"]
+        for _ in range(2)
+    ]
+    menus = {}
+    for name, description in (
+        ("Pizza Margherita", "Tomate, mozzarella, basilic"),
+        ("Salade César", "Poulet, parmesan, croûtons"),
+        ("Poulet rôti", "Poulet fermier, pommes de terre"),
+        ("Tarte aux pommes", "Pâte feuilletée"),
+    ):
+        response = client_test.post(
+            "/api/v1/menus/",
+            json={
+                "name": name,
+                "price": 10.0,
+                "category_id": categories[0],
+                "description": description,
+            },
+            headers=admin_headers,
+        )
+        menus[name] = response.json()["id"]
+
+    def search(q: str, category_id: int = categories[0]) -> list:
+        response = client_test.get(
+            "/api/v1/menus/search",
+            params={"q": q, "category_id": category_id},
+            headers=admin_headers,
+        )
+        assert response.status_code == 200
+        return [menu["name"] for menu in response.json()]
+
+    try:
+        assert search("pizza") == ["Pizza Margherita"]
+        # Préfixes, dans la description aussi
+        assert search("mozza bas") == ["Pizza Margherita"]
+        # Le nom compte plus que la description
+        assert search("poulet") == ["Poulet rôti", "Salade César"]
+        assert search("pommes") == ["Tarte aux pommes", "Poulet rôti"]
+        # Faute de frappe : recherche approchée sur le nom
+        assert search("margarita") == ["Pizza Margherita"]
+        assert search("pizza", category_id=categories[1]) == []
+        assert search("!!") == []
+    finally:
+        for menu_id in menus.values():
+            client_test.delete(
+                f"/api/v1/menus/{menu_id}", headers=admin_headers
+            )
+        for category_id in categories:
+            client_test.delete(
+                f"/api/v1/categories/{category_id}", headers=admin_headers
+            )
+
+
+def test_public_menu(
+    client_test: TestClient, admin_headers: dict, menu_id: int, monkeypatch
+):
+    menu = client_test.get(
+        f"/api/v1/menus/{menu_id}", headers=admin_headers
+    ).json()
+    # Version du catalogue relue à chaque requête
+    monkeypatch.setattr(settings, "MENU_SNAPSHOT_CHECK_INTERVAL", 0)
+
+    response = client_test.get("/api/v1/menus/public")
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["Cache-Control"] == "public, no-cache"
+    category = next(
+        category
+        for category in response.json()["categories"]
+        if category["id"] == menu["category_id"]
+    )
+    assert category["menus"] == [
+        {
+            "id": menu_id,
+            "name": menu["name"],
+            "price": menu["price"],
+            "description": menu["description"],
+            "available": True,
+        }
+    ]
+    etag = response.headers["ETag"]
+
+    response = client_test.get(
+        "/api/v1/menus/public", headers={"Accept-Encoding": "identity"}
+    )
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == etag
+    response = client_test.get(
+        "/api/v1/menus/public", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # Rupture de stock : la carte est reconstruite
+    client_test.put(
+        f"/api/v1/menus/{menu_id}", json={"stock": 0}, headers=admin_headers
+    )
+    response = client_test.get(
+        "/api/v1/menus/public", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    menus = [
+        menu
+        for category in response.json()["categories"]
+        for menu in category["menus"]
+    ]
+    assert {"id": menu_id, "available": False}.items() <= next(
+        menu for menu in menus if menu["id"] == menu_id
+    ).items()
+
+    # Entre deux vérifications, aucune requête SQL
+    monkeypatch.setattr(settings, "MENU_SNAPSHOT_CHECK_INTERVAL", 3600)
+    client_test.get("/api/v1/menus/public")
+    response = client_test.get("/api/v1/menus/public")
+    assert response.headers["X-DB-Query-Count"] == "0"
+
+
+def test_orders_keep_catalog_version(
+    client_test: TestClient,
+    admin_headers: dict,
+    customer_id: int,
+    menu_id: int,
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "MENU_SNAPSHOT_CHECK_INTERVAL", 0)
+    url = f"/api/v1/menus/{menu_id}"
+    client_test.put(url, json={"stock": 10}, headers=admin_headers)
+    public_etag = client_test.get("/api/v1/menus/public").headers["ETag"]
+    response = client_test.get(url, headers=admin_headers)
+    etag, menu = response.headers["ETag"], response.json()
+
+    # Le stock baisse sans s'épuiser : ni le catalogue ni la carte ne
+    # changent, le menu (avec son stock) si
+    order = client_test.post(
+        "/api/v1/orders/with_lines",
+        json={
+            "client_id": customer_id,
+            "lines": [{"menu_id": menu_id, "quantity": 2}],
+        },
+        headers=admin_headers,
+    ).json()
+    response = client_test.get(
+        "/api/v1/menus/public", headers={"If-None-Match": public_etag}
+    )
+    assert response.status_code == 304
+
+    # Copie en cache d'un autre worker, au stock périmé
+    menu_cache.rows.set(menu_id, Menu(**menu))
+    response = client_test.get(
+        url, headers={**admin_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["stock"] == 8
+
+    # Liste : l'ETag d'une page ne dépend que du stock de ses menus
+    pages = {
+        name: f"/api/v1/menus/?limit=1&cursor={encode_cursor([after])}"
+        for name, after in (("with", menu_id - 1), ("after", menu_id))
+    }
+    etags = {
+        name: client_test.get(page, headers=admin_headers).headers["ETag"]
+        for name, page in pages.items()
+    }
+    client_test.put(url, json={"stock": 7}, headers=admin_headers)
+    response = client_test.get(
+        pages["after"],
+        headers={**admin_headers, "If-None-Match": etags["after"]},
+    )
+    assert response.status_code == 304
+    response = client_test.get(
+        pages["with"],
+        headers={**admin_headers, "If-None-Match": etags["with"]},
+    )
+    assert response.status_code == 200
+    assert response.json()[0] == {**menu, "stock": 7}
+
+    for detail in order["details"]:
+        client_test.delete(
+            f"/api/v1/orderdetails/{detail['id']}", headers=admin_headers
+        )
+    client_test.delete(f"/api/v1/orders/{order['id']}", headers=admin_headers)
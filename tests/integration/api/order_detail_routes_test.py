@@ -0,0 +1,124 @@
+from fastapi.testclient import TestClient
+from app.models.order import OrderStatus
+from app.models.order_detail import OrderDetailStatus
+
+
+def test_bulk_status_transitions(
+    client_test: TestClient,
+    admin_headers: dict,
+    customer_id: int,
+    menu_id: int,
+):
+    order = client_test.post(
+        "/api/v1/orders/with_lines",
+        json={
+            "client_id": customer_id,
+            "lines": [{"menu_id": menu_id, "quantity": q} for q in (1, 2, 5)],
+        },
+        headers=admin_headers,
+    ).json()
+    line_ids = [detail["id"] for detail in order["details"]]
+
+    def transition(status: OrderDetailStatus, **targets):
+        return client_test.post(
+            "/api/v1/orderdetails/status",
+            json={"status": status.value, **targets},
+            headers=admin_headers,
+        )
+
+    response = transition(OrderDetailStatus.PREPARING, order_ids=[order["id"]])
+    assert response.status_code == 200
+    # Lignes, commandes, verrou et cumul du jour, catégories
+    assert int(response.headers["X-DB-Query-Count"]) <= 5
+    assert len(response.json()["order_details"]) == 3
+    assert response.json()["orders"] == []
+
+    # Preparing -> Served n'est pas une transition valide : rien ne bouge
+    response = transition(
+        OrderDetailStatus.SERVED, order_detail_ids=line_ids[:2]
+    )
+    assert response.status_code == 409
+
+    response = transition(
+        OrderDetailStatus.CANCELLED, order_detail_ids=[line_ids[2]]
+    )
+    assert response.status_code == 200
+    menu = client_test.get(
+        f"/api/v1/menus/{menu_id}", headers=admin_headers
+    ).json()
+    assert menu["stock"] == 100 - 3
+
+    # Les lignes annulées ne bloquent pas le passage de la commande
+    response = transition(OrderDetailStatus.READY, order_ids=[order["id"]])
+    result = response.json()
+    assert sorted(d["id"] for d in result["order_details"]) == line_ids[:2]
+    assert [o["status"] for o in result["orders"]] == [OrderStatus.READY.value]
+
+    # Rejouer la même transition est sans effet
+    response = transition(
+        OrderDetailStatus.READY, order_detail_ids=line_ids[:2]
+    )
+    assert response.status_code == 200
+    assert response.json() == {"order_details": [], "orders": []}
+
+    assert transition(OrderDetailStatus.READY).status_code == 422
+
+    for line_id in line_ids:
+        client_test.delete(
+            f"/api/v1/orderdetails/{line_id}", headers=admin_headers
+        )
+    client_test.delete(f"/api/v1/orders/{order['id']}", headers=admin_headers)
+
+
+def test_lines_of_unfinalized_order_do_not_move_it(
+    client_test: TestClient,
+    admin_headers: dict,
+    customer_id: int,
+    menu_id: int,
+):
+    order = client_test.post(
+        "/api/v1/orders/",
+        json={
+            "client_id": customer_id,
+            "total_price": 10.0,
+            "status": OrderStatus.CREATED.value,
+        },
+        headers=admin_headers,
+    ).json()
+    detail = client_test.post(
+        "/api/v1/orderdetails/",
+        json={
+            "order_id": order["id"],
+            "menu_id": menu_id,
+            "status": OrderDetailStatus.CREATED.value,
+            "price": 10.0,
+            "quantity": 2,
+        },
+        headers=admin_headers,
+    ).json()
+
+    response = client_test.post(
+        "/api/v1/orderdetails/status",
+        json={
+            "status": OrderDetailStatus.PREPARING.value,
+            "order_ids": [order["id"]],
+        },
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    assert len(response.json()["order_details"]) == 1
+    assert response.json()["orders"] == []
+    url = f"/api/v1/orders/{order['id']}"
+    status = client_test.get(url, headers=admin_headers).json()["status"]
+    assert status == OrderStatus.CREATED.value
+
+    # Toujours finalisable : total calculé, puis en préparation
+    response = client_test.get(f"{url}/finalize_order", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == OrderStatus.PREPARING.value
+    assert response.json()["total_price"] == 20.0
+
+    client_test.delete(
+        f"/api/v1/orderdetails/{detail['id']}", headers=admin_headers
+    )
+    client_test.delete(url, headers=admin_headers)
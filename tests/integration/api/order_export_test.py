@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from app.models.order import OrderStatus
+from app.models.order_detail import OrderDetailStatus
+
+
+def test_export_orders(
+    client_test: TestClient,
+    admin_headers: dict,
+    customer_id: int,
+    menu_id: int,
+):
+    orders = []
+    for status in (OrderStatus.CREATED, OrderStatus.PAID):
+        response = client_test.post(
+            "/api/v1/orders/",
+            json={
+                "client_id": customer_id,
+                "total_price": 19.0,
+                "status": status.value,
+            },
+            headers=admin_headers,
+        )
+        orders.append(response.json())
+    response = client_test.post(
+        "/api/v1/orderdetails/",
+        json={
+            "order_id": orders[0]["id"],
+            "menu_id": menu_id,
+            "status": OrderDetailStatus.CREATED.value,
+            "price": 9.5,
+            "quantity": 2,
+        },
+        headers=admin_headers,
+    )
+    detail = response.json()
+
+    today = date.today()
+    params = {
+        "start": str(today - timedelta(days=1)),
+        "end": str(today + timedelta(days=1)),
+        "client_id": customer_id,
+    }
+
+    response = client_test.get(
+        "/api/v1/orders/export",
+        params={**params, "include_details": True},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == [o["id"] for o in orders]
+    assert [d["id"] for d in lines[0]["details"]] == [detail["id"]]
+    assert lines[1]["details"] == []
+
+    response = client_test.get(
+        "/api/v1/orders/export",
+        params={**params, "format": "csv", "status": OrderStatus.PAID.value},
+        headers=admin_headers,
+    )
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row["id"]) for row in rows] == [orders[1]["id"]]
+    assert rows[0]["status"] == OrderStatus.PAID.value
+
+    response = client_test.get(
+        "/api/v1/orders/export",
+        params={**params, "format": "csv", "include_details": True},
+        headers=admin_headers,
+    )
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["detail_id"] for row in rows] == [str(detail["id"]), ""]
+
+    response = client_test.get(
+        "/api/v1/orders/export",
+        params={"start": str(today), "end": str(today - timedelta(days=1))},
+        headers=admin_headers,
+    )
+    assert response.status_code == 400
+
+    client_test.delete(
+        f"/api/v1/orderdetails/{detail['id']}", headers=admin_headers
+    )
+    for order in orders:
+        client_test.delete(
+            f"/api/v1/orders/{order['id']}", headers=admin_headers
+        )
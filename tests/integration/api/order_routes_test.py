@@ -0,0 +1,243 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.api.pagination import encode_cursor
+from app.models.order import OrderStatus
+
+
+def test_order_routes(
+    client_test: TestClient, admin_headers: dict, customer_id: int
+):
+    response = client_test.post(
+        "/api/v1/orders/",
+        json={
+            "client_id": customer_id,
+            "total_price": 12.5,
+            "status": OrderStatus.CREATED.value,
+        },
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    order = response.json()
+
+    response = client_test.get(
+        f"/api/v1/orders/{order['id']}", headers=admin_headers
+    )
+    assert response.json() == order
+
+    response = client_test.get("/api/v1/orders/", headers=admin_headers)
+    assert order in response.json()
+
+    response = client_test.get(
+        f"/api/v1/users/{customer_id}/orders", headers=admin_headers
+    )
+    assert [o["id"] for o in response.json()] == [order["id"]]
+
+    response = client_test.put(
+        f"/api/v1/orders/{order['id']}",
+        json={"status": OrderStatus.PREPARING.value},
+        headers=admin_headers,
+    )
+    assert response.json()["status"] == OrderStatus.PREPARING.value
+
+    response = client_test.delete(
+        f"/api/v1/orders/{order['id']}", headers=admin_headers
+    )
+    assert response.status_code == 200
+    response = client_test.get(
+        f"/api/v1/orders/{order['id']}", headers=admin_headers
+    )
+    assert response.status_code == 404
+
+
+def test_orders_keyset_pagination(
+    client_test: TestClient, admin_headers: dict, customer_id: int
+):
+    created = []
+    for price in (1.0, 2.0, 3.0):
+        response = client_test.post(
+            "/api/v1/orders/",
+            json={
+                "client_id": customer_id,
+                "total_price": price,
+                "status": OrderStatus.CREATED.value,
+            },
+            headers=admin_headers,
+        )
+        created.append(response.json()["id"])
+
+    url = f"/api/v1/users/{customer_id}/orders?limit=2"
+    pages = []
+    while url:
+        response = client_test.get(url, headers=admin_headers)
+        assert response.status_code == 200
+        pages.append([o["id"] for o in response.json()])
+        link = response.headers.get("Link")
+        url = link[1 : link.index(">")] if link else None
+
+    assert pages == [created[:2], created[2:]]
+
+    # Curseur illisible, ou d'une liste triée par id seulement
+    for cursor in ("garbage", encode_cursor([created[0]])):
+        response = client_test.get(
+            f"/api/v1/orders/?cursor={cursor}", headers=admin_headers
+        )
+        assert response.status_code == 400
+
+    for order_id in created:
+        client_test.delete(f"/api/v1/orders/{order_id}", headers=admin_headers)
+
+
+def test_create_order_with_lines(
+    client_test: TestClient,
+    admin_headers: dict,
+    customer_id: int,
+    menu_id: int,
+):
+    response = client_test.post(
+        "/api/v1/orders/with_lines",
+        json={
+            "client_id": customer_id,
+            "lines": [
+                {"menu_id": menu_id, "quantity": 2},
+                {"menu_id": menu_id, "quantity": 1, "comment": "sans sel"},
+            ],
+        },
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    # Stock, commande, lignes, verrou et cumul du jour, catégories
+    assert int(response.headers["X-DB-Query-Count"]) <= 6
+    order = response.json()
+    assert order["status"] == OrderStatus.PREPARING.value
+    assert order["total_price"] == 9.5 * 3
+    assert [d["quantity"] for d in order["details"]] == [2, 1]
+    assert order["details"][1]["comment"] == "sans sel"
+
+    response = client_test.get(
+        f"/api/v1/orders/{order['id']}/details", headers=admin_headers
+    )
+    assert len(response.json()) == 2
+
+    response = client_test.post(
+        "/api/v1/orders/with_lines",
+        json={
+            "client_id": customer_id,
+            "lines": [{"menu_id": 0, "quantity": 1}],
+        },
+        headers=admin_headers,
+    )
+    assert response.status_code == 404
+
+    response = client_test.post(
+        "/api/v1/orders/with_lines",
+        json={
+            "client_id": customer_id,
+            "lines": [{"menu_id": menu_id, "quantity": 1000}],
+        },
+        headers=admin_headers,
+    )
+    assert response.status_code == 409
+    response = client_test.get(
+        f"/api/v1/menus/{menu_id}", headers=admin_headers
+    )
+    assert response.json()["stock"] == 100 - 3
+
+    for detail in order["details"]:
+        client_test.delete(
+            f"/api/v1/orderdetails/{detail['id']}", headers=admin_headers
+        )
+    client_test.delete(f"/api/v1/orders/{order['id']}", headers=admin_headers)
+
+
+def test_orders_include_details(
+    client_test: TestClient,
+    admin_headers: dict,
+    customer_id: int,
+    menu_id: int,
+):
+    orders = [
+        client_test.post(
+            "/api/v1/orders/with_lines",
+            json={
+                "client_id": customer_id,
+                "lines": [{"menu_id": menu_id, "quantity": quantity}] * 2,
+            },
+            headers=admin_headers,
+        ).json()
+        for quantity in (1, 2, 3)
+    ]
+
+    response = client_test.get(
+        f"/api/v1/orders/{orders[0]['id']}?include=details",
+        headers=admin_headers,
+    )
+    assert response.json() == orders[0]
+    response = client_test.get(
+        f"/api/v1/orders/{orders[0]['id']}", headers=admin_headers
+    )
+    assert "details" not in response.json()
+
+    # Toute la page et ses lignes : une requête de plus, pas une par commande
+    response = client_test.get(
+        f"/api/v1/users/{customer_id}/orders?include=details",
+        headers=admin_headers,
+    )
+    assert response.json() == orders
+    assert response.headers["X-DB-Query-Count"] == "2"
+
+    for order in orders:
+        for detail in order["details"]:
+            client_test.delete(
+                f"/api/v1/orderdetails/{detail['id']}", headers=admin_headers
+            )
+        client_test.delete(
+            f"/api/v1/orders/{order['id']}", headers=admin_headers
+        )
+
+
+def test_order_etag(
+    client_test: TestClient,
+    admin_headers: dict,
+    customer_id: int,
+    menu_id: int,
+):
+    order = client_test.post(
+        "/api/v1/orders/",
+        json={
+            "client_id": customer_id,
+            "total_price": 10.0,
+            "status": OrderStatus.CREATED.value,
+        },
+        headers=admin_headers,
+    ).json()
+    url = f"/api/v1/orders/{order['id']}?include=details"
+    etag = client_test.get(url, headers=admin_headers).headers["ETag"]
+    response = client_test.get(
+        url, headers={**admin_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    # Une ligne ajoutée change la version de la commande
+    detail = client_test.post(
+        "/api/v1/orderdetails/",
+        json={
+            "order_id": order["id"],
+            "menu_id": menu_id,
+            "status": "Created",
+            "price": 10.0,
+            "quantity": 1,
+        },
+        headers=admin_headers,
+    ).json()
+    response = client_test.get(
+        url, headers={**admin_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert [d["id"] for d in response.json()["details"]] == [detail["id"]]
+
+    client_test.delete(
+        f"/api/v1/orderdetails/{detail['id']}", headers=admin_headers
+    )
+    client_test.delete(f"/api/v1/orders/{order['id']}", headers=admin_headers)
+    response = client_test.get(url, headers=admin_headers)
+    assert response.status_code == 404
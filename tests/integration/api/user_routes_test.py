@@ -0,0 +1,13 @@
+from fastapi.testclient import TestClient
+
+
+def test_get_all_users_query_count(
+    client_test: TestClient, admin_headers: dict, customer_id: int
+):
+    response = client_test.get("/api/v1/users/", headers=admin_headers)
+
+    assert response.status_code == 200
+    # Une requête pour les utilisateurs, une (IN) pour tous leurs rôles,
+    # quel que soit le nombre d'utilisateurs.
+    assert int(response.headers["X-DB-Query-Count"]) <= 2
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
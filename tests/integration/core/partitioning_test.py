@@ -0,0 +1,164 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import async_engine
+from app.core.partitions import (
+    MONTHS_AHEAD,
+    add_months,
+    create_monthly_partitions,
+    partition_name,
+)
+from app.models.category import Category
+from app.models.menu import Menu
+from app.models.order import OrderBase, OrderStatus
+from app.models.order_detail import OrderDetail, OrderDetailStatus
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_existing_partitions_are_not_recreated(session: AsyncSession):
+    today = datetime.now(timezone.utc).date()
+    async with async_engine.begin() as connection:
+        created = await connection.run_sync(
+            create_monthly_partitions, today, 0
+        )
+    assert created == []
+
+
+async def test_rows_of_default_partition_move_to_new_month():
+    month = add_months(datetime.now(timezone.utc).date(), MONTHS_AHEAD + 24)
+    async with async_engine.connect() as connection:
+        await connection.begin()
+        session = AsyncSession(bind=connection)
+        user = User(
+            username="partitions",
+            email=f"partitions_{uuid.uuid4().hex}@example.com",
+            password_hash="x",
+            first_name="Partition",
+            last_name="Test",
+            adresse="1 rue des Mois",
+            phone="0600000000",
+        )
+        category = Category(name=f"cat_{uuid.uuid4().hex}")
+        session.add_all([user, category])
+        await session.flush()
+        menu = Menu(
+            name=f"plat_{uuid.uuid4().hex}",
+            price=9.5,
+            description="",
+            category_id=category.id,
+        )
+        # Commande d'un mois sans partition : reçue par défaut
+        order = OrderBase(
+            client_id=user.id,
+            created_at=datetime.combine(month, datetime.min.time()),
+            total_price=9.5,
+            status=OrderStatus.CREATED,
+        )
+        session.add_all([menu, order])
+        await session.flush()
+        session.add(
+            OrderDetail(
+                order_id=order.id,
+                menu_id=menu.id,
+                price=9.5,
+                comment="",
+                quantity=1,
+                status=OrderDetailStatus.CREATED,
+            )
+        )
+        await session.flush()
+
+        created = await connection.run_sync(
+            create_monthly_partitions, month, 0
+        )
+        assert created == [
+            partition_name("order", month),
+            partition_name("orderdetail", month),
+        ]
+        for table in ("order", "orderdetail"):
+            located = await connection.execute(
+                text(
+                    f'SELECT tableoid::regclass::text FROM "{table}" '
+                    f"WHERE created_at = :created_at"
+                ),
+                {"created_at": order.created_at},
+            )
+            assert located.scalars().all() == [partition_name(table, month)]
+        # Partitions et lignes annulées avec la transaction
+        await connection.rollback()
+
+
+async def test_query_on_a_day_scans_one_partition(session: AsyncSession):
+    today = datetime.now(timezone.utc).date()
+    start = datetime.combine(today, datetime.min.time())
+    statement = select(OrderBase).where(
+        col(OrderBase.created_at) >= start,
+        col(OrderBase.created_at) < start + timedelta(days=1),
+    )
+    compiled = statement.compile(
+        async_engine.sync_engine, compile_kwargs={"literal_binds": True}
+    )
+    plan = "\n".join(
+        (await session.exec(text(f"EXPLAIN {compiled}"))).scalars()
+    )
+    assert partition_name("order", today) in plan
+    assert "order_default" not in plan
+
+
+async def test_order_lines_follow_their_order(session: AsyncSession):
+    user = User(
+        username="partitions",
+        email=f"partitions_{uuid.uuid4().hex}@example.com",
+        password_hash="x",
+        first_name="Partition",
+        last_name="Test",
+        adresse="1 rue des Mois",
+        phone="0600000000",
+    )
+    category = Category(name=f"cat_{uuid.uuid4().hex}")
+    session.add_all([user, category])
+    await session.flush()
+    menu = Menu(
+        name=f"plat_{uuid.uuid4().hex}",
+        price=9.5,
+        description="",
+        category_id=category.id,
+    )
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    orders = [
+        OrderBase(
+            client_id=user.id,
+            created_at=created_at,
+            total_price=9.5,
+            status=OrderStatus.CREATED,
+        )
+        for created_at in (now, now - timedelta(days=40))
+    ]
+    session.add_all([menu, *orders])
+    await session.flush()
+
+    detail = OrderDetail(
+        order_id=orders[0].id,
+        menu_id=menu.id,
+        price=9.5,
+        comment="",
+        quantity=1,
+        status=OrderDetailStatus.CREATED,
+    )
+    session.add(detail)
+    await session.flush()
+    assert detail.created_at == orders[0].created_at
+
+    # Rattachée à une commande d'un autre mois, la ligne change de
+    # partition avec elle
+    detail.order_id = orders[1].id
+    await session.flush()
+    assert detail.created_at == orders[1].created_at
+    await session.rollback()
@@ -0,0 +1,58 @@
+import uuid
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import select
+from app.core import database
+from app.core.config import settings
+from app.core.database import async_engine, async_session_maker
+from app.models.category import Category
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def replica(monkeypatch, anyio_backend):
+    # La même base sert de réplica : seul le routage est vérifié ici.
+    replica = create_async_engine(settings.DATABASE_URL)
+    monkeypatch.setattr(database, "replica_engine", replica)
+    yield replica
+    await replica.dispose()
+    await async_engine.dispose()
+
+
+async def test_read_only_session_reads_from_replica_until_write(replica):
+    statement = select(Category)
+    async with async_session_maker(read_only=True) as session:
+        routing = session.sync_session
+        assert routing.get_bind(clause=statement) is replica.sync_engine
+        await session.exec(statement)
+
+        category = Category(name=f"replica_{uuid.uuid4().hex[:8]}")
+        session.add(category)
+        await session.flush()
+
+        # Lecture après écriture : collée au primaire, voit l'écriture.
+        assert routing.get_bind(clause=statement) is async_engine.sync_engine
+        found = await session.exec(
+            select(Category).where(Category.id == category.id)
+        )
+        assert found.first() is not None
+        await session.rollback()
+
+
+async def test_read_write_session_uses_primary(replica):
+    async with async_session_maker() as session:
+        assert (
+            session.sync_session.get_bind(clause=select(Category))
+            is async_engine.sync_engine
+        )
+
+
+async def test_select_for_update_uses_primary(replica):
+    async with async_session_maker(read_only=True) as session:
+        assert (
+            session.sync_session.get_bind(
+                clause=select(Category).with_for_update()
+            )
+            is async_engine.sync_engine
+        )
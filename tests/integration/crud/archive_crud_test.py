@@ -0,0 +1,191 @@
+import json
+import uuid
+from datetime import date, datetime
+
+import pytest
+from sqlmodel import col, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.export import ExportFormat, export_orders
+from app.core.config import settings
+from app.crud import analytics_crud, archive_crud, daily_sales_crud
+from app.models.category import Category
+from app.models.daily_sales import DailySales
+from app.models.menu import Menu
+from app.models.order import OrderBase, OrderStatus
+from app.models.order_detail import OrderDetail, OrderDetailStatus
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+# Un mois sans autre commande : seules celles du test sont archivées
+MONTH = date(2001, 1, 1)
+BEFORE = date(2001, 2, 1)
+END = date(2001, 1, 31)
+
+
+@pytest.fixture
+async def old_orders(session: AsyncSession, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path))
+    user = User(
+        username="archive",
+        email=f"archive_{uuid.uuid4().hex}@example.com",
+        password_hash="x",
+        first_name="Archive",
+        last_name="Test",
+        adresse="1 rue des Archives",
+        phone="0600000000",
+    )
+    category = Category(name=f"cat_{uuid.uuid4().hex}")
+    session.add_all([user, category])
+    await session.commit()
+    menu = Menu(
+        name=f"plat_{uuid.uuid4().hex}",
+        price=12.0,
+        description="",
+        category_id=category.id,
+    )
+    orders = [
+        OrderBase(
+            client_id=user.id,
+            created_at=datetime(2001, 1, day, 12),
+            total_price=24.0,
+            status=status,
+        )
+        for day, status in (
+            (10, OrderStatus.PAID),
+            (11, OrderStatus.CANCELLED),
+            (12, OrderStatus.PAID),
+            (13, OrderStatus.CREATED),
+        )
+    ]
+    session.add_all([menu, *orders])
+    await session.commit()
+    session.add(
+        OrderDetail(
+            order_id=orders[0].id,
+            menu_id=menu.id,
+            price=12.0,
+            quantity=2,
+            status=OrderDetailStatus.SERVED,
+        )
+    )
+    await session.commit()
+    order_ids = [order.id for order in orders]
+    ids = user.id, menu.id, category.id
+    yield order_ids
+
+    user_id, menu_id, category_id = ids
+    await session.exec(
+        delete(OrderDetail).where(col(OrderDetail.order_id).in_(order_ids))
+    )
+    await session.exec(delete(OrderBase).where(OrderBase.client_id == user_id))
+    await session.exec(delete(Menu).where(col(Menu.id) == menu_id))
+    await session.exec(delete(Category).where(col(Category.id) == category_id))
+    await session.exec(delete(User).where(col(User.id) == user_id))
+    await session.exec(
+        delete(DailySales).where(col(DailySales.day).between(MONTH, END))
+    )
+    await session.commit()
+
+
+async def sales_of_month(session: AsyncSession) -> list:
+    end = date(2001, 1, 31)
+    return [
+        await analytics_crud.get_top_menus(session, MONTH, end),
+        await analytics_crud.get_revenue_by_category(session, MONTH, end),
+        await analytics_crud.get_revenue_by_hour(session, MONTH, end),
+        await analytics_crud.get_basket_size(session, MONTH, end),
+    ]
+
+
+async def test_closed_orders_are_moved_to_archive(session, old_orders):
+    paid, cancelled, other_paid, created = old_orders
+    month = await archive_crud.get_first_archivable_month(session, BEFORE)
+    assert month == MONTH
+    sales = await sales_of_month(session)
+
+    # Deux lots d'au plus deux commandes, puis plus rien à archiver
+    batches = []
+    while count := await archive_crud.archive_batch(
+        session, MONTH, BEFORE, batch_size=2
+    ):
+        batches.append(count)
+    assert batches == [2, 1]
+    month = await archive_crud.get_first_archivable_month(session, BEFORE)
+    assert month is None
+
+    remaining = await session.exec(
+        select(OrderBase.id).where(col(OrderBase.id).in_(old_orders))
+    )
+    assert list(remaining) == [created]
+    details = await session.exec(
+        select(OrderDetail).where(col(OrderDetail.order_id) == paid)
+    )
+    assert details.first() is None
+
+    archived = archive_crud.read_archived_orders(
+        MONTH, MONTH, date(2001, 1, 31), with_details=True
+    )
+    assert [a.order.id for a in archived] == [paid, cancelled, other_paid]
+    assert archived[0].order.status == OrderStatus.PAID
+    assert [(d.quantity, d.price) for d in archived[0].details] == [(2, 12)]
+
+    # Lecture transparente : statistiques et export voient l'archive
+    assert await sales_of_month(session) == sales
+    top_menus, categories, hours, basket = sales
+    assert [(m.quantity, m.revenue) for m in top_menus] == [(2, 24.0)]
+    assert [c.revenue for c in categories] == [24.0]
+    assert [(h.weekday, h.hour, h.order_count) for h in hours] == [
+        (3, 12, 1),
+        (5, 12, 1),
+    ]
+    assert basket.order_count == 1
+    assert basket.average_items == 2
+
+    chunks = [
+        chunk
+        async for chunk in export_orders(
+            ExportFormat.NDJSON,
+            MONTH,
+            date(2001, 1, 31),
+            include_details=True,
+            batch_size=2,
+        )
+    ]
+    lines = [json.loads(line) for line in "".join(chunks).splitlines()]
+    assert [line["id"] for line in lines] == [
+        paid,
+        cancelled,
+        other_paid,
+        created,
+    ]
+    assert [d["quantity"] for d in lines[0]["details"]] == [2]
+
+
+async def daily_sales_of_month(session: AsyncSession) -> list:
+    await daily_sales_crud.rebuild_daily_sales(session, MONTH, END)
+    return [
+        (
+            row.day,
+            row.revenue,
+            row.order_count,
+            row.average_ticket,
+            row.orders_by_status,
+            row.revenue_by_category,
+        )
+        for row in await daily_sales_crud.get_daily_sales(session, MONTH, END)
+    ]
+
+
+async def test_rebuild_counts_archived_orders(session, old_orders):
+    daily_sales = await daily_sales_of_month(session)
+    while await archive_crud.archive_batch(session, MONTH, BEFORE):
+        pass
+
+    assert await daily_sales_of_month(session) == daily_sales
+    totals = {day: (revenue, count) for day, revenue, count, *_ in daily_sales}
+    assert totals[date(2001, 1, 10)] == (24.0, 1)
+    assert totals[date(2001, 1, 12)] == (24.0, 1)
+    assert totals[date(2001, 1, 11)] == (0.0, 0)
+    assert len(daily_sales) == 31
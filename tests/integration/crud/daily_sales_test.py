@@ -0,0 +1,191 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlmodel import col, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import async_session_maker
+from app.crud import daily_sales_crud
+from app.crud.order_crud import create_order, delete_order, finalize_order
+from app.crud.order_detail_crud import (
+    create_order_detail,
+    delete_order_detail,
+    get_all_order_details_by_order,
+    transition_order_details,
+)
+from app.models.category import Category
+from app.models.daily_sales import DailySales
+from app.models.menu import Menu
+from app.models.order import OrderBase, OrderStatus
+from app.models.order_detail import OrderDetail, OrderDetailStatus
+from app.models.user import User
+from app.schemas.order_detail_schema import OrderDetailCreate
+from app.schemas.order_schema import OrderCreate
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client_and_menu(session: AsyncSession):
+    user = User(
+        username="sales",
+        email=f"sales_{uuid.uuid4().hex}@example.com",
+        password_hash="x",
+        first_name="Sales",
+        last_name="Test",
+        adresse="1 rue des Ventes",
+        phone="0600000000",
+    )
+    category = Category(name=f"cat_{uuid.uuid4().hex}")
+    session.add_all([user, category])
+    await session.commit()
+    menu = Menu(
+        name=f"plat_{uuid.uuid4().hex}",
+        price=12.0,
+        description="",
+        category_id=category.id,
+    )
+    menu.stock = 100
+    session.add(menu)
+    await session.commit()
+    ids = user.id, menu.id, category.id
+    yield ids
+
+    user_id, menu_id, category_id = ids
+    order_ids = select(OrderBase.id).where(OrderBase.client_id == user_id)
+    await session.exec(
+        delete(OrderDetail).where(col(OrderDetail.order_id).in_(order_ids))
+    )
+    await session.exec(delete(OrderBase).where(OrderBase.client_id == user_id))
+    await session.exec(delete(Menu).where(col(Menu.id) == menu_id))
+    await session.exec(delete(Category).where(col(Category.id) == category_id))
+    await session.exec(delete(User).where(col(User.id) == user_id))
+    await session.commit()
+    today = datetime.now(timezone.utc).date()
+    await daily_sales_crud.rebuild_daily_sales(session, today, today)
+
+
+async def today_sales() -> DailySales:
+    today = datetime.now(timezone.utc).date()
+    async with async_session_maker() as session:
+        sales = await daily_sales_crud.get_daily_sales(session, today, today)
+    # Pas encore de ligne : un jour sans commande finalisée
+    return sales[0] if sales else DailySales(day=today)
+
+
+async def rebuilt_sales() -> DailySales:
+    today = datetime.now(timezone.utc).date()
+    async with async_session_maker() as session:
+        await daily_sales_crud.rebuild_daily_sales(session, today, today)
+    return await today_sales()
+
+
+def figures(sales: DailySales) -> tuple:
+    return (
+        sales.revenue,
+        sales.order_count,
+        sales.average_ticket,
+        sales.orders_by_status,
+        sales.revenue_by_category,
+    )
+
+
+async def place_order(session: AsyncSession, user_id: int, menu_id: int):
+    order = await create_order(
+        session,
+        OrderCreate(
+            client_id=user_id, total_price=1.0, status=OrderStatus.CREATED
+        ),
+    )
+    await create_order_detail(
+        session,
+        OrderDetailCreate(
+            order_id=order.id,
+            menu_id=menu_id,
+            price=12.0,
+            quantity=2,
+            status=OrderDetailStatus.CREATED,
+        ),
+    )
+    return order
+
+
+async def test_finalize_updates_daily_sales(session, client_and_menu):
+    user_id, menu_id, category_id = client_and_menu
+    before = await today_sales()
+    order = await place_order(session, user_id, menu_id)
+    # Une commande non finalisée et ses lignes ne touchent pas au cumul
+    assert figures(await today_sales()) == figures(before)
+    assert before.updated_at == (await today_sales()).updated_at
+
+    await finalize_order(session, order.id)
+    after = await today_sales()
+    assert after.revenue == pytest.approx(before.revenue + 24.0)
+    assert after.order_count == before.order_count + 1
+    assert after.revenue_by_category[str(category_id)] == 24.0
+    assert figures(after) == figures(await rebuilt_sales())
+
+    # Une ligne ajoutée puis annulée après la finalisation
+    line = await create_order_detail(
+        session,
+        OrderDetailCreate(
+            order_id=order.id,
+            menu_id=menu_id,
+            price=12.0,
+            quantity=1,
+            status=OrderDetailStatus.CREATED,
+        ),
+    )
+    assert (await today_sales()).revenue_by_category[str(category_id)] == 36.0
+    await transition_order_details(
+        session, OrderDetailStatus.CANCELLED, order_detail_ids=[line.id]
+    )
+    sales = await today_sales()
+    assert sales.revenue_by_category[str(category_id)] == 24.0
+    assert figures(sales) == figures(await rebuilt_sales())
+
+    for detail in await get_all_order_details_by_order(session, order.id):
+        await delete_order_detail(session, detail.id)
+    await delete_order(session, order.id)
+    after = await today_sales()
+    assert str(category_id) not in after.revenue_by_category
+    assert figures(after) == figures(before)
+
+
+async def test_cancelled_order_leaves_daily_sales(session, client_and_menu):
+    user_id, menu_id, category_id = client_and_menu
+    before = await today_sales()
+    order = await place_order(session, user_id, menu_id)
+    await finalize_order(session, order.id)
+
+    await transition_order_details(
+        session, OrderDetailStatus.CANCELLED, order_ids=[order.id]
+    )
+    sales = await today_sales()
+    assert sales.revenue == pytest.approx(before.revenue)
+    assert sales.order_count == before.order_count
+    assert sales.orders_by_status.get(OrderStatus.CANCELLED.value, 0) == (
+        before.orders_by_status.get(OrderStatus.CANCELLED.value, 0) + 1
+    )
+    assert str(category_id) not in sales.revenue_by_category
+    assert figures(sales) == figures(await rebuilt_sales())
+
+
+async def test_concurrent_finalizations_are_all_counted(
+    session, client_and_menu
+):
+    user_id, menu_id, category_id = client_and_menu
+    orders = [await place_order(session, user_id, menu_id) for _ in range(4)]
+
+    async def finalize(order_id: int):
+        async with async_session_maker() as other_session:
+            return await finalize_order(other_session, order_id)
+
+    # Chaque transaction ajoute son delta à la même ligne : aucun ne doit
+    # être perdu
+    await asyncio.gather(*(finalize(order.id) for order in orders))
+    sales = await today_sales()
+    assert sales.revenue_by_category[str(category_id)] == 4 * 24.0
+    assert figures(sales) == figures(await rebuilt_sales())
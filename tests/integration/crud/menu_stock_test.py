@@ -0,0 +1,108 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlmodel import col, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.database import async_session_maker
+from app.crud import daily_sales_crud
+from app.crud.menu_crud import OutOfStockError, UnknownMenuError
+from app.crud.order_crud import create_order_with_lines
+from app.crud.order_detail_crud import update_order_detail
+from app.models.menu import Menu
+from app.models.order import OrderBase
+from app.models.order_detail import OrderDetail, OrderDetailStatus
+from app.models.user import User
+from app.schemas.order_detail_schema import OrderDetailUpdate
+from app.schemas.order_schema import OrderLineCreate, OrderWithLinesCreate
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client_and_menu(session: AsyncSession):
+    user = User(
+        username="stock",
+        email=f"stock_{uuid.uuid4().hex}@example.com",
+        password_hash="x",
+        first_name="Stock",
+        last_name="Test",
+        adresse="1 rue du Stock",
+        phone="0600000000",
+    )
+    menu = Menu(name=f"plat_{uuid.uuid4().hex}", price=12.0, description="")
+    menu.stock = 10
+    session.add_all([user, menu])
+    await session.commit()
+    user_id, menu_id = user.id, menu.id
+    yield user_id, menu_id
+
+    order_ids = select(OrderBase.id).where(OrderBase.client_id == user_id)
+    await session.exec(
+        delete(OrderDetail).where(col(OrderDetail.order_id).in_(order_ids))
+    )
+    await session.exec(delete(OrderBase).where(OrderBase.client_id == user_id))
+    await session.exec(delete(Menu).where(col(Menu.id) == menu_id))
+    await session.exec(delete(User).where(col(User.id) == user_id))
+    await session.commit()
+    # Commandes supprimées sans passer par le crud : cumul du jour recalculé
+    today = datetime.now(timezone.utc).date()
+    await daily_sales_crud.rebuild_daily_sales(session, today, today)
+
+
+async def stock_of(menu_id: int) -> int:
+    async with async_session_maker() as session:
+        return (await session.get(Menu, menu_id)).stock
+
+
+def order_of(client_id: int, *lines: tuple) -> OrderWithLinesCreate:
+    return OrderWithLinesCreate(
+        client_id=client_id,
+        lines=[
+            OrderLineCreate(menu_id=menu_id, quantity=quantity)
+            for menu_id, quantity in lines
+        ],
+    )
+
+
+async def test_parallel_orders_never_oversell(client_and_menu):
+    user_id, menu_id = client_and_menu
+
+    async def place_order():
+        async with async_session_maker() as session:
+            try:
+                await create_order_with_lines(
+                    session, order_of(user_id, (menu_id, 3))
+                )
+                return True
+            except OutOfStockError:
+                return False
+
+    results = await asyncio.gather(*(place_order() for _ in range(8)))
+
+    # 10 en stock, 3 par commande : exactement 3 commandes passent
+    assert results.count(True) == 3
+    assert await stock_of(menu_id) == 1
+
+
+async def test_cancelled_line_releases_stock(session, client_and_menu):
+    user_id, menu_id = client_and_menu
+    _, details = await create_order_with_lines(
+        session, order_of(user_id, (menu_id, 4), (menu_id, 6))
+    )
+    detail_id = details[0].id
+    assert await stock_of(menu_id) == 0
+
+    with pytest.raises(OutOfStockError):
+        await create_order_with_lines(session, order_of(user_id, (menu_id, 1)))
+    with pytest.raises(UnknownMenuError):
+        await create_order_with_lines(session, order_of(user_id, (-1, 1)))
+
+    await update_order_detail(
+        session,
+        detail_id,
+        OrderDetailUpdate(status=OrderDetailStatus.CANCELLED),
+    )
+    assert await stock_of(menu_id) == 4
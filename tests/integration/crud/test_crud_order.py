@@ -1,8 +1,10 @@
+import asyncio
 from fastapi.testclient import TestClient
 import pytest
 import uuid  # for generating unique user emails
 from datetime import datetime, date, timezone
 from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.order import OrderBase, OrderStatus
 from app.schemas.order_schema import OrderCreate, OrderUpdate
 from app.crud.order_crud import (
@@ -13,15 +15,23 @@ from app.crud.order_crud import (
     get_orders_by_date,
     update_order,
     delete_order,
+    finalize_order,
+    get_order_total,
 )
+from app.core.database import async_session_maker
+from app.models.menu import Menu
+from app.models.order_detail import OrderDetail, OrderDetailStatus
 
 from app.schemas.order_schema import OrderCreate
+from app.crud.order_detail_crud import delete_order_detail
 from app.crud.user_crud import delete_user
 from app.models.user import User  # assuming you have a User model
 
+pytestmark = pytest.mark.anyio
+
 
 @pytest.fixture
-def sample_user(session):
+async def sample_user(session):
     user = User(
         username="testuser",
         email=f"test_{uuid.uuid4().hex}@example.com",  # unique each run
@@ -32,17 +42,17 @@ def sample_user(session):
         phone="1234567890",
     )
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     return user
 
 
 @pytest.fixture
-def sample_order(session, sample_user):
+async def sample_order(session, sample_user):
     order_data = OrderCreate(
         client_id=sample_user.id, total_price=100.0, status=OrderStatus.CREATED
     )
-    order = create_order(session, order_data)
+    order = await create_order(session, order_data)
     return order
 
 
@@ -57,13 +67,13 @@ def sample_order(session, sample_user):
 # Tests
 
 
-def test_create_and_get_order(session: Session, sample_user):
+async def test_create_and_get_order(session: AsyncSession, sample_user):
     order_data = OrderCreate(
         client_id=sample_user.id,  # use the fixture user id
         total_price=50.0,
         status=OrderStatus.CREATED,
     )
-    order = create_order(session, order_data)
+    order = await create_order(session, order_data)
 
     assert order.id is not None
     assert order.client_id == sample_user.id
@@ -72,11 +82,11 @@ def test_create_and_get_order(session: Session, sample_user):
     assert isinstance(order.created_at, datetime)
     assert order.created_at.tzinfo in (None, timezone.utc)
 
-    fetched = get_order(session, order.id)
+    fetched = await get_order(session, order.id)
     assert fetched.id == order.id
     assert fetched.client_id == sample_user.id
-    delete_order(session, order.id)
-    delete_user(session, sample_user.id)
+    await delete_order(session, order.id)
+    await delete_user(session, sample_user.id)
     # Clean up the user after test
 
 
@@ -84,48 +94,94 @@ def test_create_and_get_order(session: Session, sample_user):
 # orders = get_all_orders(session)
 # assert len(orders) >= 1
 # assert orders[0].id == sample_order.id
-def test_get_all_orders(session: Session, sample_order):
-    orders = get_all_orders(session)
+async def test_get_all_orders(session: AsyncSession, sample_order):
+    orders = await get_all_orders(session)
     assert sample_order in orders
     user_id = sample_order.client_id
-    delete_order(session, sample_order.id)
-    delete_user(session, user_id)
+    await delete_order(session, sample_order.id)
+    await delete_user(session, user_id)
 
 
-def test_get_order_by_client_id(session: Session, sample_order):
-    order = get_order_by_client_id(session, sample_order.client_id)
+async def test_get_order_by_client_id(session: AsyncSession, sample_order):
+    order = await get_order_by_client_id(session, sample_order.client_id)
     assert order.id == sample_order.id
     assert order.client_id == sample_order.client_id
     user_id = sample_order.client_id
-    delete_order(session, sample_order.id)
-    delete_user(session, user_id)
+    await delete_order(session, sample_order.id)
+    await delete_user(session, user_id)
 
 
-def test_get_orders_by_date(session: Session, sample_order):
+async def test_get_orders_by_date(session: AsyncSession, sample_order):
     today = date.today()
-    orders = get_orders_by_date(session, today)
+    orders = await get_orders_by_date(session, today)
     assert sample_order in orders
     user_id = sample_order.client_id
-    delete_order(session, sample_order.id)
-    delete_user(session, user_id)
+    await delete_order(session, sample_order.id)
+    await delete_user(session, user_id)
     # assert len(orders) >= 1
     # assert orders[0].id == sample_order.id
 
 
-def test_update_order(session: Session, sample_order):
+async def test_update_order(session: AsyncSession, sample_order):
     update_data = OrderUpdate(total_price=200.0, status=OrderStatus.PREPARING)
-    updated = update_order(session, sample_order.id, update_data)
+    updated = await update_order(session, sample_order.id, update_data)
 
     assert updated.total_price == 200.0
     assert updated.status == OrderStatus.PREPARING
     user_id = sample_order.client_id
-    delete_order(session, sample_order.id)
-    delete_user(session, user_id)
+    await delete_order(session, sample_order.id)
+    await delete_user(session, user_id)
 
 
-def test_delete_order(session: Session, sample_order):
-    delete_order(session, sample_order.id)
-    deleted = get_order(session, sample_order.id)
+async def test_delete_order(session: AsyncSession, sample_order):
+    await delete_order(session, sample_order.id)
+    deleted = await get_order(session, sample_order.id)
     assert deleted is None
     user_id = sample_order.client_id
-    delete_user(session, user_id)
+    await delete_user(session, user_id)
+
+
+async def test_finalize_order(session: AsyncSession, sample_order):
+    menu = Menu(name=f"menu_{uuid.uuid4().hex}", price=4.0, description="")
+    session.add(menu)
+    await session.commit()
+    details = [
+        OrderDetail(
+            order_id=sample_order.id,
+            menu_id=menu.id,
+            price=4.0,
+            quantity=3,
+            status=OrderDetailStatus.CREATED,
+        ),
+        OrderDetail(
+            order_id=sample_order.id,
+            menu_id=menu.id,
+            price=10.0,
+            quantity=1,
+            status=OrderDetailStatus.CANCELLED,
+        ),
+    ]
+    session.add_all(details)
+    await session.commit()
+    assert await get_order_total(session, sample_order.id) == 12.0
+
+    async def finalize():
+        async with async_session_maker() as other_session:
+            return await finalize_order(other_session, sample_order.id)
+
+    # Deux finalisations concurrentes : une seule met à jour la commande,
+    # l'autre renvoie la commande finalisée
+    orders = await asyncio.gather(finalize(), finalize())
+    for order in orders:
+        assert order.total_price == 12.0
+        assert order.status == OrderStatus.PREPARING
+
+    assert await finalize_order(session, -1) is None
+
+    for detail in details:
+        await delete_order_detail(session, detail.id)
+    await session.delete(menu)
+    await session.commit()
+    user_id = sample_order.client_id
+    await delete_order(session, sample_order.id)
+    await delete_user(session, user_id)
@@ -0,0 +1,20 @@
+from app.api.conditional import etag_matches, weak_etag
+
+
+def test_weak_etag_depends_on_every_part():
+    etag = weak_etag("/api/v1/menus/", "", 3)
+    assert etag.startswith('W/"') and etag.endswith('"')
+    assert weak_etag("/api/v1/menus/", "", 3) == etag
+    assert weak_etag("/api/v1/menus/", "", 4) != etag
+    assert weak_etag("/api/v1/menus/", "limit=1", 3) != etag
+
+
+def test_etag_matches():
+    etag = weak_etag(1)
+    assert etag_matches(etag, etag)
+    # Comparaison faible : le préfixe W/ est ignoré
+    assert etag_matches(etag.removeprefix("W/"), etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(weak_etag(2), etag)
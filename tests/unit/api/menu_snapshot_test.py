@@ -0,0 +1,35 @@
+import gzip
+import json
+
+from app.api.menu_snapshot import accepts_gzip, render_menu
+
+
+def test_render_menu_groups_by_category():
+    rows = [
+        (1, "Entrées", 10, "Soupe", 6.0, "Du jour", 3),
+        (1, "Entrées", 11, "Salade", 7.5, "Verte", 0),
+        (2, "Plats", 12, "Gratin", 12.0, "Maison", 5),
+    ]
+    snapshot = render_menu(rows, (4, 2))
+    document = json.loads(snapshot.body)
+    assert [c["name"] for c in document["categories"]] == ["Entrées", "Plats"]
+    assert document["categories"][0]["menus"][1] == {
+        "id": 11,
+        "name": "Salade",
+        "price": 7.5,
+        "description": "Verte",
+        "available": False,
+    }
+    assert gzip.decompress(snapshot.gzipped) == snapshot.body
+    # Même catalogue, mêmes octets et même ETag
+    assert render_menu(rows, (4, 2)) == snapshot
+    assert render_menu(rows, (5, 2)).etag != snapshot.etag
+
+
+def test_accepts_gzip():
+    assert accepts_gzip("gzip, deflate, br")
+    assert accepts_gzip("br;q=1.0, gzip;q=0.8")
+    assert accepts_gzip("*")
+    assert not accepts_gzip(None)
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip("gzip;q=0")
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    values = (datetime(2025, 8, 4, 12, 30, 15, 123456), 42)
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, (datetime, int)) == values
+
+
+def test_invalid_cursor():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor", (int,))
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "values, key_types",
+    [
+        ((42,), (datetime, int)),
+        ((42, 43), (datetime, int)),
+        ((datetime(2025, 8, 4), 42), (int,)),
+        (("42",), (int,)),
+        ((True,), (int,)),
+    ],
+)
+def test_cursor_of_another_key(values, key_types):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(encode_cursor(values), key_types)
+    assert exc_info.value.status_code == 400
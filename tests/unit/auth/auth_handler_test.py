@@ -0,0 +1,61 @@
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.auth.auth_bearer import RoleChecker
+from app.auth.auth_handler import (
+    VerifiedToken,
+    signJWT,
+    token_cache,
+    verifyJWT,
+)
+from app.core.config import settings
+from app.models.role import RoleType
+
+
+def encode(**payload) -> str:
+    return jwt.encode(
+        payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
+    )
+
+
+def test_verified_token_is_cached_until_exp():
+    token = signJWT("cache@example.com", ["admin", "employee"])["access_token"]
+    verified = verifyJWT(token)
+    assert verified is not None
+    assert verified.roles == frozenset({"admin", "employee"})
+    payload = verified.payload
+    assert payload["exp"] - payload["iat"] == int(settings.JWT_TOKEN_EXPIRES)
+
+    hits = token_cache.hits
+    assert verifyJWT(token) is verified
+    assert token_cache.hits == hits + 1
+    # L'entrée expire avec le jeton (à l'écart près des deux horloges)
+    expires_at = next(
+        expiry
+        for expiry, cached in token_cache.entries.values()
+        if cached is verified
+    )
+    remaining = payload["exp"] - time.time()
+    assert expires_at - time.monotonic() == pytest.approx(remaining, abs=1)
+
+
+def test_invalid_tokens_are_rejected_and_not_cached():
+    size = len(token_cache.entries)
+    expired = encode(user_id="a", roles=["admin"], exp=int(time.time()) - 1)
+    assert verifyJWT(expired) is None
+    assert verifyJWT(expired[:-2] + "xx") is None
+    assert verifyJWT("not a token") is None
+    # Sans exp : valide, mais revérifié à chaque fois
+    assert verifyJWT(encode(user_id="a", roles=["admin"])) is not None
+    assert len(token_cache.entries) == size
+
+
+def test_role_checker():
+    check = RoleChecker(allowed_roles=[RoleType.admin, RoleType.employee])
+    assert check(VerifiedToken({}, frozenset({"customer", "employee"})))
+    with pytest.raises(HTTPException) as error:
+        check(VerifiedToken({}, frozenset({"customer"})))
+    assert error.value.status_code == 403
@@ -0,0 +1,57 @@
+from datetime import date, datetime
+
+from app.core.archive import (
+    archived_months,
+    group_parts,
+    month_parts,
+    read_month,
+    read_parts,
+    write_part,
+)
+from app.models.order import OrderStatus
+
+
+def test_parts_are_read_back_by_column_type(tmp_path):
+    created_at = datetime(2025, 8, 14, 12, 30)
+    rows = [
+        {"id": 2, "created_at": created_at, "status": OrderStatus.PAID},
+        {"id": 1, "created_at": created_at, "status": OrderStatus.CANCELLED},
+    ]
+    path = write_part(tmp_path, date(2025, 8, 14), "order", rows)
+    assert path == tmp_path / "2025-08" / "order-2.json.gz"
+
+    assert read_month(tmp_path, date(2025, 8, 1), "order") == [
+        {"id": 1, "created_at": created_at, "status": "CANCELLED"},
+        {"id": 2, "created_at": created_at, "status": "PAID"},
+    ]
+    assert read_month(tmp_path, date(2025, 9, 1), "order") == []
+    assert archived_months(tmp_path) == [date(2025, 8, 1)]
+
+
+def test_rows_archived_twice_are_read_once(tmp_path):
+    row = {"id": 1, "created_at": datetime(2025, 8, 14), "status": "PAID"}
+    write_part(tmp_path, date(2025, 8, 1), "order", [row])
+    write_part(tmp_path, date(2025, 8, 1), "order", [{**row, "id": 3}, row])
+    rows = read_month(tmp_path, date(2025, 8, 1), "order")
+    assert [row["id"] for row in rows] == [1, 3]
+
+
+def test_parts_are_grouped_by_key_range(tmp_path):
+    month = date(2025, 8, 1)
+
+    def write(*ids):
+        rows = [{"id": id, "created_at": datetime(2025, 8, id)} for id in ids]
+        return write_part(tmp_path, month, "order", rows)
+
+    late = write(20, 25)
+    early = write(3, 5)
+    overlapping = write(4, 9)
+    groups = group_parts(
+        month_parts(tmp_path, month, "order"),
+        lambda row: (row["created_at"], row["id"]),
+    )
+    assert [group.paths for group in groups] == [
+        [early, overlapping],
+        [late],
+    ]
+    assert [row["id"] for row in read_parts(groups[0].paths)] == [3, 4, 5, 9]
@@ -0,0 +1,57 @@
+from app.core.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    clock.now = 60
+    assert cache.get("a") is None
+    assert cache.snapshot()["size"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    snapshot = cache.snapshot()
+    assert snapshot["evictions"] == 1
+    assert snapshot["hit_ratio"] == 3 / 4
+
+
+def test_popped_entry_is_forgotten():
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.pop("a")
+    cache.pop("missing")
+    assert cache.get("a") is None
+
+
+def test_entry_ttl_is_capped_by_cache_ttl():
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("short", 1, ttl=10)
+    cache.set("long", 2, ttl=600)
+
+    clock.now = 10
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    clock.now = 60
+    assert cache.get("long") is None
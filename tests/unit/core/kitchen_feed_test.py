@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app.core.kitchen_feed import KitchenFeed, StationFilter
+
+pytestmark = pytest.mark.anyio
+
+
+async def take(events, count: int) -> list:
+    return [(await events.__anext__()) for _ in range(count)]
+
+
+async def started(events) -> asyncio.Future:
+    # Démarre l'abonnement (le générateur ne s'abonne qu'à la 1re lecture)
+    first = asyncio.ensure_future(events.__anext__())
+    await asyncio.sleep(0)
+    return first
+
+
+async def test_replay_then_live():
+    feed = KitchenFeed(buffer_size=10)
+    feed.publish("order.created", {"id": 1}, status="Created")
+    feed.publish("order.status", {"id": 1}, status="Preparing")
+
+    events = feed.subscribe(StationFilter(), since=1)
+    assert [e.seq for e in await take(events, 1)] == [2]
+    feed.publish("order.status", {"id": 1}, status="Ready")
+    assert [e.seq for e in await take(events, 1)] == [3]
+    await events.aclose()
+    assert not feed.subscriptions
+
+
+async def test_station_filter():
+    feed = KitchenFeed()
+    station = StationFilter(statuses={"Preparing"}, category_ids={7})
+    events = feed.subscribe(station)
+    first = await started(events)
+
+    feed.publish("order_detail.created", {}, status="Created", category_id=7)
+    feed.publish("order_detail.status", {}, status="Preparing", category_id=8)
+    feed.publish("order_detail.status", {}, status="Preparing", category_id=7)
+    feed.publish("order.status", {}, status="Preparing")
+
+    assert (await first).seq == 3
+    assert [e.seq for e in await take(events, 1)] == [4]
+    await events.aclose()
+
+
+async def test_reset_when_too_far_behind():
+    feed = KitchenFeed(buffer_size=2)
+    for seq in range(5):
+        feed.publish("order.created", {"id": seq})
+
+    for since in (1, 99):
+        events = feed.subscribe(StationFilter(), since=since)
+        reset = await events.__anext__()
+        assert (reset.type, reset.seq) == ("reset", 5)
+        await events.aclose()
+
+    events = feed.subscribe(StationFilter(), since=3)
+    assert [e.seq for e in await take(events, 2)] == [4, 5]
+    await events.aclose()
+
+
+async def test_slow_subscriber_is_dropped():
+    feed = KitchenFeed(max_queue=2)
+    events = feed.subscribe(StationFilter())
+    first = await started(events)
+    for seq in range(4):
+        feed.publish("order.created", {"id": seq})
+
+    # Les événements en file sont livrés, puis le client est déconnecté
+    assert (await first).seq == 1
+    assert [e.seq for e in await take(events, 1)] == [2]
+    with pytest.raises(StopAsyncIteration):
+        await events.__anext__()
+    assert not feed.subscriptions
+
+
+async def test_heartbeat():
+    feed = KitchenFeed()
+    events = feed.subscribe(StationFilter(), heartbeat=0.01)
+    assert await events.__anext__() is None
+    await events.aclose()
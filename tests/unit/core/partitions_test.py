@@ -0,0 +1,30 @@
+from datetime import date
+
+from app.core.partitions import (
+    add_months,
+    is_partition,
+    partition_ddl,
+    partition_name,
+)
+
+
+def test_add_months_crosses_years():
+    assert add_months(date(2025, 11, 17), 1) == date(2025, 12, 1)
+    assert add_months(date(2025, 11, 17), 2) == date(2026, 1, 1)
+    assert add_months(date(2025, 1, 31), -1) == date(2024, 12, 1)
+
+
+def test_partition_names():
+    assert partition_name("order", date(2025, 8, 14)) == "order_p2025_08"
+    assert is_partition("order_p2025_08")
+    assert is_partition("orderdetail_default")
+    assert not is_partition("order")
+    assert not is_partition("daily_sales")
+
+
+def test_partition_ddl_covers_one_month():
+    assert partition_ddl("orderdetail", date(2025, 12, 24)) == (
+        'CREATE TABLE IF NOT EXISTS "orderdetail_p2025_12" '
+        'PARTITION OF "orderdetail" '
+        "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')"
+    )
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from app.core.pool_stats import TimedQueuePool, instrument_engine
+
+
+def test_pool_stats_counts_checkouts_and_timeouts():
+    engine = create_engine(
+        "sqlite://",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    stats = instrument_engine("test", engine)
+
+    with engine.connect() as connection:
+        connection.execute(text("select 1"))
+        snapshot = stats.snapshot()
+        assert snapshot["checked_out"] == 1
+        assert snapshot["overflow_in_use"] == 0
+
+        # Le pool est épuisé : la seconde acquisition expire.
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    snapshot = stats.snapshot()
+    assert snapshot["checked_out"] == 0
+    assert snapshot["checkouts"] == 1
+    assert snapshot["checkins"] == 1
+    assert snapshot["timeouts"] == 1
+    assert snapshot["connects"] == 1
+    assert snapshot["wait_max_ms"] >= 50
+
+
+def test_pool_stats_survive_dispose():
+    engine = create_engine("sqlite://", poolclass=TimedQueuePool)
+    stats = instrument_engine("test", engine)
+    engine.dispose()
+
+    with engine.connect():
+        pass
+
+    assert stats.snapshot()["checkouts"] == 1
+    assert stats.snapshot()["wait_max_ms"] > 0
@@ -0,0 +1,26 @@
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.query_counter import RepeatedQueryError, track_queries
+from app.crud import role_crud
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_track_queries_counts_statements(session: AsyncSession):
+    with track_queries() as stats:
+        await role_crud.get_all_roles(session)
+        await role_crud.get_roles_by_ids(session, [1, 2, 3])
+
+    assert stats.count == 2
+    assert stats.duration_ms > 0
+    assert len(stats.shapes) == 2
+
+
+async def test_track_queries_detects_repeated_statements(
+    session: AsyncSession,
+):
+    with pytest.raises(RepeatedQueryError, match="role_crud.get_role_by_id"):
+        with track_queries(threshold=3, raise_on_repeat=True):
+            for role_id in range(5):
+                session.expunge_all()
+                await role_crud.get_role_by_id(session, role_id)
@@ -0,0 +1,67 @@
+import logging
+import pytest
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
+from app.core.query_log import normalize_sql
+from app.core.database import engine
+from sqlalchemy import text
+from app.crud import order_crud
+
+
+def test_normalize_sql():
+    assert (
+        normalize_sql(
+            "SELECT * FROM menu\n  WHERE id IN (%(id_1)s, %(id_2)s, %(id_3)s)"
+            " AND name = 'pizza' AND price > 12.5 LIMIT 10"
+        )
+        == "SELECT * FROM menu WHERE id IN (?) AND name = ? AND price > ? "
+        "LIMIT ?"
+    )
+    assert normalize_sql(
+        "SELECT * FROM menu WHERE id IN (__[POSTCOMPILE_id_1])"
+    ) == normalize_sql("SELECT * FROM menu WHERE id IN (%(id_1)s, %(id_2)s)")
+
+
+@pytest.mark.anyio
+async def test_slow_query_logged_with_caller_and_plan(
+    session: AsyncSession, monkeypatch, caplog
+):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN_RATE", 1.0)
+
+    with caplog.at_level(logging.WARNING, logger="app.core.query_log"):
+        await order_crud.get_all_orders(session)
+        # La transaction reste utilisable après l'EXPLAIN.
+        await order_crud.get_order(session, 1)
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert any(
+        "order_crud.get_all_orders" in m and "actual time" in m
+        for m in messages
+    )
+    assert any("order_crud.get_order" in m for m in messages)
+
+
+def test_explain_never_keeps_writes(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN_RATE", 1.0)
+    statement = text(
+        "WITH bumped AS (UPDATE table_version SET version = version + 1"
+        " WHERE table_name = 'role' RETURNING version)"
+        " SELECT version FROM bumped"
+    )
+    read = text("SELECT version FROM table_version WHERE table_name = 'role'")
+
+    with caplog.at_level(logging.WARNING, logger="app.core.query_log"):
+        with engine.connect() as connection:
+            before = connection.execute(read).scalar_one()
+            bumped = connection.execute(statement).scalar_one()
+            after = connection.execute(read).scalar_one()
+            connection.rollback()
+
+    # Exécutée une seule fois : l'EXPLAIN du WITH n'a rien écrit
+    assert bumped == after == before + 1
+    messages = [r.getMessage() for r in caplog.records]
+    plan = next(m for m in messages if "UPDATE table_version" in m)
+    assert "Update on table_version" in plan
+    assert "actual time" not in plan
@@ -0,0 +1,37 @@
+from app.core.search import TrigramIndex, similarity, trigrams, words
+
+
+def test_words_without_case_nor_accents():
+    assert words("Salade César, crème brûlée") == [
+        "salade",
+        "cesar",
+        "creme",
+        "brulee",
+    ]
+
+
+def test_trigrams_like_pg_trgm():
+    assert trigrams("Cat") == {"  c", " ca", "cat", "at "}
+    assert trigrams("!!") == set()
+
+
+def test_similarity():
+    assert similarity("tarte", "tarte") == 1
+    assert similarity("tarte", "pizza") == 0
+    assert 0.3 < similarity("margarita", "Pizza Margherita") < 1
+
+
+def test_index_search():
+    index = TrigramIndex()
+    index.add(1, "Pizza Margherita", group=1)
+    index.add(2, "Pizza Regina", group=1)
+    index.add(3, "Margherita", group=2)
+    assert len(index) == 3
+
+    results = index.search("margarita")
+    # Le nom le plus court est le plus proche
+    assert [doc_id for doc_id, _ in results] == [3, 1]
+    assert results[1][1] == similarity("margarita", "Pizza Margherita")
+    assert index.search("margarita", group=1) == results[1:]
+    assert [doc_id for doc_id, _ in index.search("pizza", limit=2)] == [2, 1]
+    assert index.search("tiramisu") == []
@@ -0,0 +1,49 @@
+import pytest
+
+from app.crud.menu_import_crud import (
+    ImportFormat,
+    guess_format,
+    read_records,
+    validate_rows,
+)
+
+
+def test_read_csv_records():
+    data = "name,price,stock\nPizza,9.5,\nSalade,7,3\n".encode()
+    assert read_records(data, ImportFormat.CSV) == [
+        {"name": "Pizza", "price": "9.5"},
+        {"name": "Salade", "price": "7", "stock": "3"},
+    ]
+
+
+def test_read_json_records():
+    data = b'[{"name": "Pizza", "price": 9.5}]'
+    assert read_records(data, ImportFormat.JSON) == [
+        {"name": "Pizza", "price": 9.5}
+    ]
+    with pytest.raises(ValueError):
+        read_records(b'{"name": "Pizza"}', ImportFormat.JSON)
+
+
+def test_guess_format():
+    assert guess_format("menus.JSON") is ImportFormat.JSON
+    assert guess_format("menus.csv") is ImportFormat.CSV
+    assert guess_format(None) is ImportFormat.CSV
+
+
+def test_validate_rows():
+    rows, errors = validate_rows(
+        [
+            {"name": "Pizza", "price": "9.5", "category_id": "1"},
+            {"name": "Salade", "price": "-1", "category_id": "1"},
+            {"price": "3"},
+        ]
+    )
+    assert [(position, row.name, row.stock) for position, row in rows] == [
+        (1, "Pizza", None)
+    ]
+    assert [(error.row, error.name) for error in errors] == [
+        (2, "Salade"),
+        (3, None),
+    ]
+    assert errors[1].error.startswith("name: Field required")
@@ -1,6 +1,6 @@
 import pytest
 from typing import List
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.database import engine
 from app.models.role import RoleType
 from app.schemas.user_schema import UserCreate
@@ -8,6 +8,8 @@ from app.schemas.role_schema import RoleCreate
 from app.crud import user_crud, role_crud
 from tests import conftest
 
+pytestmark = pytest.mark.anyio
+
 
 @pytest.fixture()
 def user_data() -> dict:
@@ -24,19 +26,19 @@ def user_data() -> dict:
     }
 
 
-def test_create_user(session: Session, user_data: dict):
+async def test_create_user(session: AsyncSession, user_data: dict):
     try:
-        role_1 = role_crud.get_role_by_id(session, 1)
-        role_2 = role_crud.get_role_by_id(session, 2)
-        role_3 = role_crud.get_role_by_id(session, 3)
+        role_1 = await role_crud.get_role_by_id(session, 1)
+        role_2 = await role_crud.get_role_by_id(session, 2)
+        role_3 = await role_crud.get_role_by_id(session, 3)
         if (role_1 is None) or (role_2 is None) or (role_3 is None):
-            role_1 = role_crud.create_role(
+            role_1 = await role_crud.create_role(
                 session, RoleCreate(role_type=RoleType.admin)
             )
-            role_2 = role_crud.create_role(
+            role_2 = await role_crud.create_role(
                 session, RoleCreate(role_type=RoleType.employee)
             )
-            role_3 = role_crud.create_role(
+            role_3 = await role_crud.create_role(
                 session, RoleCreate(role_type=RoleType.customer)
             )
         # user_schema = UserCreate(**user_data)
@@ -50,9 +52,9 @@ def test_create_user(session: Session, user_data: dict):
             password_hash=user_data["password_hash"],
             role_ids=user_data["role_ids"],
         )
-        user = user_crud.create_user(session, user_schema)
+        user = await user_crud.create_user(session, user_schema)
         conftest.compare_object_to_dict(
             user, user_data, ["id", "password_hash"]
         )
     finally:
-        user_crud.delete_user(session, user.id)
+        await user_crud.delete_user(session, user.id)